@@ -1,14 +1,17 @@
-from dotenv import load_dotenv
+import os
+
 from flask import Flask, jsonify, make_response, Response, request
 # from flask_cors import CORS
 
 from meal_max.models import kitchen_model
 from meal_max.models.battle_model import BattleModel
+from meal_max.utils import (admission, batch, compression, health, json_provider, profiling, sql_utils, startup,
+                            streaming, versioning)
 from meal_max.utils.sql_utils import check_database_connection, check_table_exists
 
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from .env file (python-dotenv is only imported if there is one)
+startup.load_env_file(os.path.dirname(os.path.abspath(__file__)))
 
 app = Flask(__name__)
 # This bypasses standard security stuff we'll talk about later
@@ -16,6 +19,18 @@ app = Flask(__name__)
 # uncomment this
 # CORS(app)
 
+# Time SQL statements and count them per request (no-op unless SQL_STATS_ENABLED=true)
+sql_utils.init_app(app)
+# Profile single requests on demand (PROFILING_ENABLED=true) and sample all
+# request threads in the background (SAMPLING_PROFILER_ENABLED=true)
+profiling.init_app(app)
+# Probe the database and random.org in the background for /api/ready
+health.init_app(app, "meals")
+# Encode JSON with orjson when installed, without sorting keys (JSON_PROVIDER=default opts out)
+json_provider.init_app(app)
+# gzip (or zstd) large JSON bodies for clients that accept it (COMPRESSION_ENABLED=false opts out)
+compression.init_app(app)
+
 # Initialize the BattleModel
 battle_model = BattleModel()
 
@@ -58,6 +73,29 @@ def db_check() -> Response:
     except Exception as e:
         return make_response(jsonify({'error': str(e)}), 404)
 
+@app.route('/api/live', methods=['GET'])
+def liveness() -> Response:
+    """
+    Liveness route for orchestrators; never touches a dependency.
+
+    Returns:
+        JSON response with the process uptime and whether the background prober is running.
+    """
+    return make_response(jsonify(health.health_monitor.liveness()), 200)
+
+@app.route('/api/ready', methods=['GET'])
+def readiness() -> Response:
+    """
+    Readiness route for orchestrators, served from cached background probes.
+
+    Returns:
+        JSON response with database latency, connection saturation, random source
+        availability and write queue depths.
+    Raises:
+        503 error if the service should not take traffic.
+    """
+    report = health.health_monitor.readiness()
+    return make_response(jsonify(report), 200 if report['ready'] else 503)
 
 ##########################################################
 #
@@ -116,12 +154,14 @@ def add_meal() -> Response:
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/clear-meals', methods=['DELETE'])
+@admission.limit('clear-meals')
 def clear_catalog() -> Response:
     """
     Route to clear all meals (recreates the table).
 
     Returns:
         JSON response indicating success of the operation or error message.
+        429, with a Retry-After header, if too many requests are running or waiting.
     """
     try:
         app.logger.info("Clearing the meals")
@@ -203,6 +243,8 @@ def get_meal_by_name(meal_name: str) -> Response:
 
 
 @app.route('/api/battle', methods=['GET'])
+@batch.network_bound
+@admission.limit('battle')
 def battle() -> Response:
     """
     Route to initiate a battle between the two currently prepared meals.
@@ -210,6 +252,7 @@ def battle() -> Response:
     Returns:
         JSON response indicating the result of the battle and the winner.
     Raises:
+        429 error, with a Retry-After header, if too many battles are running or waiting.
         500 error if there is an issue during the battle.
     """
     try:
@@ -300,30 +343,206 @@ def prep_combatant() -> Response:
 
 
 @app.route('/api/leaderboard', methods=['GET'])
+@versioning.conditional(lambda: (kitchen_model.catalog_version.value, kitchen_model.stats_version.value,
+                                 request.args.get('sort', 'wins'), streaming.response_format()))
 def get_leaderboard() -> Response:
     """
     Route to get the leaderboard of meals sorted by wins, battles, or win percentage.
 
     Query Parameters:
         - sort (str): The field to sort by ('wins', 'battles', or 'win_pct'). Default is 'wins'.
+        - format (str, optional): 'ndjson' streams one meal per line, 'json-stream' streams
+          the usual JSON body as it is read. Accept: application/x-ndjson also selects NDJSON.
 
     Returns:
         JSON response with a sorted leaderboard of meals.
+        304 Not Modified if If-None-Match matches the current ETag.
     Raises:
         500 error if there is an issue generating the leaderboard.
     """
     try:
         sort_by = request.args.get('sort', 'wins')  # Default sort by wins
+        fmt = streaming.response_format()
+        if fmt != 'json':
+            app.logger.info("Streaming leaderboard sorted by %s as %s", sort_by, fmt)
+            return streaming.stream_response(kitchen_model.iter_leaderboard(sort_by), 'leaderboard', fmt,
+                                             status='success')
+
         app.logger.info("Generating leaderboard sorted by %s", sort_by)
 
-        leaderboard_data = kitchen_model.get_leaderboard(sort_by)
+        version = (kitchen_model.catalog_version.value, kitchen_model.stats_version.value)
 
-        return make_response(jsonify({'status': 'success', 'leaderboard': leaderboard_data}), 200)
+        return json_provider.cached_json_response(
+            ('leaderboard', sort_by), version,
+            lambda: {'status': 'success', 'leaderboard': kitchen_model.get_leaderboard(sort_by)})
     except Exception as e:
         app.logger.error(f"Error generating leaderboard: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
 
+############################################################
+#
+# Batch
+#
+############################################################
+
+def checkpoint_combatants():
+    """
+    Saves the combatants for an atomic batch and returns a function that puts them back.
+
+    Returns:
+        Callable[[], None]: Restores the saved combatants.
+    """
+    combatants = list(battle_model.combatants)
+
+    def restore():
+        battle_model.combatants = combatants
+
+    return restore
+
+@app.route('/api/batch', methods=['POST'])
+@admission.limit('batch')
+def batch_operations() -> Response:
+    """
+    Route to run several API operations in one request, on one database connection and transaction.
+
+    Expected JSON Input:
+        - operations (list): The operations to run in order, each an object with
+          'path', 'method' (default GET) and an optional JSON 'body', e.g.
+          {"method": "POST", "path": "/api/prep-combatant", "body": {"meal": "Pad Thai"}}.
+        - atomic (bool, optional): If any operation fails, roll back all of them
+          (database and combatants) and skip the rest. Defaults to false, where only
+          the failed operation's writes are undone.
+
+    Returns:
+        JSON response with the status code and JSON body of each operation.
+        400 if the batch is malformed or calls a route that waits on random.org;
+        for a failed atomic batch, the failed operation's status code.
+        429, with a Retry-After header, if too many batches are running or waiting.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return make_response(jsonify({'error': 'Invalid input. A JSON object with operations is required.'}), 400)
+
+        operations = batch.validate_operations(data.get('operations'))
+        atomic = bool(data.get('atomic', False))
+        app.logger.info("Running a batch of %d operations, atomic=%s", len(operations), atomic)
+
+        body, status_code = batch.run_batch(app, operations, atomic=atomic, checkpoint=checkpoint_combatants)
+        return make_response(jsonify(body), status_code)
+    except batch.BatchError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error(f"Error running batch: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
+############################################################
+#
+# Diagnostics
+#
+############################################################
+
+@app.route('/api/sql-stats', methods=['GET'])
+def get_sql_stats() -> Response:
+    """
+    Route to get per-statement SQL timing stats (requires SQL_STATS_ENABLED=true).
+
+    Returns:
+        JSON response with count, total, mean, p50 and p99 per normalized statement,
+        and how many leaderboard reads ran their query or shared another's (single_flight).
+    """
+    app.logger.info("Retrieving SQL statement stats")
+    return make_response(jsonify({
+        'status': 'success',
+        'enabled': sql_utils.SQL_STATS_ENABLED,
+        'statements': sql_utils.statement_stats.snapshot(),
+        'single_flight': {'leaderboard_reads': kitchen_model.leaderboard_reads.snapshot()}
+    }), 200)
+
+
+@app.route('/api/admission-stats', methods=['GET'])
+def get_admission_stats() -> Response:
+    """
+    Route to get the admission control limits and counters of the throttled routes.
+
+    Returns:
+        JSON response with, per route, its limits, in-flight and queued requests,
+        admitted requests and rejected requests by reason.
+    """
+    app.logger.info("Retrieving admission control stats")
+    return make_response(jsonify({
+        'status': 'success',
+        'enabled': admission.ADMISSION_ENABLED,
+        'routes': admission.snapshot()
+    }), 200)
+
+
+@app.route('/api/profiles/<string:profile_id>', methods=['GET'])
+def get_profile(profile_id: str) -> Response:
+    """
+    Route to get a stored request profile (requires PROFILING_ENABLED=true).
+
+    Path Parameter:
+        - profile_id (str): The id returned in the X-Profile-Id header of a profiled request.
+
+    Query Parameters:
+        - format (str): 'summary' (default) for the top functions as JSON,
+          or 'collapsed' for flamegraph-compatible collapsed stacks.
+
+    Returns:
+        JSON response with the profile summary, or the collapsed stacks as text.
+    Raises:
+        404 error if the profile does not exist or has been evicted.
+    """
+    app.logger.info("Retrieving profile %s", profile_id)
+    profile = profiling.profile_store.get(profile_id)
+    if profile is None:
+        return make_response(jsonify({'error': f'Profile {profile_id} not found'}), 404)
+
+    if request.args.get('format') == 'collapsed':
+        return Response(profiling.format_collapsed(profile['stacks']), mimetype='text/plain')
+    return make_response(jsonify({'status': 'success', 'profile': profiling.summarize_profile(profile)}), 200)
+
+
+@app.route('/api/admin/flamegraph', methods=['GET'])
+def get_flamegraph() -> Response:
+    """
+    Route to get the stacks aggregated by the background sampling profiler
+    (requires SAMPLING_PROFILER_ENABLED=true).
+
+    Query Parameters:
+        - seconds (int): How far back to aggregate. Defaults to the whole rolling window.
+        - format (str): 'collapsed' (default) for flamegraph-compatible collapsed stacks,
+          or 'summary' for the top functions and the measured sampling overhead as JSON.
+
+    Returns:
+        The collapsed stacks as text, or a JSON summary.
+    Raises:
+        404 error if the sampling profiler is not running.
+    """
+    sampler = profiling.rolling_sampler
+    if sampler is None:
+        return make_response(jsonify({'error': 'Sampling profiler is not enabled'}), 404)
+
+    seconds = request.args.get('seconds', type=int)
+    stacks = sampler.aggregate(seconds)
+    app.logger.info("Serving aggregated stacks (%d samples)", sum(stacks.values()))
+
+    if request.args.get('format') == 'summary':
+        return make_response(jsonify({
+            'status': 'success',
+            'samples': sum(stacks.values()),
+            'overhead_pct': sampler.overhead_pct(),
+            'top_functions': profiling.top_functions(stacks)
+        }), 200)
+    return Response(profiling.format_collapsed(stacks), mimetype='text/plain')
+
 
 if __name__ == '__main__':
+    # The development server runs with the debugger; production serving goes through wsgi.py
+    if os.getenv('APP_ENV') == 'production':
+        raise SystemExit("Refusing to run the debug development server with APP_ENV=production; "
+                         "use gunicorn -c gunicorn.conf.py wsgi:app")
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
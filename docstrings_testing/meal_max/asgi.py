@@ -0,0 +1,148 @@
+import asyncio
+from contextlib import asynccontextmanager
+from functools import partial
+import multiprocessing
+import os
+import time
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+
+from app import app as flask_app, battle_model
+from meal_max.utils import admission
+from meal_max.utils.random_utils import close_async_client, get_random_async
+import wsgi  # noqa: F401 (refuses debug mode in production)
+
+
+# The async serving variant: `uvicorn asgi:app`
+#
+# Routes that wait on random.org run natively here with an async HTTP client; every other
+# route is the unchanged Flask handler. Blocking work (SQLite and the Flask routes) runs on
+# a bounded thread pool, so a slow random.org call no longer pins a thread.
+
+ASGI_EXECUTOR_THREADS = int(os.getenv("ASGI_EXECUTOR_THREADS", str(4 * multiprocessing.cpu_count())))
+
+# The Flask app behind a WSGI bridge; its thread pool is the one bounded executor for blocking work
+flask_bridge = WSGIMiddleware(flask_app, workers=ASGI_EXECUTOR_THREADS)
+
+
+async def run_blocking(fn, *args):
+    """
+    Runs a blocking call (such as a model method that queries SQLite) on the bounded executor.
+
+    Args:
+        fn: The function to call.
+        *args: Its arguments.
+
+    Returns:
+        The function's return value.
+    """
+    return await asyncio.get_running_loop().run_in_executor(flask_bridge.executor, partial(fn, *args))
+
+
+def json_response(payload: dict, status_code: int) -> Response:
+    """
+    Renders a payload exactly as the Flask routes do, with the Flask app's JSON provider.
+
+    Args:
+        payload (dict): The response body.
+        status_code (int): The HTTP status code.
+
+    Returns:
+        Response: The JSON response.
+    """
+    rendered = flask_app.json.response(payload)
+    return Response(rendered.get_data(), status_code=status_code, media_type=rendered.mimetype)
+
+
+def from_flask(rendered) -> Response:
+    """
+    Converts a response built by the Flask app (such as admission's 429) into a Starlette one.
+
+    Args:
+        rendered (flask.Response): The Flask response.
+
+    Returns:
+        Response: The same body, status, media type and headers.
+    """
+    headers = {name: value for name, value in rendered.headers.items()
+               if name.lower() not in ("content-type", "content-length")}
+    return Response(rendered.get_data(), status_code=rendered.status_code, media_type=rendered.mimetype,
+                    headers=headers)
+
+
+async def admitted(name: str, handler) -> Response:
+    """
+    Runs a native handler under the admission controller of the Flask view it replaces.
+
+    The controller is the one admission.limit created for that view, so limits, 429s and
+    /api/admission-stats counters are shared by both serving variants. admit() can wait in
+    the queue, so it runs on the executor rather than the event loop.
+
+    Args:
+        name (str): The limited route's name, e.g. 'battle'.
+        handler: An async function returning the Response.
+
+    Returns:
+        Response: The handler's response, or a 429 with Retry-After if the request is rejected.
+    """
+    controller = admission.controllers.get(name)
+    if controller is None:
+        return await handler()
+    reason, wait = await run_blocking(controller.admit)
+    if reason is not None:
+        with flask_app.app_context():
+            return from_flask(admission.too_many_requests(name, reason, wait))
+    start = time.perf_counter()
+    try:
+        return await handler()
+    finally:
+        controller.release(time.perf_counter() - start)
+
+
+async def battle(request: Request) -> Response:
+    """
+    Route to initiate a battle between the two currently prepared meals; mirrors /api/battle in app.py.
+
+    Returns:
+        JSON response indicating the result of the battle and the winner.
+    Raises:
+        429 error, with a Retry-After header, if too many battles are running or waiting.
+        500 error if there is an issue during the battle.
+    """
+    return await admitted('battle', run_battle)
+
+
+async def run_battle() -> Response:
+    """The battle itself, once admitted."""
+    try:
+        flask_app.logger.info('Two meals enter, one meal leaves!')
+
+        # Only worth asking random.org once there is a battle to decide
+        random_number = None
+        if len(battle_model.get_combatants()) >= 2:
+            random_number = await get_random_async()
+        winner = await run_blocking(battle_model.battle, random_number)
+
+        return json_response({'status': 'success', 'winner': winner}, 200)
+    except Exception as e:
+        flask_app.logger.error(f"Battle error: {e}")
+        return json_response({'error': str(e)}, 500)
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    yield
+    await close_async_client()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/battle', battle, methods=['GET']),
+        Mount('/', flask_bridge),
+    ],
+    lifespan=lifespan,
+)
@@ -0,0 +1,113 @@
+import argparse
+from contextlib import contextmanager
+import os
+import sys
+import tempfile
+
+from benchmarks.datagen import load_meals
+from benchmarks.harness import measure, print_table, quiet_logging, write_results
+from meal_max.utils import compression, sql_utils
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results", "compression.json")
+
+ENDPOINTS = {"wins": "/api/leaderboard?sort=wins", "win_pct": "/api/leaderboard?sort=win_pct"}
+
+# (name, encoding, level); identity sends no Accept-Encoding
+VARIANTS = [
+    ("identity", None, None),
+    ("gzip-1", "gzip", 1),
+    ("gzip-6", "gzip", 6),
+    ("gzip-9", "gzip", 9),
+    ("zstd-1", "zstd", 1),
+    ("zstd-3", "zstd", 3),
+    ("zstd-9", "zstd", 9),
+]
+
+
+@contextmanager
+def patched(**settings):
+    """
+    Temporarily replaces compression module settings.
+    """
+    originals = {name: getattr(compression, name) for name in settings}
+    for name, value in settings.items():
+        setattr(compression, name, value)
+    try:
+        yield
+    finally:
+        for name, value in originals.items():
+            setattr(compression, name, value)
+
+
+def run_endpoint(client, path: str, repeat: int, link_mbps: list[int]) -> dict:
+    """
+    Fetches one endpoint with each encoding and level.
+
+    Args:
+        client (FlaskClient): A test client for the app.
+        path (str): The endpoint.
+        repeat (int): Timed requests per variant.
+        link_mbps (list[int]): Link speeds to model the transfer time at.
+
+    Returns:
+        dict: Measurements keyed by variant: server latency, response size, compression
+        ratio, and p50 latency plus transfer time at each link speed.
+    """
+    results = {}
+    identity_bytes = None
+    for name, encoding, level in VARIANTS:
+        if encoding == "zstd" and compression.zstandard is None:
+            continue
+        level_setting = {"ZSTD_LEVEL" if encoding == "zstd" else "GZIP_LEVEL": level} if level else {}
+        headers = {"Accept-Encoding": encoding} if encoding else {}
+        with patched(COMPRESSION_ENCODINGS=[encoding or "gzip"], **level_setting):
+            body = client.get(path, headers=headers).get_data()
+            stats = measure(lambda i: client.get(path, headers=headers).get_data(), repeat)
+
+        identity_bytes = identity_bytes or len(body)
+        stats["bytes"] = len(body)
+        stats["kb"] = round(len(body) / 1024, 1)
+        stats["ratio"] = round(identity_bytes / len(body), 2)
+        for mbps in link_mbps:
+            stats[f"total_ms_{mbps}mbps"] = round(stats["p50_ms"] + len(body) * 8 / (mbps * 1000), 2)
+        results[name] = stats
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure response size against latency for each compression setting.")
+    parser.add_argument("--rows", type=int, default=100_000, help="Meals on the menu (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed requests per variant (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=411)
+    parser.add_argument("--link-mbps", default="10,100,1000",
+                        help="Comma-separated link speeds to model transfer time at (default: %(default)s)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    args = parser.parse_args(argv)
+    link_mbps = [int(mbps) for mbps in args.link_mbps.split(",")]
+
+    # The background prober would call random.org during the run
+    os.environ.setdefault("HEALTH_PROBER_ENABLED", "false")
+    from app import app
+
+    quiet_logging("meal_max")
+    app.logger.setLevel("WARNING")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "meal_max.db")
+        print(f"Populating {args.rows} meals...", file=sys.stderr)
+        load_meals(db_path, args.rows, args.seed)
+        sql_utils.DB_PATH = db_path
+        client = app.test_client()
+        results = {name: run_endpoint(client, path, args.repeat, link_mbps) for name, path in ENDPOINTS.items()}
+
+    write_results(args.output, "compression", results)
+    for metric in ["p50_ms", "kb", "ratio"] + [f"total_ms_{mbps}mbps" for mbps in link_mbps]:
+        print_table(results, metric=metric)
+        print()
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import argparse
+from contextlib import contextmanager
+import os
+import sys
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from benchmarks.datagen import meal_batch
+from benchmarks.harness import measure, print_table, quiet_logging, write_results
+from meal_max.models.kitchen_model import Meal
+from meal_max.utils import json_provider
+from meal_max.utils.json_provider import EncodedResponseCache, FastJSONProvider
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results", "json.json")
+
+
+def make_meals(size: int, seed: int) -> list[Meal]:
+    """
+    Builds size generated meals with ids 1..size.
+
+    Args:
+        size (int): The number of meals.
+        seed (int): The random seed.
+
+    Returns:
+        list[Meal]: The meals.
+    """
+    rows = meal_batch(0, size, size, seed, deleted_fraction=0, with_stats=False)
+    return [Meal(i, meal, cuisine, price, difficulty) for i, (meal, cuisine, price, difficulty, *_) in enumerate(rows, 1)]
+
+
+@contextmanager
+def patched(name: str, value):
+    """
+    Temporarily replaces a json_provider module attribute.
+    """
+    original = getattr(json_provider, name)
+    setattr(json_provider, name, value)
+    try:
+        yield
+    finally:
+        setattr(json_provider, name, original)
+
+
+def run_size(size: int, repeat: int, seed: int) -> dict:
+    """
+    Times rendering {'status': 'success', 'meals': [...]} as a response body with each encoder.
+
+    Args:
+        size (int): The number of meals in the payload.
+        repeat (int): Timed renders per encoder.
+        seed (int): The random seed.
+
+    Returns:
+        dict: Measurements keyed by encoder.
+    """
+    meals = make_meals(size, seed)
+    payload = {"status": "success", "meals": meals}
+    app = Flask(__name__)
+    default_provider = DefaultJSONProvider(app)
+    fast_provider = FastJSONProvider(app)
+
+    results = {}
+    with app.app_context():
+        results["flask_default"] = measure(lambda i: default_provider.response(payload).get_data(), repeat)
+        if json_provider.orjson is not None:
+            results["fast_orjson"] = measure(lambda i: fast_provider.response(payload).get_data(), repeat)
+        with patched("orjson", None):
+            results["fast_stdlib"] = measure(lambda i: fast_provider.response(payload).get_data(), repeat)
+
+        app.json = fast_provider
+        with patched("JSON_CACHE_ENABLED", True), patched("encoded_response_cache", EncodedResponseCache()):
+            results["cache_hit"] = measure(
+                lambda i: json_provider.cached_json_response("meals", 1, lambda: payload).get_data(), repeat)
+
+    for stats in results.values():
+        stats["rows_per_second"] = round(size / (stats["p50_ms"] / 1000)) if stats["p50_ms"] else None
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark JSON encoding of meal collections.")
+    parser.add_argument("--sizes", default="1000,100000", help="Comma-separated payload sizes (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed renders per encoder (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=411)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    args = parser.parse_args(argv)
+
+    quiet_logging("meal_max")
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = {str(size): run_size(size, args.repeat, args.seed) for size in sizes}
+
+    write_results(args.output, "json", results)
+    print_table(results)
+    print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
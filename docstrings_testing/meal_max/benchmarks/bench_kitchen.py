@@ -0,0 +1,145 @@
+import argparse
+from contextlib import contextmanager
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+from benchmarks.datagen import load_meals
+from benchmarks.harness import compare_to_baseline, measure, print_table, quiet_logging, write_results
+from meal_max.models import battle_model, kitchen_model
+from meal_max.models.battle_model import BattleModel
+from meal_max.utils import sql_utils
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline_kitchen.json")
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results", "kitchen.json")
+
+def sample_names(db_path: str, count: int, seed: int) -> list[str]:
+    """
+    Reads the names of count random meals from db_path, for lookups by name.
+
+    Args:
+        db_path (str): The database file.
+        count (int): The number of names.
+        seed (int): The random seed.
+
+    Returns:
+        list[str]: The names.
+    """
+    conn = sqlite3.connect(db_path)
+    (size,) = conn.execute("SELECT COUNT(*) FROM meals").fetchone()
+    ids = random.Random(seed).sample(range(1, size + 1), min(count, size))
+    names = [row[0] for row in conn.execute(f"SELECT meal FROM meals WHERE id IN ({','.join('?' * len(ids))})", ids)]
+    conn.close()
+    return names
+
+
+@contextmanager
+def stubbed_random(seed: int):
+    """
+    Replaces random.org with a seeded local generator for the duration of the block.
+
+    Args:
+        seed (int): The random seed.
+    """
+    rng = random.Random(seed)
+    original = battle_model.get_random
+    battle_model.get_random = lambda: round(rng.random(), 2)
+    try:
+        yield
+    finally:
+        battle_model.get_random = original
+
+
+def run_size(size: int, repeat: int, seed: int) -> dict:
+    """
+    Runs every operation against a fresh database of size meals.
+
+    Args:
+        size (int): The number of meals.
+        repeat (int): Timed calls per cheap operation; full scans use fewer as size grows.
+        seed (int): The random seed.
+
+    Returns:
+        dict: Measurements keyed by operation.
+    """
+    rng = random.Random(seed)
+    scan_repeat = max(3, min(repeat // 10, 1_000_000 // size))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "meal_max.db")
+        print(f"Populating {size} meals...", file=sys.stderr)
+        # Deleted meals would make lookups fail, so the benchmark menu has none
+        load_meals(db_path, size, seed, deleted_fraction=0)
+        names = sample_names(db_path, 500, seed)
+        sql_utils.DB_PATH = db_path
+
+        results = {}
+        results["create_meal"] = measure(
+            lambda i: kitchen_model.create_meal(f"new-meal-{i}", "Fusion", 12.5, "MED"), repeat)
+        results["get_meal_by_name"] = measure(
+            lambda i: kitchen_model.get_meal_by_name(rng.choice(names)), repeat)
+        results["get_leaderboard_wins"] = measure(
+            lambda i: kitchen_model.get_leaderboard("wins"), scan_repeat)
+        results["get_leaderboard_win_pct"] = measure(
+            lambda i: kitchen_model.get_leaderboard("win_pct"), scan_repeat)
+        results["update_meal_stats"] = measure(
+            lambda i: kitchen_model.update_meal_stats(rng.randrange(1, size + 1), rng.choice(["win", "loss"])),
+            repeat)
+
+        model = BattleModel()
+
+        def prep(i):
+            model.clear_combatants()
+            model.prep_combatant(kitchen_model.get_meal_by_id(rng.randrange(1, size + 1)))
+            model.prep_combatant(kitchen_model.get_meal_by_id(rng.randrange(1, size + 1)))
+
+        with stubbed_random(seed):
+            results["battle"] = measure(lambda i: model.battle(), repeat, setup=prep)
+
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark kitchen_model and BattleModel against SQLite.")
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        help="Comma-separated meal table sizes (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed calls per operation (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=411)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed p50 slowdown against the baseline, as a fraction (default: %(default)s)")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results to the baseline file")
+    args = parser.parse_args(argv)
+
+    quiet_logging("meal_max")
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = {str(size): run_size(size, args.repeat, args.seed) for size in sizes}
+
+    write_results(args.output, "kitchen", results)
+    print_table(results)
+    print(f"\nResults written to {args.output}")
+
+    if args.update_baseline:
+        write_results(args.baseline, "kitchen", results)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; run with --update-baseline to create one.")
+        return 0
+
+    regressions = compare_to_baseline(results, args.baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} of the baseline.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
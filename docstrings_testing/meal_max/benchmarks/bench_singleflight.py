@@ -0,0 +1,81 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.datagen import load_meals
+from benchmarks.harness import print_table, quiet_logging, write_results
+from meal_max.models import kitchen_model
+from meal_max.utils import singleflight, sql_utils
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results", "singleflight.json")
+
+
+def burst(callers: int) -> dict:
+    """
+    Releases callers threads at once, each reading the leaderboard sorted by wins.
+
+    Returns:
+        dict: burst_ms (until the last caller has its result) and queries (leaderboard queries run).
+    """
+    before = kitchen_model.leaderboard_reads.snapshot()["executions"]
+    barrier = threading.Barrier(callers + 1)
+
+    def read():
+        barrier.wait()
+        kitchen_model.get_leaderboard("wins")
+
+    threads = [threading.Thread(target=read) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    queries = kitchen_model.leaderboard_reads.snapshot()["executions"] - before
+    return {"burst_ms": elapsed * 1000, "queries": queries if singleflight.SINGLEFLIGHT_ENABLED else callers}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare bursts of identical leaderboard reads with and without single-flight.")
+    parser.add_argument("--rows", type=int, default=10_000, help="Meals in the catalog (default: %(default)s)")
+    parser.add_argument("--callers", default="1,8,32", help="Comma-separated burst sizes (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5, help="Bursts per setting (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=411)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    args = parser.parse_args(argv)
+
+    quiet_logging("meal_max")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Populating {args.rows} meals...", file=sys.stderr)
+        sql_utils.DB_PATH = os.path.join(tmp, "meal_max.db")
+        load_meals(sql_utils.DB_PATH, args.rows, args.seed)
+
+        for callers in (int(value) for value in args.callers.split(",")):
+            results[str(callers)] = {}
+            for name, enabled in [("separate", False), ("single_flight", True)]:
+                singleflight.SINGLEFLIGHT_ENABLED = enabled
+                burst(callers)
+                runs = [burst(callers) for _ in range(args.repeat)]
+                results[str(callers)][name] = {
+                    "burst_ms": round(statistics.median(run["burst_ms"] for run in runs), 2),
+                    "queries": statistics.median(run["queries"] for run in runs),
+                }
+
+    write_results(args.output, "singleflight", results)
+    for metric in ["burst_ms", "queries"]:
+        print_table(results, metric=metric)
+        print()
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.datagen import load_meals
+from benchmarks.harness import print_table, quiet_logging, write_results
+from meal_max.utils import sql_utils
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results", "streaming.json")
+
+PATH = "/api/leaderboard?sort=wins"
+FORMATS = ["json", "json-stream", "ndjson"]
+
+
+def fetch(client, fmt: str) -> dict:
+    """
+    Requests the leaderboard once and reads the body chunk by chunk without keeping it.
+
+    Returns:
+        dict: ttfb_ms (until the first body chunk), total_ms, bytes, and peak_kb, the most
+        memory Python had allocated during the request above what it held before.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = client.get(f"{PATH}&format={fmt}", buffered=False)
+    chunks = iter(response.response)
+    first = next(chunks, b"")
+    ttfb = time.perf_counter() - start
+    size = len(first)
+    for chunk in chunks:
+        size += len(chunk)
+    response.close()
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ttfb_ms": round(ttfb * 1000, 2), "total_ms": round(total * 1000, 2), "bytes": size,
+            "peak_kb": round(peak / 1024, 1)}
+
+
+def run_size(app, rows: int, repeat: int, seed: int, tmp: str) -> dict:
+    """
+    Measures each response format against a meals table of the given size.
+
+    tracemalloc slows allocation-heavy code, so the times are comparable with each other
+    but not with the other benchmarks.
+
+    Returns:
+        dict: The median of each measurement, keyed by format.
+    """
+    db_path = os.path.join(tmp, f"meals_{rows}.db")
+    load_meals(db_path, rows, seed)
+    sql_utils.DB_PATH = db_path
+    client = app.test_client()
+
+    results = {}
+    for fmt in FORMATS:
+        fetch(client, fmt)
+        runs = [fetch(client, fmt) for _ in range(repeat)]
+        results[fmt] = {metric: sorted(run[metric] for run in runs)[len(runs) // 2] for metric in runs[0]}
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare buffered and streamed leaderboard responses.")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated table sizes (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed requests per format (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=411)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    args = parser.parse_args(argv)
+
+    # The background prober would call random.org during the run; compression and the
+    # response cache would measure something other than the formats
+    os.environ.setdefault("HEALTH_PROBER_ENABLED", "false")
+    os.environ.setdefault("COMPRESSION_ENABLED", "false")
+    os.environ.setdefault("JSON_CACHE_ENABLED", "false")
+    from app import app
+
+    quiet_logging("meal_max")
+    app.logger.setLevel("WARNING")
+    sizes = [int(size) for size in args.sizes.split(",")]
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Populating tables of {args.sizes} meals...", file=sys.stderr)
+        results = {str(size): run_size(app, size, args.repeat, args.seed, tmp) for size in sizes}
+
+    write_results(args.output, "streaming", results)
+    for metric in ["peak_kb", "ttfb_ms", "total_ms"]:
+        print_table(results, metric=metric)
+        print()
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
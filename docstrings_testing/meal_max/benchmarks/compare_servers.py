@@ -0,0 +1,55 @@
+import json
+import sys
+
+from benchmarks.loadgen import SERVER_COMMANDS, build_parser, execute
+
+
+def print_comparison(reports: dict) -> None:
+    """
+    Prints throughput per server, then p50/p95 per endpoint side by side.
+
+    Args:
+        reports (dict): run_load reports keyed by server.
+    """
+    servers = list(reports)
+    print(f"{'server':<12}{'reqs':>8}{'errs':>7}{'rps':>9}")
+    for server, report in reports.items():
+        print(f"{server:<12}{report['requests']:>8}{report['errors']:>7}{report['rps']:>9}")
+
+    labels = sorted({label for report in reports.values() for label in report["endpoints"]})
+    print()
+    print(f"{'endpoint (p50 / p95 ms)':<52}" + "".join(f"{server:>20}" for server in servers))
+    for label in labels:
+        cells = []
+        for server in servers:
+            stats = reports[server]["endpoints"].get(label)
+            cells.append(f"{stats['p50_ms']} / {stats['p95_ms']}" if stats else "-")
+        print(f"{label:<52}" + "".join(f"{cell:>20}" for cell in cells))
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    parser.description = "Run the same load against several server variants and compare them."
+    parser.add_argument("--servers", default="gunicorn,uvicorn",
+                        help=f"Comma-separated variants from {', '.join(sorted(SERVER_COMMANDS))} (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if args.url:
+        parser.error("--url cannot be combined with a comparison; each variant is started locally")
+
+    reports = {}
+    for server in args.servers.split(","):
+        if server not in SERVER_COMMANDS:
+            parser.error(f"Unknown server '{server}'")
+        print(f"Running {args.duration} s against {server}...", file=sys.stderr)
+        args.server = server
+        reports[server] = execute(args)
+
+    print_comparison(reports)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+import argparse
+from bisect import bisect
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
+import math
+import os
+import random
+import sqlite3
+import sys
+import time
+from typing import Iterable, Iterator
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_PATH = os.path.join(PROJECT_DIR, "sql", "create_meal_table.sql")
+
+MEAL_COLUMNS = ("meal", "cuisine", "price", "difficulty", "battles", "wins", "deleted")
+
+# cuisine: (share of the menu, median price, dishes)
+CUISINES = {
+    "Italian": (18, 16.0, ["Lasagna", "Risotto", "Carbonara", "Margherita Pizza", "Osso Buco", "Gnocchi"]),
+    "Mexican": (14, 11.0, ["Tacos", "Enchiladas", "Burrito", "Mole Poblano", "Quesadilla", "Pozole"]),
+    "Chinese": (13, 12.0, ["Kung Pao Chicken", "Mapo Tofu", "Dumplings", "Chow Mein", "Peking Duck", "Fried Rice"]),
+    "American": (12, 13.0, ["Cheeseburger", "Mac and Cheese", "Fried Chicken", "BBQ Ribs", "Clam Chowder"]),
+    "Japanese": (9, 18.0, ["Ramen", "Sushi Platter", "Tonkatsu", "Okonomiyaki", "Katsu Curry", "Udon"]),
+    "Indian": (9, 14.0, ["Butter Chicken", "Biryani", "Chana Masala", "Palak Paneer", "Rogan Josh", "Dosa"]),
+    "Thai": (7, 13.0, ["Pad Thai", "Green Curry", "Tom Yum", "Massaman Curry", "Larb", "Khao Soi"]),
+    "French": (6, 24.0, ["Coq au Vin", "Ratatouille", "Bouillabaisse", "Cassoulet", "Beef Bourguignon"]),
+    "Mediterranean": (5, 15.0, ["Moussaka", "Falafel Plate", "Shakshuka", "Souvlaki", "Paella"]),
+    "Korean": (4, 15.0, ["Bibimbap", "Bulgogi", "Kimchi Jjigae", "Japchae", "Tteokbokki"]),
+    "Vietnamese": (3, 12.0, ["Pho", "Banh Mi", "Bun Cha", "Com Tam", "Goi Cuon"]),
+}
+DIFFICULTIES = {"LOW": 45, "MED": 40, "HIGH": 15}
+STYLES = [
+    "Classic", "Spicy", "Smoky", "Grandma's", "Street", "Crispy", "Slow-Cooked", "Rustic", "Golden", "Midnight",
+    "Garden", "Fiery", "Hearty", "Coastal", "Royal", "Sunday", "Tangy", "Braised", "Charred", "Herbed",
+]
+DESCRIPTORS = [
+    "House", "Market", "Harvest", "Village", "Chef's", "Family", "Festival", "Country", "Downtown", "Island",
+    "Mountain", "River", "Lucky", "Golden Gate", "Night Market", "Farmhouse", "Seaside", "Old Town", "Corner", "Signature",
+]
+
+NAME_COMBINATIONS = len(STYLES) * len(DESCRIPTORS)
+
+
+def meal_name(index: int, dish: str) -> str:
+    """
+    Builds a meal name that is unique for every index, whatever the dish.
+
+    Args:
+        index (int): The zero-based meal index.
+        dish (str): The dish the name is built around.
+
+    Returns:
+        str: The name.
+    """
+    combination, number = index % NAME_COMBINATIONS, index // NAME_COMBINATIONS
+    style, descriptor = divmod(combination, len(DESCRIPTORS))
+    name = f"{STYLES[style]} {DESCRIPTORS[descriptor]} {dish}"
+    return f"{name} No. {number + 1}" if number else name
+
+
+def meal_batch(start: int, stop: int, count: int, seed: int = 411, deleted_fraction: float = 0.01,
+               with_stats: bool = True) -> list[tuple]:
+    """
+    Generates meals start..stop-1 of a menu of count meals, in MEAL_COLUMNS order.
+
+    Names are unique per index, so the UNIQUE meal constraint always holds. Cuisines
+    follow rough menu shares, prices are log-normal around each cuisine's median
+    (never below $1) and battle counts are heavy-tailed with wins <= battles. Each
+    batch is seeded from (seed, start), so the menu is the same however it is split up.
+
+    Args:
+        start (int): The first meal index.
+        stop (int): One past the last meal index.
+        count (int): The menu size.
+        seed (int): The random seed.
+        deleted_fraction (float): The share of meals marked as deleted.
+        with_stats (bool): Generate battle history; otherwise every meal starts at 0 battles.
+
+    Returns:
+        list[tuple]: (meal, cuisine, price, difficulty, battles, wins, deleted) rows.
+    """
+    rng = random.Random(f"{seed}:{start}")
+    uniform, lognormvariate, paretovariate = rng.random, rng.lognormvariate, rng.paretovariate
+    cuisines = [(name, math.log(median), dishes) for name, (_, median, dishes) in CUISINES.items()]
+    cuisine_cumulative = list(accumulate(share for share, _, _ in CUISINES.values()))
+    difficulties = list(DIFFICULTIES)
+    difficulty_cumulative = list(accumulate(DIFFICULTIES.values()))
+
+    rows = []
+    for i in range(start, stop):
+        cuisine, log_median, dishes = cuisines[bisect(cuisine_cumulative, uniform() * cuisine_cumulative[-1])]
+        price = max(1.0, round(lognormvariate(log_median, 0.35), 2))
+        difficulty = difficulties[bisect(difficulty_cumulative, uniform() * difficulty_cumulative[-1])]
+        battles = int(paretovariate(1.5)) - 1 if with_stats else 0
+        wins = int(battles * uniform())
+        rows.append((meal_name(i, dishes[int(uniform() * len(dishes))]), cuisine, price, difficulty,
+                     battles, wins, uniform() < deleted_fraction))
+    return rows
+
+
+def generate_batches(make_batch, count: int, batch_size: int = 100_000, workers: int = 0, **kwargs) -> Iterator[list]:
+    """
+    Yields the batches of a catalog in order, generating them in worker processes.
+
+    Args:
+        make_batch: A picklable function taking (start, stop, count, **kwargs) and returning rows.
+        count (int): The catalog size.
+        batch_size (int): Rows per batch.
+        workers (int): Worker processes; 0 uses one per CPU, 1 generates in this process.
+        **kwargs: Passed through to make_batch.
+
+    Yields:
+        list: The rows of each batch.
+    """
+    ranges = [(start, min(start + batch_size, count)) for start in range(0, count, batch_size)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(ranges) == 1:
+        for start, stop in ranges:
+            yield make_batch(start, stop, count, **kwargs)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        futures = deque()
+        for start, stop in ranges:
+            # Stay a few batches ahead of the writer without holding the whole catalog in memory
+            futures.append(pool.submit(make_batch, start, stop, count, **kwargs))
+            if len(futures) > 2 * workers:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
+
+
+def bulk_load(db_path: str, table: str, columns: Iterable[str], batches: Iterable[list],
+              create_schema: bool = False) -> dict:
+    """
+    Inserts batches of rows with executemany, one transaction per batch.
+
+    Journaling and fsync are relaxed for the duration of the load, which is only
+    safe for generated data that can be regenerated after a crash.
+
+    Args:
+        db_path (str): The SQLite database file.
+        table (str): The table to load.
+        columns (Iterable[str]): The column names, in row order.
+        batches (Iterable[list]): Batches of rows.
+        create_schema (bool): Run the schema script (which drops and recreates the table) first.
+
+    Returns:
+        dict: rows loaded, seconds taken and rows_per_second.
+    """
+    columns = tuple(columns)
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        if create_schema:
+            with open(SCHEMA_PATH) as f:
+                conn.executescript(f.read())
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA journal_mode = MEMORY")
+        conn.execute("PRAGMA cache_size = -262144")
+
+        loaded = 0
+        start = time.perf_counter()
+        for batch in batches:
+            conn.execute("BEGIN")
+            conn.executemany(sql, batch)
+            conn.execute("COMMIT")
+            loaded += len(batch)
+        elapsed = time.perf_counter() - start
+    finally:
+        conn.close()
+    return {"rows": loaded, "seconds": round(elapsed, 2), "rows_per_second": int(loaded / elapsed) if elapsed else 0}
+
+
+def load_meals(db_path: str, count: int, seed: int = 411, deleted_fraction: float = 0.01,
+               with_stats: bool = True, create_schema: bool = True, workers: int = 0) -> dict:
+    """
+    Generates count meals straight into the meals table of db_path.
+
+    Args:
+        db_path (str): The SQLite database file.
+        count (int): The number of meals.
+        seed (int): The random seed.
+        deleted_fraction (float): The share of meals marked as deleted.
+        with_stats (bool): Generate battle history.
+        create_schema (bool): Recreate the meals table first.
+        workers (int): Generator processes; 0 uses one per CPU.
+
+    Returns:
+        dict: The bulk_load statistics.
+    """
+    batches = generate_batches(meal_batch, count, workers=workers, seed=seed,
+                               deleted_fraction=deleted_fraction, with_stats=with_stats)
+    return bulk_load(db_path, "meals", MEAL_COLUMNS, batches, create_schema=create_schema)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic menu of meals into a SQLite database.")
+    parser.add_argument("--db", required=True, help="The SQLite database file")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Meals to generate (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=411)
+    parser.add_argument("--deleted-fraction", type=float, default=0.01)
+    parser.add_argument("--no-stats", action="store_true", help="Start every meal with no battles")
+    parser.add_argument("--workers", type=int, default=0, help="Generator processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    stats = load_meals(args.db, args.rows, args.seed, args.deleted_fraction,
+                       with_stats=not args.no_stats, workers=args.workers)
+    print(f"Loaded {stats['rows']} meals in {stats['seconds']} s ({stats['rows_per_second']} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import random
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+
+class RandomOrgHandler(BaseHTTPRequestHandler):
+    """
+    Answers the random.org plain-text endpoints the apps use, from a local generator.
+
+    Supported paths: /integers/, /decimal-fractions/ and /quota/.
+    """
+
+    protocol_version = "HTTP/1.1"
+    rng = random.Random()
+    rng_lock = threading.Lock()
+    # Seconds to wait before answering number requests, to model a slow random.org
+    delay = 0.0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if self.delay and not url.path.startswith("/quota"):
+            time.sleep(self.delay)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        num = int(params.get("num", 1))
+
+        with self.rng_lock:
+            if url.path.startswith("/integers"):
+                low, high = int(params.get("min", 1)), int(params.get("max", 100))
+                lines = [str(self.rng.randint(low, high)) for _ in range(num)]
+            elif url.path.startswith("/decimal-fractions"):
+                decimals = int(params.get("dec", 2))
+                lines = [f"{self.rng.random():.{decimals}f}" for _ in range(num)]
+            elif url.path.startswith("/quota"):
+                lines = ["1000000"]
+            else:
+                self.send_error(404)
+                return
+
+        body = ("\n".join(lines) + "\n").encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_random_org_stub(port: int = 0, seed=None, delay_ms: float = 0) -> ThreadingHTTPServer:
+    """
+    Starts the stand-in on a daemon thread.
+
+    Args:
+        port (int): The port to listen on; 0 picks a free one.
+        seed: Seed for the generator, for reproducible runs.
+        delay_ms (float): Latency to add to every number request.
+
+    Returns:
+        ThreadingHTTPServer: The running server; its base URL is http://127.0.0.1:<server_port>.
+    """
+    RandomOrgHandler.rng.seed(seed)
+    RandomOrgHandler.delay = delay_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", port), RandomOrgHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="random-org-stub", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for random.org.")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--delay-ms", type=float, default=0, help="Latency to add to every number request")
+    args = parser.parse_args()
+
+    RandomOrgHandler.rng.seed(args.seed)
+    RandomOrgHandler.delay = args.delay_ms / 1000
+    print(f"Serving random.org stand-in on http://127.0.0.1:{args.port} (set RANDOM_ORG_URL to this)")
+    ThreadingHTTPServer(("127.0.0.1", args.port), RandomOrgHandler).serve_forever()
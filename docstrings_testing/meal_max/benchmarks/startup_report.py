@@ -0,0 +1,155 @@
+import argparse
+from collections import defaultdict
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.datagen import load_meals
+from benchmarks.harness import write_results
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCHMARK_DIR)
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results", "startup.json")
+
+FIRST_REQUEST = "/api/leaderboard"
+
+# Runs in a fresh interpreter: imports the production entry point, times two requests, then
+# times the imports deferred to first use, which the first battle would pay
+CHILD = """
+import importlib, json, time
+start = time.perf_counter()
+import wsgi
+ready = time.perf_counter()
+client = wsgi.app.test_client()
+client.get({path!r}).get_data()
+first = time.perf_counter()
+client.get({path!r}).get_data()
+second = time.perf_counter()
+from meal_max.utils import startup
+for module in startup.WARM_UP_IMPORTS:
+    importlib.import_module(module)
+deferred = time.perf_counter()
+print(json.dumps({{"ready_ms": (ready - start) * 1000, "first_request_ms": (first - ready) * 1000,
+                  "second_request_ms": (second - first) * 1000, "deferred_imports_ms": (deferred - second) * 1000}}))
+""".format(path=FIRST_REQUEST)
+
+# (name, environment); fast leaves first-use costs to the first requests, warm pays them before serving
+MODES = [("fast", {"WARM_UP_ENABLED": "false"}), ("warm", {"WARM_UP_ENABLED": "true"})]
+
+
+def run_child(env: dict, importtime: bool = False) -> subprocess.CompletedProcess:
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", CHILD]
+    result = subprocess.run(command, cwd=PROJECT_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Child process failed:\n{result.stderr[-2000:]}")
+    return result
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """
+    Parses the output of python -X importtime.
+
+    Only the interpreter's own startup and the import of wsgi are kept, not what the
+    child imports afterwards.
+
+    Returns:
+        list[dict]: One entry per imported module with self_us, cumulative_us, its nesting
+        depth and the module whose import pulled it in (its parent).
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # One space after the bar, then two per level of nesting
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append({"name": name.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative_us),
+                        "depth": depth})
+        if name.strip() == "wsgi" and depth == 0:
+            break
+    # -X importtime prints a module after everything it imported, so parents come after children
+    parents = {}
+    for module in reversed(modules):
+        parents[module["depth"]] = module["name"]
+        module["parent"] = parents.get(module["depth"] - 1) if module["depth"] else None
+    return modules
+
+
+def breakdown(runs: list[list[dict]]) -> dict:
+    """
+    Summarizes importtime runs, taking the median across runs.
+
+    Returns:
+        dict: 'by_package' (self time of every module summed by top-level package),
+        'by_import' (cumulative time of each module app.py and wsgi.py import directly,
+        which is what each of those import lines costs) and 'total_ms'.
+    """
+    by_package = defaultdict(list)
+    by_import = defaultdict(list)
+    totals = []
+    for modules in runs:
+        packages = defaultdict(int)
+        for module in modules:
+            packages[module["name"].split(".")[0]] += module["self_us"]
+            if module["parent"] in ("app", "wsgi") and module["name"] != "app":
+                by_import[module["name"]].append(module["cumulative_us"])
+        for package, self_us in packages.items():
+            by_package[package].append(self_us)
+        totals.append(sum(module["self_us"] for module in modules))
+
+    def ms(values):
+        return round(statistics.median(values) / 1000, 2)
+
+    return {
+        "total_ms": ms(totals),
+        "by_package": dict(sorted(((p, ms(v)) for p, v in by_package.items()), key=lambda item: -item[1])),
+        "by_import": dict(sorted(((m, ms(v)) for m, v in by_import.items()), key=lambda item: -item[1])),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Break down startup time per module, with and without warm-up.")
+    parser.add_argument("--rows", type=int, default=10_000, help="Meals in the table (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh processes per mode (default: %(default)s)")
+    parser.add_argument("--top", type=int, default=15, help="Rows to print per table (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=411)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "meal_max.db")
+        print(f"Populating {args.rows} meals...", file=sys.stderr)
+        load_meals(db_path, args.rows, args.seed)
+        base_env = dict(os.environ, DB_PATH=db_path, HEALTH_PROBER_ENABLED="false", APP_ENV="production")
+
+        for name, settings in MODES:
+            env = dict(base_env, **settings)
+            timings = [json.loads(run_child(env).stdout.strip().splitlines()[-1]) for _ in range(args.repeat)]
+            results[name] = {metric: round(statistics.median(t[metric] for t in timings), 2) for metric in timings[0]}
+            results[name]["first_response_ms"] = round(results[name]["ready_ms"] + results[name]["first_request_ms"], 2)
+
+        imports = breakdown([parse_importtime(run_child(dict(base_env, WARM_UP_ENABLED="false"), importtime=True).stderr)
+                             for _ in range(args.repeat)])
+
+    write_results(args.output, "startup", {"modes": results, "imports": imports})
+
+    print(f"{'mode':<8}" + "".join(f"{metric:>20}" for metric in results["fast"]))
+    for name, timings in results.items():
+        print(f"{name:<8}" + "".join(f"{value:>20.2f}" for value in timings.values()))
+    print(f"\nImport time {imports['total_ms']} ms (under -X importtime, which adds overhead)")
+    for title, table in [("by top-level package (self time)", imports["by_package"]),
+                         ("by module imported from app.py and wsgi.py (cumulative)", imports["by_import"])]:
+        print(f"\n{title}")
+        for module, ms in list(table.items())[:args.top]:
+            print(f"  {module:<48}{ms:>10.2f} ms")
+    print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
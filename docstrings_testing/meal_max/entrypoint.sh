@@ -13,5 +13,9 @@ else
     echo "Skipping database creation."
 fi
 
-# Start the Python application
-exec python app.py
+# Start the Python application: gunicorn in production, the Flask development server otherwise
+if [ "${APP_ENV:-production}" = "production" ]; then
+    exec gunicorn -c gunicorn.conf.py wsgi:app
+else
+    exec python app.py
+fi
@@ -0,0 +1,57 @@
+import multiprocessing
+import os
+
+
+# Production serving settings, read by `gunicorn -c gunicorn.conf.py wsgi:app` (see entrypoint.sh)
+
+CPU_COUNT = multiprocessing.cpu_count()
+
+
+def _workers() -> int:
+    # Battle combatants live in process memory, so every worker would have its own, and
+    # the data versions behind ETags only count each worker's own writes.
+    # One worker is the default; WEB_CONCURRENCY=auto (2 x CPU + 1) or a number opts in to more.
+    setting = os.getenv("WEB_CONCURRENCY", "1")
+    if setting == "auto":
+        return 2 * CPU_COUNT + 1
+    return max(1, int(setting))
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = _workers()
+if workers > 1:
+    # Another worker's writes would not change this worker's ETags, so it could answer 304 with stale data
+    os.environ.setdefault("ETAGS_ENABLED", "false")
+worker_class = "gthread"
+# Requests mostly wait on SQLite and random.org, so threads scale past the core count
+threads = int(os.getenv("GUNICORN_THREADS", str(4 * CPU_COUNT)))
+
+# Import the app once in the master so workers fork with it loaded
+preload_app = True
+# Warm it up there too, before the port opens (see meal_max/utils/startup.py);
+# WARM_UP_ENABLED=false opens the port sooner and leaves those costs to the first requests
+os.environ.setdefault("WARM_UP_ENABLED", "true")
+
+# Recycle workers after this many requests (plus jitter, so they do not all restart at once).
+# Off by default: a recycled worker starts with no combatants.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", str(max(1, max_requests // 10))))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Heartbeat files on tmpfs, so a slow container disk cannot get workers killed
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+# Set GUNICORN_ACCESS_LOG to empty to turn the access log off
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # Threads started while the master preloaded the app do not survive the fork
+    from meal_max.utils import health, profiling
+
+    if profiling.SAMPLING_PROFILER_ENABLED:
+        profiling.start_sampling_profiler()
+    if health.HEALTH_PROBER_ENABLED and health.health_monitor is not None:
+        health.health_monitor.start()
@@ -1,5 +1,5 @@
 import logging
-from typing import List
+from typing import List, Optional
 
 from meal_max.models.kitchen_model import Meal, update_meal_stats
 from meal_max.utils.logger import configure_logger
@@ -23,12 +23,14 @@ class BattleModel:
         """
         self.combatants: List[Meal] = []
 
-    def battle(self) -> str:
+    def battle(self, random_number: Optional[float] = None) -> str:
         """
         Starts a battle between two meals and simulates it.
 
         Args:
             self (BattleModel): the battlemodel that we're interacting with.
+            random_number (float, optional): A random number already fetched from random.org
+                (the ASGI variant fetches it asynchronously). Fetched here if not given.
 
         Raises:
             ValueError: If not enough combatants are entered in the Battle.
@@ -60,7 +62,8 @@ class BattleModel:
         logger.info("Delta between scores: %.3f", delta)
 
         # Get random number from random.org
-        random_number = get_random()
+        if random_number is None:
+            random_number = get_random()
 
         # Log the random number
         logger.info("Random number from random.org: %.3f", random_number)
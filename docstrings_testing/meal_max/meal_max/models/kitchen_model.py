@@ -1,15 +1,24 @@
 from dataclasses import dataclass
 import logging
 import sqlite3
-from typing import Any
+from typing import Any, Iterator, Optional
 
-from meal_max.utils.sql_utils import get_db_connection
+from meal_max.utils.sql_utils import after_commit, get_db_connection, iter_rows
 from meal_max.utils.logger import configure_logger
+from meal_max.utils.singleflight import SingleFlight
+from meal_max.utils.versioning import VersionCounter
 
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+# Bumped after meals are created or deleted
+catalog_version = VersionCounter("catalog")
+# Bumped after battle stats change
+stats_version = VersionCounter("stats")
+# Shares leaderboard reads between concurrent requests
+leaderboard_reads = SingleFlight("leaderboard_reads")
+
 
 @dataclass
 class Meal:
@@ -40,6 +49,7 @@ def create_meal(meal: str, cuisine: str, price: float, difficulty: str) -> None:
                 VALUES (?, ?, ?, ?)
             """, (meal, cuisine, price, difficulty))
             conn.commit()
+            after_commit(catalog_version.bump)
 
             logger.info("Meal successfully added to the database: %s", meal)
 
@@ -68,6 +78,7 @@ def delete_meal(meal_id: int) -> None:
 
             cursor.execute("UPDATE meals SET deleted = TRUE WHERE id = ?", (meal_id,))
             conn.commit()
+            after_commit(catalog_version.bump)
 
             logger.info("Meal with ID %s marked as deleted.", meal_id)
 
@@ -75,7 +86,7 @@ def delete_meal(meal_id: int) -> None:
         logger.error("Database error: %s", str(e))
         raise e
 
-def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
+def _leaderboard_query(sort_by: str) -> str:
     query = """
         SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles) AS win_pct
         FROM meals WHERE deleted = false AND battles > 0
@@ -88,26 +99,36 @@ def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
     else:
         logger.error("Invalid sort_by parameter: %s", sort_by)
         raise ValueError("Invalid sort_by parameter: %s" % sort_by)
+    return query
+
+def _leaderboard_row_to_dict(row: tuple) -> dict[str, Any]:
+    return {
+        'id': row[0],
+        'meal': row[1],
+        'cuisine': row[2],
+        'price': row[3],
+        'difficulty': row[4],
+        'battles': row[5],
+        'wins': row[6],
+        'win_pct': round(row[7] * 100, 1)  # Convert to percentage
+    }
+
+# Concurrent calls with the same sort and data versions share one query and receive the
+# same list, so it must not be modified. The versions are read before querying, so a result
+# is never filed under a newer version than it reflects.
+def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
+    query = _leaderboard_query(sort_by)
+    key = ("leaderboard", sort_by, catalog_version.value, stats_version.value)
+    return leaderboard_reads.do(key, lambda: _query_leaderboard(query))
 
+def _query_leaderboard(query: str) -> list[dict[str, Any]]:
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(query)
             rows = cursor.fetchall()
 
-        leaderboard = []
-        for row in rows:
-            meal = {
-                'id': row[0],
-                'meal': row[1],
-                'cuisine': row[2],
-                'price': row[3],
-                'difficulty': row[4],
-                'battles': row[5],
-                'wins': row[6],
-                'win_pct': round(row[7] * 100, 1)  # Convert to percentage
-            }
-            leaderboard.append(meal)
+        leaderboard = [_leaderboard_row_to_dict(row) for row in rows]
 
         logger.info("Leaderboard retrieved successfully")
         return leaderboard
@@ -116,6 +137,24 @@ def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
         logger.error("Database error: %s", str(e))
         raise e
 
+# Same rows as get_leaderboard, fetched in batches so only one batch is in memory at a time.
+# The connection stays open until the generator is exhausted or closed.
+def iter_leaderboard(sort_by: str="wins", batch_size: Optional[int]=None) -> Iterator[dict[str, Any]]:
+    query = _leaderboard_query(sort_by)
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query)
+            for row in iter_rows(cursor, batch_size):
+                yield _leaderboard_row_to_dict(row)
+
+        logger.info("Leaderboard streamed successfully")
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
 def get_meal_by_id(meal_id: int) -> Meal:
     try:
         with get_db_connection() as conn:
@@ -180,6 +219,7 @@ def update_meal_stats(meal_id: int, result: str) -> None:
                 raise ValueError(f"Invalid result: {result}. Expected 'win' or 'loss'.")
 
             conn.commit()
+            after_commit(stats_version.bump)
 
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
@@ -0,0 +1,272 @@
+from functools import wraps
+import logging
+import math
+import os
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.sql_utils import in_shared_transaction
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Reject excess requests to the routes marked with @limit instead of letting every request slow down
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+# Defaults for each limited route; every route gets its own limiter. A queued request holds a
+# server thread while it waits, so keep the concurrency plus queue of all limited routes
+# below the thread count (GUNICORN_THREADS) to leave threads for the cheap routes.
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "1"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "1"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "2"))
+# Sustained requests per second and burst size per route; a rate of 0 turns rate limiting off
+ADMISSION_RATE = float(os.getenv("ADMISSION_RATE", "20"))
+ADMISSION_BURST = int(os.getenv("ADMISSION_BURST", "40"))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: holds up to burst tokens and gains rate tokens per second.
+    """
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """
+        Takes a token if one is available.
+
+        Returns:
+            float: 0 if a token was taken, otherwise the seconds until one will be available.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+
+class ConcurrencyLimiter:
+    """
+    Lets at most max_concurrent callers in at once, with a bounded queue of waiting callers.
+
+    Callers that find the queue full are turned away at once; queued callers give up
+    after queue_timeout seconds.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.queued = 0
+        self.peak_in_flight = 0
+        self.peak_queued = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> Optional[str]:
+        """
+        Waits for a slot.
+
+        Returns:
+            str: None once admitted, or why not: 'queue_full' or 'queue_timeout'.
+        """
+        with self._condition:
+            # Newcomers queue behind callers already waiting rather than overtaking them
+            if self.in_flight < self.max_concurrent and not self.queued:
+                return self._enter()
+            if self.queued >= self.max_queue:
+                return "queue_full"
+
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+            try:
+                admitted = self._condition.wait_for(lambda: self.in_flight < self.max_concurrent,
+                                                    timeout=self.queue_timeout)
+            finally:
+                self.queued -= 1
+            if not admitted:
+                return "queue_timeout"
+            return self._enter()
+
+    def _enter(self) -> None:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def release(self) -> None:
+        """Frees a slot taken by acquire and wakes one waiting caller."""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+
+class AdmissionController:
+    """
+    Admission control for one route: a token bucket, a concurrency limiter and their counters.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float,
+                 rate: float, burst: int):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst) if rate > 0 else None
+        self.limiter = ConcurrencyLimiter(max_concurrent, max_queue, queue_timeout)
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.rejected = {"rate": 0, "queue_full": 0, "queue_timeout": 0}
+        # Moving average of the time admitted requests take, to estimate Retry-After
+        self.mean_seconds = 0.0
+
+    def admit(self) -> Tuple[Optional[str], float]:
+        """
+        Decides whether a request may run, waiting in the queue if need be.
+
+        Returns:
+            Tuple[Optional[str], float]: (None, 0) when admitted (call release afterwards),
+            otherwise the reason and the seconds the client should wait before retrying.
+        """
+        if self.bucket is not None:
+            wait = self.bucket.try_acquire()
+            if wait:
+                return self._reject("rate", wait)
+
+        reason = self.limiter.acquire()
+        if reason is not None:
+            # Roughly how long until the requests ahead of this one are done
+            ahead = self.limiter.in_flight + self.limiter.queued
+            return self._reject(reason, self.mean_seconds * max(1, ahead) / self.limiter.max_concurrent)
+
+        with self._lock:
+            self.admitted += 1
+        return None, 0.0
+
+    def release(self, elapsed: float) -> None:
+        """
+        Ends an admitted request.
+
+        Args:
+            elapsed (float): The seconds it ran for.
+        """
+        self.limiter.release()
+        with self._lock:
+            self.mean_seconds = elapsed if not self.mean_seconds else 0.8 * self.mean_seconds + 0.2 * elapsed
+
+    def _reject(self, reason: str, wait: float) -> Tuple[str, float]:
+        with self._lock:
+            self.rejected[reason] += 1
+        logger.info("Rejected %s (%s), retry after %.2f s", self.name, reason, wait)
+        return reason, wait
+
+    def snapshot(self) -> dict:
+        """
+        Returns the limits, current load and counters.
+
+        Returns:
+            dict: Limits, in_flight, queued, their peaks, admitted and rejected counts by reason.
+        """
+        with self._lock:
+            return {
+                "max_concurrent": self.limiter.max_concurrent,
+                "max_queue": self.limiter.max_queue,
+                "queue_timeout_seconds": self.limiter.queue_timeout,
+                "rate": self.bucket.rate if self.bucket else None,
+                "burst": self.bucket.burst if self.bucket else None,
+                "in_flight": self.limiter.in_flight,
+                "queued": self.limiter.queued,
+                "peak_in_flight": self.limiter.peak_in_flight,
+                "peak_queued": self.limiter.peak_queued,
+                "admitted": self.admitted,
+                "rejected": dict(self.rejected),
+                "mean_ms": round(self.mean_seconds * 1000, 3),
+            }
+
+
+# Controllers of the limited routes, keyed by route name
+controllers: dict[str, AdmissionController] = {}
+
+
+def too_many_requests(name: str, reason: str, wait: float):
+    """
+    Builds the 429 response for a rejected request.
+
+    Args:
+        name (str): The route name.
+        reason (str): 'rate', 'queue_full' or 'queue_timeout'.
+        wait (float): Seconds until a retry is likely to be admitted.
+
+    Returns:
+        Response: A 429 JSON response with a Retry-After header in whole seconds (at least 1).
+    """
+    from flask import jsonify, make_response
+
+    response = make_response(jsonify({'error': f"Too many requests to {name}, try again later",
+                                      'reason': reason}), 429)
+    response.headers["Retry-After"] = str(max(1, math.ceil(wait)))
+    return response
+
+
+def limit(name: str, max_concurrent: Optional[int] = None, max_queue: Optional[int] = None,
+          queue_timeout: Optional[float] = None, rate: Optional[float] = None, burst: Optional[int] = None):
+    """
+    Decorates a view with admission control; unset limits come from the ADMISSION_* settings.
+
+    Requests over the rate, or arriving to a full queue, get a 429 at once; queued
+    requests get one if no slot frees up within queue_timeout. Operations inside an
+    /api/batch request are not limited again, since the batch itself was admitted and
+    waiting would hold its transaction open. With ADMISSION_ENABLED off the view is
+    returned as it is.
+
+    Args:
+        name (str): The route name used in metrics, e.g. 'battle'.
+        max_concurrent (int, optional): Requests allowed to run at once.
+        max_queue (int, optional): Requests allowed to wait for a slot.
+        queue_timeout (float, optional): Seconds a queued request waits before giving up.
+        rate (float, optional): Sustained requests per second; 0 for no rate limit.
+        burst (int, optional): Requests allowed at once above the rate.
+    """
+    def decorator(view):
+        if not ADMISSION_ENABLED:
+            return view
+        controller = AdmissionController(
+            name,
+            ADMISSION_MAX_CONCURRENT if max_concurrent is None else max_concurrent,
+            ADMISSION_MAX_QUEUE if max_queue is None else max_queue,
+            ADMISSION_QUEUE_TIMEOUT_SECONDS if queue_timeout is None else queue_timeout,
+            ADMISSION_RATE if rate is None else rate,
+            ADMISSION_BURST if burst is None else burst,
+        )
+        controllers[name] = controller
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if in_shared_transaction():
+                return view(*args, **kwargs)
+            reason, wait = controller.admit()
+            if reason is not None:
+                return too_many_requests(name, reason, wait)
+            start = time.perf_counter()
+            try:
+                return view(*args, **kwargs)
+            finally:
+                controller.release(time.perf_counter() - start)
+
+        wrapper.admission = controller
+        return wrapper
+    return decorator
+
+
+def snapshot() -> dict:
+    """
+    Returns every limited route's snapshot, keyed by route name.
+    """
+    return {name: controller.snapshot() for name, controller in controllers.items()}
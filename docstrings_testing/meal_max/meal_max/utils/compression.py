@@ -0,0 +1,184 @@
+from itertools import chain
+import logging
+import os
+from typing import Iterable, Iterator, List, Optional, Tuple
+import zlib
+
+from meal_max.utils.logger import configure_logger
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+# Bodies smaller than this are sent as they are; the framing and CPU would cost more than they save
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# Server preference when the client accepts several encodings equally; unavailable ones are skipped
+COMPRESSION_ENCODINGS = [e.strip() for e in os.getenv("COMPRESSION_ENCODINGS", "zstd,gzip").split(",") if e.strip()]
+# Higher levels trade CPU time per response for smaller bodies. For a 100k-meal leaderboard, gzip 6
+# responded 5% slower than level 1 for a body 27% smaller; level 9 took 1.9x as long (benchmarks/bench_compression.py)
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+ZSTD_LEVEL = int(os.getenv("ZSTD_LEVEL", "3"))
+ZSTD_THREADS = int(os.getenv("ZSTD_THREADS", "0"))
+# In-memory bodies are fed to the compressor in slices of this size, so the compressed copy streams out
+COMPRESSION_CHUNK_SIZE = int(os.getenv("COMPRESSION_CHUNK_SIZE", "65536"))
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "application/x-ndjson", "image/svg+xml"}
+
+
+def available_encodings() -> List[str]:
+    """
+    Lists the configured encodings this process can produce, in preference order.
+
+    Returns:
+        List[str]: Some of 'zstd' and 'gzip'.
+    """
+    return [e for e in COMPRESSION_ENCODINGS if e == "gzip" or (e == "zstd" and zstandard is not None)]
+
+
+def choose_encoding(accept_encodings) -> Optional[str]:
+    """
+    Picks the encoding for a response from the request's Accept-Encoding.
+
+    The client's quality values win; ties go to the server's preference order.
+
+    Args:
+        accept_encodings (Accept): The parsed Accept-Encoding header (request.accept_encodings).
+
+    Returns:
+        str: The encoding to use, or None to send the body as it is.
+    """
+    best, best_quality = None, 0
+    for encoding in available_encodings():
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _compressor(encoding: str):
+    """Returns a fresh streaming compressor with compress() and flush() for the encoding."""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=ZSTD_THREADS).compressobj()
+    # wbits 16 + MAX_WBITS writes the gzip header and trailer
+    return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """
+    Compresses a body chunk by chunk, never holding more than the compressor's window.
+
+    Args:
+        chunks (Iterable[bytes]): The uncompressed body.
+        encoding (str): 'gzip' or 'zstd'.
+
+    Yields:
+        bytes: Compressed chunks.
+    """
+    compressor = _compressor(encoding)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _slices(data: bytes, size: int) -> Iterator[bytes]:
+    view = memoryview(data)
+    for start in range(0, len(view), size):
+        yield view[start:start + size]
+
+
+def _peek(chunks: Iterator[bytes], size: int) -> Tuple[bytes, bool]:
+    """
+    Reads up to size bytes from the front of a streamed body.
+
+    Returns:
+        Tuple[bytes, bool]: What was read, and whether the stream ended.
+    """
+    head = []
+    read = 0
+    for chunk in chunks:
+        head.append(chunk)
+        read += len(chunk)
+        if read >= size:
+            return b"".join(head), False
+    return b"".join(head), True
+
+
+def _compressible(response) -> bool:
+    if response.status_code != 200 or response.direct_passthrough:
+        return False
+    if "Content-Encoding" in response.headers:
+        return False
+    mimetype = response.mimetype or ""
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def compress_response(response):
+    """
+    Compresses a Flask response in place when the client accepts it and the body is large enough.
+
+    In-memory bodies below COMPRESSION_MIN_SIZE are left alone. Streamed bodies are read
+    only until COMPRESSION_MIN_SIZE bytes have arrived; shorter streams are sent as they
+    are, longer ones are compressed as the rest streams through. Compressed responses lose
+    their Content-Length and get a weak ETag, since the bytes now depend on the encoding.
+
+    Args:
+        response (Response): The response to compress.
+
+    Returns:
+        Response: The same response.
+    """
+    from flask import request
+
+    if not _compressible(response) or request.method == "HEAD":
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.is_sequence:
+        data = response.get_data()
+        if len(data) < COMPRESSION_MIN_SIZE:
+            return response
+        body = _slices(data, COMPRESSION_CHUNK_SIZE)
+    else:
+        # The original iterable is replaced below, so close it along with the response
+        close = getattr(response.response, "close", None)
+        if close is not None:
+            response.call_on_close(close)
+        chunks = response.iter_encoded()
+        head, ended = _peek(chunks, COMPRESSION_MIN_SIZE)
+        if ended:
+            response.set_data(head)
+            return response
+        body = chain([head], chunks)
+
+    response.response = compress_stream(body, encoding)
+    response.headers.pop("Content-Length", None)
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app) -> None:
+    """
+    Registers response compression on a Flask app when COMPRESSION_ENABLED is set.
+
+    Args:
+        app (Flask): The application.
+    """
+    if not COMPRESSION_ENABLED:
+        return
+    app.after_request(compress_response)
+    logger.info("Compressing responses with %s", ", ".join(available_encodings()) or "nothing")
@@ -0,0 +1,269 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+from meal_max.utils import random_utils, sql_utils
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# The prober refreshes cached results in the background so /api/ready never touches a dependency
+HEALTH_PROBER_ENABLED = os.getenv("HEALTH_PROBER_ENABLED", "true").lower() == "true"
+HEALTH_PROBE_INTERVAL_SECONDS = float(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS", "5"))
+HEALTH_RANDOM_PROBE_INTERVAL_SECONDS = float(os.getenv("HEALTH_RANDOM_PROBE_INTERVAL_SECONDS", "60"))
+# Results older than this no longer count, so a stuck prober makes the service unready
+HEALTH_TTL_SECONDS = float(os.getenv("HEALTH_TTL_SECONDS", "15"))
+HEALTH_MAX_QUEUE_DEPTH = int(os.getenv("HEALTH_MAX_QUEUE_DEPTH", "10000"))
+# random.org being down degrades one route; by default it does not take the service out of rotation
+HEALTH_REQUIRE_RANDOM_SOURCE = os.getenv("HEALTH_REQUIRE_RANDOM_SOURCE", "false").lower() == "true"
+
+
+# Depth callbacks of in-process write queues, keyed by queue name
+_write_queues: dict[str, Callable[[], int]] = {}
+
+
+def register_write_queue(name: str, depth: Callable[[], int]) -> None:
+    """
+    Registers a write queue whose depth readiness should report.
+
+    Args:
+        name (str): The queue name shown in the readiness report.
+        depth (Callable[[], int]): Returns the number of pending writes; must be cheap.
+    """
+    _write_queues[name] = depth
+
+
+def unregister_write_queue(name: str) -> None:
+    """
+    Stops reporting a write queue.
+
+    Args:
+        name (str): The queue name.
+    """
+    _write_queues.pop(name, None)
+
+
+def probe_database(table: str) -> dict:
+    """
+    Times a trivial query against table on a fresh connection.
+
+    Args:
+        table (str): The table that must exist for the service to work.
+
+    Returns:
+        dict: ok, latency_ms and error (None when ok).
+    """
+    start = time.perf_counter()
+    try:
+        conn = sqlite3.connect(sql_utils.DB_PATH, timeout=1)
+        try:
+            conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchall()
+        finally:
+            conn.close()
+        return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 3), "error": None}
+    except sqlite3.Error as e:
+        logger.warning("Database probe failed: %s", e)
+        return {"ok": False, "latency_ms": round((time.perf_counter() - start) * 1000, 3), "error": str(e)}
+
+
+def probe_random_source() -> dict:
+    """
+    Checks that random.org answers and still has quota for this client.
+
+    Returns:
+        dict: ok, quota, latency_ms and error (None when ok).
+    """
+    start = time.perf_counter()
+    try:
+        quota = random_utils.get_quota()
+        error = None if quota >= 0 else "random.org quota exhausted"
+    except RuntimeError as e:
+        logger.warning("Random source probe failed: %s", e)
+        quota, error = None, str(e)
+    return {"ok": error is None, "quota": quota,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 3), "error": error}
+
+
+class HealthMonitor:
+    """
+    Caches dependency probes and assembles liveness and readiness reports from them.
+
+    Probes run on a background thread when started. Without it (HEALTH_PROBER_ENABLED
+    off, before a forked worker restarts it, or after it died) readiness runs only the
+    local database probe inline, once its result has outlived its interval; random.org
+    is never called in a request, and its result is reported from the cache, stale or
+    missing. Connection and queue gauges are read live, since they are just counters.
+
+    Attributes:
+        table (str): The table the database probe queries.
+        ttl (float): Seconds after which a cached probe result no longer counts.
+    """
+
+    def __init__(self, table: str, interval: float = HEALTH_PROBE_INTERVAL_SECONDS,
+                 random_interval: float = HEALTH_RANDOM_PROBE_INTERVAL_SECONDS, ttl: float = HEALTH_TTL_SECONDS):
+        self.table = table
+        self.intervals = {"database": interval, "random_source": random_interval}
+        self.ttl = ttl
+        self.started_at = time.monotonic()
+        self._results: dict[str, tuple[float, dict]] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _probe(self, name: str) -> dict:
+        if name == "database":
+            return probe_database(self.table)
+        return probe_random_source()
+
+    def refresh(self, force: bool = False, probes: Optional[Iterable[str]] = None) -> None:
+        """
+        Re-runs every probe whose cached result is older than its interval.
+
+        Args:
+            force (bool): Re-run every probe regardless of age.
+            probes (Iterable[str], optional): Only these probes ('database', 'random_source').
+        """
+        # One refresher at a time; concurrent callers use whatever is cached
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            for name, interval in self.intervals.items():
+                if probes is not None and name not in probes:
+                    continue
+                cached = self._results.get(name)
+                if force or cached is None or now - cached[0] >= interval:
+                    result = self._probe(name)
+                    with self._lock:
+                        self._results[name] = (time.monotonic(), result)
+        finally:
+            self._refresh_lock.release()
+
+    def start(self) -> None:
+        """Starts the background prober if it is not already running."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="health-prober", daemon=True)
+        self._thread.start()
+        logger.info("Health prober started (every %g s, TTL %g s)", min(self.intervals.values()), self.ttl)
+
+    def stop(self) -> None:
+        """Stops the background prober and waits for it to exit."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error("Health probe raised: %s", e)
+            if self._stopped.wait(min(self.intervals.values())):
+                return
+
+    def _cached(self, name: str) -> dict:
+        with self._lock:
+            cached = self._results.get(name)
+        if cached is None:
+            return {"ok": False, "error": "not probed yet", "age_seconds": None}
+        checked_at, result = cached
+        age = time.monotonic() - checked_at
+        result = dict(result, age_seconds=round(age, 3))
+        if age > self.ttl:
+            result.update(ok=False, error=f"stale: last probed {age:.1f} s ago")
+        return result
+
+    def liveness(self) -> dict:
+        """
+        Reports whether the process is up; never touches a dependency.
+
+        Returns:
+            dict: alive, uptime_seconds and whether the background prober is running.
+        """
+        return {
+            "alive": True,
+            "uptime_seconds": round(time.monotonic() - self.started_at, 3),
+            "prober_running": self._thread is not None and self._thread.is_alive(),
+        }
+
+    def readiness(self) -> dict:
+        """
+        Reports whether the service can take traffic, from cached probes and live gauges.
+
+        The service is ready when the database probe is fresh and ok, connections are
+        below DB_MAX_CONNECTIONS, every write queue is below HEALTH_MAX_QUEUE_DEPTH and,
+        with HEALTH_REQUIRE_RANDOM_SOURCE, random.org is available.
+
+        Returns:
+            dict: ready, prober_running, and the database, connections, random_source and
+            write_queues details.
+        """
+        prober_running = self._thread is not None and self._thread.is_alive()
+        if not prober_running:
+            # Only the local probe is cheap enough to run in the request
+            self.refresh(probes=("database",))
+
+        database = self._cached("database")
+        random_source = self._cached("random_source")
+        in_use = sql_utils.connections_in_use()
+        connections = {
+            "in_use": in_use,
+            "max": sql_utils.DB_MAX_CONNECTIONS,
+            "saturation": round(in_use / sql_utils.DB_MAX_CONNECTIONS, 3) if sql_utils.DB_MAX_CONNECTIONS else None,
+        }
+        write_queues = {}
+        for name, depth in list(_write_queues.items()):
+            try:
+                write_queues[name] = depth()
+            except Exception as e:
+                logger.error("Could not read depth of write queue %s: %s", name, e)
+                write_queues[name] = None
+
+        ready = (
+            database["ok"]
+            and (connections["saturation"] is None or connections["saturation"] < 1)
+            and all(depth is not None and depth < HEALTH_MAX_QUEUE_DEPTH for depth in write_queues.values())
+            and (random_source["ok"] or not HEALTH_REQUIRE_RANDOM_SOURCE)
+        )
+        return {
+            "ready": ready,
+            "prober_running": prober_running,
+            "database": database,
+            "connections": connections,
+            "random_source": random_source,
+            "write_queues": write_queues,
+        }
+
+
+# The monitor serving /api/live and /api/ready, created by init_app
+health_monitor: Optional[HealthMonitor] = None
+
+
+def init_app(app, table: str) -> HealthMonitor:
+    """
+    Creates the health monitor for a Flask app, starting the background prober
+    when HEALTH_PROBER_ENABLED is set.
+
+    Args:
+        app (Flask): The application.
+        table (str): The table the database probe queries.
+
+    Returns:
+        HealthMonitor: The monitor, also available as health_monitor.
+    """
+    global health_monitor
+    health_monitor = HealthMonitor(table)
+    app.extensions["health_monitor"] = health_monitor
+    if HEALTH_PROBER_ENABLED:
+        health_monitor.start()
+    return health_monitor
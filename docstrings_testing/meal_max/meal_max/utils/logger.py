@@ -4,23 +4,35 @@ import sys
 from flask import current_app, has_request_context
 
 
-def configure_logger(logger):
-    logger.setLevel(logging.DEBUG)  # Set the desired logging level here
+# One stderr handler shared by every module logger, created by the first configure_logger call
+_handler = None
+
+
+def _stderr_handler() -> logging.Handler:
+    global _handler
+    if _handler is None:
+        # Create a console handler that logs to stderr
+        _handler = logging.StreamHandler(sys.stderr)
+        _handler.setLevel(logging.DEBUG)
 
-    # Create a console handler that logs to stderr
-    handler = logging.StreamHandler(sys.stderr)
-    handler.setLevel(logging.DEBUG)
+        # Create a formatter with a timestamp
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-    # Create a formatter with a timestamp
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        # Add the formatter to the handler
+        _handler.setFormatter(formatter)
+    return _handler
 
-    # Add the formatter to the handler
-    handler.setFormatter(formatter)
 
-    # Add the handler to the logger
-    logger.addHandler(handler)
+def configure_logger(logger):
+    logger.setLevel(logging.DEBUG)  # Set the desired logging level here
+
+    # Add the handler to the logger, once however often the logger is configured
+    handler = _stderr_handler()
+    if handler not in logger.handlers:
+        logger.addHandler(handler)
 
     if has_request_context():
         app_logger = current_app.logger
         for handler in app_logger.handlers:
-            logger.addHandler(handler)
\ No newline at end of file
+            if handler not in logger.handlers:
+                logger.addHandler(handler)
@@ -0,0 +1,393 @@
+from collections import Counter, OrderedDict, deque
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Iterable, Optional
+import uuid
+
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Per-request profiling is opt-in; a request must also ask for it with X-Profile: 1 or ?profile=1
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "1"))
+PROFILE_MAX_SAMPLES = int(os.getenv("PROFILE_MAX_SAMPLES", "10000"))
+PROFILE_HISTORY = int(os.getenv("PROFILE_HISTORY", "20"))
+PROFILE_DIR = os.getenv("PROFILE_DIR")
+
+# The always-on sampler aggregates request-thread stacks over a rolling window
+SAMPLING_PROFILER_ENABLED = os.getenv("SAMPLING_PROFILER_ENABLED", "false").lower() == "true"
+SAMPLING_PROFILER_INTERVAL_MS = float(os.getenv("SAMPLING_PROFILER_INTERVAL_MS", "20"))
+SAMPLING_PROFILER_WINDOW_SECONDS = int(os.getenv("SAMPLING_PROFILER_WINDOW_SECONDS", "300"))
+SAMPLING_PROFILER_BUCKET_SECONDS = int(os.getenv("SAMPLING_PROFILER_BUCKET_SECONDS", "10"))
+
+# Only stacks passing through Flask's request dispatch belong to request threads
+REQUEST_FRAME = "flask.app:wsgi_app"
+
+
+####################################################
+#
+# Stack sampling
+#
+####################################################
+
+def collapse_frame(frame) -> str:
+    """
+    Renders a frame and its callers as one collapsed-stack line, root first.
+
+    Args:
+        frame: The innermost frame of the stack.
+
+    Returns:
+        str: Frames joined by ';' as 'module:function', the format flamegraph.pl reads.
+    """
+    names = []
+    while frame is not None:
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}")
+        frame = frame.f_back
+    names.reverse()
+    return ";".join(names)
+
+
+def format_collapsed(stacks: Counter) -> str:
+    """
+    Formats stack counts as collapsed-stack text, one 'stack count' line per stack.
+
+    Args:
+        stacks (Counter): Sample counts keyed by collapsed stack.
+
+    Returns:
+        str: The collapsed stacks, heaviest first.
+    """
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def top_functions(stacks: Counter, limit: int = 20) -> list[dict]:
+    """
+    Summarizes stack counts per function.
+
+    Args:
+        stacks (Counter): Sample counts keyed by collapsed stack.
+        limit (int): The number of functions to return.
+
+    Returns:
+        list[dict]: Functions ordered by self samples, with self and total (inclusive) samples.
+    """
+    self_samples = Counter()
+    total_samples = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_samples[frames[-1]] += count
+        for function in set(frames):
+            total_samples[function] += count
+
+    total = sum(stacks.values()) or 1
+    return [
+        {
+            "function": function,
+            "self": count,
+            "total": total_samples[function],
+            "self_pct": round(100.0 * count / total, 1),
+        }
+        for function, count in self_samples.most_common(limit)
+    ]
+
+
+class StackSampler(threading.Thread):
+    """
+    A daemon thread that periodically samples the stacks of other threads.
+
+    Attributes:
+        stacks (Counter): Sample counts keyed by collapsed stack.
+        samples (int): The number of sampling passes taken.
+        busy_seconds (float): Time spent taking samples, for measuring overhead.
+    """
+
+    def __init__(self, thread_ids: Optional[Iterable[int]] = None, interval: float = 0.001,
+                 max_samples: Optional[int] = None):
+        """
+        Args:
+            thread_ids (Iterable[int], optional): The threads to sample. Defaults to every thread but the sampler.
+            interval (float): Seconds between samples.
+            max_samples (int, optional): Stop after this many sampling passes.
+        """
+        super().__init__(name="stack-sampler", daemon=True)
+        self.thread_ids = set(thread_ids) if thread_ids is not None else None
+        self.interval = interval
+        self.max_samples = max_samples
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.busy_seconds = 0.0
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            start = time.perf_counter()
+            frames = sys._current_frames()
+            for thread_id, frame in frames.items():
+                if thread_id == own_id or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                self.record(collapse_frame(frame))
+            del frames
+            self.samples += 1
+            self.busy_seconds += time.perf_counter() - start
+            if self.max_samples is not None and self.samples >= self.max_samples:
+                break
+
+    def record(self, stack: str) -> None:
+        """
+        Counts one sample of a collapsed stack.
+
+        Args:
+            stack (str): The collapsed stack.
+        """
+        self.stacks[stack] += 1
+
+    def stop(self) -> None:
+        """Stops sampling and waits for the thread to exit."""
+        self._stopped.set()
+        self.join()
+
+
+class RollingSampler(StackSampler):
+    """
+    A StackSampler that keeps request-thread stacks in time buckets over a rolling window.
+
+    Attributes:
+        window_seconds (int): How much history to keep.
+        bucket_seconds (int): The granularity at which old samples expire.
+    """
+
+    def __init__(self, interval: float = SAMPLING_PROFILER_INTERVAL_MS / 1000,
+                 window_seconds: int = SAMPLING_PROFILER_WINDOW_SECONDS,
+                 bucket_seconds: int = SAMPLING_PROFILER_BUCKET_SECONDS):
+        super().__init__(interval=interval)
+        self.name = "rolling-sampler"
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._buckets: deque = deque()
+
+    def record(self, stack: str) -> None:
+        """
+        Counts a sample into the current bucket if it comes from a request thread.
+
+        Args:
+            stack (str): The collapsed stack.
+        """
+        if REQUEST_FRAME not in stack:
+            return
+        now = time.monotonic()
+        bucket_start = now - now % self.bucket_seconds
+        with self._lock:
+            if not self._buckets or self._buckets[-1][0] != bucket_start:
+                self._buckets.append((bucket_start, Counter()))
+                while self._buckets and self._buckets[0][0] <= now - self.window_seconds:
+                    self._buckets.popleft()
+            self._buckets[-1][1][stack] += 1
+
+    def aggregate(self, seconds: Optional[int] = None) -> Counter:
+        """
+        Sums the buckets within the last seconds of the window.
+
+        Args:
+            seconds (int, optional): How far back to look. Defaults to the whole window.
+
+        Returns:
+            Counter: Sample counts keyed by collapsed stack.
+        """
+        cutoff = time.monotonic() - min(seconds or self.window_seconds, self.window_seconds)
+        total = Counter()
+        with self._lock:
+            for bucket_start, stacks in self._buckets:
+                if bucket_start + self.bucket_seconds > cutoff:
+                    total.update(stacks)
+        return total
+
+    def overhead_pct(self) -> float:
+        """
+        Returns the share of wall time spent sampling since the sampler started.
+
+        Returns:
+            float: The overhead as a percentage of one core.
+        """
+        elapsed = time.monotonic() - self.started_at
+        return round(100.0 * self.busy_seconds / elapsed, 3) if elapsed > 0 else 0.0
+
+
+####################################################
+#
+# Per-request profiles
+#
+####################################################
+
+class ProfileStore:
+    """
+    Keeps the most recent request profiles in memory, and on disk when PROFILE_DIR is set.
+    """
+
+    def __init__(self, max_profiles: int = PROFILE_HISTORY, directory: Optional[str] = PROFILE_DIR):
+        self.max_profiles = max_profiles
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._profiles: OrderedDict = OrderedDict()
+
+    def save(self, profile: dict) -> None:
+        """
+        Stores a profile, evicting the oldest one when the store is full.
+
+        Args:
+            profile (dict): The profile, including its 'id' and 'stacks'.
+        """
+        with self._lock:
+            self._profiles[profile["id"]] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            base = os.path.join(self.directory, profile["id"])
+            with open(base + ".collapsed", "w") as f:
+                f.write(format_collapsed(profile["stacks"]))
+            with open(base + ".json", "w") as f:
+                json.dump(summarize_profile(profile), f, indent=2)
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        """
+        Retrieves a stored profile.
+
+        Args:
+            profile_id (str): The id returned in the X-Profile-Id header.
+
+        Returns:
+            dict: The profile, or None if it is unknown or has been evicted.
+        """
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+
+profile_store = ProfileStore()
+
+# The background sampler, started by start_sampling_profiler
+rolling_sampler: Optional[RollingSampler] = None
+
+
+def start_sampling_profiler() -> RollingSampler:
+    """
+    Starts the background RollingSampler if it is not already running in this process.
+
+    Returns:
+        RollingSampler: The running sampler.
+    """
+    global rolling_sampler
+    if rolling_sampler is None or not rolling_sampler.is_alive():
+        rolling_sampler = RollingSampler()
+        rolling_sampler.start()
+        logger.info("Sampling profiler started (every %.1f ms, %d s window)",
+                    SAMPLING_PROFILER_INTERVAL_MS, SAMPLING_PROFILER_WINDOW_SECONDS)
+    return rolling_sampler
+
+
+def summarize_profile(profile: dict, limit: int = 20) -> dict:
+    """
+    Builds the JSON summary of a profile.
+
+    Args:
+        profile (dict): The stored profile.
+        limit (int): The number of top functions to include.
+
+    Returns:
+        dict: Request details, sample counts and the top functions.
+    """
+    return {
+        "id": profile["id"],
+        "method": profile["method"],
+        "path": profile["path"],
+        "duration_ms": profile["duration_ms"],
+        "samples": profile["samples"],
+        "truncated": profile["truncated"],
+        "top_functions": top_functions(profile["stacks"], limit),
+    }
+
+
+def profile_requested(request) -> bool:
+    """
+    Checks whether a request asked to be profiled.
+
+    Args:
+        request: The Flask request.
+
+    Returns:
+        bool: True if the X-Profile header or the profile query flag is set.
+    """
+    flag = request.headers.get("X-Profile") or request.args.get("profile")
+    return flag is not None and flag.lower() in ("1", "true", "yes")
+
+
+def init_app(app) -> None:
+    """
+    Registers profiling on a Flask app.
+
+    With SAMPLING_PROFILER_ENABLED the background RollingSampler is started.
+    With PROFILING_ENABLED a request that asks for it is sampled by a StackSampler
+    for its duration (capped at PROFILE_MAX_SAMPLES), stored in profile_store, and
+    answered with an X-Profile-Id header.
+
+    Args:
+        app (Flask): The application to instrument.
+    """
+    if SAMPLING_PROFILER_ENABLED:
+        start_sampling_profiler()
+
+    if not PROFILING_ENABLED:
+        return
+
+    from flask import g, request
+
+    @app.before_request
+    def _start_profile():
+        if not profile_requested(request):
+            return
+        sampler = StackSampler(thread_ids=[threading.get_ident()],
+                               interval=PROFILE_SAMPLE_INTERVAL_MS / 1000,
+                               max_samples=PROFILE_MAX_SAMPLES)
+        g.profile = (sampler, time.perf_counter())
+        sampler.start()
+
+    @app.after_request
+    def _stop_profile(response):
+        profile = g.pop("profile", None)
+        if profile is None:
+            return response
+        sampler, start = profile
+        sampler.stop()
+
+        profile_id = uuid.uuid4().hex
+        profile_store.save({
+            "id": profile_id,
+            "method": request.method,
+            "path": request.path,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+            "samples": sampler.samples,
+            "truncated": sampler.samples >= PROFILE_MAX_SAMPLES,
+            "stacks": sampler.stacks,
+        })
+        logger.info("Profiled %s %s (%d samples) as %s", request.method, request.path, sampler.samples, profile_id)
+        response.headers["X-Profile-Id"] = profile_id
+        return response
+
+    @app.teardown_request
+    def _discard_profile(exc):
+        # after_request is skipped when a request fails outright, so make sure the sampler stops
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profile[0].stop()
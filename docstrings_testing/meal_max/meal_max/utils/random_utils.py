@@ -1,5 +1,5 @@
 import logging
-import requests
+import os
 
 from meal_max.utils.logger import configure_logger
 
@@ -7,8 +7,16 @@ logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+# Overridable so load tests can point at a local stand-in
+RANDOM_ORG_URL = os.getenv("RANDOM_ORG_URL", "https://www.random.org").rstrip("/")
+
+
 def get_random() -> float:
-    url = "https://www.random.org/decimal-fractions/?num=1&dec=2&col=1&format=plain&rnd=new"
+    # requests (with urllib3 and certifi) is the costliest import of the app and only the
+    # random.org calls need it, so it is imported on first use rather than at startup
+    import requests
+
+    url = f"{RANDOM_ORG_URL}/decimal-fractions/?num=1&dec=2&col=1&format=plain&rnd=new"
 
     try:
         # Log the request to random.org
@@ -36,3 +44,95 @@ def get_random() -> float:
     except requests.exceptions.RequestException as e:
         logger.error("Request to random.org failed: %s", e)
         raise RuntimeError("Request to random.org failed: %s" % e)
+
+
+def get_quota(timeout: float = 2) -> int:
+    """
+    Fetches the remaining random.org bit quota for this client, as a cheap availability probe.
+
+    Args:
+        timeout (float): Seconds to wait for random.org.
+
+    Returns:
+        int: The remaining quota in bits; random.org refuses requests once it is negative.
+
+    Raises:
+        RuntimeError: If the request to random.org fails or returns an invalid response.
+    """
+    import requests
+
+    url = f"{RANDOM_ORG_URL}/quota/?format=plain"
+    try:
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        return int(response.text.strip())
+    except ValueError:
+        raise RuntimeError("Invalid quota response from random.org: %s" % response.text.strip())
+    except requests.exceptions.RequestException as e:
+        raise RuntimeError("Quota request to random.org failed: %s" % e)
+
+
+####################################################
+#
+# Async client (for the ASGI variant)
+#
+####################################################
+
+# One pooled client per process; httpx is only needed by asgi.py, so it is imported on first use
+_async_client = None
+
+
+def _get_async_client():
+    global _async_client
+    if _async_client is None:
+        import httpx
+        _async_client = httpx.AsyncClient(timeout=5)
+    return _async_client
+
+
+async def close_async_client() -> None:
+    """Closes the pooled async client, if one was opened."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+async def _fetch_async(url: str) -> str:
+    import httpx
+
+    try:
+        logger.info("Fetching random number from %s", url)
+        response = await _get_async_client().get(url)
+        response.raise_for_status()
+        return response.text.strip()
+
+    except httpx.TimeoutException:
+        logger.error("Request to random.org timed out.")
+        raise RuntimeError("Request to random.org timed out.")
+
+    except httpx.HTTPError as e:
+        logger.error("Request to random.org failed: %s", e)
+        raise RuntimeError("Request to random.org failed: %s" % e)
+
+
+async def get_random_async() -> float:
+    """
+    Async version of get_random, which waits on random.org without holding a thread.
+
+    Returns:
+        float: The random number fetched from random.org.
+
+    Raises:
+        RuntimeError: If the request to random.org fails.
+        ValueError: If the response from random.org is not a valid float.
+    """
+    random_number_str = await _fetch_async(
+        f"{RANDOM_ORG_URL}/decimal-fractions/?num=1&dec=2&col=1&format=plain&rnd=new")
+    try:
+        random_number = float(random_number_str)
+    except ValueError:
+        raise ValueError("Invalid response from random.org: %s" % random_number_str)
+
+    logger.info("Received random number: %.3f", random_number)
+    return random_number
@@ -0,0 +1,115 @@
+import importlib
+import logging
+import os
+import time
+from typing import Optional
+
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.sql_utils import get_db_connection
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Pay the first requests' one-time costs before serving (see warm_up); off, the app starts sooner
+WARM_UP_ENABLED = os.getenv("WARM_UP_ENABLED", "false").lower() == "true"
+# Modules the app imports on first use, which warm_up imports ahead of time
+WARM_UP_IMPORTS = [m.strip() for m in os.getenv("WARM_UP_IMPORTS", "requests").split(",") if m.strip()]
+# GET routes warm_up sends one request to
+WARM_UP_PATHS = ["/api/health", "/api/db-check"]
+
+
+def find_env_file(start_dir: str) -> Optional[str]:
+    """
+    Looks for a .env file in start_dir and then its parents, as python-dotenv's find_dotenv does.
+
+    Args:
+        start_dir (str): The directory to start from.
+
+    Returns:
+        str: The path of the nearest .env file, or None if there is none.
+    """
+    directory = os.path.abspath(start_dir)
+    while True:
+        path = os.path.join(directory, ".env")
+        if os.path.isfile(path):
+            return path
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+def load_env_file(start_dir: str) -> Optional[str]:
+    """
+    Loads the nearest .env file into the environment, importing python-dotenv only when there is one.
+
+    Variables already set in the environment win, as with load_dotenv.
+
+    Args:
+        start_dir (str): The directory to start looking from, normally the app's own.
+
+    Returns:
+        str: The path of the file loaded, or None if there was none.
+    """
+    path = find_env_file(start_dir)
+    if path is None:
+        return None
+    from dotenv import load_dotenv
+
+    load_dotenv(path)
+    return path
+
+
+def warm_up(app, table: str) -> dict:
+    """
+    Pays the one-time costs of the first requests before the app serves any.
+
+    Imports the modules deferred to first use (WARM_UP_IMPORTS), reads the whole table
+    once so its pages are in the OS cache, and sends one request to each of WARM_UP_PATHS
+    through the app, which builds the URL matcher and the parts of Flask and Werkzeug
+    created on first use. Statements are not prepared ahead: SQLite caches them per
+    connection, and every request opens its own.
+
+    Failures are logged rather than raised, so the server still starts and reports
+    itself unready through /api/ready.
+
+    Args:
+        app (Flask): The application, with its routes registered.
+        table (str): The table the routes read, e.g. 'meals'.
+
+    Returns:
+        dict: Milliseconds spent on each step ('imports', 'database', 'requests').
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    for module in WARM_UP_IMPORTS:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            logger.warning("Warm-up could not import %s: %s", module, e)
+    timings["imports"] = round((time.perf_counter() - start) * 1000, 3)
+
+    start = time.perf_counter()
+    try:
+        with get_db_connection() as conn:
+            # NOT INDEXED makes SQLite count through the table itself rather than its smallest index
+            rows = conn.execute(f"SELECT COUNT(*) FROM {table} NOT INDEXED").fetchone()[0]
+        logger.info("Warm-up read %d rows of %s", rows, table)
+    except Exception as e:
+        logger.warning("Warm-up could not read the %s table: %s", table, e)
+    timings["database"] = round((time.perf_counter() - start) * 1000, 3)
+
+    start = time.perf_counter()
+    client = app.test_client()
+    for path in WARM_UP_PATHS:
+        status = client.get(path).status_code
+        if status >= 400:
+            logger.warning("Warm-up request to %s returned %d", path, status)
+    timings["requests"] = round((time.perf_counter() - start) * 1000, 3)
+
+    logger.info("Warmed up in %.1f ms (%s)", sum(timings.values()),
+                ", ".join(f"{step} {ms:.1f} ms" for step, ms in timings.items()))
+    return timings
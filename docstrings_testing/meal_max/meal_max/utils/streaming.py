@@ -0,0 +1,125 @@
+from itertools import chain
+import logging
+import os
+from typing import Any, Callable, Iterable, Iterator
+
+from meal_max.utils.json_provider import FastJSONProvider
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Encoded rows are gathered into writes of about this many bytes; smaller means an earlier first byte
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "16384"))
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+# Values of the 'format' query parameter: buffered JSON, one JSON object per line, or a JSON body sent in chunks
+RESPONSE_FORMATS = ("json", "ndjson", "json-stream")
+
+
+def response_format() -> str:
+    """
+    Picks the representation of a list endpoint for the current request.
+
+    The 'format' query parameter wins. Without it, clients that prefer
+    application/x-ndjson in their Accept header get NDJSON.
+
+    Returns:
+        str: One of RESPONSE_FORMATS.
+    """
+    from flask import request
+
+    requested = request.args.get("format", "").lower()
+    if requested in RESPONSE_FORMATS:
+        return requested
+    if request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE]) == NDJSON_MIMETYPE:
+        return "ndjson"
+    return "json"
+
+
+def _encoder() -> Callable[[Any], bytes]:
+    from flask import current_app
+
+    provider = current_app.json
+    if isinstance(provider, FastJSONProvider):
+        return provider.encode
+    return lambda obj: provider.dumps(obj).encode()
+
+
+def _chunked(pieces: Iterable[bytes], size: int) -> Iterator[bytes]:
+    """Joins small pieces into chunks of at least size bytes, so each row is not its own write."""
+    buffer = bytearray()
+    for piece in pieces:
+        buffer += piece
+        if len(buffer) >= size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def _ndjson_lines(rows: Iterator, encode: Callable[[Any], bytes]) -> Iterator[bytes]:
+    try:
+        for row in rows:
+            yield encode(row) + b"\n"
+    except Exception as e:
+        # The 200 status is already sent; a final error line tells the client the stream is incomplete
+        logger.error("Error while streaming rows: %s", str(e))
+        yield encode({"error": str(e)}) + b"\n"
+
+
+def _json_array(rows: Iterator, key: str, fields: dict, encode: Callable[[Any], bytes]) -> Iterator[bytes]:
+    envelope = encode(fields)[:-1]
+    yield envelope + (b"," if fields else b"") + encode(key) + b":["
+    try:
+        for index, row in enumerate(rows):
+            yield (b"," if index else b"") + encode(row)
+    except Exception as e:
+        # Leave the array unterminated so the truncated body does not parse as a complete result
+        logger.error("Error while streaming rows: %s", str(e))
+        return
+    yield b"]}\n"
+
+
+def stream_response(rows: Iterable[Any], key: str, fmt: str, **fields: Any):
+    """
+    Streams rows as NDJSON or as a chunked JSON body, holding one chunk in memory at a time.
+
+    The first row is read before the response is returned, so an error running the
+    query still surfaces as an exception in the route. The row iterator is closed with
+    the response, which releases its database connection if the client goes away early.
+
+    Args:
+        rows (Iterable[Any]): The rows, typically a generator over a cursor.
+        key (str): The field that holds the rows in the JSON body, e.g. 'leaderboard'.
+        fmt (str): 'ndjson' for one row per line, or 'json-stream' for
+            {**fields, key: [rows]} sent as it is encoded.
+        **fields (Any): Other top-level fields of the JSON body, e.g. status='success'.
+
+    Returns:
+        Response: A streamed 200 response.
+    """
+    from flask import current_app
+
+    rows = iter(rows)
+    first = next(rows, None)
+    remaining = chain([] if first is None else [first], rows)
+    encode = _encoder()
+    if fmt == "ndjson":
+        pieces, mimetype = _ndjson_lines(remaining, encode), NDJSON_MIMETYPE
+    else:
+        pieces, mimetype = _json_array(remaining, key, fields, encode), "application/json"
+
+    def body() -> Iterator[bytes]:
+        try:
+            yield from _chunked(pieces, STREAM_CHUNK_SIZE)
+        finally:
+            close = getattr(rows, "close", None)
+            if close is not None:
+                close()
+
+    response = current_app.response_class(body(), mimetype=mimetype)
+    response.vary.add("Accept")
+    return response
@@ -46,6 +46,18 @@ check_db() {
   fi
 }
 
+# Function to check readiness (served from cached background probes)
+check_ready() {
+  echo "Checking readiness..."
+  curl -s -X GET "$BASE_URL/ready" | grep -q '"ready": *true'
+  if [ $? -eq 0 ]; then
+    echo "Service is ready."
+  else
+    echo "Readiness check failed."
+    exit 1
+  fi
+}
+
 
 # Meal Management
 
@@ -0,0 +1,52 @@
+import pytest
+from starlette.testclient import TestClient
+
+import asgi
+from meal_max.utils import admission
+from meal_max.utils.admission import AdmissionController
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def client():
+    return TestClient(asgi.app)
+
+@pytest.fixture
+def battle_controller(mocker):
+    """A battle controller allowing one battle at a time and none waiting."""
+    controller = AdmissionController("battle", max_concurrent=1, max_queue=0, queue_timeout=0.1, rate=0, burst=1)
+    mocker.patch.object(admission, "controllers", {"battle": controller})
+    mocker.patch.object(asgi.battle_model, "combatants", [])
+    return controller
+
+
+######################################################
+#
+#    Admission
+#
+######################################################
+
+def test_battle_over_the_limit_gets_429(client, battle_controller):
+    """Test that the native /api/battle is throttled by the controller of the Flask view it replaces."""
+    assert battle_controller.admit() == (None, 0.0)
+
+    response = client.get("/api/battle")
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert response.json()["reason"] == "queue_full"
+    assert battle_controller.snapshot()["rejected"]["queue_full"] == 1
+
+def test_battle_admitted_is_released(client, battle_controller):
+    """Test that an admitted battle runs and frees its slot, even when the battle fails."""
+    response = client.get("/api/battle")
+
+    assert response.status_code == 500
+    assert "Two combatants" in response.json()["error"]
+    stats = battle_controller.snapshot()
+    assert (stats["admitted"], stats["in_flight"]) == (1, 0)
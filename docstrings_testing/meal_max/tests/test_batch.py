@@ -0,0 +1,227 @@
+import sqlite3
+
+from flask import Flask, g, jsonify, make_response, request
+import pytest
+
+from meal_max.utils import batch, sql_utils
+from meal_max.utils.batch import BatchError, run_batch, validate_operations
+from meal_max.utils.sql_utils import after_commit, get_db_connection
+from meal_max.utils.versioning import VersionCounter
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def meals_db(tmp_path, mocker):
+    """Point sql_utils at a throwaway database with an empty meals table."""
+    db_path = str(tmp_path / "meals.db")
+    mocker.patch.object(sql_utils, "DB_PATH", db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE meals (id INTEGER PRIMARY KEY, meal TEXT UNIQUE)")
+    conn.close()
+    return db_path
+
+
+@pytest.fixture
+def app(meals_db):
+    """A bare Flask app whose routes write the way the real ones do, plus an in-memory combatants."""
+    flask_app = Flask(__name__)
+    flask_app.combatants = []
+    flask_app.meal_version = VersionCounter("meals")
+
+    @flask_app.route("/api/create-meal", methods=["POST"])
+    def create_meal():
+        data = request.get_json()
+        if not data.get("meal"):
+            return make_response(jsonify({"error": "meal is required"}), 400)
+        try:
+            with get_db_connection() as conn:
+                conn.cursor().execute("INSERT INTO meals (meal) VALUES (?)", (data["meal"],))
+                conn.commit()
+        except sqlite3.IntegrityError as e:
+            return make_response(jsonify({"error": str(e)}), 500)
+        flask_app.combatants.append(data["meal"])
+        if data.get("fail_after_write"):
+            return make_response(jsonify({"error": "failed after writing"}), 500)
+        return make_response(jsonify({"status": "success"}), 201)
+
+    @flask_app.route("/api/rename-meal", methods=["POST"])
+    def rename_meal():
+        data = request.get_json()
+        with get_db_connection() as conn:
+            conn.cursor().execute("UPDATE meals SET meal = ? WHERE id = ?", (data["meal"], data["id"]))
+            conn.commit()
+        after_commit(flask_app.meal_version.bump)
+        if data.get("fail_after_write"):
+            return make_response(jsonify({"error": "failed after writing"}), 500)
+        return make_response(jsonify({"status": "success"}), 200)
+
+    @flask_app.route("/api/count-meals", methods=["GET"])
+    def count_meals():
+        with get_db_connection() as conn:
+            count = conn.cursor().execute("SELECT COUNT(*) FROM meals").fetchone()[0]
+        return make_response(jsonify({"count": count, "saw_marker": "marker" in g}), 200)
+
+    @flask_app.route("/api/random", methods=["GET"])
+    @batch.network_bound
+    def random_number():
+        raise AssertionError("called random.org")
+
+    @flask_app.route("/api/mark", methods=["POST"])
+    def mark():
+        g.marker = True
+        return make_response(jsonify({"status": "success"}), 200)
+
+    return flask_app
+
+
+@pytest.fixture
+def checkpoint(app):
+    def save():
+        saved = list(app.combatants)
+
+        def restore():
+            app.combatants[:] = saved
+        return restore
+    return save
+
+
+def create(meal, **extra):
+    return {"method": "POST", "path": "/api/create-meal", "body": {"meal": meal, **extra}}
+
+
+def committed_meals(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute("SELECT meal FROM meals ORDER BY id")]
+    finally:
+        conn.close()
+
+
+######################################################
+#
+#    Validation
+#
+######################################################
+
+@pytest.mark.parametrize("operations,message", [
+    (None, "non-empty list"),
+    ([], "non-empty list"),
+    ([{"method": "GET"}], "with a 'path'"),
+    (["/api/health"], "with a 'path'"),
+    ([{"path": "/health"}], "/api/ route"),
+    ([{"path": "/api/batch"}], "other than /api/batch"),
+])
+def test_validate_operations_invalid(operations, message):
+    """Test that malformed batches are rejected before anything runs."""
+    with pytest.raises(BatchError, match=message):
+        validate_operations(operations)
+
+
+def test_validate_operations_too_many(mocker):
+    """Test the operation limit."""
+    mocker.patch.object(batch, "BATCH_MAX_OPERATIONS", 2)
+    with pytest.raises(BatchError, match="at most 2"):
+        validate_operations([{"path": "/api/health"}] * 3)
+
+
+def test_validate_operations_defaults():
+    """Test that the method defaults to GET and is upper-cased."""
+    assert validate_operations([{"path": "/api/health"}, {"method": "post", "path": "/api/x", "body": {"a": 1}}]) == [
+        {"method": "GET", "path": "/api/health", "body": None},
+        {"method": "POST", "path": "/api/x", "body": {"a": 1}},
+    ]
+
+
+######################################################
+#
+#    Running batches
+#
+######################################################
+
+def test_run_batch(app, meals_db, mocker):
+    """Test that operations run in order on one connection and see each other's writes."""
+    connect = mocker.spy(sql_utils, "connect")
+    operations = validate_operations([create("a"), create("b"), {"path": "/api/count-meals"}])
+
+    body, status_code = run_batch(app, operations)
+
+    assert status_code == 200
+    assert body["status"] == "success"
+    assert [result["status"] for result in body["results"]] == [201, 201, 200]
+    assert body["results"][2]["body"]["count"] == 2
+    assert connect.call_count == 1
+    assert committed_meals(meals_db) == ["a", "b"]
+
+
+def test_run_batch_partial(app, meals_db):
+    """Test that a failed operation's writes are undone while the others commit."""
+    operations = validate_operations([
+        create("a"), create("b", fail_after_write=True), create(""), {"path": "/api/missing"}, create("c"),
+    ])
+
+    body, status_code = run_batch(app, operations)
+
+    assert status_code == 200
+    assert body["status"] == "partial"
+    assert [result["status"] for result in body["results"]] == [201, 500, 400, 404, 201]
+    assert committed_meals(meals_db) == ["a", "c"]
+
+
+def test_run_batch_partial_drops_failed_callbacks(app, meals_db):
+    """Test that after_commit callbacks of an operation rolled back to its savepoint do not run."""
+    def rename(meal_id, meal, **extra):
+        return {"method": "POST", "path": "/api/rename-meal", "body": {"id": meal_id, "meal": meal, **extra}}
+    operations = validate_operations([create("a"), rename(1, "b"), rename(1, "c", fail_after_write=True),
+                                      rename(1, "d")])
+
+    body, _ = run_batch(app, operations)
+
+    assert [result["status"] for result in body["results"]] == [201, 200, 500, 200]
+    assert committed_meals(meals_db) == ["d"]
+    assert app.meal_version.value == 2
+
+
+def test_run_batch_atomic_rolls_back(app, meals_db, checkpoint):
+    """Test that an atomic batch undoes everything, restores memory and skips the rest."""
+    app.combatants.append("existing")
+    operations = validate_operations([create("a"), create("a"), create("b")])
+
+    body, status_code = run_batch(app, operations, atomic=True, checkpoint=checkpoint)
+
+    assert status_code == 500
+    assert body["status"] == "rolled_back"
+    assert body["results"][0]["status"] == 201
+    assert body["results"][1]["status"] == 500
+    assert body["results"][2] == {"skipped": True}
+    assert committed_meals(meals_db) == []
+    assert app.combatants == ["existing"]
+
+
+def test_run_batch_atomic_success(app, meals_db, checkpoint):
+    """Test that a successful atomic batch commits and keeps memory changes."""
+    body, status_code = run_batch(app, validate_operations([create("a"), create("b")]), atomic=True,
+                                  checkpoint=checkpoint)
+
+    assert (body["status"], status_code) == ("success", 200)
+    assert committed_meals(meals_db) == ["a", "b"]
+    assert app.combatants == ["a", "b"]
+
+
+def test_run_batch_refuses_network_bound(app, meals_db):
+    """Test that a batch calling a route that waits on random.org is refused before anything runs."""
+    operations = validate_operations([create("a"), {"path": "/api/random?count=2"}])
+
+    with pytest.raises(BatchError, match=r"Operation 1 \(/api/random\?count=2\) waits on a remote service"):
+        run_batch(app, operations)
+    assert committed_meals(meals_db) == []
+
+
+def test_operations_do_not_share_g(app, meals_db):
+    """Test that flask.g set by one operation is not visible to the next."""
+    body, _ = run_batch(app, validate_operations([{"method": "POST", "path": "/api/mark"}, {"path": "/api/count-meals"}]))
+    assert body["results"][1]["body"]["saw_marker"] is False
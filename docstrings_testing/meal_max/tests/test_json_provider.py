@@ -0,0 +1,188 @@
+from datetime import datetime, timezone
+import json
+
+from flask import Flask, request
+import pytest
+
+from meal_max.models.kitchen_model import Meal
+from meal_max.utils import json_provider
+from meal_max.utils.json_provider import EncodedResponseCache, FastJSONProvider
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def app(mocker):
+    """A bare Flask app using FastJSONProvider."""
+    mocker.patch.object(json_provider, "JSON_PROVIDER", "fast")
+    flask_app = Flask(__name__)
+    json_provider.init_app(flask_app)
+    return flask_app
+
+
+@pytest.fixture
+def stdlib_only(mocker):
+    """Encode as if orjson were not installed."""
+    mocker.patch.object(json_provider, "orjson", None)
+
+
+@pytest.fixture
+def cache_enabled(mocker):
+    """Turn the encoded response cache on with a fresh cache."""
+    mocker.patch.object(json_provider, "JSON_CACHE_ENABLED", True)
+    mocker.patch.object(json_provider, "encoded_response_cache", EncodedResponseCache(max_entries=2))
+    return json_provider.encoded_response_cache
+
+
+@pytest.fixture
+def sample_meal():
+    return Meal(1, "Pad Thai", "Thai", 12.5, "MED")
+
+
+######################################################
+#
+#    Encoding
+#
+######################################################
+
+def test_init_app_installs_provider(app):
+    """Test that init_app replaces Flask's provider."""
+    assert isinstance(app.json, FastJSONProvider)
+
+
+def test_init_app_default_keeps_flask_provider(mocker):
+    """Test that JSON_PROVIDER=default leaves Flask's provider in place."""
+    mocker.patch.object(json_provider, "JSON_PROVIDER", "default")
+    flask_app = Flask(__name__)
+    json_provider.init_app(flask_app)
+    assert not isinstance(flask_app.json, FastJSONProvider)
+
+
+@pytest.mark.parametrize("orjson_installed", [True, False])
+def test_encode_dataclass(app, sample_meal, mocker, orjson_installed):
+    """Test that a Meal encodes to the same fields as Flask's provider, in field order."""
+    if not orjson_installed:
+        mocker.patch.object(json_provider, "orjson", None)
+    body = app.json.encode({"status": "success", "meal": sample_meal})
+
+    assert body == (b'{"status":"success","meal":{"id":1,"meal":"Pad Thai","cuisine":"Thai",'
+                    b'"price":12.5,"difficulty":"MED"}}')
+
+
+def test_keys_are_not_sorted(app, stdlib_only):
+    """Test that keys keep their insertion order."""
+    assert app.json.dumps({"b": 1, "a": 2}) == '{"b":1,"a":2}'
+
+
+def test_encode_datetime_like_flask(app):
+    """Test that datetimes use the HTTP date format, as Flask's provider does."""
+    moment = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    assert json.loads(app.json.encode({"at": moment})) == {"at": "Tue, 02 Jan 2024 03:04:05 GMT"}
+
+
+def test_encode_unsupported_type(app):
+    """Test that an unsupported type raises TypeError."""
+    with pytest.raises(TypeError):
+        app.json.encode({"value": object()})
+
+
+def test_loads_round_trip(app, sample_meal):
+    """Test that what is encoded decodes again."""
+    assert app.json.loads(app.json.dumps([sample_meal])) == [sample_meal.__dict__]
+
+
+def test_response(app, sample_meal):
+    """Test that jsonify goes through the provider."""
+    with app.app_context():
+        response = app.json.response({"meal": sample_meal})
+
+    assert response.mimetype == "application/json"
+    assert response.get_data().endswith(b"}\n")
+    assert json.loads(response.get_data())["meal"]["meal"] == "Pad Thai"
+
+
+def test_request_json_parsing(app):
+    """Test that request bodies are parsed by the provider, including invalid ones."""
+    @app.route("/echo", methods=["POST"])
+    def echo():
+        return {"got": request.get_json()}
+
+    client = app.test_client()
+    assert client.post("/echo", json={"id": 1}).get_json() == {"got": {"id": 1}}
+    assert client.post("/echo", data="{", content_type="application/json").status_code == 400
+
+
+######################################################
+#
+#    Encoded response cache
+#
+######################################################
+
+def test_cache_hit_and_miss_by_version():
+    """Test that an entry is reused until its version changes."""
+    cache = EncodedResponseCache()
+    build_calls = []
+
+    def build():
+        build_calls.append(1)
+        return [1, 2, 3]
+
+    assert cache.get_or_encode("leaderboard", 1, build, lambda payload: str(payload).encode()) == b"[1, 2, 3]"
+    cache.get_or_encode("leaderboard", 1, build, lambda payload: str(payload).encode())
+    assert (cache.hits, cache.misses, len(build_calls)) == (1, 1, 1)
+
+    cache.get_or_encode("leaderboard", 2, build, lambda payload: str(payload).encode())
+    assert (cache.hits, cache.misses, len(build_calls)) == (1, 2, 2)
+
+
+def test_cache_evicts_least_recently_used():
+    """Test that entries beyond max_entries are evicted oldest first."""
+    cache = EncodedResponseCache(max_entries=2)
+    for key in ("a", "b", "a", "c"):
+        cache.get_or_encode(key, 1, lambda: key, str.encode)
+
+    cache.get_or_encode("b", 1, lambda: "b", str.encode)
+    assert cache.misses == 4
+    cache.get_or_encode("a", 1, lambda: "a", str.encode)
+    assert cache.misses == 5
+
+
+def test_cached_json_response(app, cache_enabled, sample_meal):
+    """Test that a cached response matches an uncached one and is only built once per version."""
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {"status": "success", "leaderboard": [sample_meal]}
+
+    with app.app_context():
+        first = json_provider.cached_json_response("leaderboard", 1, build)
+        second = json_provider.cached_json_response("leaderboard", 1, build)
+        expected = app.json.response(build())
+
+    assert first.get_data() == second.get_data() == expected.get_data()
+    assert (cache_enabled.hits, cache_enabled.misses) == (1, 1)
+
+
+def test_cached_json_response_disabled(app, mocker):
+    """Test that nothing is cached when JSON_CACHE_ENABLED is off."""
+    mocker.patch.object(json_provider, "JSON_CACHE_ENABLED", False)
+    mock_cache = mocker.patch.object(json_provider, "encoded_response_cache")
+
+    with app.app_context():
+        response = json_provider.cached_json_response("leaderboard", 1, lambda: {"leaderboard": []})
+
+    assert response.get_json() == {"leaderboard": []}
+    mock_cache.get_or_encode.assert_not_called()
+
+
+def test_cached_json_response_without_version(app, cache_enabled):
+    """Test that an unknown version is never cached."""
+    with app.app_context():
+        json_provider.cached_json_response("leaderboard", None, lambda: {"leaderboard": []})
+
+    assert (cache_enabled.hits, cache_enabled.misses) == (0, 0)
@@ -5,6 +5,7 @@ import re
 
 
 
+from meal_max.models import kitchen_model
 from meal_max.models.kitchen_model import *
 
 def normalize_whitespace(sql_query: str) -> str:
@@ -302,6 +303,22 @@ def test_get_learderboard_win_pct_sort(mock_cursor):
     assert actual_query == expected_query, "The SQL query did not match the expected structure."
 
 
+def test_get_leaderboard_keyed_by_versions(mocker, mock_cursor):
+    """
+    Tests that leaderboard reads are shared only between calls with the same sort and data versions
+    """
+    do = mocker.spy(kitchen_model.leaderboard_reads, "do")
+
+    get_leaderboard("wins")
+    kitchen_model.stats_version.bump()
+    get_leaderboard("wins")
+
+    first, second = (call.args[0] for call in do.call_args_list)
+    assert first[:2] == second[:2] == ("leaderboard", "wins")
+    assert second[3] == first[3] + 1
+    assert mock_cursor.execute.call_count == 2
+
+
 def test_get_leaderboard_invalid_sort_by():
     """ 
     Tests a leaderboard request with an invalid 'sort_by' to ensure ValueError is raised
@@ -312,6 +329,53 @@ def test_get_leaderboard_invalid_sort_by():
         get_leaderboard("invalid_sort")
 
 
+def test_iter_leaderboard(mock_cursor):
+    """
+    Tests streaming the leaderboard fetches rows in batches rather than all at once
+    """
+
+    # Simulate two batches of rows followed by an exhausted cursor
+    mock_cursor.fetchmany.side_effect = [
+        [(1, 'Borsch', 'Ukrainian', 12.99, 'MED', 5, 4, 0.8)],
+        [(2, 'Limoncello Al Farfalle', 'Italian', 24.99, 'HIGH', 20, 12, 0.6)],
+        []
+    ]
+
+    leaderboard = iter_leaderboard("wins", batch_size=1)
+
+    # Nothing is queried until the generator is iterated
+    assert not mock_cursor.execute.called
+
+    expected_leaderboard = [
+        {'id': 1, 'meal': 'Borsch', 'cuisine': 'Ukrainian', 'price': 12.99, 'difficulty': 'MED', 'battles': 5, 'wins': 4, 'win_pct': 80.0},
+        {'id': 2, 'meal': 'Limoncello Al Farfalle', 'cuisine': 'Italian', 'price': 24.99, 'difficulty': 'HIGH', 'battles': 20, 'wins': 12, 'win_pct': 60.0}
+    ]
+    assert list(leaderboard) == expected_leaderboard
+
+    mock_cursor.fetchmany.assert_called_with(1)
+    assert not mock_cursor.fetchall.called
+
+    expected_query = normalize_whitespace("""
+        SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles) AS win_pct
+        FROM meals
+        WHERE deleted = false AND battles > 0
+        ORDER BY wins DESC
+    """)
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+
+    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+
+
+def test_iter_leaderboard_invalid_sort_by():
+    """
+    Tests that streaming the leaderboard with an invalid 'sort_by' raises ValueError on first read
+    """
+
+    leaderboard = iter_leaderboard("invalid_sort")
+    with pytest.raises(ValueError, match="Invalid sort_by parameter"):
+        next(leaderboard)
+
+
 
 # get_meal_by_id
 
@@ -512,3 +576,34 @@ def test_update_meal_stats_invalid_result(mock_cursor):
     with pytest.raises(ValueError, match="Invalid result: invalid_result. Expected 'win' or 'loss'."):
         update_meal_stats(1, 'invalid_result')
 
+
+
+# Version testing
+
+def test_catalog_version_bumped_on_create_and_delete(mock_cursor):
+    """
+    Tests that creating and deleting meals bump the catalog version but not the stats version
+    """
+    catalog, stats = catalog_version.value, stats_version.value
+
+    create_meal("Pad Thai", "Thai", 12.5, "MED")
+    mock_cursor.fetchone.return_value = (False,)
+    delete_meal(1)
+
+    assert catalog_version.value == catalog + 2
+    assert stats_version.value == stats
+
+
+def test_stats_version_bumped_on_battle(mock_cursor):
+    """
+    Tests that a recorded battle result bumps the stats version, and an invalid one does not
+    """
+    mock_cursor.fetchone.return_value = (False,)
+    stats = stats_version.value
+
+    update_meal_stats(1, 'win')
+    assert stats_version.value == stats + 1
+
+    with pytest.raises(ValueError):
+        update_meal_stats(1, 'invalid_result')
+    assert stats_version.value == stats + 1
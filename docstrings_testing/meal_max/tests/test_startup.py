@@ -0,0 +1,139 @@
+import logging
+import os
+import sqlite3
+import subprocess
+import sys
+
+from flask import Flask, jsonify, make_response
+import pytest
+
+from meal_max.utils import sql_utils, startup
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.startup import find_env_file, load_env_file, warm_up
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def meals_db(tmp_path, mocker):
+    """Point sql_utils at a throwaway database with two meals."""
+    db_path = str(tmp_path / "meals.db")
+    mocker.patch.object(sql_utils, "DB_PATH", db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE meals (id INTEGER PRIMARY KEY, meal TEXT UNIQUE)")
+    conn.executemany("INSERT INTO meals (meal) VALUES (?)", [("a",), ("b",)])
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+@pytest.fixture
+def app(mocker):
+    """A bare Flask app that counts requests to the warm-up routes."""
+    mocker.patch.object(startup, "WARM_UP_PATHS", ["/api/health", "/api/missing"])
+    mocker.patch.object(startup, "WARM_UP_IMPORTS", ["json", "no_such_module"])
+    flask_app = Flask(__name__)
+    flask_app.requests = 0
+
+    @flask_app.route("/api/health")
+    def health():
+        flask_app.requests += 1
+        return make_response(jsonify({"status": "healthy"}), 200)
+
+    return flask_app
+
+
+######################################################
+#
+#    Environment files
+#
+######################################################
+
+def test_find_env_file(tmp_path):
+    """Test that the nearest .env file in the directory or its parents is found."""
+    nested = tmp_path / "a" / "b"
+    nested.mkdir(parents=True)
+    (tmp_path / ".env").write_text("X=1\n")
+    assert find_env_file(str(nested)) == str(tmp_path / ".env")
+
+    (nested / ".env").write_text("X=2\n")
+    assert find_env_file(str(nested)) == str(nested / ".env")
+
+
+def test_load_env_file(tmp_path, monkeypatch):
+    """Test that variables are loaded without overriding the environment."""
+    (tmp_path / ".env").write_text("STARTUP_TEST_NEW=from-file\nSTARTUP_TEST_SET=from-file\n")
+    monkeypatch.setenv("STARTUP_TEST_SET", "from-env")
+    monkeypatch.delenv("STARTUP_TEST_NEW", raising=False)
+
+    assert load_env_file(str(tmp_path)) == str(tmp_path / ".env")
+    assert os.environ["STARTUP_TEST_NEW"] == "from-file"
+    assert os.environ["STARTUP_TEST_SET"] == "from-env"
+    monkeypatch.delenv("STARTUP_TEST_NEW")
+
+
+def test_load_env_file_without_file(tmp_path, mocker):
+    """Test that python-dotenv is not used when there is nothing to load."""
+    mocker.patch.object(startup, "find_env_file", return_value=None)
+    load_dotenv = mocker.patch("dotenv.load_dotenv")
+
+    assert load_env_file(str(tmp_path)) is None
+    load_dotenv.assert_not_called()
+
+
+def test_app_import_defers_requests():
+    """Test that importing the app does not import requests; a fresh interpreter is needed to tell."""
+    code = "import sys, app; assert 'requests' not in sys.modules, 'requests was imported'"
+    env = dict(os.environ, HEALTH_PROBER_ENABLED="false")
+    result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_DIR, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+
+######################################################
+#
+#    Warm-up
+#
+######################################################
+
+def test_warm_up(app, meals_db, caplog):
+    """Test that warm-up imports, reads the table and calls each route, logging what failed."""
+    timings = warm_up(app, "meals")
+
+    assert set(timings) == {"imports", "database", "requests"}
+    assert app.requests == 1
+    assert "Warm-up read 2 rows of meals" in caplog.text
+    assert "could not import no_such_module" in caplog.text
+    assert "request to /api/missing returned 404" in caplog.text
+
+
+def test_warm_up_missing_table(app, meals_db, caplog):
+    """Test that a missing table is logged rather than raised."""
+    warm_up(app, "songs")
+
+    assert "could not read the songs table" in caplog.text
+    assert app.requests == 1
+
+
+######################################################
+#
+#    Logging
+#
+######################################################
+
+def test_configure_logger_is_idempotent():
+    """Test that configuring a logger again adds no handlers, and all loggers share one."""
+    first = logging.getLogger("startup_test.first")
+    second = logging.getLogger("startup_test.second")
+    configure_logger(first)
+    configure_logger(first)
+    configure_logger(second)
+
+    assert len(first.handlers) == 1
+    assert first.handlers == second.handlers
@@ -0,0 +1,144 @@
+import json
+
+from flask import Flask, request
+import pytest
+
+from meal_max.utils import json_provider, streaming
+from meal_max.utils.streaming import response_format, stream_response
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+class Rows:
+    """A row generator that records how far it was read and whether it was closed."""
+
+    def __init__(self, count, fail_at=None):
+        self.count = count
+        self.fail_at = fail_at
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.read == self.fail_at:
+            raise RuntimeError("cursor failed")
+        if self.read >= self.count:
+            raise StopIteration
+        self.read += 1
+        return {"id": self.read, "meal": f"Meal {self.read}"}
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(params=["fast", "default"])
+def app(request, mocker):
+    """A bare Flask app with the fast JSON provider, then with Flask's own."""
+    mocker.patch.object(streaming, "STREAM_CHUNK_SIZE", 256)
+    flask_app = Flask(__name__)
+    if request.param == "fast":
+        json_provider.init_app(flask_app)
+    flask_app.rows = None
+
+    @flask_app.route("/meals")
+    def meals():
+        return stream_response(flask_app.rows, "leaderboard", response_format(), status="success")
+
+    return flask_app
+
+
+######################################################
+#
+#    Negotiation
+#
+######################################################
+
+@pytest.mark.parametrize("path,headers,expected", [
+    ("/meals", {}, "json"),
+    ("/meals?format=ndjson", {}, "ndjson"),
+    ("/meals?format=JSON-STREAM", {}, "json-stream"),
+    ("/meals?format=xml", {}, "json"),
+    ("/meals", {"Accept": "application/x-ndjson"}, "ndjson"),
+    ("/meals", {"Accept": "application/json, application/x-ndjson;q=0.5"}, "json"),
+    ("/meals", {"Accept": "*/*"}, "json"),
+    ("/meals?format=json", {"Accept": "application/x-ndjson"}, "json"),
+])
+def test_response_format(app, path, headers, expected):
+    """Test choosing the representation from the query string and the Accept header."""
+    with app.test_request_context(path, headers=headers):
+        assert response_format() == expected
+
+
+######################################################
+#
+#    Streaming
+#
+######################################################
+
+def test_ndjson(app):
+    """Test one row per line, sent in several chunks, with the source closed at the end."""
+    app.rows = Rows(50)
+    response = app.test_client().get("/meals?format=ndjson")
+
+    assert response.is_streamed
+    assert response.mimetype == "application/x-ndjson"
+    assert "Accept" in response.headers["Vary"]
+    lines = response.get_data().splitlines()
+    assert [json.loads(line) for line in lines] == [{"id": i, "meal": f"Meal {i}"} for i in range(1, 51)]
+    assert app.rows.closed
+
+
+def test_json_stream_matches_buffered_body(app):
+    """Test that the chunked JSON body decodes to the same document a buffered response would."""
+    app.rows = Rows(50)
+    response = app.test_client().get("/meals?format=json-stream")
+
+    assert response.mimetype == "application/json"
+    assert response.get_json() == {"status": "success", "leaderboard": [{"id": i, "meal": f"Meal {i}"} for i in range(1, 51)]}
+
+
+@pytest.mark.parametrize("fmt,expected", [("ndjson", b""), ("json-stream", {"status": "success", "leaderboard": []})])
+def test_empty(app, fmt, expected):
+    """Test streaming no rows."""
+    app.rows = Rows(0)
+    response = app.test_client().get(f"/meals?format={fmt}")
+    assert (response.get_data() if fmt == "ndjson" else response.get_json()) == expected
+
+
+def test_rows_are_read_lazily(app):
+    """Test that only the first row is read before the body is iterated, and the rest as it is sent."""
+    app.rows = Rows(1000)
+    with app.test_request_context("/meals?format=ndjson"):
+        response = stream_response(app.rows, "leaderboard", "ndjson")
+        assert app.rows.read == 1
+        first_chunk = next(iter(response.response))
+        assert 256 <= len(first_chunk) < 1000
+        assert app.rows.read < 50
+        response.close()
+    assert app.rows.closed
+
+
+def test_error_before_first_row_raises(app):
+    """Test that a query that fails outright raises in the route instead of sending a 200."""
+    with app.test_request_context("/meals?format=ndjson"):
+        with pytest.raises(RuntimeError, match="cursor failed"):
+            stream_response(Rows(10, fail_at=0), "leaderboard", "ndjson")
+
+
+def test_error_mid_stream(app):
+    """Test that NDJSON ends with an error line, and the JSON body is left unterminated."""
+    app.rows = Rows(10, fail_at=3)
+    lines = app.test_client().get("/meals?format=ndjson").get_data().splitlines()
+    assert [json.loads(line) for line in lines][-1] == {"error": "cursor failed"}
+    assert len(lines) == 4
+
+    app.rows = Rows(10, fail_at=3)
+    body = app.test_client().get("/meals?format=json-stream").get_data()
+    with pytest.raises(ValueError):
+        json.loads(body)
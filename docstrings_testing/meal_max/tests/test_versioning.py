@@ -0,0 +1,136 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, jsonify, make_response, request
+import pytest
+
+from meal_max.utils import versioning
+from meal_max.utils.versioning import VersionCounter, make_etag
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def counter():
+    return VersionCounter("catalog")
+
+
+@pytest.fixture
+def client(counter, mocker):
+    """A bare Flask app with one conditional route over counter, and a call log."""
+    mocker.patch.object(versioning, "ETAGS_ENABLED", True)
+    app = Flask(__name__)
+    calls = []
+
+    @app.route("/leaderboard")
+    @versioning.conditional(lambda: (counter.value, request.args.get("sort", "")))
+    def leaderboard():
+        calls.append(request.args.get("sort", ""))
+        if request.args.get("fail"):
+            return make_response(jsonify({"error": "boom"}), 500)
+        return make_response(jsonify({"version": counter.value}), 200)
+
+    test_client = app.test_client()
+    test_client.calls = calls
+    return test_client
+
+
+######################################################
+#
+#    Version counters
+#
+######################################################
+
+def test_bump(counter):
+    """Test that bump increments and returns the new value."""
+    assert counter.value == 0
+    assert counter.bump() == 1
+    assert counter.value == 1
+
+
+def test_bump_concurrently(counter):
+    """Test that concurrent bumps are not lost."""
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: counter.bump(), range(1000)))
+    assert counter.value == 1000
+
+
+def test_make_etag():
+    """Test that tags differ by version and argument and are stable otherwise."""
+    assert make_etag("/leaderboard", 1, "wins") == make_etag("/leaderboard", 1, "wins")
+    assert make_etag("/leaderboard", 1, "wins") != make_etag("/leaderboard", 2, "wins")
+    assert make_etag("/leaderboard", 1, "wins") != make_etag("/leaderboard", 1, "win_pct")
+
+
+######################################################
+#
+#    Conditional GET
+#
+######################################################
+
+def test_response_has_etag(client):
+    """Test that a 200 carries a strong ETag and asks clients to revalidate."""
+    response = client.get("/leaderboard")
+
+    assert response.status_code == 200
+    etag, weak = response.get_etag()
+    assert etag and not weak
+    assert response.headers["Cache-Control"] == "no-cache"
+
+
+def test_not_modified(client):
+    """Test that a matching If-None-Match gets 304 without running the route."""
+    etag = client.get("/leaderboard").get_etag()[0]
+
+    response = client.get("/leaderboard", headers={"If-None-Match": f'"{etag}"'})
+    assert response.status_code == 304
+    assert response.get_data() == b""
+    assert response.get_etag() == (etag, False)
+    assert len(client.calls) == 1
+
+
+def test_not_modified_weak_tag(client):
+    """Test that a weakened tag (e.g. after compression) still matches."""
+    etag = client.get("/leaderboard").get_etag()[0]
+
+    response = client.get("/leaderboard", headers={"If-None-Match": f'W/"{etag}"'})
+    assert response.status_code == 304
+
+
+def test_modified_after_bump(client, counter):
+    """Test that a bump invalidates the previous tag."""
+    etag = client.get("/leaderboard").get_etag()[0]
+    counter.bump()
+
+    response = client.get("/leaderboard", headers={"If-None-Match": f'"{etag}"'})
+    assert response.status_code == 200
+    assert response.get_json() == {"version": 1}
+    assert response.get_etag()[0] != etag
+
+
+def test_tag_depends_on_arguments(client):
+    """Test that different query arguments get different tags."""
+    etag = client.get("/leaderboard?sort=wins").get_etag()[0]
+
+    response = client.get("/leaderboard?sort=win_pct", headers={"If-None-Match": f'"{etag}"'})
+    assert response.status_code == 200
+
+
+def test_errors_have_no_etag(client):
+    """Test that error responses are not tagged."""
+    response = client.get("/leaderboard?fail=1")
+
+    assert response.status_code == 500
+    assert response.get_etag() == (None, None)
+
+
+def test_etags_disabled(client, mocker):
+    """Test that ETAGS_ENABLED=false leaves responses untouched."""
+    mocker.patch.object(versioning, "ETAGS_ENABLED", False)
+    response = client.get("/leaderboard", headers={"If-None-Match": "*"})
+
+    assert response.status_code == 200
+    assert response.get_etag() == (None, None)
@@ -1,16 +1,45 @@
-from dotenv import load_dotenv
+import atexit
+import os
+import shutil
+import tempfile
+
 from flask import Flask, jsonify, make_response, Response, request
 
-from music_collection.models import song_model
+from music_collection.models import play_log, song_import, song_model
 from music_collection.models.playlist_model import PlaylistModel
+from music_collection.utils import (admission, batch, compression, health, jobs, json_provider, profiling,
+                                    sql_utils, startup, streaming, versioning)
 from music_collection.utils.sql_utils import check_database_connection, check_table_exists
 
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from .env file (python-dotenv is only imported if there is one)
+startup.load_env_file(os.path.dirname(os.path.abspath(__file__)))
+# Add the tables, indexes and triggers of newer versions to an existing database (SCHEMA_MIGRATE_ENABLED=false opts out)
+if startup.SCHEMA_MIGRATE_ENABLED:
+    startup.apply_schema(os.path.join(os.path.dirname(os.path.abspath(__file__)), "sql", "create_song_table.sql"))
 
 app = Flask(__name__)
 
+# Time SQL statements and count them per request (no-op unless SQL_STATS_ENABLED=true)
+sql_utils.init_app(app)
+# Profile single requests on demand (PROFILING_ENABLED=true) and sample all
+# request threads in the background (SAMPLING_PROFILER_ENABLED=true)
+profiling.init_app(app)
+# Probe the database and random.org in the background for /api/ready
+health.init_app(app, "songs")
+# Encode JSON with orjson when installed, without sorting keys (JSON_PROVIDER=default opts out)
+json_provider.init_app(app)
+# gzip (or zstd) large JSON bodies for clients that accept it (COMPRESSION_ENABLED=false opts out)
+compression.init_app(app)
+# Report queued and running background jobs (bulk imports) in /api/ready
+health.register_write_queue('jobs', jobs.job_runner.pending)
+# Write plays and their hourly and daily rollups in the background, for /api/charts
+# (PLAY_LOG_ENABLED=false opts out); plays still queued are written at exit
+if play_log.PLAY_LOG_ENABLED:
+    song_model.play_log.start()
+    atexit.register(song_model.play_log.stop)
+health.register_write_queue('play_events', song_model.play_log.pending)
+
 playlist_model = PlaylistModel()
 
 
@@ -54,6 +83,32 @@ def db_check() -> Response:
         return make_response(jsonify({'error': str(e)}), 404)
 
 
+@app.route('/api/live', methods=['GET'])
+def liveness() -> Response:
+    """
+    Liveness route for orchestrators; never touches a dependency.
+
+    Returns:
+        JSON response with the process uptime and whether the background prober is running.
+    """
+    return make_response(jsonify(health.health_monitor.liveness()), 200)
+
+
+@app.route('/api/ready', methods=['GET'])
+def readiness() -> Response:
+    """
+    Readiness route for orchestrators, served from cached background probes.
+
+    Returns:
+        JSON response with database latency, connection saturation, random source
+        availability and write queue depths.
+    Raises:
+        503 error if the service should not take traffic.
+    """
+    report = health.health_monitor.readiness()
+    return make_response(jsonify(report), 200 if report['ready'] else 503)
+
+
 ##########################################################
 #
 # Song Management
@@ -122,24 +177,37 @@ def delete_song(song_id: int) -> Response:
 
 
 @app.route('/api/get-all-songs-from-catalog', methods=['GET'])
+@versioning.conditional(lambda: (song_model.catalog_version.value, song_model.stats_version.value,
+                                 request.args.get('sort_by_play_count', 'false').lower(), streaming.response_format()))
 def get_all_songs() -> Response:
     """
     Route to retrieve all songs in the catalog (non-deleted), with an option to sort by play count.
 
     Query Parameter:
         - sort_by_play_count (bool, optional): If true, sort songs by play count.
+        - format (str, optional): 'ndjson' streams one song per line, 'json-stream' streams
+          the usual JSON body as it is read. Accept: application/x-ndjson also selects NDJSON.
 
     Returns:
         JSON response with the list of songs or error message.
+        304 Not Modified if If-None-Match matches the current ETag.
     """
     try:
         # Extract query parameter for sorting by play count
         sort_by_play_count = request.args.get('sort_by_play_count', 'false').lower() == 'true'
 
+        fmt = streaming.response_format()
+        if fmt != 'json':
+            app.logger.info("Streaming all songs from the catalog as %s, sort_by_play_count=%s", fmt, sort_by_play_count)
+            return streaming.stream_response(song_model.iter_all_songs(sort_by_play_count=sort_by_play_count),
+                                             'songs', fmt, status='success')
+
         app.logger.info("Retrieving all songs from the catalog, sort_by_play_count=%s", sort_by_play_count)
-        songs = song_model.get_all_songs(sort_by_play_count=sort_by_play_count)
+        version = (song_model.catalog_version.value, song_model.stats_version.value)
 
-        return make_response(jsonify({'status': 'success', 'songs': songs}), 200)
+        return json_provider.cached_json_response(
+            ('catalog', sort_by_play_count), version,
+            lambda: {'status': 'success', 'songs': song_model.get_all_songs(sort_by_play_count=sort_by_play_count)})
     except Exception as e:
         app.logger.error(f"Error retrieving songs: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
@@ -201,6 +269,7 @@ def get_song_by_compound_key() -> Response:
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/get-random-song', methods=['GET'])
+@batch.network_bound
 def get_random_song() -> Response:
     """
     Route to retrieve a random song from the catalog.
@@ -216,6 +285,209 @@ def get_random_song() -> Response:
         app.logger.error(f"Error retrieving a random song: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/get-random-songs', methods=['GET'])
+@batch.network_bound
+def get_random_songs() -> Response:
+    """
+    Route to retrieve several distinct random songs from the catalog, with one request to random.org.
+
+    Query Parameter:
+        - n (int, optional): How many songs, from 1 to RANDOM_SONGS_MAX (default 100). Defaults to 1.
+          Fewer are returned if the catalog is smaller.
+
+    Returns:
+        JSON response with the list of random songs or error message.
+    Raises:
+        400 error if n is not an integer in range.
+        500 error if the catalog is empty or random.org cannot be reached.
+    """
+    try:
+        # Attempt to cast n to an integer in range
+        try:
+            count = int(request.args.get('n', 1))
+        except ValueError:
+            count = 0
+        if not 1 <= count <= song_model.RANDOM_SONGS_MAX:
+            return make_response(jsonify({'error': f'n must be an integer between 1 and {song_model.RANDOM_SONGS_MAX}'}), 400)
+
+        app.logger.info("Retrieving %d random songs from the catalog", count)
+        songs = song_model.get_random_songs(count)
+        return make_response(jsonify({'status': 'success', 'songs': songs}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving random songs: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/search-songs', methods=['GET'])
+def search_songs() -> Response:
+    """
+    Route to search the artist, title and genre of the songs in the catalog.
+
+    Query Parameters:
+        - q (str): The search words; each must match the start of a word, e.g. 'mid hea'.
+        - limit (int, optional): Songs per page, up to 100. Defaults to 20.
+        - cursor (str, optional): The next_cursor of the previous page.
+
+    Returns:
+        JSON response with the matching songs, most relevant first, and next_cursor
+        (null on the last page).
+    Raises:
+        400 error if q has no words, or limit or cursor is invalid.
+        500 error if there is an issue searching the catalog.
+    """
+    try:
+        query = request.args.get('q', '')
+
+        # Attempt to cast limit to an integer
+        try:
+            limit = int(request.args.get('limit', 20))
+        except ValueError:
+            return make_response(jsonify({'error': 'Limit must be an integer'}), 400)
+
+        app.logger.info("Searching songs for '%s'", query)
+        try:
+            songs, next_cursor = song_model.search_songs(query, limit=limit, after=request.args.get('cursor'))
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        return make_response(jsonify({'status': 'success', 'songs': songs, 'next_cursor': next_cursor}), 200)
+    except Exception as e:
+        app.logger.error(f"Error searching songs: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/query-songs-from-catalog', methods=['GET'])
+def query_songs() -> Response:
+    """
+    Route to retrieve a page of the songs in the catalog matching the given filters.
+
+    Query Parameters:
+        - genre (str, optional): Only songs of this genre.
+        - artist (str, optional): Only songs by this artist.
+        - year_min, year_max (int, optional): Only songs released within these years.
+        - duration_min, duration_max (int, optional): Only songs lasting within these seconds.
+        - sort_by (str, optional): id, artist, title, year, duration or play_count. Defaults to id.
+        - order (str, optional): 'asc' or 'desc'. Defaults to 'asc'.
+        - limit (int, optional): Songs per page, up to 100. Defaults to 20.
+        - cursor (str, optional): The next_cursor of the previous page.
+
+    Returns:
+        JSON response with the matching songs and next_cursor (null on the last page).
+    Raises:
+        400 error if a number, the sort, the order, a range or the cursor is invalid.
+        500 error if there is an issue querying the catalog.
+    """
+    try:
+        # Attempt to cast the ranges and limit to integers
+        numbers = {}
+        for name in ['year_min', 'year_max', 'duration_min', 'duration_max', 'limit']:
+            value = request.args.get(name)
+            if value is None:
+                continue
+            try:
+                numbers[name] = int(value)
+            except ValueError:
+                return make_response(jsonify({'error': f'{name} must be an integer'}), 400)
+
+        order = request.args.get('order', 'asc').lower()
+        if order not in ('asc', 'desc'):
+            return make_response(jsonify({'error': "order must be 'asc' or 'desc'"}), 400)
+
+        app.logger.info("Querying songs from the catalog: %s", request.args.to_dict())
+        try:
+            songs, next_cursor = song_model.query_songs(
+                genre=request.args.get('genre'), artist=request.args.get('artist'),
+                sort_by=request.args.get('sort_by', 'id'), descending=order == 'desc',
+                after=request.args.get('cursor'), **numbers)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        return make_response(jsonify({'status': 'success', 'songs': songs, 'next_cursor': next_cursor}), 200)
+    except Exception as e:
+        app.logger.error(f"Error querying songs: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/import-songs', methods=['POST'])
+@admission.limit('import-songs')
+def import_songs() -> Response:
+    """
+    Route to import songs in bulk from a CSV (with a header row) or NDJSON file.
+
+    The file is either the request body or a multipart form field named 'file'. Each
+    row needs artist, title, year, genre and duration, and is checked like /api/create-song.
+
+    Query Parameters:
+        - format (str, optional): 'csv' or 'ndjson'. Defaults to what the Content-Type or file name says.
+        - mode (str, optional): 'skip' leaves songs that already exist as they are; 'upsert'
+          updates their genre and duration and restores them if deleted. Defaults to 'skip'.
+        - background (bool, optional): Run as a background job. Defaults to true for files
+          over IMPORT_SYNC_MAX_BYTES (1 MB).
+
+    Returns:
+        JSON response with the import report: counts of inserted, updated, skipped and invalid
+        rows, and the conflicting and invalid rows with their line numbers.
+        202 with the job (and a Location header for /api/import-jobs/<job_id>) when run in the background.
+    Raises:
+        400 error if the file, format or mode is missing or invalid.
+        500 error if there is an issue writing to the catalog.
+    """
+    upload = request.files.get('file')
+    fmt = request.args.get('format') or (song_import.detect_format(upload.filename, upload.mimetype) if upload
+                                         else song_import.detect_format(content_type=request.content_type))
+    mode = request.args.get('mode', 'skip')
+    if fmt not in song_import.IMPORT_FORMATS:
+        return make_response(jsonify({'error': "format must be 'csv' or 'ndjson'"}), 400)
+    if mode not in song_import.IMPORT_MODES:
+        return make_response(jsonify({'error': "mode must be 'skip' or 'upsert'"}), 400)
+
+    # Keep the upload in a file: a background job outlives the request and its stream
+    fd, path = tempfile.mkstemp(prefix='import-', suffix=f'.{fmt}')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            shutil.copyfileobj(upload.stream if upload else request.stream, f)
+        size = os.path.getsize(path)
+        if size == 0:
+            os.remove(path)
+            return make_response(jsonify({'error': 'No file to import'}), 400)
+
+        background = request.args.get('background')
+        if (size > song_import.IMPORT_SYNC_MAX_BYTES) if background is None else background.lower() == 'true':
+            job = jobs.job_runner.submit(
+                'import_songs',
+                lambda job: song_import.import_file(path, fmt, mode, progress=lambda counts: job.update(**counts)),
+                cleanup=lambda: os.remove(path))
+            app.logger.info("Importing %d bytes of %s in the background as job %s", size, fmt, job.id)
+            response = make_response(jsonify({'status': 'accepted', 'job': job.snapshot()}), 202)
+            response.headers['Location'] = f'/api/import-jobs/{job.id}'
+            return response
+
+        app.logger.info("Importing %d bytes of %s", size, fmt)
+        try:
+            report = song_import.import_file(path, fmt, mode)
+        finally:
+            os.remove(path)
+        return make_response(jsonify({'status': 'success', 'report': report}), 200)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error(f"Error importing songs: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/import-jobs/<job_id>', methods=['GET'])
+def get_import_job(job_id: str) -> Response:
+    """
+    Route to follow a background import.
+
+    Path Parameter:
+        - job_id (str): The id /api/import-songs returned.
+
+    Returns:
+        JSON response with the job's status ('queued', 'running', 'succeeded' or 'failed'),
+        its progress (rows so far, bytes_read of total_bytes), and its report once it succeeded.
+    Raises:
+        404 error if the job is unknown to this process or has been forgotten.
+    """
+    job = jobs.job_runner.get(job_id)
+    if job is None:
+        return make_response(jsonify({'error': f'Import job {job_id} not found'}), 404)
+    return make_response(jsonify({'status': 'success', 'job': job.snapshot()}), 200)
+
 
 ############################################################
 #
@@ -379,37 +651,43 @@ def play_current_song() -> Response:
 
 
 @app.route('/api/play-entire-playlist', methods=['POST'])
+@admission.limit('play-entire-playlist')
 def play_entire_playlist() -> Response:
     """
     Route to play all songs in the playlist.
 
     Returns:
-        JSON response indicating success of the operation.
+        JSON response with the plays counted, the songs updated, and the ids of songs
+        skipped because they are missing from the catalog or deleted.
     Raises:
+        429 error, with a Retry-After header, if too many requests are running or waiting.
         500 error if there is an issue playing the playlist.
     """
     try:
         app.logger.info('Playing entire playlist')
-        playlist_model.play_entire_playlist()
-        return make_response(jsonify({'status': 'success'}), 200)
+        report = playlist_model.play_entire_playlist()
+        return make_response(jsonify({'status': 'success', **report}), 200)
     except Exception as e:
         app.logger.error(f"Error playing playlist: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/play-rest-of-playlist', methods=['POST'])
+@admission.limit('play-rest-of-playlist')
 def play_rest_of_playlist() -> Response:
     """
     Route to play the rest of the playlist from the current track.
 
     Returns:
-        JSON response indicating success of the operation.
+        JSON response with the plays counted, the songs updated, and the ids of songs
+        skipped because they are missing from the catalog or deleted.
     Raises:
+        429 error, with a Retry-After header, if too many requests are running or waiting.
         500 error if there is an issue playing the rest of the playlist.
     """
     try:
         app.logger.info('Playing rest of the playlist')
-        playlist_model.play_rest_of_playlist()
-        return make_response(jsonify({'status': 'success'}), 200)
+        report = playlist_model.play_rest_of_playlist()
+        return make_response(jsonify({'status': 'success', **report}), 200)
     except Exception as e:
         app.logger.error(f"Error playing rest of the playlist: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
@@ -433,12 +711,14 @@ def rewind_playlist() -> Response:
         return make_response(jsonify({'error': str(e)}), 500)
 
 @app.route('/api/get-all-songs-from-playlist', methods=['GET'])
+@versioning.conditional(lambda: (playlist_model.version,))
 def get_all_songs_from_playlist() -> Response:
     """
     Route to retrieve all songs in the playlist.
 
     Returns:
         JSON response with the list of songs or an error message.
+        304 Not Modified if If-None-Match matches the current ETag.
     """
     try:
         app.logger.info("Retrieving all songs from the playlist")
@@ -446,7 +726,9 @@ def get_all_songs_from_playlist() -> Response:
         # Get all songs from the playlist
         songs = playlist_model.get_all_songs()
 
-        return make_response(jsonify({'status': 'success', 'songs': songs}), 200)
+        # Reuse the encoded body while the playlist is unchanged (JSON_CACHE_ENABLED=true)
+        return json_provider.cached_json_response(
+            'playlist', playlist_model.version, lambda: {'status': 'success', 'songs': songs})
 
     except Exception as e:
         app.logger.error(f"Error retrieving songs from playlist: {e}")
@@ -692,23 +974,252 @@ def swap_songs_in_playlist() -> Response:
 ############################################################
 
 @app.route('/api/song-leaderboard', methods=['GET'])
+@versioning.conditional(lambda: (song_model.catalog_version.value, song_model.stats_version.value,
+                                 streaming.response_format()))
 def get_song_leaderboard() -> Response:
     """
     Route to get a list of all sorted by play count.
 
+    Query Parameter:
+        - format (str, optional): 'ndjson' or 'json-stream' to stream the leaderboard,
+          as for /api/get-all-songs-from-catalog.
+
     Returns:
         JSON response with a sorted leaderboard of songs.
+        304 Not Modified if If-None-Match matches the current ETag.
     Raises:
         500 error if there is an issue generating the leaderboard.
     """
     try:
+        fmt = streaming.response_format()
+        if fmt != 'json':
+            app.logger.info("Streaming song leaderboard as %s", fmt)
+            return streaming.stream_response(song_model.iter_all_songs(sort_by_play_count=True),
+                                             'leaderboard', fmt, status='success')
+
         app.logger.info("Generating song leaderboard sorted")
-        leaderboard_data = song_model.get_all_songs(sort_by_play_count=True)
-        return make_response(jsonify({'status': 'success', 'leaderboard': leaderboard_data}), 200)
+        version = (song_model.catalog_version.value, song_model.stats_version.value)
+        return json_provider.cached_json_response(
+            'song-leaderboard', version,
+            lambda: {'status': 'success', 'leaderboard': song_model.get_all_songs(sort_by_play_count=True)})
     except Exception as e:
         app.logger.error(f"Error generating leaderboard: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
 
+@app.route('/api/charts', methods=['GET'])
+@admission.limit('charts')
+def get_charts() -> Response:
+    """
+    Route to get the most played songs over a recent window, from the hourly and daily play rollups.
+
+    The window ends with the current hour (UTC). Plays are counted once the play log has
+    written them, within PLAY_LOG_FLUSH_SECONDS.
+
+    Query Parameters:
+        - window (str, optional): Hours, days or weeks, e.g. '24h', '7d' or '4w'. Defaults to '7d'.
+        - limit (int, optional): How many songs, up to 100. Defaults to 20.
+
+    Returns:
+        JSON response with the window's start and end (Unix seconds) and the chart:
+        songs with their plays in the window, most played first.
+    Raises:
+        400 error if the window or limit is invalid.
+        429 error, with a Retry-After header, if too many requests are running or waiting.
+        500 error if there is an issue reading the charts.
+    """
+    try:
+        window = request.args.get('window', '7d')
+        # Attempt to cast limit to an integer
+        try:
+            limit = int(request.args.get('limit', 20))
+        except ValueError:
+            return make_response(jsonify({'error': 'limit must be an integer'}), 400)
+
+        try:
+            start, end = play_log.chart_bounds(play_log.parse_window(window))
+            app.logger.info("Retrieving the top %d songs for the last %s", limit, window)
+            chart = play_log.get_charts(start, end, limit)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        return make_response(jsonify({'status': 'success', 'window': window, 'start': start, 'end': end,
+                                      'chart': chart}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving charts: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
+############################################################
+#
+# Batch
+#
+############################################################
+
+def checkpoint_playlist():
+    """
+    Saves the playlist for an atomic batch and returns a function that puts it back.
+
+    Returns:
+        Callable[[], None]: Restores the saved songs and current track.
+    """
+    songs = list(playlist_model.playlist)
+    current_track_number = playlist_model.current_track_number
+
+    def restore():
+        playlist_model.playlist = songs
+        playlist_model.current_track_number = current_track_number
+        playlist_model.version += 1
+
+    return restore
+
+
+@app.route('/api/batch', methods=['POST'])
+@admission.limit('batch')
+def batch_operations() -> Response:
+    """
+    Route to run several API operations in one request, on one database connection and transaction.
+
+    Expected JSON Input:
+        - operations (list): The operations to run in order, each an object with
+          'path', 'method' (default GET) and an optional JSON 'body', e.g.
+          {"method": "POST", "path": "/api/add-song-to-playlist", "body": {"artist": ...}}.
+        - atomic (bool, optional): If any operation fails, roll back all of them
+          (database and playlist) and skip the rest. Defaults to false, where only
+          the failed operation's writes are undone.
+
+    Returns:
+        JSON response with the status code and JSON body of each operation.
+        400 if the batch is malformed or calls a route that waits on random.org;
+        for a failed atomic batch, the failed operation's status code.
+        429, with a Retry-After header, if too many batches are running or waiting.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return make_response(jsonify({'error': 'Invalid input. A JSON object with operations is required.'}), 400)
+
+        operations = batch.validate_operations(data.get('operations'))
+        atomic = bool(data.get('atomic', False))
+        app.logger.info("Running a batch of %d operations, atomic=%s", len(operations), atomic)
+
+        body, status_code = batch.run_batch(app, operations, atomic=atomic, checkpoint=checkpoint_playlist)
+        return make_response(jsonify(body), status_code)
+    except batch.BatchError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error(f"Error running batch: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
+############################################################
+#
+# Diagnostics
+#
+############################################################
+
+@app.route('/api/sql-stats', methods=['GET'])
+def get_sql_stats() -> Response:
+    """
+    Route to get per-statement SQL timing stats (requires SQL_STATS_ENABLED=true).
+
+    Returns:
+        JSON response with count, total, mean, p50 and p99 per normalized statement,
+        how many catalog reads ran their query or shared another's (single_flight), and
+        the size and counters of the in-memory catalog snapshot (catalog_snapshot), and
+        the counters of the play log writer (play_log).
+    """
+    app.logger.info("Retrieving SQL statement stats")
+    return make_response(jsonify({
+        'status': 'success',
+        'enabled': sql_utils.SQL_STATS_ENABLED,
+        'statements': sql_utils.statement_stats.snapshot(),
+        'single_flight': {'catalog_reads': song_model.catalog_reads.snapshot()},
+        'catalog_snapshot': song_model.catalog_snapshot.stats(),
+        'play_log': song_model.play_log.stats()
+    }), 200)
+
+
+@app.route('/api/admission-stats', methods=['GET'])
+def get_admission_stats() -> Response:
+    """
+    Route to get the admission control limits and counters of the throttled routes.
+
+    Returns:
+        JSON response with, per route, its limits, in-flight and queued requests,
+        admitted requests and rejected requests by reason.
+    """
+    app.logger.info("Retrieving admission control stats")
+    return make_response(jsonify({
+        'status': 'success',
+        'enabled': admission.ADMISSION_ENABLED,
+        'routes': admission.snapshot()
+    }), 200)
+
+
+@app.route('/api/profiles/<string:profile_id>', methods=['GET'])
+def get_profile(profile_id: str) -> Response:
+    """
+    Route to get a stored request profile (requires PROFILING_ENABLED=true).
+
+    Path Parameter:
+        - profile_id (str): The id returned in the X-Profile-Id header of a profiled request.
+
+    Query Parameters:
+        - format (str): 'summary' (default) for the top functions as JSON,
+          or 'collapsed' for flamegraph-compatible collapsed stacks.
+
+    Returns:
+        JSON response with the profile summary, or the collapsed stacks as text.
+    Raises:
+        404 error if the profile does not exist or has been evicted.
+    """
+    app.logger.info("Retrieving profile %s", profile_id)
+    profile = profiling.profile_store.get(profile_id)
+    if profile is None:
+        return make_response(jsonify({'error': f'Profile {profile_id} not found'}), 404)
+
+    if request.args.get('format') == 'collapsed':
+        return Response(profiling.format_collapsed(profile['stacks']), mimetype='text/plain')
+    return make_response(jsonify({'status': 'success', 'profile': profiling.summarize_profile(profile)}), 200)
+
+
+@app.route('/api/admin/flamegraph', methods=['GET'])
+def get_flamegraph() -> Response:
+    """
+    Route to get the stacks aggregated by the background sampling profiler
+    (requires SAMPLING_PROFILER_ENABLED=true).
+
+    Query Parameters:
+        - seconds (int): How far back to aggregate. Defaults to the whole rolling window.
+        - format (str): 'collapsed' (default) for flamegraph-compatible collapsed stacks,
+          or 'summary' for the top functions and the measured sampling overhead as JSON.
+
+    Returns:
+        The collapsed stacks as text, or a JSON summary.
+    Raises:
+        404 error if the sampling profiler is not running.
+    """
+    sampler = profiling.rolling_sampler
+    if sampler is None:
+        return make_response(jsonify({'error': 'Sampling profiler is not enabled'}), 404)
+
+    seconds = request.args.get('seconds', type=int)
+    stacks = sampler.aggregate(seconds)
+    app.logger.info("Serving aggregated stacks (%d samples)", sum(stacks.values()))
+
+    if request.args.get('format') == 'summary':
+        return make_response(jsonify({
+            'status': 'success',
+            'samples': sum(stacks.values()),
+            'overhead_pct': sampler.overhead_pct(),
+            'top_functions': profiling.top_functions(stacks)
+        }), 200)
+    return Response(profiling.format_collapsed(stacks), mimetype='text/plain')
+
+
 if __name__ == '__main__':
+    # The development server runs with the debugger; production serving goes through wsgi.py
+    if os.getenv('APP_ENV') == 'production':
+        raise SystemExit("Refusing to run the debug development server with APP_ENV=production; "
+                         "use gunicorn -c gunicorn.conf.py wsgi:app")
     app.run(debug=True, host='0.0.0.0', port=5000)
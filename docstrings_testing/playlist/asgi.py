@@ -0,0 +1,134 @@
+import asyncio
+from contextlib import asynccontextmanager
+from functools import partial
+import multiprocessing
+import os
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+
+from app import app as flask_app
+from music_collection.models import song_model
+from music_collection.models.song_model import Song
+from music_collection.utils.random_utils import close_async_client, get_random_fractions_async
+import wsgi  # noqa: F401 (refuses debug mode in production)
+
+
+# The async serving variant: `uvicorn asgi:app`
+#
+# Routes that wait on random.org run natively here with an async HTTP client; every other
+# route is the unchanged Flask handler. Blocking work (SQLite and the Flask routes) runs on
+# a bounded thread pool, so a slow random.org call no longer pins a thread.
+
+ASGI_EXECUTOR_THREADS = int(os.getenv("ASGI_EXECUTOR_THREADS", str(4 * multiprocessing.cpu_count())))
+
+# The Flask app behind a WSGI bridge; its thread pool is the one bounded executor for blocking work
+flask_bridge = WSGIMiddleware(flask_app, workers=ASGI_EXECUTOR_THREADS)
+
+
+async def run_blocking(fn, *args):
+    """
+    Runs a blocking call (such as a model function that queries SQLite) on the bounded executor.
+
+    Args:
+        fn: The function to call.
+        *args: Its arguments.
+
+    Returns:
+        The function's return value.
+    """
+    return await asyncio.get_running_loop().run_in_executor(flask_bridge.executor, partial(fn, *args))
+
+
+def json_response(payload: dict, status_code: int) -> Response:
+    """
+    Renders a payload exactly as the Flask routes do, with the Flask app's JSON provider.
+
+    Args:
+        payload (dict): The response body.
+        status_code (int): The HTTP status code.
+
+    Returns:
+        Response: The JSON response.
+    """
+    rendered = flask_app.json.response(payload)
+    return Response(rendered.get_data(), status_code=status_code, media_type=rendered.mimetype)
+
+
+async def get_random_song(request: Request) -> Response:
+    """
+    Route to retrieve a random song from the catalog; mirrors /api/get-random-song in app.py.
+
+    Returns:
+        JSON response with the details of a random song or error message.
+    """
+    try:
+        flask_app.logger.info("Retrieving a random song from the catalog")
+        songs = await pick_random_songs(1)
+        return json_response({'status': 'success', 'song': songs[0]}, 200)
+    except Exception as e:
+        flask_app.logger.error(f"Error retrieving a random song: {e}")
+        return json_response({'error': str(e)}, 500)
+
+
+async def get_random_songs(request: Request) -> Response:
+    """
+    Route to retrieve several distinct random songs; mirrors /api/get-random-songs in app.py.
+
+    Returns:
+        JSON response with the list of random songs or error message.
+    """
+    try:
+        # Attempt to cast n to an integer in range
+        try:
+            count = int(request.query_params.get('n', 1))
+        except ValueError:
+            count = 0
+        if not 1 <= count <= song_model.RANDOM_SONGS_MAX:
+            return json_response({'error': f'n must be an integer between 1 and {song_model.RANDOM_SONGS_MAX}'}, 400)
+
+        flask_app.logger.info("Retrieving %d random songs from the catalog", count)
+        songs = await pick_random_songs(count)
+        return json_response({'status': 'success', 'songs': songs}, 200)
+    except Exception as e:
+        flask_app.logger.error(f"Error retrieving random songs: {e}")
+        return json_response({'error': str(e)}, 500)
+
+
+async def pick_random_songs(count: int) -> list[Song]:
+    """
+    song_model.get_random_songs, waiting on random.org without holding an executor thread.
+
+    Args:
+        count (int): How many songs to pick.
+
+    Returns:
+        list[Song]: The randomly selected songs.
+
+    Raises:
+        ValueError: If the catalog is empty.
+    """
+    size = await run_blocking(song_model.get_catalog_size)
+    if not size:
+        raise ValueError("The song catalog is empty.")
+    fractions = await get_random_fractions_async(min(count, size))
+    return await run_blocking(song_model.pick_songs, fractions)
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    yield
+    await close_async_client()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/get-random-song', get_random_song, methods=['GET']),
+        Route('/api/get-random-songs', get_random_songs, methods=['GET']),
+        Mount('/', flask_bridge),
+    ],
+    lifespan=lifespan,
+)
@@ -0,0 +1,110 @@
+import argparse
+from itertools import accumulate
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from benchmarks.datagen import load_songs
+from benchmarks.harness import measure, print_table, quiet_logging, write_results
+from music_collection.models import play_log
+from music_collection.models.play_log import DAY, chart_bounds, get_charts, parse_window, write_plays
+from music_collection.utils import sql_utils
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results", "charts.json")
+
+WINDOWS = ["24h", "7d", "4w"]
+# The plays start at midnight UTC of this day number
+FIRST_DAY = 20000
+
+
+def load_plays(songs: int, plays: int, days: int, batch_size: int, seed: int) -> dict:
+    """
+    Writes plays spread evenly over days, in time order, through write_plays batches.
+
+    Songs are picked with Zipf-like popularity (weight 1 / rank), so a few songs take
+    most plays and the long tail is still played now and then.
+
+    Returns:
+        dict: plays, seconds and plays_per_second of the writes alone.
+    """
+    rng = random.Random(seed)
+    cum_weights = list(accumulate(1 / rank for rank in range(1, songs + 1)))
+    song_ids = range(1, songs + 1)
+    start, step = FIRST_DAY * DAY, days * DAY / plays
+    written, elapsed = 0, 0.0
+    while written < plays:
+        count = min(batch_size, plays - written)
+        picks = rng.choices(song_ids, cum_weights=cum_weights, k=count)
+        events = [(song_id, int(start + (written + i) * step)) for i, song_id in enumerate(picks)]
+        began = time.perf_counter()
+        write_plays(events)
+        elapsed += time.perf_counter() - began
+        written += count
+    return {"plays": written, "seconds": round(elapsed, 2), "plays_per_second": int(written / elapsed)}
+
+
+def raw_chart(start: int, end: int, limit: int) -> list:
+    """The chart counted from play_events, for comparison."""
+    with sqlite3.connect(sql_utils.DB_PATH) as conn:
+        return conn.execute("""
+            SELECT song_id, COUNT(*) AS plays FROM play_events
+            WHERE played_at >= ? AND played_at < ?
+            GROUP BY song_id ORDER BY plays DESC, song_id LIMIT ?
+        """, (start, end, limit)).fetchall()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Time play log writes and chart reads from the rollups against "
+                                                 "counting raw play events.")
+    parser.add_argument("--songs", type=int, default=100000, help="Catalog size (default: %(default)s)")
+    parser.add_argument("--plays", type=int, default=5000000, help="Plays to write (default: %(default)s)")
+    parser.add_argument("--days", type=int, default=60, help="Days the plays are spread over (default: %(default)s)")
+    parser.add_argument("--batch-size", type=int, default=play_log.PLAY_LOG_BATCH_SIZE,
+                        help="Plays per transaction (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed reads per operation (default: %(default)s)")
+    parser.add_argument("--limit", type=int, default=20, help="Songs per chart (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=411)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    args = parser.parse_args(argv)
+
+    quiet_logging("music_collection")
+    with tempfile.TemporaryDirectory() as tmp:
+        sql_utils.DB_PATH = os.path.join(tmp, "charts.db")
+        load_songs(sql_utils.DB_PATH, args.songs, args.seed, deleted_fraction=0)
+        writes = load_plays(args.songs, args.plays, args.days, args.batch_size, args.seed)
+        print(f"Wrote {writes['plays']} plays ({writes['plays_per_second']} plays/s)", file=sys.stderr)
+        with sqlite3.connect(sql_utils.DB_PATH) as conn:
+            tables = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                      for table in ("play_events", "song_plays_hourly", "song_plays_daily")}
+        db_bytes = os.path.getsize(sql_utils.DB_PATH)
+
+        # Windows end an hour and a half into the last day, so each has partial days at both edges
+        now = (FIRST_DAY + args.days - 1) * DAY + 5400
+        bounds = {window: chart_bounds(parse_window(window), now) for window in WINDOWS}
+        results = {"rollups": {}, "raw events": {}, "raw, indexed": {}}
+        for window, (start, end) in bounds.items():
+            results["rollups"][window] = measure(lambda i: get_charts(start, end, args.limit), args.repeat)
+            results["raw events"][window] = measure(lambda i: raw_chart(start, end, args.limit), args.repeat)
+            assert [song["id"] for song in get_charts(start, end, args.limit)] == \
+                [song_id for song_id, _ in raw_chart(start, end, args.limit)]
+        with sqlite3.connect(sql_utils.DB_PATH) as conn:
+            conn.execute("CREATE INDEX play_events_played_at ON play_events (played_at)")
+        for window, (start, end) in bounds.items():
+            results["raw, indexed"][window] = measure(
+                lambda i: raw_chart(start, end, args.limit), args.repeat)
+
+    write_results(args.output, "charts", results, songs=args.songs, days=args.days, limit=args.limit,
+                  writes=writes, rows=tables, db_bytes=db_bytes)
+    print_table(results, metric="p50_ms")
+    print(f"\nRows: {tables}, database {db_bytes / 1e6:.0f} MB")
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from benchmarks.datagen import SCHEMA_PATH, song_batch
+from benchmarks.harness import print_table, quiet_logging, write_results
+from music_collection.models import song_import, song_model
+from music_collection.utils import sql_utils
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results", "import.json")
+
+
+def fresh_db(path: str) -> None:
+    """Creates an empty catalog from the schema script."""
+    with sqlite3.connect(path) as conn:
+        with open(SCHEMA_PATH) as f:
+            conn.executescript(f.read())
+    sql_utils.DB_PATH = path
+
+
+def write_csv(path: str, rows: list[tuple]) -> None:
+    """Writes the artist, title, year, genre and duration of generated rows as CSV."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(song_import.SONG_FIELDS)
+        writer.writerows(row[:5] for row in rows)
+
+
+def rate(rows: int, fn) -> dict:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return {"seconds": round(elapsed, 2), "rows_per_second": round(rows / elapsed)}
+
+
+def run_size(rows: int, create_song_rows: int, seed: int, tmp: str) -> dict:
+    """
+    Loads rows songs with import_file in skip and upsert mode (over the same songs again),
+    and create_song_rows of them one create_song call at a time.
+
+    Returns:
+        dict: seconds and rows_per_second keyed by operation.
+    """
+    generated = song_batch(0, rows, rows, seed, deleted_fraction=0)
+    csv_path = os.path.join(tmp, f"songs_{rows}.csv")
+    write_csv(csv_path, generated)
+
+    results = {}
+    fresh_db(os.path.join(tmp, f"import_{rows}.db"))
+    results["import_file (new songs)"] = rate(rows, lambda: song_import.import_file(csv_path))
+    results["import_file (upsert existing)"] = rate(rows, lambda: song_import.import_file(csv_path, mode="upsert"))
+
+    fresh_db(os.path.join(tmp, f"create_{rows}.db"))
+    results["create_song per row"] = rate(create_song_rows, lambda: [
+        song_model.create_song(*row[:5]) for row in generated[:create_song_rows]])
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare bulk imports with one create_song call per song.")
+    parser.add_argument("--sizes", default="10000,100000", help="Comma-separated import sizes (default: %(default)s)")
+    parser.add_argument("--create-song-rows", type=int, default=2000,
+                        help="Songs created one at a time for comparison (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=411)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    args = parser.parse_args(argv)
+
+    quiet_logging("music_collection")
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {size: run_size(int(size), args.create_song_rows, args.seed, tmp) for size in args.sizes.split(",")}
+
+    write_results(args.output, "import", results)
+    print_table(results, metric="rows_per_second")
+    print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
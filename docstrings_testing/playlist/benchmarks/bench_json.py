@@ -0,0 +1,87 @@
+import argparse
+from contextlib import contextmanager
+import os
+import sys
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from benchmarks.bench_playlist import make_songs
+from benchmarks.harness import measure, print_table, quiet_logging, write_results
+from music_collection.utils import json_provider
+from music_collection.utils.json_provider import EncodedResponseCache, FastJSONProvider
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results", "json.json")
+
+
+@contextmanager
+def patched(name: str, value):
+    """
+    Temporarily replaces a json_provider module attribute.
+    """
+    original = getattr(json_provider, name)
+    setattr(json_provider, name, value)
+    try:
+        yield
+    finally:
+        setattr(json_provider, name, original)
+
+
+def run_size(size: int, repeat: int, seed: int) -> dict:
+    """
+    Times rendering {'status': 'success', 'songs': [...]} as a response body with each encoder.
+
+    Args:
+        size (int): The number of songs in the payload.
+        repeat (int): Timed renders per encoder.
+        seed (int): The random seed.
+
+    Returns:
+        dict: Measurements keyed by encoder.
+    """
+    songs = make_songs(size, seed)
+    payload = {"status": "success", "songs": songs}
+    app = Flask(__name__)
+    default_provider = DefaultJSONProvider(app)
+    fast_provider = FastJSONProvider(app)
+
+    results = {}
+    with app.app_context():
+        results["flask_default"] = measure(lambda i: default_provider.response(payload).get_data(), repeat)
+        if json_provider.orjson is not None:
+            results["fast_orjson"] = measure(lambda i: fast_provider.response(payload).get_data(), repeat)
+        with patched("orjson", None):
+            results["fast_stdlib"] = measure(lambda i: fast_provider.response(payload).get_data(), repeat)
+
+        app.json = fast_provider
+        with patched("JSON_CACHE_ENABLED", True), patched("encoded_response_cache", EncodedResponseCache()):
+            results["cache_hit"] = measure(
+                lambda i: json_provider.cached_json_response("playlist", 1, lambda: payload).get_data(), repeat)
+
+    for stats in results.values():
+        stats["rows_per_second"] = round(size / (stats["p50_ms"] / 1000)) if stats["p50_ms"] else None
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark JSON encoding of song collections.")
+    parser.add_argument("--sizes", default="1000,100000", help="Comma-separated payload sizes (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed renders per encoder (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=411)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    args = parser.parse_args(argv)
+
+    quiet_logging("music_collection")
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = {str(size): run_size(size, args.repeat, args.seed) for size in sizes}
+
+    write_results(args.output, "json", results, orjson=json_provider.orjson is not None)
+    print_table(results)
+    print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
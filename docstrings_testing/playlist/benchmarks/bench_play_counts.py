@@ -0,0 +1,55 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+from benchmarks.datagen import load_songs
+from benchmarks.harness import measure, print_table, quiet_logging, write_results
+from music_collection.models import play_log, song_model
+from music_collection.utils import sql_utils
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results", "play_counts.json")
+
+
+def play_one_by_one(song_ids: list[int]) -> None:
+    """What playing a playlist cost before: one update_play_count, and its own commit, per track."""
+    for song_id in song_ids:
+        song_model.update_play_count(song_id)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Time counting a playlist's plays one track at a time against "
+                                                 "update_play_counts.")
+    parser.add_argument("--songs", type=int, default=100000, help="Catalog size (default: %(default)s)")
+    parser.add_argument("--sizes", default="10,100,1000", help="Comma-separated playlist lengths (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed plays per operation (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=411)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    args = parser.parse_args(argv)
+
+    quiet_logging("music_collection")
+    # Time the play count writes alone; the play log writes its own batches either way
+    play_log.PLAY_LOG_ENABLED = False
+    rng = random.Random(args.seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        sql_utils.DB_PATH = os.path.join(tmp, "catalog.db")
+        load_songs(sql_utils.DB_PATH, args.songs, args.seed, deleted_fraction=0)
+        for size in args.sizes.split(","):
+            song_ids = [rng.randint(1, args.songs) for _ in range(int(size))]
+            results[size] = {
+                "one by one": measure(lambda i: play_one_by_one(song_ids), args.repeat),
+                "update_play_counts": measure(lambda i: song_model.update_play_counts(song_ids), args.repeat),
+            }
+
+    write_results(args.output, "play_counts", results, songs=args.songs)
+    print_table(results, metric="p50_ms")
+    print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+import argparse
+from contextlib import contextmanager
+import os
+import random
+import sys
+
+from benchmarks.harness import (
+    compare_to_baseline,
+    measure,
+    measure_allocations,
+    print_table,
+    quiet_logging,
+    scaling_exponent,
+    write_results
+)
+from music_collection.models import playlist_model
+from music_collection.models.playlist_model import PlaylistModel
+from music_collection.models.song_model import Song
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline_playlist.json")
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results", "playlist.json")
+
+GENRES = ["Pop", "Rock", "Jazz", "Hip-Hop", "Classical", "Country", "Electronic"]
+
+
+def make_songs(size: int, seed: int) -> list[Song]:
+    """
+    Builds size distinct songs with ids 1..size.
+
+    Args:
+        size (int): The number of songs.
+        seed (int): The random seed.
+
+    Returns:
+        list[Song]: The songs.
+    """
+    rng = random.Random(seed)
+    return [
+        Song(i, f"Artist {i % 5000}", f"Song {i}", rng.randint(1950, 2024), rng.choice(GENRES), rng.randint(90, 420))
+        for i in range(1, size + 1)
+    ]
+
+
+@contextmanager
+def stubbed_play_count():
+    """
+    Replaces the database writes made by the play methods with no-ops.
+    """
+    original, original_bulk = playlist_model.update_play_count, playlist_model.update_play_counts
+    playlist_model.update_play_count = lambda song_id: None
+    playlist_model.update_play_counts = lambda song_ids: {"plays": len(song_ids), "songs": len(set(song_ids)),
+                                                          "missing": [], "deleted": []}
+    try:
+        yield
+    finally:
+        playlist_model.update_play_count, playlist_model.update_play_counts = original, original_bulk
+
+
+def operations(model: PlaylistModel, songs: list[Song], rng: random.Random) -> tuple:
+    """
+    Builds the benchmarked operations as (call, setup) pairs that keep the playlist size constant.
+
+    Args:
+        model (PlaylistModel): A model holding every song in songs.
+        songs (list[Song]): The songs, indexed by id - 1.
+        rng (random.Random): The random source for picking targets.
+
+    Returns:
+        tuple: (call, setup) pairs keyed by operation name, and a function that puts back
+        the last removed song.
+    """
+    size = len(songs)
+    state = {}
+
+    def pick(i):
+        state["song"] = songs[rng.randrange(size)]
+        state["other"] = songs[rng.randrange(size)]
+        while state["other"].id == state["song"].id:
+            state["other"] = songs[rng.randrange(size)]
+        state["track"] = rng.randint(1, size)
+
+    def restore(i):
+        # Put back whatever the previous remove took out, outside the timing
+        removed = state.pop("removed", None)
+        if removed is not None:
+            model.playlist.append(removed)
+        pick(i)
+
+    def take_last(i):
+        restore(i)
+        state["added"] = model.playlist.pop()
+
+    def remove_by_track(i):
+        state["removed"] = model.playlist[state["track"] - 1]
+        model.remove_song_by_track_number(state["track"])
+
+    def remove_by_id(i):
+        state["removed"] = state["song"]
+        model.remove_song_by_song_id(state["song"].id)
+
+    return restore, {
+        "add_song_to_playlist": (lambda i: model.add_song_to_playlist(state["added"]), take_last),
+        "remove_song_by_song_id": (remove_by_id, restore),
+        "remove_song_by_track_number": (remove_by_track, restore),
+        "move_song_to_beginning": (lambda i: model.move_song_to_beginning(state["song"].id), restore),
+        "move_song_to_end": (lambda i: model.move_song_to_end(state["song"].id), restore),
+        "move_song_to_track_number": (
+            lambda i: model.move_song_to_track_number(state["song"].id, state["track"]), restore),
+        "swap_songs_in_playlist": (
+            lambda i: model.swap_songs_in_playlist(state["song"].id, state["other"].id), restore),
+        "get_song_by_song_id": (lambda i: model.get_song_by_song_id(state["song"].id), restore),
+        "get_playlist_duration": (lambda i: model.get_playlist_duration(), restore),
+        "play_entire_playlist": (lambda i: model.play_entire_playlist(), restore),
+        "play_rest_of_playlist": (lambda i: model.play_rest_of_playlist(),
+                                  lambda i: (restore(i), model.go_to_track_number(state["track"]))),
+    }
+
+
+def run_size(size: int, repeat: int, seed: int, allocations: bool) -> dict:
+    """
+    Runs every operation against a playlist of size songs.
+
+    Args:
+        size (int): The playlist length.
+        repeat (int): Timed calls per operation at the smallest sizes; fewer as size grows.
+        seed (int): The random seed.
+        allocations (bool): Whether to also measure allocations per call.
+
+    Returns:
+        dict: Measurements keyed by operation.
+    """
+    print(f"Building a playlist of {size} songs...", file=sys.stderr)
+    songs = make_songs(size, seed)
+    model = PlaylistModel()
+    model.playlist = list(songs)
+    rng = random.Random(seed)
+
+    op_repeat = max(3, min(repeat, 2_000_000 // size))
+    play_repeat = max(1, min(op_repeat, 100_000 // size))
+
+    results = {}
+    with stubbed_play_count():
+        restore, benchmarked = operations(model, songs, rng)
+        for name, (call, setup) in benchmarked.items():
+            count = play_repeat if name.startswith("play_") else op_repeat
+            results[name] = measure(call, count, setup=setup)
+            if allocations:
+                setup(count + 1)
+                results[name].update(measure_allocations(lambda: call(count + 1)))
+            restore(count + 2)
+            assert model.get_playlist_length() == size, f"{name} changed the playlist length"
+    return results
+
+
+def scaling_report(results: dict) -> dict:
+    """
+    Fits a scaling exponent per operation across the measured sizes.
+
+    Args:
+        results (dict): Measurements keyed by size, then by operation.
+
+    Returns:
+        dict: The exponent keyed by operation.
+    """
+    sizes = [int(size) for size in results]
+    operations_measured = list(next(iter(results.values())))
+    return {
+        operation: scaling_exponent(sizes, [results[str(size)][operation]["p50_ms"] for size in sizes])
+        for operation in operations_measured
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark PlaylistModel operations across playlist sizes.")
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        help="Comma-separated playlist sizes (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed calls per operation (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=411)
+    parser.add_argument("--no-allocations", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed p50 slowdown against the baseline, as a fraction (default: %(default)s)")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results to the baseline file")
+    args = parser.parse_args(argv)
+
+    quiet_logging("music_collection")
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = {str(size): run_size(size, args.repeat, args.seed, not args.no_allocations) for size in sizes}
+    scaling = scaling_report(results)
+
+    write_results(args.output, "playlist", results, scaling=scaling)
+    print_table(results)
+    if not args.no_allocations:
+        print()
+        print_table(results, metric="alloc_peak_kb")
+    print("\nScaling exponent (p50 ~ size^k):")
+    for operation, exponent in scaling.items():
+        print(f"  {operation:<28} {exponent if exponent is not None else '-'}")
+    print(f"\nResults written to {args.output}")
+
+    if args.update_baseline:
+        write_results(args.baseline, "playlist", results, scaling=scaling)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; run with --update-baseline to create one.")
+        return 0
+
+    regressions = compare_to_baseline(results, args.baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} of the baseline.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+
+from benchmarks.datagen import artist_name, load_songs
+from benchmarks.harness import measure, print_table, quiet_logging, write_results
+from music_collection.models import song_model
+from music_collection.utils import sql_utils
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results", "query.json")
+
+# One query per access path, from the route's point of view
+QUERIES = {
+    "genre": {"genre": "Jazz"},
+    "genre + years": {"genre": "Rock", "year_min": 1990, "year_max": 1999},
+    "genre + old years": {"genre": "Rock", "year_min": 1960, "year_max": 1969},
+    "artist": {"artist": artist_name(50)},
+    "years": {"year_min": 2000, "year_max": 2004},
+    "duration": {"duration_min": 200, "duration_max": 205},
+    "top played": {"sort_by": "play_count", "descending": True},
+}
+DEEP_PAGE = 50
+INDEXES = ["songs_genre_year", "songs_artist_year", "songs_year", "songs_duration", "songs_play_count"]
+
+
+def page_after(filters: dict, pages: int, limit: int):
+    """Returns the cursor that starts page pages + 1 of a query, or None if there are fewer pages."""
+    after = None
+    for _ in range(pages):
+        _, after = song_model.query_songs(**filters, limit=limit, after=after)
+        if after is None:
+            return None
+    return after
+
+
+def measure_queries(repeat: int, limit: int) -> dict:
+    """Times the first page of each query, and a deep page of the newest songs of a genre."""
+    results = {name: measure(lambda i: song_model.query_songs(**filters, limit=limit), repeat)
+               for name, filters in QUERIES.items()}
+    deep = {"genre": "Pop", "sort_by": "year", "descending": True}
+    after = page_after(deep, DEEP_PAGE, limit)
+    if after is not None:
+        results[f"genre by year, page {DEEP_PAGE + 1}"] = measure(
+            lambda i: song_model.query_songs(**deep, limit=limit, after=after), repeat)
+    return results
+
+
+def run_size(rows: int, repeat: int, limit: int, seed: int, tmp: str) -> dict:
+    """
+    Times each query with the schema's indexes, then again after dropping them.
+
+    Returns:
+        dict: measure() results keyed by operation.
+    """
+    db_path = os.path.join(tmp, f"catalog_{rows}.db")
+    stats = load_songs(db_path, rows, seed)
+    print(f"Loaded {rows} songs ({stats['rows_per_second']} rows/s)", file=sys.stderr)
+    sql_utils.DB_PATH = db_path
+
+    results = measure_queries(repeat, limit)
+    with sqlite3.connect(db_path) as conn:
+        for index in INDEXES:
+            conn.execute(f"DROP INDEX {index}")
+    results.update({f"{name} (no index)": result for name, result in measure_queries(repeat, limit).items()})
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Time filtered catalog queries with and without their indexes.")
+    parser.add_argument("--sizes", default="100000,1000000", help="Comma-separated catalog sizes (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed queries per operation (default: %(default)s)")
+    parser.add_argument("--limit", type=int, default=20, help="Songs per page (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=411)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    args = parser.parse_args(argv)
+
+    quiet_logging("music_collection")
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {size: run_size(int(size), args.repeat, args.limit, args.seed, tmp) for size in args.sizes.split(",")}
+
+    write_results(args.output, "query", results, limit=args.limit)
+    print_table(results, metric="p50_ms")
+    print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+from benchmarks.datagen import load_songs
+from benchmarks.harness import measure, print_table, quiet_logging, write_results
+from music_collection.models import song_model
+from music_collection.utils import sql_utils
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results", "random_song.json")
+
+
+def run_size(rows: int, repeat: int, seed: int, tmp: str) -> dict:
+    """
+    Times picking random songs from a catalog of the given size.
+
+    random.org is replaced by a local generator, so only the database side is measured.
+    full_scan is how get_random_song used to pick: read every song, then index the list.
+
+    Returns:
+        dict: measure() results keyed by operation.
+    """
+    db_path = os.path.join(tmp, f"catalog_{rows}.db")
+    stats = load_songs(db_path, rows, seed)
+    print(f"Loaded {rows} songs ({stats['rows_per_second']} rows/s, including the ordinal triggers)", file=sys.stderr)
+    sql_utils.DB_PATH = db_path
+    rng = random.Random(seed)
+    song_model.get_random_fractions = lambda count: [rng.random() for _ in range(count)]
+
+    def full_scan(i):
+        songs = song_model._query_all_songs(False)
+        return songs[rng.randrange(len(songs))]
+
+    return {
+        "full_scan": measure(full_scan, repeat),
+        "get_random_song": measure(lambda i: song_model.get_random_song(), repeat),
+        "get_random_songs(10)": measure(lambda i: song_model.get_random_songs(10), repeat),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Time random song selection against catalogs of increasing size.")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated catalog sizes (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed calls per operation (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=411)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    args = parser.parse_args(argv)
+
+    quiet_logging("music_collection")
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {size: run_size(int(size), args.repeat, args.seed, tmp) for size in args.sizes.split(",")}
+
+    write_results(args.output, "random_song", results)
+    print_table(results, metric="p50_ms")
+    print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
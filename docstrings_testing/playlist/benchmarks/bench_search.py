@@ -0,0 +1,80 @@
+import argparse
+import os
+import sys
+import tempfile
+
+from benchmarks.datagen import load_songs
+from benchmarks.harness import measure, print_table, quiet_logging, write_results
+from music_collection.models import song_model
+from music_collection.utils import sql_utils
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results", "search.json")
+
+# From narrow to broad: a full title, typed prefixes, a whole artist name, a genre
+QUERIES = ["midnight heart tonight", "silver sto", "mid hea", "dj kings", "jazz"]
+DEEP_PAGE = 50
+
+
+def page_after(query: str, pages: int, limit: int):
+    """Returns the cursor that starts page pages + 1 of query, or None if there are fewer pages."""
+    after = None
+    for _ in range(pages):
+        _, after = song_model.search_songs(query, limit=limit, after=after)
+        if after is None:
+            return None
+    return after
+
+
+def run_size(rows: int, repeat: int, limit: int, seed: int, tmp: str) -> dict:
+    """
+    Times the first page of each query, and page DEEP_PAGE + 1 of the broadest one.
+
+    Returns:
+        dict: measure() results keyed by operation, with the number of matches of each query.
+    """
+    db_path = os.path.join(tmp, f"catalog_{rows}.db")
+    stats = load_songs(db_path, rows, seed)
+    print(f"Loaded {rows} songs ({stats['rows_per_second']} rows/s, including the ordinal and FTS triggers)",
+          file=sys.stderr)
+    sql_utils.DB_PATH = db_path
+
+    results = {}
+    for query in QUERIES:
+        results[f"'{query}'"] = measure(lambda i: song_model.search_songs(query, limit=limit), repeat)
+        with sql_utils.get_db_connection() as conn:
+            match = song_model._fts_prefix_query(query)
+            results[f"'{query}'"]["matches"] = conn.execute(
+                "SELECT COUNT(*) FROM songs_fts WHERE songs_fts MATCH ?", (match,)).fetchone()[0]
+
+    after = page_after(QUERIES[-1], DEEP_PAGE, limit)
+    if after is not None:
+        results[f"'{QUERIES[-1]}' page {DEEP_PAGE + 1}"] = measure(
+            lambda i: song_model.search_songs(QUERIES[-1], limit=limit, after=after), repeat)
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Time /api/search-songs queries against catalogs of increasing size.")
+    parser.add_argument("--sizes", default="100000,1000000", help="Comma-separated catalog sizes (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed searches per query (default: %(default)s)")
+    parser.add_argument("--limit", type=int, default=20, help="Songs per page (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=411)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    args = parser.parse_args(argv)
+
+    quiet_logging("music_collection")
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {size: run_size(int(size), args.repeat, args.limit, args.seed, tmp) for size in args.sizes.split(",")}
+
+    write_results(args.output, "search", results, limit=args.limit)
+    for metric in ["p50_ms", "matches"]:
+        print_table(results, metric=metric)
+        print()
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
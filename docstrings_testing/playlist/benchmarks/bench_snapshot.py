@@ -0,0 +1,83 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.datagen import load_songs
+from benchmarks.harness import measure, print_table, quiet_logging, write_results
+from music_collection.models import catalog_snapshot, song_model
+from music_collection.utils import sql_utils
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results", "snapshot.json")
+
+
+def measure_reads(keys: list[tuple], repeat: int) -> dict:
+    """Times lookups by id and by compound key, and the whole catalog by play count."""
+    return {
+        "get_song_by_id": measure(lambda i: song_model.get_song_by_id(keys[i % len(keys)][0]), repeat),
+        "get_song_by_compound_key": measure(
+            lambda i: song_model.get_song_by_compound_key(*keys[i % len(keys)][1:]), repeat),
+        "get_all_songs(by plays)": measure(lambda i: song_model.get_all_songs(sort_by_play_count=True), 5),
+    }
+
+
+def run_size(rows: int, repeat: int, seed: int, tmp: str) -> dict:
+    """
+    Times reads against SQLite, then from the snapshot, and measures the snapshot's load.
+
+    Returns:
+        dict: measure() results keyed by operation, plus load_ms and memory_mb of the snapshot.
+    """
+    db_path = os.path.join(tmp, f"catalog_{rows}.db")
+    load_songs(db_path, rows, seed)
+    sql_utils.DB_PATH = db_path
+    rng = random.Random(seed)
+    keys = [(song["id"], song["artist"], song["title"], song["year"])
+            for song in rng.sample(song_model._query_all_songs(False), 1000)]
+
+    results = {f"{name} (SQLite)": result for name, result in measure_reads(keys, repeat).items()}
+
+    catalog_snapshot.CATALOG_SNAPSHOT_ENABLED = True
+    start = time.perf_counter()
+    song_model.catalog_snapshot.get_by_id(1)
+    load_ms = (time.perf_counter() - start) * 1000
+    # Load again under tracemalloc, which would distort the timing
+    song_model.catalog_snapshot.invalidate()
+    tracemalloc.start()
+    song_model.catalog_snapshot.get_by_id(1)
+    memory_mb = tracemalloc.get_traced_memory()[0] / 2 ** 20
+    tracemalloc.stop()
+    results.update({f"{name} (snapshot)": result for name, result in measure_reads(keys, repeat).items()})
+    results["snapshot load"] = {"load_ms": round(load_ms, 1), "memory_mb": round(memory_mb, 1)}
+    catalog_snapshot.CATALOG_SNAPSHOT_ENABLED = False
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare song_model reads from SQLite and from the catalog snapshot.")
+    parser.add_argument("--sizes", default="10000,100000", help="Comma-separated catalog sizes (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=1000, help="Timed lookups per operation (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=411)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    args = parser.parse_args(argv)
+
+    quiet_logging("music_collection")
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {size: run_size(int(size), args.repeat, args.seed, tmp) for size in args.sizes.split(",")}
+
+    write_results(args.output, "snapshot", results)
+    print_table(results, metric="p50_ms")
+    for size, result in results.items():
+        print(f"\nSnapshot of {size} songs: loaded in {result['snapshot load']['load_ms']} ms, "
+              f"{result['snapshot load']['memory_mb']} MB")
+    print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
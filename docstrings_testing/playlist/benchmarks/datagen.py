@@ -0,0 +1,242 @@
+import argparse
+from bisect import bisect
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import accumulate
+import math
+import os
+import random
+import sqlite3
+import sys
+import time
+from typing import Iterable, Iterator
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_PATH = os.path.join(PROJECT_DIR, "sql", "create_song_table.sql")
+DROP_SCHEMA_PATH = os.path.join(PROJECT_DIR, "sql", "drop_song_tables.sql")
+
+SONG_COLUMNS = ("artist", "title", "year", "genre", "duration", "play_count", "deleted")
+
+# Rough catalog shares per genre
+GENRES = {
+    "Pop": 22, "Rock": 18, "Hip-Hop": 14, "Electronic": 10, "R&B": 8, "Country": 7, "Jazz": 5,
+    "Classical": 4, "Latin": 4, "Metal": 3, "Folk": 3, "Reggae": 1, "Blues": 1,
+}
+ADJECTIVES = [
+    "Electric", "Midnight", "Golden", "Broken", "Silent", "Neon", "Wild", "Lonely", "Burning", "Velvet",
+    "Crystal", "Hollow", "Secret", "Endless", "Fading", "Sweet", "Cold", "Restless", "Distant", "Shining",
+    "Blue", "Crimson", "Paper", "Silver", "Summer", "Winter", "Northern", "Little", "Last", "First",
+    "Dancing", "Falling", "Running", "Painted", "Sacred", "Strange", "Gentle", "Heavy", "Open", "Hidden",
+]
+NOUNS = [
+    "Heart", "Road", "Dream", "Fire", "River", "Night", "City", "Light", "Rain", "Highway",
+    "Ocean", "Moon", "Sky", "Echo", "Shadow", "Garden", "Mirror", "Storm", "Train", "Window",
+    "Letter", "Horizon", "Avenue", "Valley", "Signal", "Thunder", "Island", "Season", "Story", "Machine",
+    "Kingdom", "Circle", "Harbor", "Desert", "Lullaby", "Anthem", "Parade", "Satellite", "Memory", "Stranger",
+]
+PHRASES = ["", "of Mine", "Tonight", "Again", "Forever", "in the Dark", "Blues", "Song", "Reprise", "Remix"]
+ARTIST_FIRST = ["The", "Los", "DJ", "MC", "Lil", "Big", "Saint", "Young", "Sister", "Brother"]
+ARTIST_LAST = ["Wolves", "Echoes", "Pilots", "Rivers", "Comets", "Strangers", "Foxes", "Monarchs", "Lanterns",
+               "Tides", "Ghosts", "Sparrows", "Kings", "Dreamers", "Satellites", "Owls", "Mirrors", "Roses"]
+
+TITLE_COMBINATIONS = len(ADJECTIVES) * len(NOUNS) * len(PHRASES)
+
+
+def song_title(index: int) -> str:
+    """
+    Builds a title that is unique for every index.
+
+    Word choices are the mixed-radix digits of index; indexes past the number of
+    combinations get a part number.
+
+    Args:
+        index (int): The zero-based song index.
+
+    Returns:
+        str: The title.
+    """
+    combination, part = index % TITLE_COMBINATIONS, index // TITLE_COMBINATIONS
+    combination, phrase = divmod(combination, len(PHRASES))
+    adjective, noun = divmod(combination, len(NOUNS))
+    title = f"{ADJECTIVES[adjective]} {NOUNS[noun]}"
+    if PHRASES[phrase]:
+        title += f" {PHRASES[phrase]}"
+    if part:
+        title += f" Pt. {part + 1}"
+    return title
+
+
+def artist_name(index: int) -> str:
+    """
+    Builds a distinct artist name for an artist index.
+
+    Args:
+        index (int): The zero-based artist index.
+
+    Returns:
+        str: The artist name.
+    """
+    first, last = divmod(index, len(ARTIST_LAST))
+    name = f"{ARTIST_FIRST[first % len(ARTIST_FIRST)]} {ARTIST_LAST[last]}"
+    generation = first // len(ARTIST_FIRST)
+    return f"{name} {generation + 1}" if generation else name
+
+
+@lru_cache(maxsize=4)
+def _artists(count: int) -> list[str]:
+    return [artist_name(i) for i in range(max(1, count // 15))]
+
+
+def song_batch(start: int, stop: int, count: int, seed: int = 411, deleted_fraction: float = 0.01) -> list[tuple]:
+    """
+    Generates songs start..stop-1 of a catalog of count songs, in SONG_COLUMNS order.
+
+    Titles are unique per index, so UNIQUE(artist, title, year) always holds. Artist
+    popularity is Zipf-like, years skew recent (all after 1900), durations are log-normal
+    around three and a half minutes and play counts are heavy-tailed. Each batch is
+    seeded from (seed, start), so the catalog is the same however it is split up.
+
+    Args:
+        start (int): The first song index.
+        stop (int): One past the last song index.
+        count (int): The catalog size, which sets the number of artists.
+        seed (int): The random seed.
+        deleted_fraction (float): The share of songs marked as deleted.
+
+    Returns:
+        list[tuple]: (artist, title, year, genre, duration, play_count, deleted) rows.
+    """
+    rng = random.Random(f"{seed}:{start}")
+    uniform, expovariate, lognormvariate, paretovariate = (
+        rng.random, rng.expovariate, rng.lognormvariate, rng.paretovariate)
+    artists = _artists(count)
+    log_artists = math.log(len(artists) + 1)
+    genre_names = list(GENRES)
+    genre_cumulative = list(accumulate(GENRES.values()))
+    genre_total = genre_cumulative[-1]
+    log_duration = math.log(210)
+
+    rows = []
+    for i in range(start, stop):
+        # Inverse-CDF sample of a Zipf-like (1/rank) artist distribution
+        artist = artists[min(len(artists) - 1, int(math.exp(uniform() * log_artists)) - 1)]
+        genre = genre_names[bisect(genre_cumulative, uniform() * genre_total)]
+        year = max(1901, 2024 - int(expovariate(1 / 18)) - 1)
+        duration = max(30, int(lognormvariate(log_duration, 0.3)))
+        play_count = int(paretovariate(1.2)) - 1
+        rows.append((artist, song_title(i), year, genre, duration, play_count, uniform() < deleted_fraction))
+    return rows
+
+
+def generate_batches(make_batch, count: int, batch_size: int = 100_000, workers: int = 0, **kwargs) -> Iterator[list]:
+    """
+    Yields the batches of a catalog in order, generating them in worker processes.
+
+    Args:
+        make_batch: A picklable function taking (start, stop, count, **kwargs) and returning rows.
+        count (int): The catalog size.
+        batch_size (int): Rows per batch.
+        workers (int): Worker processes; 0 uses one per CPU, 1 generates in this process.
+        **kwargs: Passed through to make_batch.
+
+    Yields:
+        list: The rows of each batch.
+    """
+    ranges = [(start, min(start + batch_size, count)) for start in range(0, count, batch_size)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(ranges) == 1:
+        for start, stop in ranges:
+            yield make_batch(start, stop, count, **kwargs)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        futures = deque()
+        for start, stop in ranges:
+            # Stay a few batches ahead of the writer without holding the whole catalog in memory
+            futures.append(pool.submit(make_batch, start, stop, count, **kwargs))
+            if len(futures) > 2 * workers:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
+
+
+def bulk_load(db_path: str, table: str, columns: Iterable[str], batches: Iterable[list],
+              create_schema: bool = False) -> dict:
+    """
+    Inserts batches of rows with executemany, one transaction per batch.
+
+    Journaling and fsync are relaxed for the duration of the load, which is only
+    safe for generated data that can be regenerated after a crash.
+
+    Args:
+        db_path (str): The SQLite database file.
+        table (str): The table to load.
+        columns (Iterable[str]): The column names, in row order.
+        batches (Iterable[list]): Batches of rows.
+        create_schema (bool): Drop the catalog and recreate it with the schema script first.
+
+    Returns:
+        dict: rows loaded, seconds taken and rows_per_second.
+    """
+    columns = tuple(columns)
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        if create_schema:
+            for path in (DROP_SCHEMA_PATH, SCHEMA_PATH):
+                with open(path) as f:
+                    conn.executescript(f.read())
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA journal_mode = MEMORY")
+        conn.execute("PRAGMA cache_size = -262144")
+
+        loaded = 0
+        start = time.perf_counter()
+        for batch in batches:
+            conn.execute("BEGIN")
+            conn.executemany(sql, batch)
+            conn.execute("COMMIT")
+            loaded += len(batch)
+        elapsed = time.perf_counter() - start
+    finally:
+        conn.close()
+    return {"rows": loaded, "seconds": round(elapsed, 2), "rows_per_second": int(loaded / elapsed) if elapsed else 0}
+
+
+def load_songs(db_path: str, count: int, seed: int = 411, deleted_fraction: float = 0.01,
+               create_schema: bool = True, workers: int = 0) -> dict:
+    """
+    Generates count songs straight into the songs table of db_path.
+
+    Args:
+        db_path (str): The SQLite database file.
+        count (int): The number of songs.
+        seed (int): The random seed.
+        deleted_fraction (float): The share of songs marked as deleted.
+        create_schema (bool): Recreate the songs table first.
+        workers (int): Generator processes; 0 uses one per CPU.
+
+    Returns:
+        dict: The bulk_load statistics.
+    """
+    batches = generate_batches(song_batch, count, workers=workers, seed=seed, deleted_fraction=deleted_fraction)
+    return bulk_load(db_path, "songs", SONG_COLUMNS, batches, create_schema=create_schema)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic song catalog into a SQLite database.")
+    parser.add_argument("--db", required=True, help="The SQLite database file")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Songs to generate (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=411)
+    parser.add_argument("--deleted-fraction", type=float, default=0.01)
+    parser.add_argument("--workers", type=int, default=0, help="Generator processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    stats = load_songs(args.db, args.rows, args.seed, args.deleted_fraction, workers=args.workers)
+    print(f"Loaded {stats['rows']} songs in {stats['seconds']} s ({stats['rows_per_second']} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
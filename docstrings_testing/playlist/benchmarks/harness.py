@@ -0,0 +1,192 @@
+import json
+import logging
+import math
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+
+def quiet_logging(package: str, level: int = logging.WARNING) -> None:
+    """
+    Raises the level of every logger in a package.
+
+    configure_logger sets DEBUG on each module logger, which would otherwise
+    dominate the timings with stderr writes.
+
+    Args:
+        package (str): The package prefix, e.g. 'music_collection'.
+        level (int): The level to set.
+    """
+    for name in list(logging.root.manager.loggerDict):
+        if name == package or name.startswith(package + "."):
+            logging.getLogger(name).setLevel(level)
+
+
+def measure(fn: Callable[[int], object], repeat: int, warmup: int = 1,
+            setup: Optional[Callable[[int], object]] = None) -> dict:
+    """
+    Times repeated calls of fn, with optional untimed per-call setup.
+
+    Args:
+        fn (Callable[[int], object]): The operation, called with the iteration index.
+        repeat (int): The number of timed calls.
+        warmup (int): The number of untimed calls made first.
+        setup (Callable[[int], object], optional): Called before each call, outside the timing.
+
+    Returns:
+        dict: ops, mean_ms, p50_ms, p95_ms and min_ms.
+    """
+    for i in range(warmup):
+        if setup:
+            setup(i)
+        fn(i)
+
+    timings = []
+    for i in range(warmup, warmup + repeat):
+        if setup:
+            setup(i)
+        start = time.perf_counter()
+        fn(i)
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    return {
+        "ops": repeat,
+        "mean_ms": round(statistics.fmean(timings) * 1000, 4),
+        "p50_ms": round(timings[len(timings) // 2] * 1000, 4),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 4),
+        "min_ms": round(timings[0] * 1000, 4),
+    }
+
+
+def write_results(path: str, suite: str, results: dict, **extra) -> dict:
+    """
+    Writes a result file.
+
+    Args:
+        path (str): The output path.
+        suite (str): The suite name.
+        results (dict): Measurements keyed by size, then by operation.
+        **extra: Additional top-level entries, e.g. derived scaling figures.
+
+    Returns:
+        dict: The document that was written.
+    """
+    document = {
+        "suite": suite,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+        **extra,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+    return document
+
+
+def compare_to_baseline(results: dict, baseline_path: str, threshold: float,
+                        metric: str = "p50_ms") -> list[str]:
+    """
+    Compares results against a baseline file.
+
+    Only operations and sizes present in both are compared.
+
+    Args:
+        results (dict): Measurements keyed by size, then by operation.
+        baseline_path (str): A result file written by write_results.
+        threshold (float): Allowed slowdown as a fraction, e.g. 0.25 for 25%.
+        metric (str): The measurement to compare.
+
+    Returns:
+        list[str]: One message per regression; empty if there are none.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    for size, operations in results.items():
+        for operation, current in operations.items():
+            previous = baseline.get(size, {}).get(operation)
+            if not previous or metric not in previous or metric not in current:
+                continue
+            if current[metric] > previous[metric] * (1 + threshold):
+                regressions.append(
+                    f"{operation} @ {size}: {current[metric]:.4f} ms vs baseline "
+                    f"{previous[metric]:.4f} ms (+{(current[metric] / previous[metric] - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def print_table(results: dict, metric: str = "p50_ms") -> None:
+    """
+    Prints one row per operation with a column per size.
+
+    Args:
+        results (dict): Measurements keyed by size, then by operation.
+        metric (str): The measurement to show.
+    """
+    sizes = list(results)
+    operations = []
+    for size in sizes:
+        operations.extend(op for op in results[size] if op not in operations)
+
+    print(f"{'operation':<28}" + "".join(f"{size:>14}" for size in sizes) + f"   ({metric})")
+    for operation in operations:
+        cells = []
+        for size in sizes:
+            value = results[size].get(operation, {}).get(metric)
+            cells.append(f"{value:>14.4f}" if value is not None else f"{'-':>14}")
+        print(f"{operation:<28}" + "".join(cells))
+
+
+def scaling_exponent(sizes: list[int], values: list[float]) -> Optional[float]:
+    """
+    Fits value ~ size^k by least squares on a log-log scale.
+
+    k is about 1 for linear operations, 0 for constant-time ones and 2 for quadratic ones.
+
+    Args:
+        sizes (list[int]): The input sizes.
+        values (list[float]): The measurement at each size.
+
+    Returns:
+        float: The fitted exponent, or None with fewer than two positive points.
+    """
+    points = [(math.log(size), math.log(value)) for size, value in zip(sizes, values) if size > 0 and value > 0]
+    if len(points) < 2:
+        return None
+    mean_x = statistics.fmean(x for x, _ in points)
+    mean_y = statistics.fmean(y for _, y in points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return None
+    return round(sum((x - mean_x) * (y - mean_y) for x, y in points) / variance, 2)
+
+
+def measure_allocations(fn: Callable[[], object]) -> dict:
+    """
+    Measures the memory one call allocates using tracemalloc.
+
+    Args:
+        fn (Callable[[], object]): The operation.
+
+    Returns:
+        dict: alloc_peak_kb (peak traced memory during the call) and alloc_net_kb (retained after it).
+    """
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_peak_kb": round((peak - before) / 1024, 1),
+        "alloc_net_kb": round((after - before) / 1024, 1),
+    }
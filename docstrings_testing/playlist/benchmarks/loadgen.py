@@ -0,0 +1,505 @@
+import argparse
+from collections import defaultdict
+from http.client import HTTPConnection, HTTPException
+import json
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Optional
+from urllib.parse import urlencode, urlparse
+
+from benchmarks.datagen import load_songs
+from benchmarks.random_org_stub import start_random_org_stub
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_PATH = os.path.join(PROJECT_DIR, "sql", "create_song_table.sql")
+
+# How each server variant is launched from PROJECT_DIR; {port} is filled in
+SERVER_COMMANDS = {
+    "werkzeug": [
+        sys.executable, "-c",
+        "from werkzeug.serving import WSGIRequestHandler\n"
+        "WSGIRequestHandler.protocol_version = 'HTTP/1.1'\n"
+        "from app import app\n"
+        "app.run(host='127.0.0.1', port={port}, threaded=True)\n"
+    ],
+    "gunicorn": [
+        sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", "127.0.0.1:{port}", "wsgi:app"
+    ],
+    "uvicorn": [
+        sys.executable, "-m", "uvicorn", "asgi:app", "--host", "127.0.0.1", "--port", "{port}",
+        "--no-access-log", "--log-level", "warning"
+    ],
+}
+
+
+####################################################
+#
+# HTTP client
+#
+####################################################
+
+class Client:
+    """
+    One simulated client holding a single keep-alive connection.
+    """
+
+    def __init__(self, host: str, port: int, rng: random.Random):
+        self.host = host
+        self.port = port
+        self.rng = rng
+        self.conn: Optional[HTTPConnection] = None
+
+    def request(self, method: str, path: str, body=None) -> tuple:
+        """
+        Sends one request, reconnecting if the server closed the connection.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The path including any query string.
+            body: A JSON-serializable body, or None.
+
+        Returns:
+            tuple: (status, parsed JSON or None, elapsed seconds); status is 0 on connection failure.
+        """
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        start = time.perf_counter()
+        for attempt in range(2):
+            try:
+                if self.conn is None:
+                    self.conn = HTTPConnection(self.host, self.port, timeout=60)
+                self.conn.request(method, path, body=payload, headers=headers)
+                response = self.conn.getresponse()
+                data = response.read()
+                elapsed = time.perf_counter() - start
+                if response.getheader("Connection", "").lower() == "close":
+                    self.close()
+                try:
+                    return response.status, json.loads(data), elapsed
+                except ValueError:
+                    return response.status, None, elapsed
+            except (HTTPException, OSError):
+                self.close()
+                if attempt:
+                    return 0, None, time.perf_counter() - start
+        return 0, None, time.perf_counter() - start
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+####################################################
+#
+# Request mix
+#
+####################################################
+
+class Catalog:
+    """
+    The songs seeded into the app under test, shared by all clients.
+    """
+
+    def __init__(self, songs: list[dict]):
+        self.songs = songs
+
+    def pick(self, rng: random.Random) -> dict:
+        return rng.choice(self.songs)
+
+
+def song_key(song: dict) -> dict:
+    return {"artist": song["artist"], "title": song["title"], "year": song["year"]}
+
+
+def catalog_reads(client: Client, catalog: Catalog) -> list:
+    song = catalog.pick(client.rng)
+    return [client.rng.choice([
+        ("GET", "/api/get-all-songs-from-catalog", None, "GET /api/get-all-songs-from-catalog"),
+        ("GET", f"/api/get-song-from-catalog-by-id/{song['id']}", None,
+         "GET /api/get-song-from-catalog-by-id/<id>"),
+        ("GET", "/api/get-song-from-catalog-by-compound-key?" + urlencode(song_key(song)), None,
+         "GET /api/get-song-from-catalog-by-compound-key"),
+        ("GET", "/api/get-random-song", None, "GET /api/get-random-song"),
+    ])]
+
+
+def playlist_edits(client: Client, catalog: Catalog) -> list:
+    song = catalog.pick(client.rng)
+    return [client.rng.choice([
+        ("POST", "/api/add-song-to-playlist", song_key(song), "POST /api/add-song-to-playlist"),
+        ("DELETE", "/api/remove-song-from-playlist", song_key(song), "DELETE /api/remove-song-from-playlist"),
+        ("POST", "/api/move-song-to-end", song_key(song), "POST /api/move-song-to-end"),
+        ("GET", "/api/get-all-songs-from-playlist", None, "GET /api/get-all-songs-from-playlist"),
+    ])]
+
+
+def plays(client: Client, catalog: Catalog) -> list:
+    if client.rng.random() < 0.9:
+        return [("POST", "/api/play-current-song", None, "POST /api/play-current-song")]
+    return [("POST", "/api/play-rest-of-playlist", None, "POST /api/play-rest-of-playlist")]
+
+
+def leaderboards(client: Client, catalog: Catalog) -> list:
+    return [("GET", "/api/song-leaderboard", None, "GET /api/song-leaderboard")]
+
+
+def heavy_writes(client: Client, catalog: Catalog) -> list:
+    return [("POST", "/api/play-entire-playlist", None, "POST /api/play-entire-playlist")]
+
+
+# Each category returns the (method, path, body, label) requests of one operation
+CATEGORIES: dict[str, Callable[[Client, Catalog], list]] = {
+    "catalog": catalog_reads,
+    "playlist": playlist_edits,
+    "play": plays,
+    "leaderboard": leaderboards,
+    "heavy": heavy_writes,
+}
+DEFAULT_MIX = "catalog=50,playlist=20,play=10,leaderboard=20"
+
+
+def parse_mix(mix: str) -> dict:
+    """
+    Parses a weighted mix such as 'catalog=50,play=10'.
+
+    Args:
+        mix (str): Comma-separated category=weight pairs.
+
+    Returns:
+        dict: Weights keyed by category.
+
+    Raises:
+        ValueError: If a category is unknown or a weight is not a positive number.
+    """
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in CATEGORIES:
+            raise ValueError(f"Unknown category '{name}'; expected one of {', '.join(CATEGORIES)}")
+        weights[name] = float(weight)
+        if weights[name] <= 0:
+            raise ValueError(f"Weight for '{name}' must be positive")
+    return weights
+
+
+def seed_app(client: Client, count: int, rng: random.Random, playlist_size: int,
+             known_songs: Optional[list[dict]] = None) -> Catalog:
+    """
+    Creates songs through the API and fills the playlist, so the mix has data to work on.
+
+    Args:
+        client (Client): The client to seed through.
+        count (int): The number of songs to create.
+        rng (random.Random): The random source.
+        playlist_size (int): The number of songs to add to the playlist.
+        known_songs (list[dict], optional): Songs to work on instead of listing the whole catalog,
+            for catalogs too large to fetch in one response.
+
+    Returns:
+        Catalog: The songs with their ids.
+    """
+    for i in range(count):
+        song = {"artist": f"Load Artist {i % 50}", "title": f"Load Song {i}", "year": rng.randint(1960, 2024),
+                "genre": rng.choice(["Pop", "Rock", "Jazz"]), "duration": rng.randint(120, 360)}
+        client.request("POST", "/api/create-song", song)
+
+    if known_songs is None:
+        status, data, _ = client.request("GET", "/api/get-all-songs-from-catalog")
+        if status != 200:
+            raise RuntimeError(f"Seeding failed: could not list the catalog ({status})")
+        known_songs = data["songs"]
+    catalog = Catalog(known_songs)
+    for song in rng.sample(catalog.songs, min(playlist_size, len(catalog.songs))):
+        client.request("POST", "/api/add-song-to-playlist", song_key(song))
+    return catalog
+
+
+####################################################
+#
+# Load run
+#
+####################################################
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def run_load(host: str, port: int, catalog: Catalog, weights: dict, clients: int, duration: float,
+             seed: int) -> dict:
+    """
+    Drives the app with concurrent clients replaying the weighted mix.
+
+    Args:
+        host (str): The app host.
+        port (int): The app port.
+        catalog (Catalog): The seeded songs.
+        weights (dict): Category weights.
+        clients (int): The number of concurrent clients.
+        duration (float): Seconds to run for.
+        seed (int): The random seed.
+
+    Returns:
+        dict: Overall throughput and per-endpoint counts, errors and latency percentiles.
+        Requests turned away by admission control (429) are counted as rejected, not as errors.
+    """
+    names = list(weights)
+    weight_values = [weights[name] for name in names]
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    rejected = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(index: int):
+        client = Client(host, port, random.Random(seed + index))
+        local_samples = defaultdict(list)
+        local_errors = defaultdict(int)
+        local_rejected = defaultdict(int)
+        while time.perf_counter() < deadline:
+            category = client.rng.choices(names, weights=weight_values)[0]
+            for method, path, body, label in CATEGORIES[category](client, catalog):
+                status, _, elapsed = client.request(method, path, body)
+                local_samples[label].append(elapsed)
+                if status == 429:
+                    local_rejected[label] += 1
+                elif not 200 <= status < 400:
+                    local_errors[label] += 1
+        client.close()
+        with lock:
+            for label, values in local_samples.items():
+                samples[label].extend(values)
+            for label, count in local_errors.items():
+                errors[label] += count
+            for label, count in local_rejected.items():
+                rejected[label] += count
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    endpoints = {}
+    for label, values in sorted(samples.items()):
+        values.sort()
+        endpoints[label] = {
+            "requests": len(values),
+            "errors": errors[label],
+            "rejected": rejected[label],
+            "rps": round(len(values) / elapsed, 1),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+        }
+    total = sum(endpoint["requests"] for endpoint in endpoints.values())
+    return {
+        "clients": clients,
+        "duration_s": round(elapsed, 2),
+        "requests": total,
+        "errors": sum(errors.values()),
+        "rejected": sum(rejected.values()),
+        "rps": round(total / elapsed, 1),
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"{report['requests']} requests in {report['duration_s']} s with {report['clients']} clients: "
+          f"{report['rps']} req/s, {report['errors']} errors, {report['rejected']} rejected (429)")
+    print(f"{'endpoint':<52}{'reqs':>8}{'errs':>7}{'429s':>7}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for label, stats in report["endpoints"].items():
+        print(f"{label:<52}{stats['requests']:>8}{stats['errors']:>7}{stats['rejected']:>7}{stats['rps']:>9}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+
+
+####################################################
+#
+# Throwaway app instance
+#
+####################################################
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_healthy(port: int, process: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App exited during startup with code {process.returncode}")
+        try:
+            conn = HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/api/health")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("App did not become healthy in time")
+
+
+def sample_catalog(db_path: str, count: int, seed: int) -> list[dict]:
+    """
+    Reads up to count random, non-deleted songs straight from a bulk-loaded database.
+
+    Args:
+        db_path (str): The database file.
+        count (int): The number of songs to sample.
+        seed (int): The random seed.
+
+    Returns:
+        list[dict]: The songs, shaped like the API's song objects.
+    """
+    conn = sqlite3.connect(db_path)
+    (size,) = conn.execute("SELECT MAX(id) FROM songs").fetchone()
+    ids = random.Random(seed).sample(range(1, size + 1), min(count, size))
+    rows = conn.execute(f"""
+        SELECT id, artist, title, year, genre, duration FROM songs
+        WHERE deleted = FALSE AND id IN ({','.join('?' * len(ids))})
+    """, ids).fetchall()
+    conn.close()
+    return [dict(zip(("id", "artist", "title", "year", "genre", "duration"), row)) for row in rows]
+
+
+def start_local_app(server: str, db_path: str, random_org_url: str, env: Optional[dict] = None,
+                    catalog_rows: int = 0, seed: int = 411) -> tuple:
+    """
+    Launches the app against a fresh database and the random.org stand-in.
+
+    Args:
+        server (str): A key of SERVER_COMMANDS.
+        db_path (str): Where to create the throwaway database.
+        random_org_url (str): The base URL of the random.org stand-in.
+        env (dict, optional): Extra environment variables for the app.
+        catalog_rows (int): Bulk-load this many synthetic songs before starting the app.
+        seed (int): The random seed for the synthetic songs.
+
+    Returns:
+        tuple: (subprocess.Popen, port).
+    """
+    if catalog_rows:
+        stats = load_songs(db_path, catalog_rows, seed)
+        print(f"Bulk-loaded {stats['rows']} songs ({stats['rows_per_second']} rows/s)", file=sys.stderr)
+    else:
+        conn = sqlite3.connect(db_path)
+        with open(SCHEMA_PATH) as f:
+            conn.executescript(f.read())
+        conn.close()
+
+    port = free_port()
+    command = [part.replace("{port}", str(port)) for part in SERVER_COMMANDS[server]]
+    process_env = dict(os.environ, DB_PATH=db_path, RANDOM_ORG_URL=random_org_url, **(env or {}))
+    process = subprocess.Popen(command, cwd=PROJECT_DIR, env=process_env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_until_healthy(port, process)
+    return process, port
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Drive the playlist app with a concurrent weighted request mix.")
+    parser.add_argument("--url", help="Target an already running app instead of starting a throwaway one")
+    parser.add_argument("--server", choices=sorted(SERVER_COMMANDS), default="werkzeug",
+                        help="How to launch the throwaway app (default: %(default)s)")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent clients (default: %(default)s)")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds to run (default: %(default)s)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Category weights (default: %(default)s)")
+    parser.add_argument("--seed-songs", type=int, default=200, help="Songs to create before the run")
+    parser.add_argument("--playlist-size", type=int, default=50, help="Songs to put in the playlist before the run")
+    parser.add_argument("--catalog-rows", type=int, default=0,
+                        help="Bulk-load this many synthetic songs into the throwaway database first "
+                             "(the catalog listing and leaderboard return every song, so weigh the mix accordingly)")
+    parser.add_argument("--seed", type=int, default=411)
+    parser.add_argument("--random-delay-ms", type=float, default=0,
+                        help="Latency added by the random.org stand-in, to model a slow external call")
+    parser.add_argument("--app-env", action="append", default=[], metavar="NAME=VALUE",
+                        help="Environment variable for the throwaway app, e.g. ADMISSION_ENABLED=false (repeatable)")
+    parser.add_argument("--max-error-rate", type=float,
+                        help="Exit non-zero if the share of failed requests exceeds this fraction")
+    parser.add_argument("--output", help="Also write the report as JSON to this path")
+    return parser
+
+
+def execute(args: argparse.Namespace) -> dict:
+    """
+    Runs one load test as described by parsed command line arguments.
+
+    Args:
+        args (argparse.Namespace): Arguments from build_parser.
+
+    Returns:
+        dict: The run_load report, with the mix and server added.
+    """
+    weights = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    process = None
+    stub = None
+    tmp = None
+    try:
+        if args.url:
+            target = urlparse(args.url)
+            host, port = target.hostname, target.port or 80
+        else:
+            tmp = tempfile.mkdtemp(prefix="loadgen-")
+            stub = start_random_org_stub(seed=args.seed, delay_ms=args.random_delay_ms)
+            db_path = os.path.join(tmp, "song_catalog.db")
+            app_env = dict(item.split("=", 1) for item in args.app_env)
+            process, port = start_local_app(args.server, db_path, f"http://127.0.0.1:{stub.server_port}",
+                                            env=app_env, catalog_rows=args.catalog_rows, seed=args.seed)
+            host = "127.0.0.1"
+
+        known_songs = None
+        if args.catalog_rows and not args.url:
+            known_songs = sample_catalog(db_path, 10_000, args.seed)
+        setup_client = Client(host, port, rng)
+        catalog = seed_app(setup_client, args.seed_songs, rng, args.playlist_size, known_songs)
+        setup_client.close()
+
+        report = run_load(host, port, catalog, weights, args.clients, args.duration, args.seed)
+        report["mix"] = weights
+        report["server"] = args.url or args.server
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        if stub is not None:
+            stub.shutdown()
+        if tmp is not None:
+            shutil.rmtree(tmp, ignore_errors=True)
+    return report
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    report = execute(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.max_error_rate is not None and report["requests"]:
+        error_rate = report["errors"] / report["requests"]
+        if error_rate > args.max_error_rate:
+            print(f"Error rate {error_rate:.1%} exceeds {args.max_error_rate:.1%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
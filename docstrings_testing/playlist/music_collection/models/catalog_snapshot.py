@@ -0,0 +1,251 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+from music_collection.utils import sql_utils
+from music_collection.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Serve song lookups and full-catalog reads from an in-memory copy (see CatalogSnapshot).
+# It holds every song, so it suits catalogs that fit comfortably in each worker's memory.
+CATALOG_SNAPSHOT_ENABLED = os.getenv("CATALOG_SNAPSHOT_ENABLED", "false").lower() == "true"
+# Look for writes made by other connections at most this often; 0 checks on every read
+CATALOG_SNAPSHOT_CHECK_SECONDS = float(os.getenv("CATALOG_SNAPSHOT_CHECK_SECONDS", "1"))
+
+
+class CatalogSnapshot:
+    """
+    An in-memory copy of the songs table, indexed by id and by compound key.
+
+    The snapshot is loaded on the first read. song_model patches it after each of its own
+    writes. Every change to songs, by any connection, bumps the counter in catalog_changes.
+    A patch is applied only when the counter has moved by exactly the rows of the write it
+    describes; otherwise (another gunicorn worker, a bulk load, a shared transaction or raw
+    SQL changed songs too) the snapshot is dropped and the next read reloads the whole table.
+    Writes to other tables, such as the play log's, leave the counter and the snapshot alone.
+
+    Between checks reads do not touch SQLite at all, so other connections' writes can go
+    unseen for up to check_interval seconds. Returned songs are shared between callers and
+    must be treated as read-only.
+    """
+
+    def __init__(self, check_interval: float = CATALOG_SNAPSHOT_CHECK_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.check_interval = check_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._path: Optional[str] = None
+        # None until loaded; songs in id order, without the deleted flag
+        self._by_id: Optional[dict[int, dict]] = None
+        self._by_key: dict[Tuple[str, str, int], int] = {}
+        self._deleted: set[int] = set()
+        # get_all_songs results per sort order, rebuilt after any change
+        self._lists: dict[bool, list[dict]] = {}
+        self._version = 0
+        self._checked_at = 0.0
+        self.loads = 0
+        self.checks = 0
+        self.reads = 0
+        self.patches = 0
+        self.invalidations = 0
+
+    def active(self) -> bool:
+        """
+        Tells whether reads should be served from the snapshot.
+
+        Reads inside a shared transaction (an /api/batch request) go to SQLite, since they
+        must see the batch's uncommitted writes.
+
+        Returns:
+            bool: True when CATALOG_SNAPSHOT_ENABLED is set and no shared transaction is active.
+        """
+        return CATALOG_SNAPSHOT_ENABLED and not sql_utils.in_shared_transaction()
+
+    def get_by_id(self, song_id: int) -> Tuple[Optional[dict], bool]:
+        """
+        Looks a song up by id, including deleted songs.
+
+        Returns:
+            Tuple[Optional[dict], bool]: The song with play_count (None if there is no such
+            song), and whether it is deleted.
+        """
+        with self._lock:
+            self._refresh()
+            self.reads += 1
+            return self._by_id.get(song_id), song_id in self._deleted
+
+    def get_by_compound_key(self, artist: str, title: str, year: int) -> Tuple[Optional[dict], bool]:
+        """
+        Looks a song up by (artist, title, year), including deleted songs.
+
+        Returns:
+            Tuple[Optional[dict], bool]: The song with play_count (None if there is no such
+            song), and whether it is deleted.
+        """
+        with self._lock:
+            self._refresh()
+            self.reads += 1
+            song_id = self._by_key.get((artist, title, year))
+            return self._by_id.get(song_id), song_id in self._deleted
+
+    def all_songs(self, sort_by_play_count: bool = False) -> list[dict]:
+        """
+        Returns the non-deleted songs, in id order or by play count (highest first).
+
+        Returns:
+            list[dict]: The songs with play_count. The list is shared until the next change.
+        """
+        with self._lock:
+            self._refresh()
+            self.reads += 1
+            songs = self._lists.get(sort_by_play_count)
+            if songs is None:
+                songs = [song for song_id, song in self._by_id.items() if song_id not in self._deleted]
+                if sort_by_play_count:
+                    songs.sort(key=lambda song: song["play_count"], reverse=True)
+                self._lists[sort_by_play_count] = songs
+            return songs
+
+    def check_for_writes(self) -> None:
+        """
+        Drops the snapshot if songs have changed since it was last loaded or patched.
+
+        song_model calls this right before it writes, so a change made by another connection
+        in the meantime is picked up without waiting for the check interval. It guarantees
+        nothing about the write that follows: a change landing between this check and the
+        commit is caught by the patch, which then finds the counter moved too far.
+        """
+        with self._lock:
+            if self._by_id is None or self._path != sql_utils.DB_PATH:
+                return
+            if self._read_version() != self._version:
+                self._drop("written by another connection")
+
+    def put(self, song: dict) -> None:
+        """Adds a song created by this process."""
+        def change():
+            self._by_id[song["id"]] = song
+            self._by_key[(song["artist"], song["title"], song["year"])] = song["id"]
+            self._deleted.discard(song["id"])
+        self._patch(change, rows=1)
+
+    def mark_deleted(self, song_id: int) -> None:
+        """Marks a song deleted by this process."""
+        def change():
+            if song_id in self._by_id:
+                self._deleted.add(song_id)
+        self._patch(change, rows=1)
+
+    def add_play(self, song_id: int) -> None:
+        """Counts a play recorded by this process."""
+        self.add_plays({song_id: 1})
+
+    def add_plays(self, plays: dict[int, int]) -> None:
+        """Counts plays recorded by this process, given per song id (one updated row each), as one patch."""
+        def change():
+            for song_id, count in plays.items():
+                song = self._by_id.get(song_id)
+                if song is not None:
+                    # Replace rather than modify, since readers may hold the old dict
+                    self._by_id[song_id] = {**song, "play_count": song["play_count"] + count}
+        self._patch(change, rows=len(plays))
+
+    def invalidate(self) -> None:
+        """Drops the snapshot; the next read reloads it."""
+        with self._lock:
+            self._drop("invalidated")
+
+    def stats(self) -> dict:
+        """
+        Returns the snapshot's size and counters.
+
+        Returns:
+            dict: enabled, loaded, songs, loads, checks (catalog_changes reads), reads,
+            patches, invalidations and check_seconds.
+        """
+        with self._lock:
+            return {
+                "enabled": CATALOG_SNAPSHOT_ENABLED,
+                "loaded": self._by_id is not None,
+                "songs": len(self._by_id) - len(self._deleted) if self._by_id is not None else 0,
+                "loads": self.loads,
+                "checks": self.checks,
+                "reads": self.reads,
+                "patches": self.patches,
+                "invalidations": self.invalidations,
+                "check_seconds": self.check_interval,
+            }
+
+    def _patch(self, change: Callable[[], None], rows: int) -> None:
+        with self._lock:
+            if self._by_id is None or self._path != sql_utils.DB_PATH:
+                return
+            # The write being patched in changed this many rows; any more means another
+            # connection changed songs since the snapshot was last brought up to date
+            version = self._read_version()
+            if version != self._version + rows:
+                self._drop("written by another connection")
+                return
+            change()
+            self._lists.clear()
+            self._version = version
+            self.patches += 1
+
+    def _refresh(self) -> None:
+        if self._path != sql_utils.DB_PATH:
+            self._connect()
+        elif self._by_id is not None and self._clock() - self._checked_at < self.check_interval:
+            return
+
+        version = self._read_version()
+        if self._by_id is None or version != self._version:
+            self._load(version)
+        self._checked_at = self._clock()
+
+    def _connect(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = sqlite3.connect(sql_utils.DB_PATH, check_same_thread=False)
+        self._path = sql_utils.DB_PATH
+        self._by_id = None
+
+    def _read_version(self) -> int:
+        self.checks += 1
+        return self._conn.execute("SELECT version FROM catalog_changes").fetchone()[0]
+
+    def _load(self, version: int) -> None:
+        # version was read first, so a commit landing during the load only causes another reload
+        start = time.perf_counter()
+        rows = self._conn.execute("""
+            SELECT id, artist, title, year, genre, duration, play_count, deleted
+            FROM songs
+            ORDER BY id
+        """).fetchall()
+
+        by_id, by_key, deleted = {}, {}, set()
+        for row in rows:
+            by_id[row[0]] = {"id": row[0], "artist": row[1], "title": row[2], "year": row[3],
+                             "genre": row[4], "duration": row[5], "play_count": row[6]}
+            by_key[(row[1], row[2], row[3])] = row[0]
+            if row[7]:
+                deleted.add(row[0])
+
+        self._by_id, self._by_key, self._deleted = by_id, by_key, deleted
+        self._lists.clear()
+        self._version = version
+        self.loads += 1
+        logger.info("Loaded catalog snapshot of %d songs in %.1f ms", len(rows), (time.perf_counter() - start) * 1000)
+
+    def _drop(self, reason: str) -> None:
+        if self._by_id is not None:
+            self._by_id = None
+            self.invalidations += 1
+            logger.info("Catalog snapshot dropped: %s", reason)
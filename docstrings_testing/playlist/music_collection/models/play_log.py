@@ -0,0 +1,324 @@
+from collections import Counter, deque
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+from music_collection.utils import sql_utils
+from music_collection.utils.logger import configure_logger
+from music_collection.utils.sql_utils import get_db_connection
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Record a timestamped event for every play, for /api/charts; the lifetime play_count is kept either way
+PLAY_LOG_ENABLED = os.getenv("PLAY_LOG_ENABLED", "true").lower() == "true"
+# Plays written per transaction; a full batch is written without waiting for the interval
+PLAY_LOG_BATCH_SIZE = int(os.getenv("PLAY_LOG_BATCH_SIZE", "500"))
+# The longest a play waits in memory before it is written
+PLAY_LOG_FLUSH_SECONDS = float(os.getenv("PLAY_LOG_FLUSH_SECONDS", "1"))
+# Plays held in memory while the database cannot take them; beyond this the oldest are dropped
+PLAY_LOG_MAX_PENDING = int(os.getenv("PLAY_LOG_MAX_PENDING", "100000"))
+CHARTS_MAX_LIMIT = int(os.getenv("CHARTS_MAX_LIMIT", "100"))
+
+HOUR = 3600
+DAY = 24 * HOUR
+WINDOW_UNITS = {"h": HOUR, "d": DAY, "w": 7 * DAY}
+_WINDOW_RE = re.compile(r"^\s*(\d+)\s*([hdw])\s*$")
+
+
+class PlayLog:
+    """
+    Buffers plays in memory and writes them in batches, with their hourly and daily rollups.
+
+    Each batch is one transaction: the raw events go to play_events, and the plays counted
+    per (hour, song) and (day, song) are added to song_plays_hourly and song_plays_daily.
+    Charts read only the rollups, so their cost follows the number of songs played in the
+    window rather than the number of plays.
+
+    Once start() is called a background thread writes whatever is queued when a batch
+    fills and every flush_interval seconds; without it, record() writes full batches
+    itself. Plays still in memory are lost if the process dies, and are not in
+    the charts until written.
+    """
+
+    def __init__(self, batch_size: int = PLAY_LOG_BATCH_SIZE, flush_interval: float = PLAY_LOG_FLUSH_SECONDS,
+                 max_pending: int = PLAY_LOG_MAX_PENDING, clock: Callable[[], float] = time.time):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Only one batch is written at a time, so a failed batch goes back in front of later plays
+        self._flush_lock = threading.Lock()
+        # Full, it drops its oldest play to take a new one
+        self._pending: deque[Tuple[int, int]] = deque(maxlen=max_pending)
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.failures = 0
+        self.last_batch_ms: Optional[float] = None
+
+    def record(self, song_id: int, played_at: Optional[float] = None) -> None:
+        """
+        Queues one play to be written with the next batch.
+
+        Args:
+            song_id (int): The song played.
+            played_at (float, optional): Unix time of the play; defaults to now.
+        """
+        if not PLAY_LOG_ENABLED:
+            return
+        event = (song_id, int(self._clock() if played_at is None else played_at))
+        with self._lock:
+            if len(self._pending) == self.max_pending:
+                self.dropped += 1
+            self._pending.append(event)
+            self.recorded += 1
+            full = len(self._pending) >= self.batch_size
+        if not full:
+            return
+        if self.running():
+            self._wake.set()
+        else:
+            self._flush_quietly()
+
+    def flush(self) -> int:
+        """
+        Writes every queued play, and its rollups, in one transaction.
+
+        Returns:
+            int: The plays written.
+
+        Raises:
+            sqlite3.Error: If the batch cannot be written; its plays stay queued.
+        """
+        with self._flush_lock:
+            with self._lock:
+                events, self._pending = self._pending, deque(maxlen=self.max_pending)
+            if not events:
+                return 0
+            start = time.perf_counter()
+            try:
+                write_plays(list(events))
+            except sqlite3.Error:
+                with self._lock:
+                    # Put the batch back in front of the plays recorded since; extending it
+                    # drops the oldest once full, and costs only the plays that came later
+                    later = self._pending
+                    self.dropped += max(0, len(events) + len(later) - self.max_pending)
+                    events.extend(later)
+                    self._pending = events
+                    self.failures += 1
+                raise
+            with self._lock:
+                self.written += len(events)
+                self.batches += 1
+                self.last_batch_ms = round((time.perf_counter() - start) * 1000, 3)
+        logger.debug("Wrote %d plays in %.1f ms", len(events), self.last_batch_ms)
+        return len(events)
+
+    def pending(self) -> int:
+        """
+        Counts the plays not written yet, for the readiness report.
+
+        Returns:
+            int: The queued plays.
+        """
+        with self._lock:
+            return len(self._pending)
+
+    def running(self) -> bool:
+        """Tells whether the background writer is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Starts the background writer; it must be started again in a forked worker."""
+        if self.running():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="play-log", daemon=True)
+        self._thread.start()
+        logger.info("Play log writer started (batches of %d, every %g s)", self.batch_size, self.flush_interval)
+
+    def stop(self) -> None:
+        """Stops the background writer and writes the plays still queued."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._flush_quietly()
+
+    def stats(self) -> dict:
+        """
+        Reports the writer's counters.
+
+        Returns:
+            dict: enabled, running, pending, recorded, written, dropped, batches, failures
+            and last_batch_ms.
+        """
+        with self._lock:
+            return {
+                "enabled": PLAY_LOG_ENABLED,
+                "running": self.running(),
+                "pending": len(self._pending),
+                "recorded": self.recorded,
+                "written": self.written,
+                "dropped": self.dropped,
+                "batches": self.batches,
+                "failures": self.failures,
+                "last_batch_ms": self.last_batch_ms,
+            }
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._flush_quietly()
+
+    def _flush_quietly(self) -> None:
+        try:
+            self.flush()
+        except sqlite3.Error as e:
+            logger.error("Could not write plays, %d queued: %s", self.pending(), e)
+
+
+def write_plays(events: list) -> None:
+    """
+    Writes plays and adds them to the hourly and daily rollups, in one transaction.
+
+    Plays are counted per (hour, song) and (day, song) before writing, so a batch
+    touches each rollup row once however many times the song was played. songs is not
+    written, so the commit leaves catalog_changes, and with it the catalog snapshot, alone.
+
+    Args:
+        events (list[tuple[int, int]]): (song_id, played_at) pairs, played_at in Unix seconds.
+
+    Raises:
+        sqlite3.Error: If there is a database error; nothing is written.
+    """
+    hourly = Counter((played_at - played_at % HOUR, song_id) for song_id, played_at in events)
+    daily = Counter((played_at - played_at % DAY, song_id) for song_id, played_at in events)
+    # A connection of its own: the writer thread must never join a request's shared transaction
+    conn = sql_utils.connect()
+    try:
+        with conn:
+            conn.executemany("INSERT INTO play_events (song_id, played_at) VALUES (?, ?)", events)
+            conn.executemany("""
+                INSERT INTO song_plays_hourly (hour_start, song_id, plays) VALUES (?, ?, ?)
+                ON CONFLICT (hour_start, song_id) DO UPDATE SET plays = plays + excluded.plays
+            """, [(hour, song_id, plays) for (hour, song_id), plays in hourly.items()])
+            conn.executemany("""
+                INSERT INTO song_plays_daily (day_start, song_id, plays) VALUES (?, ?, ?)
+                ON CONFLICT (day_start, song_id) DO UPDATE SET plays = plays + excluded.plays
+            """, [(day, song_id, plays) for (day, song_id), plays in daily.items()])
+    finally:
+        conn.close()
+
+
+def parse_window(window: str) -> int:
+    """
+    Parses a chart window such as '24h', '7d' or '4w'.
+
+    Args:
+        window (str): A whole number of hours (h), days (d) or weeks (w).
+
+    Returns:
+        int: The window in seconds.
+
+    Raises:
+        ValueError: If the window is malformed or empty.
+    """
+    match = _WINDOW_RE.match(window or "")
+    if not match or int(match.group(1)) < 1:
+        raise ValueError(f"Invalid window '{window}': expected a number of hours, days or weeks, e.g. 24h, 7d or 4w")
+    return int(match.group(1)) * WINDOW_UNITS[match.group(2)]
+
+
+def chart_bounds(window_seconds: int, now: Optional[float] = None) -> Tuple[int, int]:
+    """
+    Gives the hour-aligned [start, end) of a window ending with the current hour.
+
+    Args:
+        window_seconds (int): The window length; rounded up to whole hours.
+        now (float, optional): Unix time; defaults to now.
+
+    Returns:
+        Tuple[int, int]: start and end in Unix seconds.
+    """
+    now = int(time.time() if now is None else now)
+    end = now - now % HOUR + HOUR
+    return end - -(-window_seconds // HOUR) * HOUR, end
+
+
+def get_charts(start: int, end: int, limit: int = 20) -> list[dict]:
+    """
+    Retrieves the most played non-deleted songs between two hour-aligned times.
+
+    Whole days inside the window are read from song_plays_daily and the hours before the
+    first and after the last whole day from song_plays_hourly, so a window reads at most
+    one rollup row per song for each of its days plus 46 edge hours. Raw play_events are
+    never scanned.
+
+    Args:
+        start (int): Unix seconds, inclusive; a multiple of 3600.
+        end (int): Unix seconds, exclusive; a multiple of 3600.
+        limit (int): How many songs to return, up to CHARTS_MAX_LIMIT.
+
+    Returns:
+        list[dict]: id, artist, title, year, genre, duration and plays in the window,
+        most played first, ties by id.
+
+    Raises:
+        ValueError: If the bounds are not hour-aligned or out of order, or limit is out of range.
+        sqlite3.Error: If there is a database error.
+    """
+    if start % HOUR or end % HOUR or start >= end:
+        raise ValueError(f"Invalid chart window [{start}, {end}): expected whole hours with start before end")
+    if not 1 <= limit <= CHARTS_MAX_LIMIT:
+        raise ValueError(f"Limit must be between 1 and {CHARTS_MAX_LIMIT}, got {limit}")
+
+    first_day = -(-start // DAY) * DAY
+    last_day = end - end % DAY
+    if first_day >= last_day:
+        # No whole day inside the window
+        first_day = last_day = end
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        logger.info("Retrieving the top %d songs between %d and %d", limit, start, end)
+        cursor.execute("""
+            SELECT s.id, s.artist, s.title, s.year, s.genre, s.duration, t.plays
+            FROM (
+                SELECT song_id, SUM(plays) AS plays
+                FROM (
+                    SELECT song_id, plays FROM song_plays_daily WHERE day_start >= ? AND day_start < ?
+                    UNION ALL
+                    SELECT song_id, plays FROM song_plays_hourly WHERE hour_start >= ? AND hour_start < ?
+                    UNION ALL
+                    SELECT song_id, plays FROM song_plays_hourly WHERE hour_start >= ? AND hour_start < ?
+                )
+                GROUP BY song_id
+            ) AS t
+            JOIN songs AS s ON s.id = t.song_id
+            WHERE s.deleted = FALSE
+            ORDER BY t.plays DESC, s.id
+            LIMIT ?
+        """, (first_day, last_day, start, first_day, last_day, end, limit))
+        rows = cursor.fetchall()
+
+    return [
+        {"id": row[0], "artist": row[1], "title": row[2], "year": row[3], "genre": row[4], "duration": row[5],
+         "plays": row[6]}
+        for row in rows
+    ]
@@ -1,6 +1,6 @@
 import logging
 from typing import List
-from music_collection.models.song_model import Song, update_play_count
+from music_collection.models.song_model import Song, update_play_count, update_play_counts
 from music_collection.utils.logger import configure_logger
 
 logger = logging.getLogger(__name__)
@@ -14,6 +14,7 @@ class PlaylistModel:
     Attributes:
         current_track_number (int): The current track number being played.
         playlist (List[Song]): The list of songs in the playlist.
+        version (int): Incremented whenever the songs in the playlist or their order change.
 
     """
 
@@ -23,6 +24,7 @@ class PlaylistModel:
         """
         self.current_track_number = 1
         self.playlist: List[Song] = []
+        self.version = 0
 
     ##################################################
     # Song Management Functions
@@ -50,6 +52,7 @@ class PlaylistModel:
             raise ValueError(f"Song with ID {song.id} already exists in the playlist")
 
         self.playlist.append(song)
+        self.version += 1
 
     def remove_song_by_song_id(self, song_id: int) -> None:
         """
@@ -65,6 +68,7 @@ class PlaylistModel:
         self.check_if_empty()
         song_id = self.validate_song_id(song_id)
         self.playlist = [song_in_playlist for song_in_playlist in self.playlist if song_in_playlist.id != song_id]
+        self.version += 1
         logger.info("Song with id %d has been removed", song_id)
 
     def remove_song_by_track_number(self, track_number: int) -> None:
@@ -83,6 +87,7 @@ class PlaylistModel:
         playlist_index = track_number - 1
         logger.info("Removing song: %s", self.playlist[playlist_index].title)
         del self.playlist[playlist_index]
+        self.version += 1
 
     def clear_playlist(self) -> None:
         """
@@ -92,6 +97,7 @@ class PlaylistModel:
         if self.get_playlist_length() == 0:
             logger.warning("Clearing an empty playlist")
         self.playlist.clear()
+        self.version += 1
 
     ##################################################
     # Playlist Retrieval Functions
@@ -184,6 +190,7 @@ class PlaylistModel:
         song = self.get_song_by_song_id(song_id)
         self.playlist.remove(song)
         self.playlist.insert(0, song)
+        self.version += 1
         logger.info("Song with ID %d has been moved to the beginning", song_id)
 
     def move_song_to_end(self, song_id: int) -> None:
@@ -199,6 +206,7 @@ class PlaylistModel:
         song = self.get_song_by_song_id(song_id)
         self.playlist.remove(song)
         self.playlist.append(song)
+        self.version += 1
         logger.info("Song with ID %d has been moved to the end", song_id)
 
     def move_song_to_track_number(self, song_id: int, track_number: int) -> None:
@@ -217,6 +225,7 @@ class PlaylistModel:
         song = self.get_song_by_song_id(song_id)
         self.playlist.remove(song)
         self.playlist.insert(playlist_index, song)
+        self.version += 1
         logger.info("Song with ID %d has been moved to track number %d", song_id, track_number)
 
     def swap_songs_in_playlist(self, song1_id: int, song2_id: int) -> None:
@@ -244,6 +253,7 @@ class PlaylistModel:
         index1 = self.playlist.index(song1)
         index2 = self.playlist.index(song2)
         self.playlist[index1], self.playlist[index2] = self.playlist[index2], self.playlist[index1]
+        self.version += 1
         logger.info("Swapped songs with IDs %d and %d", song1_id, song2_id)
 
     ##################################################
@@ -267,37 +277,44 @@ class PlaylistModel:
         self.current_track_number = (self.current_track_number % self.get_playlist_length()) + 1
         logger.info("Track number updated from %d to %d", previous_track_number, self.current_track_number)
 
-    def play_entire_playlist(self) -> None:
+    def play_entire_playlist(self) -> dict:
         """
         Plays the entire playlist.
 
+        Returns:
+            dict: The update_play_counts report: plays counted, and the ids of songs
+            skipped because they are missing from the catalog or deleted.
+
         Side-effects:
             Resets the current track number to 1.
-            Updates the play count for each song.
+            Updates the play count for each song, in one transaction.
         """
         self.check_if_empty()
         logger.info("Starting to play the entire playlist.")
         self.current_track_number = 1
         logger.info("Reset current track number to 1.")
-        for _ in range(self.get_playlist_length()):
-            logger.info("Playing track number: %d", self.current_track_number)
-            self.play_current_song()
-        logger.info("Finished playing the entire playlist. Current track number reset to 1.")
+        report = update_play_counts([song.id for song in self.playlist])
+        logger.info("Finished playing the entire playlist (%d plays). Current track number reset to 1.", report["plays"])
+        return report
 
-    def play_rest_of_playlist(self) -> None:
+    def play_rest_of_playlist(self) -> dict:
         """
         Plays the rest of the playlist from the current track.
 
+        Returns:
+            dict: The update_play_counts report: plays counted, and the ids of songs
+            skipped because they are missing from the catalog or deleted.
+
         Side-effects:
             Updates the current track number back to 1.
-            Updates the play count for each song in the rest of the playlist.
+            Updates the play count for each song in the rest of the playlist, in one transaction.
         """
         self.check_if_empty()
         logger.info("Starting to play the rest of the playlist from track number: %d", self.current_track_number)
-        for _ in range(self.get_playlist_length() - self.current_track_number + 1):
-            logger.info("Playing track number: %d", self.current_track_number)
-            self.play_current_song()
-        logger.info("Finished playing the rest of the playlist. Current track number reset to 1.")
+        report = update_play_counts([song.id for song in self.playlist[self.current_track_number - 1:]])
+        self.current_track_number = 1
+        logger.info("Finished playing the rest of the playlist (%d plays). Current track number reset to 1.", report["plays"])
+        return report
 
     def rewind_playlist(self) -> None:
         """
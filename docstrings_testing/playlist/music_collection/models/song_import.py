@@ -0,0 +1,301 @@
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Callable, Iterator, Optional, TextIO, Tuple
+
+from music_collection.models import song_model
+from music_collection.utils import sql_utils
+from music_collection.utils.logger import configure_logger
+from music_collection.utils.sql_utils import get_db_connection
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Rows written per transaction
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+# Invalid and conflicting rows listed in a report; the counts always cover every row
+IMPORT_MAX_REPORTED_ROWS = int(os.getenv("IMPORT_MAX_REPORTED_ROWS", "1000"))
+# /api/import-songs runs larger uploads as background jobs unless told otherwise
+IMPORT_SYNC_MAX_BYTES = int(os.getenv("IMPORT_SYNC_MAX_BYTES", str(1024 * 1024)))
+
+IMPORT_FORMATS = ("csv", "ndjson")
+# skip leaves a song that already exists as it is; upsert updates its genre and duration and restores it if deleted
+IMPORT_MODES = ("skip", "upsert")
+SONG_FIELDS = ("artist", "title", "year", "genre", "duration")
+
+
+def detect_format(filename: Optional[str] = None, content_type: Optional[str] = None) -> Optional[str]:
+    """
+    Guesses the import format from a file name or a Content-Type.
+
+    Args:
+        filename (str, optional): e.g. 'catalog.csv' or 'catalog.ndjson'.
+        content_type (str, optional): e.g. 'text/csv' or 'application/x-ndjson'.
+
+    Returns:
+        Optional[str]: 'csv', 'ndjson', or None if neither tells.
+    """
+    extension = os.path.splitext(filename or "")[1].lower()
+    mimetype = (content_type or "").split(";")[0].strip().lower()
+    if extension == ".csv" or mimetype == "text/csv":
+        return "csv"
+    if extension in (".ndjson", ".jsonl") or mimetype in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+def read_records(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Yields the records of a CSV (with a header row) or NDJSON stream, one at a time.
+
+    Args:
+        stream (TextIO): The text to read.
+        fmt (str): 'csv' or 'ndjson'.
+
+    Yields:
+        Tuple[int, Any]: The line number and the record: a dict, or a ValueError for a
+        line that could not be parsed.
+
+    Raises:
+        ValueError: If the format is unknown or the CSV header lacks a song field.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        missing = [field for field in SONG_FIELDS if field not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"CSV header is missing the columns: {', '.join(missing)}")
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == "ndjson":
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_number, ValueError(f"Invalid JSON: {e}")
+                continue
+            yield line_number, record if isinstance(record, dict) else ValueError("Expected a JSON object")
+    else:
+        raise ValueError(f"Unknown import format '{fmt}', expected one of: {', '.join(IMPORT_FORMATS)}")
+
+
+def validate_record(record: dict) -> Tuple[str, str, int, str, int]:
+    """
+    Checks one record against the rules create_song enforces.
+
+    Args:
+        record (dict): artist, title, year, genre and duration; numbers may be strings, as in CSV.
+
+    Returns:
+        Tuple[str, str, int, str, int]: artist, title, year, genre and duration.
+
+    Raises:
+        ValueError: If a field is missing or invalid.
+    """
+    missing = [field for field in SONG_FIELDS if record.get(field) in (None, "")]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+    for field in ("artist", "title", "genre"):
+        if not isinstance(record[field], str):
+            raise ValueError(f"Invalid {field}: {record[field]!r} (must be a string).")
+
+    year = _as_int(record["year"], "year")
+    if year < 1900:
+        raise ValueError(f"Invalid year provided: {year} (must be an integer greater than or equal to 1900).")
+    duration = _as_int(record["duration"], "duration")
+    if duration <= 0:
+        raise ValueError(f"Invalid song duration: {duration} (must be a positive integer).")
+    return record["artist"], record["title"], year, record["genre"], duration
+
+
+def _as_int(value: Any, field: str) -> int:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid {field}: {value!r} (must be an integer).")
+
+
+def import_songs(stream: TextIO, fmt: str = "csv", mode: str = "skip", chunk_size: int = IMPORT_CHUNK_SIZE,
+                 progress: Optional[Callable[[dict], None]] = None) -> dict:
+    """
+    Streams songs from CSV or NDJSON into the catalog, chunk_size rows per transaction.
+
+    Each row is validated like create_song. A row whose (artist, title, year) already
+    exists, or appeared earlier in the stream, is a conflict: skip mode leaves the song
+    as it is, upsert mode updates its genre and duration and restores it if deleted.
+    Chunks commit as they go, so rows before a database error stay imported.
+
+    After each chunk this process's catalog snapshot is dropped and catalog_version bumped,
+    so its reads, cached responses and ETags include the new songs. Another process running
+    the app only reloads its snapshot (the rows move catalog_changes); its cached responses
+    and ETags follow its own catalog_version, so after an import from the command line,
+    restart the app to serve them fresh.
+
+    Args:
+        stream (TextIO): The CSV (with a header row) or NDJSON text.
+        fmt (str): 'csv' or 'ndjson'.
+        mode (str): 'skip' or 'upsert'.
+        chunk_size (int): Rows per transaction.
+        progress (Callable[[dict], None], optional): Called with the counts after each chunk.
+
+    Returns:
+        dict: The counts (rows, inserted, updated, skipped, invalid), up to
+        IMPORT_MAX_REPORTED_ROWS conflicts and errors with their line numbers, and timing.
+
+    Raises:
+        ValueError: If the format or mode is unknown, or the CSV header lacks a song field.
+        sqlite3.Error: If a chunk cannot be written.
+    """
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Unknown import mode '{mode}', expected one of: {', '.join(IMPORT_MODES)}")
+    if chunk_size < 1:
+        raise ValueError(f"Chunk size must be at least 1, got {chunk_size}")
+
+    report = {"format": fmt, "mode": mode, "rows": 0, "inserted": 0, "updated": 0, "skipped": 0, "invalid": 0,
+              "conflicts": [], "errors": []}
+    start = time.perf_counter()
+    logger.info("Importing songs from %s in %s mode", fmt, mode)
+
+    chunk = []
+    for line_number, record in read_records(stream, fmt):
+        report["rows"] += 1
+        try:
+            if isinstance(record, ValueError):
+                raise record
+            chunk.append((line_number, validate_record(record)))
+        except ValueError as e:
+            report["invalid"] += 1
+            _report_row(report["errors"], {"line": line_number, "error": str(e)})
+        if len(chunk) >= chunk_size:
+            _write_chunk(chunk, mode, report)
+            chunk = []
+            if progress is not None:
+                progress(_counts(report))
+    if chunk:
+        _write_chunk(chunk, mode, report)
+    if progress is not None:
+        progress(_counts(report))
+
+    elapsed = time.perf_counter() - start
+    report["elapsed_seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(report["rows"] / elapsed) if elapsed else None
+    logger.info("Imported %d rows: %d inserted, %d updated, %d skipped, %d invalid in %.1f s", report["rows"],
+                report["inserted"], report["updated"], report["skipped"], report["invalid"], elapsed)
+    return report
+
+
+def import_file(path: str, fmt: Optional[str] = None, mode: str = "skip", chunk_size: int = IMPORT_CHUNK_SIZE,
+                progress: Optional[Callable[[dict], None]] = None) -> dict:
+    """
+    Runs import_songs on a UTF-8 file, adding bytes_read and total_bytes to each progress report.
+
+    Args:
+        path (str): The file; its extension gives the format when fmt is not set.
+        fmt (str, optional): 'csv' or 'ndjson'.
+        mode (str): 'skip' or 'upsert'.
+        chunk_size (int): Rows per transaction.
+        progress (Callable[[dict], None], optional): Called with the counts after each chunk.
+
+    Returns:
+        dict: The import_songs report.
+
+    Raises:
+        ValueError: If the format cannot be told or is unknown, or the mode is unknown.
+        sqlite3.Error: If a chunk cannot be written.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt is None:
+        raise ValueError(f"Cannot tell the format of {path}; expected .csv or .ndjson, or a format")
+    total_bytes = os.path.getsize(path)
+
+    with open(path, "rb") as raw:
+        # utf-8-sig drops the byte order mark spreadsheet exports start with
+        text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+        report = import_songs(text, fmt, mode, chunk_size, progress=progress and (
+            lambda counts: progress({**counts, "bytes_read": raw.tell(), "total_bytes": total_bytes})))
+    return report
+
+
+def _write_chunk(chunk: list, mode: str, report: dict) -> None:
+    inserted, conflicts = 0, []
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        for line_number, (artist, title, year, genre, duration) in chunk:
+            cursor.execute("""
+                INSERT INTO songs (artist, title, year, genre, duration)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (artist, title, year) DO NOTHING
+            """, (artist, title, year, genre, duration))
+            if cursor.rowcount:
+                inserted += 1
+                continue
+            if mode == "upsert":
+                cursor.execute("""
+                    UPDATE songs SET genre = ?, duration = ?, deleted = FALSE
+                    WHERE artist = ? AND title = ? AND year = ?
+                """, (genre, duration, artist, title, year))
+            conflicts.append({"line": line_number, "artist": artist, "title": title, "year": year,
+                              "action": "updated" if mode == "upsert" else "skipped"})
+        conn.commit()
+
+    # Count only once the chunk is committed
+    report["inserted"] += inserted
+    report["updated" if mode == "upsert" else "skipped"] += len(conflicts)
+    for conflict in conflicts:
+        _report_row(report["conflicts"], conflict)
+    # The chunk may have inserted, changed or restored any song, so reload rather than patch
+    song_model.catalog_snapshot.invalidate()
+    song_model.catalog_version.bump()
+
+
+def _report_row(rows: list, row: dict) -> None:
+    if len(rows) < IMPORT_MAX_REPORTED_ROWS:
+        rows.append(row)
+
+
+def _counts(report: dict) -> dict:
+    return {key: report[key] for key in ("rows", "inserted", "updated", "skipped", "invalid")}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Import songs from a CSV or NDJSON file into the catalog.",
+        epilog="A running app picks the songs up in its catalog snapshot, but keeps serving cached responses "
+               "and ETags from before the import until it is restarted.")
+    parser.add_argument("path", help="The file to import; .csv with a header row, or .ndjson")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="Override the format the extension implies")
+    parser.add_argument("--mode", choices=IMPORT_MODES, default="skip",
+                        help="skip leaves existing songs as they are, upsert updates them (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Rows per transaction (default: %(default)s)")
+    parser.add_argument("--db", default=sql_utils.DB_PATH, help="The database (default: DB_PATH, %(default)s)")
+    args = parser.parse_args(argv)
+
+    sql_utils.DB_PATH = args.db
+
+    def show_progress(counts: dict) -> None:
+        print(f"\r{counts['bytes_read'] * 100 // max(1, counts['total_bytes'])}%: {counts['rows']} rows, "
+              f"{counts['inserted']} inserted, {counts['invalid']} invalid", end="", file=sys.stderr)
+
+    try:
+        report = import_file(args.path, args.format, args.mode, args.chunk_size, progress=show_progress)
+    except ValueError as e:
+        parser.error(str(e))
+    print(file=sys.stderr)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,48 @@
+import base64
+from collections import Counter
 from dataclasses import dataclass
+import json
 import logging
+import os
+import re
 import sqlite3
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
 
+from music_collection.models.catalog_snapshot import CatalogSnapshot
+from music_collection.models.play_log import PlayLog
 from music_collection.utils.logger import configure_logger
-from music_collection.utils.random_utils import get_random
-from music_collection.utils.sql_utils import get_db_connection
+from music_collection.utils.random_utils import get_random_fractions, sample_distinct
+from music_collection.utils.singleflight import SingleFlight
+from music_collection.utils.sql_utils import after_commit, get_db_connection, in_shared_transaction, iter_rows
+from music_collection.utils.versioning import VersionCounter
 
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+# Bumped after songs are created or deleted
+catalog_version = VersionCounter("catalog")
+# Bumped after play counts change
+stats_version = VersionCounter("stats")
+# Shares full-catalog reads between concurrent requests
+catalog_reads = SingleFlight("catalog_reads")
+# Serves song lookups and full-catalog reads from memory when CATALOG_SNAPSHOT_ENABLED is set
+catalog_snapshot = CatalogSnapshot()
+# Timestamped plays, written in batches with their hourly and daily rollups, for the charts
+play_log = PlayLog()
+# Lookups pick_songs retries when concurrent deletes shrink the catalog under it
+PICK_ATTEMPTS = 3
+# Most songs get_random_songs draws at once (random.org allows 10,000 fractions per request)
+RANDOM_SONGS_MAX = int(os.getenv("RANDOM_SONGS_MAX", "100"))
+# Largest page search_songs returns, and the most words of a query it uses
+SEARCH_MAX_LIMIT = 100
+SEARCH_MAX_TERMS = 8
+# Largest page query_songs returns, and the columns it can sort by
+QUERY_MAX_LIMIT = 100
+QUERY_SORT_COLUMNS = ("id", "artist", "title", "year", "duration", "play_count")
+# Song ids looked up per statement by update_play_counts, well under SQLite's 999 bound parameters
+PLAY_COUNT_LOOKUP_CHUNK = 500
+
 
 @dataclass
 class Song:
@@ -51,6 +83,7 @@ def create_song(artist: str, title: str, year: int, genre: str, duration: int) -
         raise ValueError(f"Invalid song duration: {duration} (must be a positive integer).")
 
     try:
+        catalog_snapshot.check_for_writes()
         # Use the context manager to handle the database connection
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -59,6 +92,10 @@ def create_song(artist: str, title: str, year: int, genre: str, duration: int) -
                 VALUES (?, ?, ?, ?, ?)
             """, (artist, title, year, genre, duration))
             conn.commit()
+            song = {"id": cursor.lastrowid, "artist": artist, "title": title, "year": year,
+                    "genre": genre, "duration": duration, "play_count": 0}
+            _patch_snapshot(lambda: catalog_snapshot.put(song))
+            after_commit(catalog_version.bump)
 
             logger.info("Song created successfully: %s - %s (%d)", artist, title, year)
 
@@ -82,6 +119,7 @@ def delete_song(song_id: int) -> None:
         sqlite3.Error: If any database error occurs.
     """
     try:
+        catalog_snapshot.check_for_writes()
         with get_db_connection() as conn:
             cursor = conn.cursor()
 
@@ -99,6 +137,8 @@ def delete_song(song_id: int) -> None:
             # Perform the soft delete by setting 'deleted' to TRUE
             cursor.execute("UPDATE songs SET deleted = TRUE WHERE id = ?", (song_id,))
             conn.commit()
+            _patch_snapshot(lambda: catalog_snapshot.mark_deleted(song_id))
+            after_commit(catalog_version.bump)
 
             logger.info("Song with ID %s marked as deleted.", song_id)
 
@@ -119,6 +159,10 @@ def get_song_by_id(song_id: int) -> Song:
     Raises:
         ValueError: If the song is not found or is marked as deleted.
     """
+    if catalog_snapshot.active():
+        song, deleted = catalog_snapshot.get_by_id(song_id)
+        return _snapshot_song(song, deleted, f"Song with ID {song_id}")
+
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -159,6 +203,10 @@ def get_song_by_compound_key(artist: str, title: str, year: int) -> Song:
     Raises:
         ValueError: If the song is not found or is marked as deleted.
     """
+    if catalog_snapshot.active():
+        song, deleted = catalog_snapshot.get_by_compound_key(artist, title, year)
+        return _snapshot_song(song, deleted, f"Song with artist '{artist}', title '{title}', and year {year}")
+
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -184,6 +232,21 @@ def get_song_by_compound_key(artist: str, title: str, year: int) -> Song:
         logger.error("Database error while retrieving song by compound key (artist '%s', title '%s', year %d): %s", artist, title, year, str(e))
         raise e
 
+def _snapshot_song(song: Optional[dict], deleted: bool, description: str) -> Song:
+    if song is None:
+        logger.info("%s not found", description)
+        raise ValueError(f"{description} not found")
+    if deleted:
+        logger.info("%s has been deleted", description)
+        raise ValueError(f"{description} has been deleted")
+    return Song(id=song["id"], artist=song["artist"], title=song["title"], year=song["year"],
+                genre=song["genre"], duration=song["duration"])
+
+def _patch_snapshot(patch: Callable[[], None]) -> None:
+    # A write in a shared transaction commits with the whole batch, whose other rows the
+    # patch cannot account for, so reload instead
+    after_commit(catalog_snapshot.invalidate if in_shared_transaction() else patch)
+
 def get_all_songs(sort_by_play_count: bool = False) -> list[dict]:
     """
     Retrieves all songs that are not marked as deleted from the catalog.
@@ -193,43 +256,33 @@ def get_all_songs(sort_by_play_count: bool = False) -> list[dict]:
 
     Returns:
         list[dict]: A list of dictionaries representing all non-deleted songs with play_count.
+        Concurrent calls with the same arguments and data versions share one query and
+        receive the same list, so it must not be modified.
 
     Logs:
         Warning: If the catalog is empty.
     """
+    if catalog_snapshot.active():
+        return catalog_snapshot.all_songs(sort_by_play_count)
+
+    # Read the versions before querying, so a result is never filed under a newer version than it reflects
+    key = ("all_songs", sort_by_play_count, catalog_version.value, stats_version.value)
+    return catalog_reads.do(key, lambda: _query_all_songs(sort_by_play_count))
+
+def _query_all_songs(sort_by_play_count: bool) -> list[dict]:
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
             logger.info("Attempting to retrieve all non-deleted songs from the catalog")
 
-            # Determine the sort order based on the 'sort_by_play_count' flag
-            query = """
-                SELECT id, artist, title, year, genre, duration, play_count
-                FROM songs
-                WHERE deleted = FALSE
-            """
-            if sort_by_play_count:
-                query += " ORDER BY play_count DESC"
-
-            cursor.execute(query)
+            cursor.execute(_all_songs_query(sort_by_play_count))
             rows = cursor.fetchall()
 
             if not rows:
                 logger.warning("The song catalog is empty.")
                 return []
 
-            songs = [
-                {
-                    "id": row[0],
-                    "artist": row[1],
-                    "title": row[2],
-                    "year": row[3],
-                    "genre": row[4],
-                    "duration": row[5],
-                    "play_count": row[6],
-                }
-                for row in rows
-            ]
+            songs = [_song_row_to_dict(row) for row in rows]
             logger.info("Retrieved %d songs from the catalog", len(songs))
             return songs
 
@@ -237,6 +290,301 @@ def get_all_songs(sort_by_play_count: bool = False) -> list[dict]:
         logger.error("Database error while retrieving all songs: %s", str(e))
         raise e
 
+def iter_all_songs(sort_by_play_count: bool = False, batch_size: Optional[int] = None) -> Iterator[dict]:
+    """
+    Yields the songs get_all_songs returns, fetching them from the cursor in batches.
+
+    Only one batch of rows is in memory at a time, so memory use does not grow with the
+    catalog. The database connection stays open until the generator is exhausted or closed.
+
+    Args:
+        sort_by_play_count (bool): If True, sort the songs by play count in descending order.
+        batch_size (int, optional): Rows per fetch; defaults to SQL_FETCH_BATCH_SIZE.
+
+    Yields:
+        dict: The non-deleted songs with play_count.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            logger.info("Streaming all non-deleted songs from the catalog")
+            cursor.execute(_all_songs_query(sort_by_play_count))
+
+            count = 0
+            for row in iter_rows(cursor, batch_size):
+                count += 1
+                yield _song_row_to_dict(row)
+            logger.info("Streamed %d songs from the catalog", count)
+
+    except sqlite3.Error as e:
+        logger.error("Database error while streaming all songs: %s", str(e))
+        raise e
+
+def _all_songs_query(sort_by_play_count: bool) -> str:
+    # Determine the sort order based on the 'sort_by_play_count' flag
+    query = """
+        SELECT id, artist, title, year, genre, duration, play_count
+        FROM songs
+        WHERE deleted = FALSE
+    """
+    if sort_by_play_count:
+        query += " ORDER BY play_count DESC"
+    return query
+
+def _song_row_to_dict(row: tuple) -> dict:
+    return {
+        "id": row[0],
+        "artist": row[1],
+        "title": row[2],
+        "year": row[3],
+        "genre": row[4],
+        "duration": row[5],
+        "play_count": row[6],
+    }
+
+def search_songs(query: str, limit: int = 20, after: Optional[str] = None) -> Tuple[list[dict], Optional[str]]:
+    """
+    Searches the artist, title and genre of non-deleted songs with the songs_fts index.
+
+    Every word of the query must match the start of a word in one of the fields, so
+    'mid hea' finds 'Midnight Heart'. Results are ordered by bm25 relevance (title
+    weighs most, then artist, then genre), then by id. Pages are keyset-paginated:
+    each page returns a cursor that continues after its last song, so deep pages cost
+    no more than the first. Relevance depends on the whole catalog, so pages fetched
+    while songs are being added or deleted may repeat or skip a song.
+
+    Args:
+        query (str): The search words; punctuation is ignored.
+        limit (int): Songs per page, from 1 to SEARCH_MAX_LIMIT.
+        after (str, optional): The next_cursor of the previous page.
+
+    Returns:
+        Tuple[list[dict], Optional[str]]: The songs with play_count, and the cursor of
+        the next page, or None on the last page.
+
+    Raises:
+        ValueError: If the query has no words, the limit is out of range or the cursor is invalid.
+    """
+    if not 1 <= limit <= SEARCH_MAX_LIMIT:
+        raise ValueError(f"Limit must be between 1 and {SEARCH_MAX_LIMIT}, got {limit}")
+    match = _fts_prefix_query(query)
+    after_rank, after_id = _decode_cursor(after) if after else (None, None)
+
+    sql = """
+        SELECT s.id, s.artist, s.title, s.year, s.genre, s.duration, s.play_count, songs_fts.rank
+        FROM songs_fts JOIN songs s ON s.id = songs_fts.rowid
+        WHERE songs_fts MATCH ?
+    """
+    params: list[Any] = [match]
+    if after_id is not None:
+        sql += " AND (songs_fts.rank > ? OR (songs_fts.rank = ? AND songs_fts.rowid > ?))"
+        params += [after_rank, after_rank, after_id]
+    sql += " ORDER BY songs_fts.rank, songs_fts.rowid LIMIT ?"
+    # One extra row tells whether there is a next page
+    params.append(limit + 1)
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            logger.info("Searching songs for %s", match)
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+        songs = [_song_row_to_dict(row) for row in rows[:limit]]
+        next_cursor = _encode_cursor(rows[limit - 1][7], rows[limit - 1][0]) if len(rows) > limit else None
+        logger.info("Found %d songs for %s%s", len(songs), match, ", with more" if next_cursor else "")
+        return songs, next_cursor
+
+    except sqlite3.Error as e:
+        logger.error("Database error while searching songs for %s: %s", match, str(e))
+        raise e
+
+def _fts_prefix_query(query: str) -> str:
+    # Quote each word so FTS5 operators and column filters in user input are taken literally
+    terms = re.findall(r"\w+", query or "")[:SEARCH_MAX_TERMS]
+    if not terms:
+        raise ValueError("The search query must contain at least one word.")
+    return " ".join(f'"{term}"*' for term in terms)
+
+def query_songs(genre: Optional[str] = None, artist: Optional[str] = None,
+                year_min: Optional[int] = None, year_max: Optional[int] = None,
+                duration_min: Optional[int] = None, duration_max: Optional[int] = None,
+                sort_by: str = "id", descending: bool = False, limit: int = 20,
+                after: Optional[str] = None) -> Tuple[list[dict], Optional[str]]:
+    """
+    Retrieves a page of the non-deleted songs matching every given filter.
+
+    Each filter is served by a partial index on the non-deleted songs (genre and artist
+    with the year, year, duration and play_count), so a page reads only the matching
+    rows rather than the whole catalog; a one-sided range sorted by id is instead read
+    in id order until the page is full. Pages are keyset-paginated in (sort_by, id)
+    order: each page returns a cursor that continues after its last song.
+
+    Args:
+        genre (str, optional): Only songs of this genre.
+        artist (str, optional): Only songs by this artist.
+        year_min (int, optional): Only songs released in or after this year.
+        year_max (int, optional): Only songs released in or before this year.
+        duration_min (int, optional): Only songs lasting at least this many seconds.
+        duration_max (int, optional): Only songs lasting at most this many seconds.
+        sort_by (str): One of QUERY_SORT_COLUMNS; ties are ordered by id.
+        descending (bool): If True, sort from the highest value down.
+        limit (int): Songs per page, from 1 to QUERY_MAX_LIMIT.
+        after (str, optional): The next_cursor of the previous page, fetched with the same
+            filters and sort.
+
+    Returns:
+        Tuple[list[dict], Optional[str]]: The songs with play_count, and the cursor of
+        the next page, or None on the last page.
+
+    Raises:
+        ValueError: If the limit, sort column, a range or the cursor is invalid.
+    """
+    if not 1 <= limit <= QUERY_MAX_LIMIT:
+        raise ValueError(f"Limit must be between 1 and {QUERY_MAX_LIMIT}, got {limit}")
+    if sort_by not in QUERY_SORT_COLUMNS:
+        raise ValueError(f"Cannot sort by '{sort_by}', expected one of: {', '.join(QUERY_SORT_COLUMNS)}")
+    for name, low, high in [("year", year_min, year_max), ("duration", duration_min, duration_max)]:
+        if low is not None and high is not None and low > high:
+            raise ValueError(f"Minimum {name} {low} is greater than maximum {name} {high}")
+
+    filters = {"genre": genre, "artist": artist, "year_min": year_min, "year_max": year_max,
+               "duration_min": duration_min, "duration_max": duration_max}
+    sql, params = _filtered_songs_query(**filters, sort_by=sort_by, descending=descending, after=after)
+    # One extra row tells whether there is a next page
+    params.append(limit + 1)
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            logger.info("Querying songs with %s, sorted by %s%s",
+                        {name: value for name, value in filters.items() if value is not None},
+                        sort_by, " descending" if descending else "")
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+        songs = [_song_row_to_dict(row) for row in rows[:limit]]
+        next_cursor = _encode_cursor(songs[-1][sort_by], songs[-1]["id"]) if len(rows) > limit else None
+        logger.info("Retrieved %d songs%s", len(songs), ", with more" if next_cursor else "")
+        return songs, next_cursor
+
+    except sqlite3.Error as e:
+        logger.error("Database error while querying songs: %s", str(e))
+        raise e
+
+def _filtered_songs_query(genre: Optional[str] = None, artist: Optional[str] = None,
+                          year_min: Optional[int] = None, year_max: Optional[int] = None,
+                          duration_min: Optional[int] = None, duration_max: Optional[int] = None,
+                          sort_by: str = "id", descending: bool = False,
+                          after: Optional[str] = None) -> Tuple[str, list]:
+    # deleted = FALSE must be spelled as in the partial indexes for SQLite to use them
+    conditions = ["deleted = FALSE"]
+    params: list[Any] = []
+    for column, operator, value in [("genre", "=", genre), ("artist", "=", artist),
+                                    ("year", ">=", year_min), ("year", "<=", year_max),
+                                    ("duration", ">=", duration_min), ("duration", "<=", duration_max)]:
+        if value is not None:
+            conditions.append(f"{column} {operator} ?")
+            params.append(value)
+
+    direction = " DESC" if descending else ""
+    if after:
+        after_value, after_id = _decode_cursor(after)
+        operator = "<" if descending else ">"
+        if sort_by == "id":
+            conditions.append(f"id {operator} ?")
+            params.append(after_id)
+        else:
+            conditions.append(f"({sort_by}, id) {operator} (?, ?)")
+            params += [after_value, after_id]
+    order = f"id{direction}" if sort_by == "id" else f"{sort_by}{direction}, id{direction}"
+
+    sql = f"""
+        SELECT id, artist, title, year, genre, duration, play_count
+        FROM songs
+        WHERE {" AND ".join(conditions)}
+        ORDER BY {order}
+        LIMIT ?
+    """
+    return sql, params
+
+def _encode_cursor(value: Any, song_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([value, song_id]).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> Tuple[Any, int]:
+    try:
+        value, song_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(value, (int, float, str)):
+            raise TypeError(value)
+        return value, int(song_id)
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+def get_catalog_size() -> int:
+    """
+    Counts the non-deleted songs in constant time, from the song_ordinals table.
+
+    Returns:
+        int: The number of non-deleted songs.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT IFNULL(MAX(ordinal), 0) FROM song_ordinals")
+            return cursor.fetchone()[0]
+
+    except sqlite3.Error as e:
+        logger.error("Database error while counting songs: %s", str(e))
+        raise e
+
+def pick_songs(fractions: list[float]) -> list[Song]:
+    """
+    Picks distinct songs at the positions the random fractions select.
+
+    Each fraction chooses a song among those not chosen yet (see sample_distinct),
+    and the songs are looked up by ordinal, so the cost does not grow with the catalog.
+    If songs are deleted between counting and looking up, the fractions are applied
+    again to the new count.
+
+    Args:
+        fractions (list[float]): Random fractions in [0, 1); at most one song is picked per song
+            in the catalog.
+
+    Returns:
+        list[Song]: The picked songs, in draw order.
+
+    Raises:
+        ValueError: If the catalog is empty.
+        RuntimeError: If the catalog kept changing during the lookup.
+    """
+    try:
+        for _ in range(PICK_ATTEMPTS):
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT IFNULL(MAX(ordinal), 0) FROM song_ordinals")
+                size = cursor.fetchone()[0]
+                if not size:
+                    logger.info("Cannot pick random songs because the song catalog is empty.")
+                    raise ValueError("The song catalog is empty.")
+
+                ordinals = sample_distinct(fractions, size)
+                cursor.execute(f"""
+                    SELECT o.ordinal, s.id, s.artist, s.title, s.year, s.genre, s.duration
+                    FROM song_ordinals o JOIN songs s ON s.id = o.song_id
+                    WHERE o.ordinal IN ({", ".join("?" * len(ordinals))})
+                """, ordinals)
+                songs = {row[0]: Song(*row[1:]) for row in cursor.fetchall()}
+
+            if len(songs) == len(ordinals):
+                logger.info("Picked songs at ordinals %s of %d", ordinals, size)
+                return [songs[ordinal] for ordinal in ordinals]
+            logger.info("The catalog changed while picking random songs, trying again")
+        raise RuntimeError("The song catalog changed while picking random songs.")
+
+    except sqlite3.Error as e:
+        logger.error("Database error while picking random songs: %s", str(e))
+        raise e
+
 def get_random_song() -> Song:
     """
     Retrieves a random song from the catalog.
@@ -248,34 +596,40 @@ def get_random_song() -> Song:
         ValueError: If the catalog is empty.
     """
     try:
-        all_songs = get_all_songs()
-
-        if not all_songs:
-            logger.info("Cannot retrieve random song because the song catalog is empty.")
-            raise ValueError("The song catalog is empty.")
-
-        # Get a random index using the random.org API
-        random_index = get_random(len(all_songs))
-        logger.info("Random index selected: %d (total songs: %d)", random_index, len(all_songs))
-
-        # Return the song at the random index, adjust for 0-based indexing
-        song_data = all_songs[random_index - 1]
-        return Song(
-            id=song_data["id"],
-            artist=song_data["artist"],
-            title=song_data["title"],
-            year=song_data["year"],
-            genre=song_data["genre"],
-            duration=song_data["duration"]
-        )
+        return get_random_songs(1)[0]
 
     except Exception as e:
         logger.error("Error while retrieving random song: %s", str(e))
         raise e
 
+def get_random_songs(count: int) -> list[Song]:
+    """
+    Retrieves distinct random songs from the catalog, with one request to random.org.
+
+    Args:
+        count (int): How many songs to pick, up to RANDOM_SONGS_MAX; fewer are returned
+            if the catalog is smaller.
+
+    Returns:
+        list[Song]: The randomly selected songs.
+
+    Raises:
+        ValueError: If count is not between 1 and RANDOM_SONGS_MAX, or the catalog is empty.
+    """
+    if not 1 <= count <= RANDOM_SONGS_MAX:
+        raise ValueError(f"Count must be between 1 and {RANDOM_SONGS_MAX}, got {count}")
+
+    # Counting first saves the random.org request when the catalog is empty
+    size = get_catalog_size()
+    if not size:
+        logger.info("Cannot retrieve random songs because the song catalog is empty.")
+        raise ValueError("The song catalog is empty.")
+
+    return pick_songs(get_random_fractions(min(count, size)))
+
 def update_play_count(song_id: int) -> None:
     """
-    Increments the play count of a song by song ID.
+    Increments the play count of a song by song ID and records the play in the play log.
 
     Args:
         song_id (int): The ID of the song whose play count should be incremented.
@@ -285,6 +639,7 @@ def update_play_count(song_id: int) -> None:
         sqlite3.Error: If there is a database error.
     """
     try:
+        catalog_snapshot.check_for_writes()
         with get_db_connection() as conn:
             cursor = conn.cursor()
             logger.info("Attempting to update play count for song with ID %d", song_id)
@@ -303,9 +658,75 @@ def update_play_count(song_id: int) -> None:
             # Increment the play count
             cursor.execute("UPDATE songs SET play_count = play_count + 1 WHERE id = ?", (song_id,))
             conn.commit()
+            _patch_snapshot(lambda: catalog_snapshot.add_play(song_id))
+            after_commit(stats_version.bump)
+            after_commit(lambda: play_log.record(song_id))
 
             logger.info("Play count incremented for song with ID: %d", song_id)
 
     except sqlite3.Error as e:
         logger.error("Database error while updating play count for song with ID %d: %s", song_id, str(e))
         raise e
+
+def update_play_counts(song_ids: Iterable[int]) -> dict:
+    """
+    Increments the play counts of many songs in one transaction and records the plays in the play log.
+
+    Repeated ids are counted together, so a song played three times is updated once by 3.
+    Songs that do not exist or are marked as deleted are left out and reported rather
+    than failing the others.
+
+    Args:
+        song_ids (Iterable[int]): The IDs of the songs played, once per play.
+
+    Returns:
+        dict: plays (counted), songs (updated), and the sorted ids that were missing or deleted.
+
+    Raises:
+        sqlite3.Error: If there is a database error; no play count is changed.
+    """
+    plays = Counter(song_ids)
+    report = {"plays": 0, "songs": 0, "missing": [], "deleted": []}
+    if not plays:
+        return report
+
+    try:
+        catalog_snapshot.check_for_writes()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            logger.info("Attempting to update play counts for %d songs", len(plays))
+
+            # Check which songs exist and which are deleted
+            ids = sorted(plays)
+            deleted_by_id = {}
+            for i in range(0, len(ids), PLAY_COUNT_LOOKUP_CHUNK):
+                chunk = ids[i:i + PLAY_COUNT_LOOKUP_CHUNK]
+                cursor.execute(f"SELECT id, deleted FROM songs WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+                deleted_by_id.update(cursor.fetchall())
+            report["missing"] = [song_id for song_id in ids if song_id not in deleted_by_id]
+            report["deleted"] = [song_id for song_id in ids if deleted_by_id.get(song_id)]
+            played = {song_id: plays[song_id] for song_id in ids
+                      if song_id in deleted_by_id and not deleted_by_id[song_id]}
+
+            # Increment the play counts
+            cursor.executemany("UPDATE songs SET play_count = play_count + ? WHERE id = ?",
+                               [(count, song_id) for song_id, count in played.items()])
+            conn.commit()
+            if played:
+                _patch_snapshot(lambda: catalog_snapshot.add_plays(played))
+                after_commit(stats_version.bump)
+                after_commit(lambda: _record_plays(played))
+
+            report.update(plays=sum(played.values()), songs=len(played))
+            logger.info("Play counts incremented for %d songs (%d plays); %d missing, %d deleted", report["songs"],
+                        report["plays"], len(report["missing"]), len(report["deleted"]))
+            return report
+
+    except sqlite3.Error as e:
+        logger.error("Database error while updating play counts for %d songs: %s", len(plays), str(e))
+        raise e
+
+def _record_plays(plays: dict[int, int]) -> None:
+    for song_id, count in plays.items():
+        for _ in range(count):
+            play_log.record(song_id)
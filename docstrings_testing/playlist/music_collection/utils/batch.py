@@ -0,0 +1,170 @@
+import logging
+import os
+from typing import Any, Callable, List, Optional, Tuple
+
+from werkzeug.exceptions import HTTPException
+
+from music_collection.utils.logger import configure_logger
+from music_collection.utils.sql_utils import shared_transaction
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+BATCH_MAX_OPERATIONS = int(os.getenv("BATCH_MAX_OPERATIONS", "1000"))
+BATCH_PATH = "/api/batch"
+
+
+class BatchError(ValueError):
+    """Raised for a batch that cannot be run at all, before any of it has run."""
+
+
+def validate_operations(operations: Any) -> List[dict]:
+    """
+    Checks the shape of a batch.
+
+    Each operation names an API route the way a client would call it:
+    {"method": "POST", "path": "/api/add-song-to-playlist", "body": {...}}.
+    The method defaults to GET and the body is optional.
+
+    Args:
+        operations (Any): The decoded 'operations' field of the request.
+
+    Returns:
+        List[dict]: The operations with their methods normalized.
+
+    Raises:
+        BatchError: If the batch is empty, too long, or an operation is malformed.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise BatchError("'operations' must be a non-empty list")
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        raise BatchError(f"A batch may hold at most {BATCH_MAX_OPERATIONS} operations, got {len(operations)}")
+
+    validated = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or not isinstance(operation.get("path"), str):
+            raise BatchError(f"Operation {index} must be an object with a 'path'")
+        path = operation["path"]
+        if not path.startswith("/api/") or path.split("?")[0].rstrip("/") == BATCH_PATH:
+            raise BatchError(f"Operation {index} must call an /api/ route other than {BATCH_PATH}")
+        method = str(operation.get("method", "GET")).upper()
+        validated.append({"method": method, "path": path, "body": operation.get("body")})
+    return validated
+
+
+def network_bound(view):
+    """
+    Marks a view that waits on a remote service (random.org), so batches refuse to run it.
+
+    A batch keeps one SQLite transaction open from its first statement to its last, and
+    every other writer in the process waits behind it, so a view that can spend seconds
+    on the network must be called on its own.
+
+    Args:
+        view: The view function.
+
+    Returns:
+        The same view, marked.
+    """
+    view.network_bound = True
+    return view
+
+
+def _check_network_bound(app, operations: List[dict]) -> None:
+    adapter = app.url_map.bind("localhost")
+    for index, operation in enumerate(operations):
+        try:
+            endpoint, _ = adapter.match(operation["path"].split("?")[0], method=operation["method"])
+        except HTTPException:
+            # Unknown routes and methods are reported by _dispatch like any other failure
+            continue
+        if getattr(app.view_functions[endpoint], "network_bound", False):
+            raise BatchError(f"Operation {index} ({operation['path']}) waits on a remote service and cannot "
+                             f"run in a batch, which would hold its transaction open meanwhile; call it on its own")
+
+
+def _dispatch(app, operation: dict) -> Tuple[int, Any]:
+    """
+    Calls the view for one operation, without the per-request hooks an HTTP request would run.
+
+    Each operation gets its own app and request context, so one operation's flask.g cannot
+    leak into another's or into the batch request's.
+
+    Returns:
+        Tuple[int, Any]: The status code and the decoded JSON body.
+    """
+    with app.app_context(), app.test_request_context(
+            operation["path"], method=operation["method"], json=operation["body"]) as ctx:
+        request = ctx.request
+        if request.routing_exception is not None:
+            return request.routing_exception.code, {"error": request.routing_exception.description}
+        try:
+            response = app.make_response(app.view_functions[request.url_rule.endpoint](**request.view_args))
+        except Exception as e:
+            logger.error("Batch operation %s %s failed: %s", operation["method"], operation["path"], e)
+            return 500, {"error": str(e)}
+        return response.status_code, response.get_json(silent=True)
+
+
+def run_batch(app, operations: List[dict], atomic: bool = False,
+              checkpoint: Optional[Callable[[], Callable[[], None]]] = None) -> Tuple[dict, int]:
+    """
+    Runs validated operations in order on one database connection and one transaction.
+
+    Every operation runs in its own savepoint. When one fails (status 400 or above) only its
+    own writes are undone and the batch carries on, unless atomic is set: then the whole
+    transaction is rolled back, in-memory state is restored from the checkpoint, and the
+    remaining operations are skipped.
+
+    The transaction (with the write lock, when any operation writes) is held until the
+    last operation ends, so operations marked network_bound, which wait on random.org,
+    are refused before anything runs.
+
+    Args:
+        app (Flask): The application whose routes the operations call.
+        operations (List[dict]): Operations from validate_operations.
+        atomic (bool): All or nothing.
+        checkpoint (Callable, optional): Saves the in-memory state the routes change (the
+            playlist, the combatants) and returns a function that restores it.
+
+    Returns:
+        Tuple[dict, int]: The response body and status code. The body holds one
+        {"status", "body"} result per operation ({"skipped": true} after an atomic failure)
+        and an overall status of 'success', 'partial' or 'rolled_back'.
+
+    Raises:
+        BatchError: If an operation is network_bound.
+    """
+    _check_network_bound(app, operations)
+    writes = any(operation["method"] != "GET" for operation in operations)
+    restore = checkpoint() if atomic and checkpoint else None
+    results = []
+    failed_status = None
+
+    with shared_transaction(immediate=writes) as conn:
+        for operation in operations:
+            savepoint = conn.savepoint()
+            status, body = _dispatch(app, operation)
+            results.append({"status": status, "body": body})
+            if status < 400:
+                conn.release_savepoint(savepoint)
+                continue
+
+            conn.rollback_savepoint(savepoint)
+            if atomic:
+                failed_status = status
+                conn.abort()
+                if restore:
+                    restore()
+                break
+
+    if failed_status is not None:
+        logger.info("Atomic batch of %d operations rolled back at operation %d", len(operations), len(results) - 1)
+        results.extend({"skipped": True} for _ in range(len(operations) - len(results)))
+        return {"status": "rolled_back", "results": results}, failed_status
+
+    succeeded = sum(1 for result in results if result["status"] < 400)
+    logger.info("Batch ran %d operations, %d succeeded", len(results), succeeded)
+    return {"status": "success" if succeeded == len(results) else "partial", "results": results}, 200
@@ -0,0 +1,164 @@
+from collections import OrderedDict
+import logging
+import os
+import secrets
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from music_collection.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Background jobs are bulk writes and SQLite has a single writer, so by default they run one at a time
+JOBS_MAX_WORKERS = int(os.getenv("JOBS_MAX_WORKERS", "1"))
+# Finished jobs kept for their status endpoint; the oldest are forgotten first
+JOBS_HISTORY = int(os.getenv("JOBS_HISTORY", "100"))
+
+
+class Job:
+    """
+    One background job and its progress.
+
+    The job's function reports progress with update(); status moves from 'queued' to
+    'running' to 'succeeded' (with the function's result) or 'failed' (with its error).
+    """
+
+    def __init__(self, kind: str):
+        self.id = secrets.token_hex(8)
+        self.kind = kind
+        self.status = "queued"
+        self.progress: dict = {}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def update(self, **progress) -> None:
+        """Merges progress counters into the job's progress."""
+        with self._lock:
+            self.progress = {**self.progress, **progress}
+
+    def snapshot(self) -> dict:
+        """
+        Returns the job's state.
+
+        Returns:
+            dict: id, kind, status, progress, result, error, created_at, started_at,
+            finished_at and elapsed_seconds.
+        """
+        with self._lock:
+            end = self.finished_at or time.time()
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "progress": self.progress,
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "elapsed_seconds": round(end - self.started_at, 3) if self.started_at else None,
+            }
+
+
+class JobRunner:
+    """
+    Runs jobs on a small thread pool and keeps their state for status requests.
+
+    Jobs live in process memory, like the playlist: with several gunicorn workers a status
+    request must reach the worker that accepted the job, and a restart forgets them.
+    """
+
+    def __init__(self, max_workers: int = JOBS_MAX_WORKERS, history: int = JOBS_HISTORY):
+        self.max_workers = max_workers
+        self.history = history
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def submit(self, kind: str, fn: Callable[[Job], Any], cleanup: Optional[Callable[[], None]] = None) -> Job:
+        """
+        Queues fn to run in the background.
+
+        Args:
+            kind (str): What the job does, e.g. 'import_songs'.
+            fn (Callable[[Job], Any]): The work; it receives the job to report progress on,
+                and its return value becomes the job's result.
+            cleanup (Callable[[], None], optional): Runs after fn however it ends, e.g. to
+                delete an uploaded file.
+
+        Returns:
+            Job: The queued job.
+        """
+        job = Job(kind)
+        with self._lock:
+            if self._executor is None:
+                # Created on first use, so a preloading gunicorn master never starts pool threads
+                from concurrent.futures import ThreadPoolExecutor
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+            self._jobs[job.id] = job
+            self._forget_finished()
+        self._executor.submit(self._run, job, fn, cleanup)
+        logger.info("Queued %s job %s", kind, job.id)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Looks up a job.
+
+        Returns:
+            Optional[Job]: The job, or None if it is unknown or has been forgotten.
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def pending(self) -> int:
+        """
+        Counts the queued and running jobs, for the readiness report.
+
+        Returns:
+            int: The jobs that have not finished.
+        """
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.finished_at is None)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stops the pool; queued jobs still run when wait is True."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, fn: Callable[[Job], Any], cleanup: Optional[Callable[[], None]]) -> None:
+        with job._lock:
+            job.status = "running"
+            job.started_at = time.time()
+        try:
+            result = fn(job)
+            status, error = "succeeded", None
+        except Exception as e:
+            logger.error("%s job %s failed: %s", job.kind, job.id, e)
+            result, status, error = None, "failed", str(e)
+        finally:
+            if cleanup is not None:
+                cleanup()
+        with job._lock:
+            job.status, job.result, job.error = status, result, error
+            job.finished_at = time.time()
+        logger.info("%s job %s %s in %.1f s", job.kind, job.id, status, job.finished_at - job.started_at)
+
+    def _forget_finished(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+
+# The process-wide runner used by the routes
+job_runner = JobRunner()
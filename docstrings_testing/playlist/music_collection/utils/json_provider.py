@@ -0,0 +1,201 @@
+from collections import OrderedDict
+import dataclasses
+import decimal
+from datetime import date
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Hashable, Optional
+import uuid
+
+from flask.json.provider import JSONProvider
+from werkzeug.http import http_date
+
+from music_collection.utils.logger import configure_logger
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# 'fast' installs FastJSONProvider; 'default' keeps Flask's provider
+JSON_PROVIDER = os.getenv("JSON_PROVIDER", "fast").lower()
+# Keep encoded bodies of unchanged collections (see EncodedResponseCache)
+JSON_CACHE_ENABLED = os.getenv("JSON_CACHE_ENABLED", "false").lower() == "true"
+JSON_CACHE_MAX_ENTRIES = int(os.getenv("JSON_CACHE_MAX_ENTRIES", "16"))
+
+
+def _default(o: Any) -> Any:
+    """
+    Converts the types JSON has no encoding for, the way Flask's default provider does.
+
+    Dataclasses become dicts of their fields without the deep copy dataclasses.asdict makes.
+    """
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return {field.name: getattr(o, field.name) for field in dataclasses.fields(o)}
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    A Flask JSON provider that encodes with orjson when it is installed, and the
+    standard library otherwise.
+
+    Keys are not sorted, dataclasses such as Song are encoded natively, and responses
+    are built straight from bytes. Output is compact unless the app is in debug mode.
+    """
+
+    mimetype = "application/json"
+
+    def encode(self, obj: Any, indent: bool = False) -> bytes:
+        """
+        Encodes obj to UTF-8 JSON bytes.
+
+        Args:
+            obj (Any): The object to encode.
+            indent (bool): Pretty-print with two-space indentation.
+
+        Returns:
+            bytes: The encoded JSON.
+        """
+        if orjson is not None:
+            option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=_default, option=option)
+        if indent:
+            return json.dumps(obj, default=_default, ensure_ascii=False, indent=2).encode()
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            kwargs.setdefault("default", _default)
+            return json.dumps(obj, **kwargs)
+        return self.encode(obj).decode()
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self.bytes_response(self.encode(obj, indent=self._app.debug))
+
+    def bytes_response(self, body: bytes):
+        """
+        Wraps an already encoded JSON body in a response.
+
+        Args:
+            body (bytes): The encoded JSON.
+
+        Returns:
+            Response: The response, with a trailing newline like Flask's.
+        """
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+class EncodedResponseCache:
+    """
+    Keeps the encoded JSON of collections that have not changed since they were last served.
+
+    Each entry is stored under a key with the version of the data it was built from;
+    a lookup with a different version rebuilds it. The least recently used entries
+    are evicted beyond max_entries.
+    """
+
+    def __init__(self, max_entries: int = JSON_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+
+    def get_or_encode(self, key: Hashable, version: Hashable, build: Callable[[], Any],
+                      encode: Callable[[Any], bytes]) -> bytes:
+        """
+        Returns the cached encoding for (key, version), building and encoding it on a miss.
+
+        Args:
+            key (Hashable): What is being cached, for example the route and its arguments.
+            version (Hashable): The version of the underlying data.
+            build (Callable[[], Any]): Builds the payload.
+            encode (Callable[[Any], bytes]): Encodes the payload.
+
+        Returns:
+            bytes: The encoded payload.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        body = encode(build())
+        with self._lock:
+            self._entries[key] = (version, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+    def clear(self) -> None:
+        """Drops every entry."""
+        with self._lock:
+            self._entries.clear()
+
+
+encoded_response_cache = EncodedResponseCache()
+
+
+def cached_json_response(key: Hashable, version: Optional[Hashable], build: Callable[[], Any]):
+    """
+    Responds with the JSON of build(), reusing the previous encoding while version is unchanged.
+
+    Falls back to encoding every time when JSON_CACHE_ENABLED is off, the version is
+    unknown (None), or the app does not use FastJSONProvider.
+
+    Args:
+        key (Hashable): The cache key.
+        version (Hashable, optional): The version of the underlying data.
+        build (Callable[[], Any]): Builds the payload.
+
+    Returns:
+        Response: A 200 JSON response.
+    """
+    from flask import current_app, jsonify
+
+    provider = current_app.json
+    if not JSON_CACHE_ENABLED or version is None or not isinstance(provider, FastJSONProvider):
+        return jsonify(build())
+    indent = current_app.debug
+    body = encoded_response_cache.get_or_encode((key, indent), version, build,
+                                                lambda payload: provider.encode(payload, indent=indent))
+    return provider.bytes_response(body)
+
+
+def init_app(app) -> None:
+    """
+    Installs FastJSONProvider on a Flask app unless JSON_PROVIDER is 'default'.
+
+    Args:
+        app (Flask): The application.
+    """
+    if JSON_PROVIDER == "default":
+        return
+    app.json = FastJSONProvider(app)
+    logger.info("Using %s for JSON responses", "orjson" if orjson is not None else "the json module")
@@ -1,5 +1,5 @@
 import logging
-import requests
+import os
 
 from music_collection.utils.logger import configure_logger
 
@@ -7,6 +7,10 @@ logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+# Overridable so load tests can point at a local stand-in
+RANDOM_ORG_URL = os.getenv("RANDOM_ORG_URL", "https://www.random.org").rstrip("/")
+
+
 def get_random(num_songs: int) -> int:
     """
     Fetches a random int between 1 and the number of songs in the catalog from random.org.
@@ -18,7 +22,11 @@ def get_random(num_songs: int) -> int:
         RuntimeError: If the request to random.org fails or returns an invalid response.
         ValueError: If the response from random.org is not a valid float.
     """
-    url = f"https://www.random.org/integers/?num=1&min=1&max={num_songs}&col=1&base=10&format=plain&rnd=new"
+    # requests (with urllib3 and certifi) is the costliest import of the app and only the
+    # random.org calls need it, so it is imported on first use rather than at startup
+    import requests
+
+    url = f"{RANDOM_ORG_URL}/integers/?num=1&min=1&max={num_songs}&col=1&base=10&format=plain&rnd=new"
 
     try:
         # Log the request to random.org
@@ -46,3 +54,184 @@ def get_random(num_songs: int) -> int:
     except requests.exceptions.RequestException as e:
         logger.error("Request to random.org failed: %s", e)
         raise RuntimeError("Request to random.org failed: %s" % e)
+
+
+def get_random_fractions(num: int) -> list[float]:
+    """
+    Fetches num random fractions in [0, 1) from random.org in one request.
+
+    Args:
+        num (int): How many fractions to fetch (random.org allows up to 10,000).
+
+    Returns:
+        list[float]: The fractions, with 10 decimal places.
+
+    Raises:
+        RuntimeError: If the request to random.org fails.
+        ValueError: If the response from random.org is not num valid floats.
+    """
+    import requests
+
+    url = f"{RANDOM_ORG_URL}/decimal-fractions/?num={num}&dec=10&col=1&format=plain&rnd=new"
+
+    try:
+        logger.info("Fetching %d random fractions from %s", num, url)
+        response = requests.get(url, timeout=5)
+        response.raise_for_status()
+        return _parse_fractions(response.text, num)
+
+    except requests.exceptions.Timeout:
+        logger.error("Request to random.org timed out.")
+        raise RuntimeError("Request to random.org timed out.")
+
+    except requests.exceptions.RequestException as e:
+        logger.error("Request to random.org failed: %s", e)
+        raise RuntimeError("Request to random.org failed: %s" % e)
+
+
+def _parse_fractions(text: str, num: int) -> list[float]:
+    try:
+        fractions = [float(line) for line in text.split()]
+    except ValueError:
+        fractions = []
+    if len(fractions) != num or not all(0 <= fraction < 1 for fraction in fractions):
+        raise ValueError("Invalid response from random.org: %s" % text.strip()[:200])
+    return fractions
+
+
+def sample_distinct(fractions: list[float], population: int) -> list[int]:
+    """
+    Turns random fractions into distinct ints between 1 and population, uniformly.
+
+    A partial Fisher-Yates shuffle of 1..population, with the i-th fraction choosing
+    among the population - i values not yet taken. Only the swapped positions are
+    stored, so the cost depends on the number of fractions, not on the population.
+
+    Args:
+        fractions (list[float]): Fractions in [0, 1); at most population of them are used.
+        population (int): The upper bound of the ints.
+
+    Returns:
+        list[int]: One distinct int per fraction used, in draw order.
+    """
+    swapped = {}
+    picks = []
+    for i, fraction in enumerate(fractions[:population]):
+        j = i + min(int(fraction * (population - i)), population - i - 1)
+        picks.append(swapped.get(j, j) + 1)
+        swapped[j] = swapped.get(i, i)
+    return picks
+
+
+def get_quota(timeout: float = 2) -> int:
+    """
+    Fetches the remaining random.org bit quota for this client, as a cheap availability probe.
+
+    Args:
+        timeout (float): Seconds to wait for random.org.
+
+    Returns:
+        int: The remaining quota in bits; random.org refuses requests once it is negative.
+
+    Raises:
+        RuntimeError: If the request to random.org fails or returns an invalid response.
+    """
+    import requests
+
+    url = f"{RANDOM_ORG_URL}/quota/?format=plain"
+    try:
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        return int(response.text.strip())
+    except ValueError:
+        raise RuntimeError("Invalid quota response from random.org: %s" % response.text.strip())
+    except requests.exceptions.RequestException as e:
+        raise RuntimeError("Quota request to random.org failed: %s" % e)
+
+
+####################################################
+#
+# Async client (for the ASGI variant)
+#
+####################################################
+
+# One pooled client per process; httpx is only needed by asgi.py, so it is imported on first use
+_async_client = None
+
+
+def _get_async_client():
+    global _async_client
+    if _async_client is None:
+        import httpx
+        _async_client = httpx.AsyncClient(timeout=5)
+    return _async_client
+
+
+async def close_async_client() -> None:
+    """Closes the pooled async client, if one was opened."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+async def _fetch_async(url: str) -> str:
+    import httpx
+
+    try:
+        logger.info("Fetching random number from %s", url)
+        response = await _get_async_client().get(url)
+        response.raise_for_status()
+        return response.text.strip()
+
+    except httpx.TimeoutException:
+        logger.error("Request to random.org timed out.")
+        raise RuntimeError("Request to random.org timed out.")
+
+    except httpx.HTTPError as e:
+        logger.error("Request to random.org failed: %s", e)
+        raise RuntimeError("Request to random.org failed: %s" % e)
+
+
+async def get_random_async(num_songs: int) -> int:
+    """
+    Async version of get_random, which waits on random.org without holding a thread.
+
+    Args:
+        num_songs (int): The upper bound of the random int.
+
+    Returns:
+        int: The random number fetched from random.org.
+
+    Raises:
+        RuntimeError: If the request to random.org fails.
+        ValueError: If the response from random.org is not a valid int.
+    """
+    random_number_str = await _fetch_async(
+        f"{RANDOM_ORG_URL}/integers/?num=1&min=1&max={num_songs}&col=1&base=10&format=plain&rnd=new")
+    try:
+        random_number = int(random_number_str)
+    except ValueError:
+        raise ValueError("Invalid response from random.org: %s" % random_number_str)
+
+    logger.info("Received random number: %.3f", random_number)
+    return random_number
+
+
+async def get_random_fractions_async(num: int) -> list[float]:
+    """
+    Async version of get_random_fractions.
+
+    Args:
+        num (int): How many fractions to fetch.
+
+    Returns:
+        list[float]: The fractions, with 10 decimal places.
+
+    Raises:
+        RuntimeError: If the request to random.org fails.
+        ValueError: If the response from random.org is not num valid floats.
+    """
+    text = await _fetch_async(
+        f"{RANDOM_ORG_URL}/decimal-fractions/?num={num}&dec=10&col=1&format=plain&rnd=new")
+    return _parse_fractions(text, num)
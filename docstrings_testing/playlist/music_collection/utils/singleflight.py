@@ -0,0 +1,135 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional
+
+from music_collection.utils.logger import configure_logger
+from music_collection.utils.sql_utils import in_shared_transaction
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Let concurrent identical reads share one query (see SingleFlight)
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() == "true"
+# Also reuse a finished result for this many seconds; 0 only shares reads that overlap.
+# Keys carry the data versions, so this only bounds how long writes made by other
+# processes (other gunicorn workers, bulk loads) can go unseen.
+SINGLEFLIGHT_TTL_SECONDS = float(os.getenv("SINGLEFLIGHT_TTL_SECONDS", "0"))
+
+
+class _Call:
+    """One computation and the callers waiting for it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.finished_at = 0.0
+
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time and hands its result to every caller.
+
+    The first caller for a key (the leader) runs the function; callers arriving before
+    it finishes wait and receive the same result, or the same exception. Every caller
+    gets the same object, so results must be treated as read-only.
+
+    Calls made inside a shared transaction (an /api/batch request) run on their own:
+    they may see the batch's uncommitted writes, which must not reach other requests.
+    """
+
+    def __init__(self, name: str, ttl: float = SINGLEFLIGHT_TTL_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.executions = 0
+        self.shared = 0
+        self.reused = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Returns fn(), sharing the computation with concurrent callers using the same key.
+
+        Args:
+            key (Hashable): Everything the result depends on, including the data versions.
+            fn (Callable[[], Any]): Computes the result.
+
+        Returns:
+            Any: The result of fn, possibly computed for another caller.
+
+        Raises:
+            Exception: Whatever fn raised, re-raised in every waiting caller.
+        """
+        if not SINGLEFLIGHT_ENABLED or in_shared_transaction():
+            return fn()
+
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is not None and call.done.is_set() and self._clock() - call.finished_at >= self.ttl:
+                del self._calls[key]
+                call = None
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+                self.executions += 1
+            else:
+                leader = False
+                if call.done.is_set():
+                    self.reused += 1
+                else:
+                    self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                call.finished_at = self._clock()
+                # Failures are never reused; successes stay for the TTL
+                if call.error is not None or self.ttl <= 0:
+                    self._calls.pop(key, None)
+                else:
+                    self._evict_expired()
+            call.done.set()
+        return call.result
+
+    def _evict_expired(self) -> None:
+        now = self._clock()
+        for key in [key for key, call in self._calls.items()
+                    if call.done.is_set() and now - call.finished_at >= self.ttl]:
+            del self._calls[key]
+
+    def snapshot(self) -> dict:
+        """
+        Returns the counters.
+
+        Returns:
+            dict: calls, executions (calls that ran the function), shared (calls that waited
+            for another's result), reused (calls served a finished result within the TTL)
+            and in_flight.
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "shared": self.shared,
+                "reused": self.reused,
+                "in_flight": sum(1 for call in self._calls.values() if not call.done.is_set()),
+                "ttl_seconds": self.ttl,
+            }
@@ -1,7 +1,13 @@
+from collections import Counter, deque
 from contextlib import contextmanager
+from contextvars import ContextVar
 import logging
 import os
+import re
 import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
 
 from music_collection.utils.logger import configure_logger
 
@@ -13,6 +19,25 @@ configure_logger(logger)
 # load the db path from the environment with a default value
 DB_PATH = os.getenv("DB_PATH", "/app/sql/song_catalog.db")
 
+# Statement instrumentation is opt-in; when disabled connections are plain sqlite3 connections
+SQL_STATS_ENABLED = os.getenv("SQL_STATS_ENABLED", "false").lower() == "true"
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "100"))
+SQL_STATS_SAMPLE_SIZE = int(os.getenv("SQL_STATS_SAMPLE_SIZE", "1024"))
+SQL_REPEATED_STATEMENT_THRESHOLD = int(os.getenv("SQL_REPEATED_STATEMENT_THRESHOLD", "10"))
+
+# SQLite has no pool: connections are opened per use, and this is how many may be open at once
+# before the service counts as saturated (readiness reports connections_in_use against it)
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "32"))
+
+# Rows fetched per round trip when results are streamed rather than fetched all at once
+SQL_FETCH_BATCH_SIZE = int(os.getenv("SQL_FETCH_BATCH_SIZE", "1000"))
+
+_connections_in_use = 0
+_connections_lock = threading.Lock()
+
+# Set by shared_transaction(); get_db_connection hands out this connection instead of opening one
+_shared_connection: ContextVar[Optional["SharedConnection"]] = ContextVar("shared_connection", default=None)
+
 
 def check_database_connection():
     """Check the database connection
@@ -50,6 +75,17 @@ def check_table_exists(tablename: str):
         logger.error(error_message)
         raise Exception(error_message) from e
 
+def connect() -> sqlite3.Connection:
+    """
+    Opens a new connection to DB_PATH, instrumented when SQL_STATS_ENABLED is set.
+
+    Returns:
+        sqlite3.Connection: The SQLite connection object.
+    """
+    if SQL_STATS_ENABLED:
+        return sqlite3.connect(DB_PATH, factory=InstrumentedConnection)
+    return sqlite3.connect(DB_PATH)
+
 @contextmanager
 def get_db_connection():
     """
@@ -58,9 +94,17 @@ def get_db_connection():
     Yields:
         sqlite3.Connection: The SQLite connection object.
     """
+    global _connections_in_use
+    shared = _shared_connection.get()
+    if shared is not None:
+        yield shared
+        return
+
     conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect()
+        with _connections_lock:
+            _connections_in_use += 1
         yield conn
     except sqlite3.Error as e:
         logger.error("Database connection error: %s", str(e))
@@ -68,4 +112,409 @@ def get_db_connection():
     finally:
         if conn:
             conn.close()
+            with _connections_lock:
+                _connections_in_use -= 1
             logger.info("Database connection closed.")
+
+def iter_rows(cursor: sqlite3.Cursor, batch_size: Optional[int] = None) -> Iterator[tuple]:
+    """
+    Iterates an executed cursor's rows with fetchmany, holding one batch in memory at a time.
+
+    Args:
+        cursor (sqlite3.Cursor): A cursor that has executed a query.
+        batch_size (int, optional): Rows per fetch; defaults to SQL_FETCH_BATCH_SIZE.
+
+    Yields:
+        tuple: The rows.
+    """
+    batch_size = batch_size or SQL_FETCH_BATCH_SIZE
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+def connections_in_use() -> int:
+    """
+    Returns the number of connections opened by get_db_connection that are still open.
+
+    Returns:
+        int: The connections in use.
+    """
+    return _connections_in_use
+
+
+class SharedConnection:
+    """
+    The connection get_db_connection hands out inside shared_transaction().
+
+    It behaves like the underlying connection, except that commit() and close() are left
+    to the transaction, so model functions written for their own connection join it unchanged.
+    Each unit of work can run in a savepoint and be rolled back on its own.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        self._savepoints = 0
+        self.aborted = False
+        self.after_commit: List[Callable[[], None]] = []
+        # How many after_commit callbacks there were when each open savepoint started
+        self._callbacks_at: Dict[str, int] = {}
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def commit(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def savepoint(self) -> str:
+        """
+        Starts a savepoint for one unit of work.
+
+        Returns:
+            str: The savepoint name, for release_savepoint or rollback_savepoint.
+        """
+        self._savepoints += 1
+        name = f"op_{self._savepoints}"
+        self._conn.execute(f"SAVEPOINT {name}")
+        self._callbacks_at[name] = len(self.after_commit)
+        return name
+
+    def release_savepoint(self, name: str) -> None:
+        """Keeps the work done since the savepoint."""
+        self._conn.execute(f"RELEASE {name}")
+        del self._callbacks_at[name]
+
+    def rollback_savepoint(self, name: str) -> None:
+        """
+        Undoes the work done since the savepoint, leaving the rest of the transaction intact.
+
+        The after_commit callbacks registered since are dropped with it, since what they
+        report will never be committed.
+        """
+        self._conn.execute(f"ROLLBACK TO {name}")
+        self._conn.execute(f"RELEASE {name}")
+        del self.after_commit[self._callbacks_at.pop(name):]
+
+    def abort(self) -> None:
+        """Rolls back the whole transaction; nothing in it is committed."""
+        if not self.aborted:
+            self._conn.execute("ROLLBACK")
+            self.aborted = True
+            self.after_commit.clear()
+
+
+@contextmanager
+def shared_transaction(immediate: bool = False):
+    """
+    Runs every get_db_connection call in this context on one connection and one transaction.
+
+    The transaction commits when the block exits normally (unless SharedConnection.abort was
+    called) and rolls back if it raises. Callbacks registered with after_commit run only
+    once the commit has happened.
+
+    Args:
+        immediate (bool): Take the write lock up front (BEGIN IMMEDIATE). Use it when the
+            work writes, so a later write cannot fail to upgrade a read lock.
+
+    Yields:
+        SharedConnection: The connection.
+    """
+    global _connections_in_use
+    if _shared_connection.get() is not None:
+        raise RuntimeError("A shared transaction is already active")
+
+    conn = connect()
+    # Transactions are managed here, not by the sqlite3 module
+    conn.isolation_level = None
+    with _connections_lock:
+        _connections_in_use += 1
+    shared = SharedConnection(conn)
+    token = _shared_connection.set(shared)
+    try:
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        yield shared
+        if not shared.aborted:
+            conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        _shared_connection.reset(token)
+        conn.close()
+        with _connections_lock:
+            _connections_in_use -= 1
+    for callback in shared.after_commit:
+        callback()
+
+
+def in_shared_transaction() -> bool:
+    """
+    Tells whether the caller runs inside shared_transaction, e.g. as an operation of /api/batch.
+
+    Returns:
+        bool: True inside a shared transaction.
+    """
+    return _shared_connection.get() is not None
+
+
+def after_commit(callback: Callable[[], None]) -> None:
+    """
+    Runs a callback once the current write is committed: right away, or at the end of
+    the shared transaction if one is active.
+
+    Args:
+        callback (Callable[[], None]): For example a version counter's bump.
+    """
+    shared = _shared_connection.get()
+    if shared is None:
+        callback()
+    else:
+        shared.after_commit.append(callback)
+
+
+####################################################
+#
+# Statement instrumentation
+#
+####################################################
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Normalizes SQL text so that executions of the same statement share one stats entry.
+
+    Literals are replaced with '?' and whitespace is collapsed.
+
+    Args:
+        sql (str): The SQL text as passed to execute.
+
+    Returns:
+        str: The normalized statement.
+    """
+    return " ".join(_LITERAL_RE.sub("?", sql).split())
+
+
+def _percentile(sorted_samples: list[float], pct: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+class StatementStats:
+    """
+    Thread-safe per-statement timing table.
+
+    Count and total are exact; p50/p99 are computed over the most recent
+    sample_size executions of each statement.
+    """
+
+    def __init__(self, sample_size: int = SQL_STATS_SAMPLE_SIZE):
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict] = {}
+
+    def record(self, statement: str, elapsed: float) -> None:
+        """
+        Records one execution of a normalized statement.
+
+        Args:
+            statement (str): The normalized SQL statement.
+            elapsed (float): The execution time in seconds.
+        """
+        with self._lock:
+            entry = self._stats.get(statement)
+            if entry is None:
+                entry = {"count": 0, "total": 0.0, "samples": deque(maxlen=self.sample_size)}
+                self._stats[statement] = entry
+            entry["count"] += 1
+            entry["total"] += elapsed
+            entry["samples"].append(elapsed)
+
+    def snapshot(self) -> list[dict]:
+        """
+        Returns the stats table sorted by total time, most expensive first.
+
+        Returns:
+            list[dict]: One entry per statement with count, total_ms, mean_ms, p50_ms and p99_ms.
+        """
+        with self._lock:
+            entries = [(statement, entry["count"], entry["total"], sorted(entry["samples"]))
+                       for statement, entry in self._stats.items()]
+
+        table = [
+            {
+                "statement": statement,
+                "count": count,
+                "total_ms": round(total * 1000, 3),
+                "mean_ms": round(total * 1000 / count, 3),
+                "p50_ms": round(_percentile(samples, 50) * 1000, 3),
+                "p99_ms": round(_percentile(samples, 99) * 1000, 3),
+            }
+            for statement, count, total, samples in entries
+        ]
+        table.sort(key=lambda row: row["total_ms"], reverse=True)
+        return table
+
+    def reset(self) -> None:
+        """Clears all recorded statements."""
+        with self._lock:
+            self._stats.clear()
+
+
+statement_stats = StatementStats()
+
+# Per-request statement counts, keyed by normalized statement
+_request_statements: ContextVar[Optional[Counter]] = ContextVar("request_statements", default=None)
+
+
+def begin_request_tracking():
+    """
+    Starts counting the statements executed in the current context.
+
+    Returns:
+        The token to pass to end_request_tracking.
+    """
+    return _request_statements.set(Counter())
+
+
+def end_request_tracking(token) -> dict:
+    """
+    Stops counting statements for the current context.
+
+    Statements executed at least SQL_REPEATED_STATEMENT_THRESHOLD times are
+    reported as repeated, which is how N+1 query patterns show up.
+
+    Args:
+        token: The token returned by begin_request_tracking.
+
+    Returns:
+        dict: The total statement count and the repeated statements with their counts.
+    """
+    counts = _request_statements.get() or Counter()
+    _request_statements.reset(token)
+    repeated = {statement: count for statement, count in counts.most_common()
+                if count >= SQL_REPEATED_STATEMENT_THRESHOLD}
+    return {"count": sum(counts.values()), "repeated": repeated}
+
+
+def _record_statement(cursor: sqlite3.Cursor, sql: str, parameters, elapsed: float) -> None:
+    statement = normalize_sql(sql)
+    statement_stats.record(statement, elapsed)
+
+    counts = _request_statements.get()
+    if counts is not None:
+        counts[statement] += 1
+
+    if elapsed * 1000 >= SQL_SLOW_QUERY_MS:
+        logger.warning("Slow SQL statement (%.1f ms): %s\n%s",
+                       elapsed * 1000, statement, explain_query_plan(cursor.connection, sql, parameters))
+
+
+def explain_query_plan(conn: sqlite3.Connection, sql: str, parameters=()) -> str:
+    """
+    Returns the EXPLAIN QUERY PLAN output for a statement as indented text.
+
+    Args:
+        conn (sqlite3.Connection): The connection the statement ran on.
+        sql (str): The SQL text.
+        parameters: The parameters the statement ran with, or None if unknown (executemany).
+
+    Returns:
+        str: The query plan, or a short note if the statement cannot be explained.
+    """
+    if parameters is None or not sql.lstrip().upper().startswith(_EXPLAINABLE):
+        return "(no query plan)"
+    try:
+        # A plain cursor keeps the EXPLAIN itself out of the stats
+        rows = sqlite3.Cursor(conn).execute("EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+    except sqlite3.Error as e:
+        return f"(query plan unavailable: {e})"
+
+    depth = {0: 0}
+    lines = []
+    for node_id, parent_id, _, detail in rows:
+        depth[node_id] = depth.get(parent_id, 0) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return "\n".join(lines)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """A cursor that times every statement it executes."""
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record_statement(self, sql, parameters, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record_statement(self, sql, None, time.perf_counter() - start)
+
+    def executescript(self, sql_script):
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            _record_statement(self, sql_script, None, time.perf_counter() - start)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """A connection whose cursors (including the execute shortcuts) are InstrumentedCursors."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def init_app(app) -> None:
+    """
+    Registers per-request statement counting on a Flask app when SQL_STATS_ENABLED is set.
+
+    Each response gets an X-SQL-Statements header, and statements repeated within a
+    single request are logged.
+
+    Args:
+        app (Flask): The application to instrument.
+    """
+    if not SQL_STATS_ENABLED:
+        return
+
+    from flask import g, request
+
+    @app.before_request
+    def _begin_sql_tracking():
+        g.sql_tracking_token = begin_request_tracking()
+
+    @app.after_request
+    def _end_sql_tracking(response):
+        token = g.pop("sql_tracking_token", None)
+        if token is None:
+            return response
+        summary = end_request_tracking(token)
+        response.headers["X-SQL-Statements"] = str(summary["count"])
+        for statement, count in summary["repeated"].items():
+            logger.warning("%s %s executed %d times in one request: %s",
+                           request.method, request.path, count, statement)
+        return response
@@ -0,0 +1,101 @@
+from functools import wraps
+import hashlib
+import logging
+import os
+import threading
+from typing import Callable, Hashable, Tuple
+
+from music_collection.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Answer If-None-Match with 304 on the routes decorated with @conditional
+ETAGS_ENABLED = os.getenv("ETAGS_ENABLED", "true").lower() == "true"
+
+# Counters start over when the process restarts, so every ETag also carries a token for this process
+BOOT_ID = os.urandom(8).hex()
+
+
+class VersionCounter:
+    """
+    A monotonically increasing counter of changes to some data.
+
+    Models bump it after every committed mutation; readers use its value to tell
+    whether anything has changed since they last looked. Values are per process:
+    writes made by another process (another gunicorn worker, a bulk load) are not counted.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> int:
+        """The current version."""
+        return self._value
+
+    def bump(self) -> int:
+        """
+        Records a change.
+
+        Returns:
+            int: The new version.
+        """
+        with self._lock:
+            self._value += 1
+            return self._value
+
+
+def make_etag(*parts: Hashable) -> str:
+    """
+    Builds a strong entity tag from the versions (and any arguments) a response depends on.
+
+    Args:
+        *parts (Hashable): Everything that determines the response body.
+
+    Returns:
+        str: The unquoted tag.
+    """
+    return hashlib.blake2b(repr((BOOT_ID, parts)).encode(), digest_size=12).hexdigest()
+
+
+def conditional(version_parts: Callable[[], Tuple]):
+    """
+    Decorates a GET route to answer If-None-Match with 304 Not Modified without calling it.
+
+    version_parts is called in the request context before the route runs, so the tag
+    never claims a newer version than the body it is attached to. Successful responses
+    get the ETag and 'Cache-Control: no-cache' so clients revalidate every time.
+
+    Args:
+        version_parts (Callable[[], Tuple]): Returns the versions and request arguments
+            the response depends on, e.g. (catalog_version.value, sort_by).
+
+    Returns:
+        Callable: The decorator.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            from flask import current_app, make_response, request
+
+            if not ETAGS_ENABLED:
+                return view(*args, **kwargs)
+
+            etag = make_etag(request.path, *version_parts())
+            if request.if_none_match.contains_weak(etag):
+                logger.debug("%s not modified", request.path)
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+        return wrapper
+    return decorator
@@ -46,6 +46,18 @@ check_db() {
   fi
 }
 
+# Function to check readiness (served from cached background probes)
+check_ready() {
+  echo "Checking readiness..."
+  curl -s -X GET "$BASE_URL/ready" | grep -q '"ready": *true'
+  if [ $? -eq 0 ]; then
+    echo "Service is ready."
+  else
+    echo "Readiness check failed."
+    exit 1
+  fi
+}
+
 
 ##########################################################
 #
@@ -151,6 +163,68 @@ get_random_song() {
   fi
 }
 
+query_songs() {
+  echo "Querying $1 songs from $2 to $3..."
+  response=$(curl -s -G "$BASE_URL/query-songs-from-catalog" --data-urlencode "genre=$1" \
+    --data-urlencode "year_min=$2" --data-urlencode "year_max=$3" --data-urlencode "sort_by=year")
+  if echo "$response" | grep -q '"status": *"success"'; then
+    echo "Query for $1 songs succeeded."
+    if [ "$ECHO_JSON" = true ]; then
+      echo "Query Results JSON:"
+      echo "$response" | jq .
+    fi
+  else
+    echo "Failed to query the catalog."
+    exit 1
+  fi
+}
+
+import_songs() {
+  echo "Importing songs from CSV..."
+  response=$(printf 'artist,title,year,genre,duration\nThe Doors,Light My Fire,1967,Rock,430\nQueen,Bohemian Rhapsody,1975,Rock,355\n' | \
+    curl -s -X POST "$BASE_URL/import-songs" -H "Content-Type: text/csv" --data-binary @-)
+  if echo "$response" | grep -q '"status": *"success"'; then
+    echo "Songs imported successfully."
+    if [ "$ECHO_JSON" = true ]; then
+      echo "Import Report JSON:"
+      echo "$response" | jq .
+    fi
+  else
+    echo "Failed to import songs."
+    exit 1
+  fi
+}
+
+search_songs() {
+  echo "Searching the catalog for \"$1\"..."
+  response=$(curl -s -G "$BASE_URL/search-songs" --data-urlencode "q=$1")
+  if echo "$response" | grep -q '"status": *"success"'; then
+    echo "Search for \"$1\" succeeded."
+    if [ "$ECHO_JSON" = true ]; then
+      echo "Search Results JSON:"
+      echo "$response" | jq .
+    fi
+  else
+    echo "Failed to search the catalog."
+    exit 1
+  fi
+}
+
+get_random_songs() {
+  echo "Getting 3 random songs from the catalog..."
+  response=$(curl -s -X GET "$BASE_URL/get-random-songs?n=3")
+  if echo "$response" | grep -q '"status": *"success"'; then
+    echo "Random songs retrieved successfully."
+    if [ "$ECHO_JSON" = true ]; then
+      echo "Random Songs JSON:"
+      echo "$response" | jq .
+    fi
+  else
+    echo "Failed to get random songs."
+    exit 1
+  fi
+}
+
 
 ############################################################
 #
@@ -460,10 +534,27 @@ get_song_leaderboard() {
   fi
 }
 
+# Function to get the most played songs over a window, from the play rollups
+get_charts() {
+  echo "Getting the charts for the last $1..."
+  response=$(curl -s -X GET "$BASE_URL/charts?window=$1")
+  if echo "$response" | grep -q '"status": *"success"'; then
+    echo "Charts for the last $1 retrieved successfully."
+    if [ "$ECHO_JSON" = true ]; then
+      echo "Charts JSON:"
+      echo "$response" | jq .
+    fi
+  else
+    echo "Failed to get the charts."
+    exit 1
+  fi
+}
+
 
 # Health checks
 check_health
 check_db
+check_ready
 
 # Create songs
 create_song "The Beatles" "Hey Jude" 1968 "Rock" 180
@@ -478,6 +569,10 @@ get_all_songs
 get_song_by_id 2
 get_song_by_compound_key "The Beatles" "Let It Be" 1970
 get_random_song
+get_random_songs
+search_songs "beat let"
+query_songs "Rock" 1960 1979
+import_songs
 
 add_song_to_playlist "The Rolling Stones" "Paint It Black" 1966
 add_song_to_playlist "Queen" "Bohemian Rhapsody" 1975
@@ -510,5 +605,6 @@ play_current_song
 play_rest_of_playlist
 
 get_song_leaderboard
+get_charts 7d
 
 echo "All tests passed successfully!"
@@ -4,6 +4,7 @@
 if [ -f "$DB_PATH" ]; then
     echo "Recreating database at $DB_PATH."
     # Drop and recreate the tables
+    sqlite3 "$DB_PATH" < /app/sql/drop_song_tables.sql
     sqlite3 "$DB_PATH" < /app/sql/create_song_table.sql
     echo "Database recreated successfully."
 else
@@ -1,5 +1,11 @@
-DROP TABLE IF EXISTS songs;
-CREATE TABLE songs (
+-- The catalog schema. Every statement is idempotent, so the script both creates a new
+-- database and brings an existing one up to date: the app runs it at startup, and tables,
+-- indexes and triggers added since the database was created are added to it. Derived
+-- tables are filled from songs when they are new. sql/create_db.sh runs
+-- drop_song_tables.sql first to recreate the catalog empty.
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS songs (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     artist TEXT NOT NULL,
     title TEXT NOT NULL,
@@ -9,4 +15,149 @@ CREATE TABLE songs (
     play_count INTEGER DEFAULT 0,
     deleted BOOLEAN DEFAULT FALSE,
     UNIQUE(artist, title, year)
-);
\ No newline at end of file
+);
+
+-- Counts the rows changed in songs, by any connection. The catalog snapshot compares it
+-- with the count it has seen: a patch for this process's own write is applied only if the
+-- count moved by exactly that write's rows, so another connection's change is never absorbed.
+CREATE TABLE IF NOT EXISTS catalog_changes (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO catalog_changes (id, version) VALUES (1, 0);
+
+CREATE TRIGGER IF NOT EXISTS songs_changes_insert AFTER INSERT ON songs
+BEGIN
+    UPDATE catalog_changes SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS songs_changes_update AFTER UPDATE ON songs
+BEGIN
+    UPDATE catalog_changes SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS songs_changes_delete AFTER DELETE ON songs
+BEGIN
+    UPDATE catalog_changes SET version = version + 1;
+END;
+
+-- Access paths for query_songs. They cover only non-deleted songs, which every catalog
+-- query filters on, so they stay small and soft-deleted rows never need skipping. The
+-- id is implicitly the last column, so keyset pages in (column, id) order need no sort.
+CREATE INDEX IF NOT EXISTS songs_genre_year ON songs (genre, year) WHERE deleted = FALSE;
+CREATE INDEX IF NOT EXISTS songs_artist_year ON songs (artist, year) WHERE deleted = FALSE;
+CREATE INDEX IF NOT EXISTS songs_year ON songs (year) WHERE deleted = FALSE;
+CREATE INDEX IF NOT EXISTS songs_duration ON songs (duration) WHERE deleted = FALSE;
+-- Also serves get_all_songs(sort_by_play_count=True)
+CREATE INDEX IF NOT EXISTS songs_play_count ON songs (play_count) WHERE deleted = FALSE;
+
+-- Numbers the non-deleted songs 1..N without gaps, so a random song is a lookup by a
+-- random ordinal and the catalog size is MAX(ordinal). The triggers below keep it in step:
+-- new songs are appended, and a removed song's ordinal is given to the song holding the
+-- last one, which is then dropped.
+CREATE TABLE IF NOT EXISTS song_ordinals (
+    ordinal INTEGER PRIMARY KEY,
+    song_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS song_ordinals_song_id ON song_ordinals (song_id);
+-- Number the songs of a database created before song_ordinals; once it has rows the triggers keep it
+INSERT INTO song_ordinals (ordinal, song_id)
+SELECT ROW_NUMBER() OVER (ORDER BY id), id FROM songs
+WHERE deleted = FALSE AND NOT EXISTS (SELECT 1 FROM song_ordinals);
+
+CREATE TRIGGER IF NOT EXISTS songs_ordinal_insert AFTER INSERT ON songs WHEN NOT NEW.deleted
+BEGIN
+    INSERT INTO song_ordinals (ordinal, song_id)
+    VALUES ((SELECT IFNULL(MAX(ordinal), 0) + 1 FROM song_ordinals), NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS songs_ordinal_restore AFTER UPDATE OF deleted ON songs WHEN OLD.deleted AND NOT NEW.deleted
+BEGIN
+    INSERT INTO song_ordinals (ordinal, song_id)
+    VALUES ((SELECT IFNULL(MAX(ordinal), 0) + 1 FROM song_ordinals), NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS songs_ordinal_soft_delete AFTER UPDATE OF deleted ON songs WHEN NEW.deleted AND NOT OLD.deleted
+BEGIN
+    UPDATE song_ordinals
+    SET song_id = (SELECT song_id FROM song_ordinals ORDER BY ordinal DESC LIMIT 1)
+    WHERE song_id = OLD.id;
+    DELETE FROM song_ordinals WHERE ordinal = (SELECT MAX(ordinal) FROM song_ordinals);
+END;
+
+CREATE TRIGGER IF NOT EXISTS songs_ordinal_delete AFTER DELETE ON songs WHEN NOT OLD.deleted
+BEGIN
+    UPDATE song_ordinals
+    SET song_id = (SELECT song_id FROM song_ordinals ORDER BY ordinal DESC LIMIT 1)
+    WHERE song_id = OLD.id;
+    DELETE FROM song_ordinals WHERE ordinal = (SELECT MAX(ordinal) FROM song_ordinals);
+END;
+
+-- Full-text index over the non-deleted songs' artist, title and genre, for /api/search-songs.
+-- The text is read from songs (external content), so the index stores only the tokens.
+-- prefix='2 3' keeps extra indexes for 2- and 3-character prefixes, which makes short
+-- prefix queries (as typed into a search box) cheap.
+CREATE VIRTUAL TABLE IF NOT EXISTS songs_fts USING fts5(
+    artist, title, genre,
+    content='songs', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+-- Rank matches with bm25, weighting title over artist over genre
+INSERT INTO songs_fts (songs_fts, rank) VALUES ('rank', 'bm25(2.0, 3.0, 1.0)');
+-- Index the songs of a database created before songs_fts (its docsize table has a row per indexed song)
+INSERT INTO songs_fts (rowid, artist, title, genre)
+SELECT id, artist, title, genre FROM songs
+WHERE deleted = FALSE AND NOT EXISTS (SELECT 1 FROM songs_fts_docsize);
+
+CREATE TRIGGER IF NOT EXISTS songs_fts_insert AFTER INSERT ON songs WHEN NOT NEW.deleted
+BEGIN
+    INSERT INTO songs_fts (rowid, artist, title, genre) VALUES (NEW.id, NEW.artist, NEW.title, NEW.genre);
+END;
+
+CREATE TRIGGER IF NOT EXISTS songs_fts_restore AFTER UPDATE OF deleted ON songs WHEN OLD.deleted AND NOT NEW.deleted
+BEGIN
+    INSERT INTO songs_fts (rowid, artist, title, genre) VALUES (NEW.id, NEW.artist, NEW.title, NEW.genre);
+END;
+
+CREATE TRIGGER IF NOT EXISTS songs_fts_soft_delete AFTER UPDATE OF deleted ON songs WHEN NEW.deleted AND NOT OLD.deleted
+BEGIN
+    INSERT INTO songs_fts (songs_fts, rowid, artist, title, genre) VALUES ('delete', OLD.id, OLD.artist, OLD.title, OLD.genre);
+END;
+
+CREATE TRIGGER IF NOT EXISTS songs_fts_delete AFTER DELETE ON songs WHEN NOT OLD.deleted
+BEGIN
+    INSERT INTO songs_fts (songs_fts, rowid, artist, title, genre) VALUES ('delete', OLD.id, OLD.artist, OLD.title, OLD.genre);
+END;
+
+CREATE TRIGGER IF NOT EXISTS songs_fts_update AFTER UPDATE OF artist, title, genre ON songs WHEN NOT OLD.deleted AND NOT NEW.deleted
+BEGIN
+    INSERT INTO songs_fts (songs_fts, rowid, artist, title, genre) VALUES ('delete', OLD.id, OLD.artist, OLD.title, OLD.genre);
+    INSERT INTO songs_fts (rowid, artist, title, genre) VALUES (NEW.id, NEW.artist, NEW.title, NEW.genre);
+END;
+
+-- Every play with its time (Unix seconds), appended in batches by the play log. Charts never
+-- read it, so it has no index besides the rowid and appends stay cheap at any size.
+CREATE TABLE IF NOT EXISTS play_events (
+    id INTEGER PRIMARY KEY,
+    song_id INTEGER NOT NULL,
+    played_at INTEGER NOT NULL
+);
+
+-- Plays per song per hour and per day (bucket start in Unix seconds, UTC), added to with
+-- each batch of play_events, for /api/charts. WITHOUT ROWID keeps each table a single
+-- b-tree in (bucket, song) order, so a window is one range scan.
+CREATE TABLE IF NOT EXISTS song_plays_hourly (
+    hour_start INTEGER NOT NULL,
+    song_id INTEGER NOT NULL,
+    plays INTEGER NOT NULL,
+    PRIMARY KEY (hour_start, song_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS song_plays_daily (
+    day_start INTEGER NOT NULL,
+    song_id INTEGER NOT NULL,
+    plays INTEGER NOT NULL,
+    PRIMARY KEY (day_start, song_id)
+) WITHOUT ROWID;
+
+COMMIT;
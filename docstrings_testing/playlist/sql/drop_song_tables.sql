@@ -0,0 +1,8 @@
+-- Drops the catalog, for sql/create_db.sh to recreate it empty with create_song_table.sql
+DROP TABLE IF EXISTS play_events;
+DROP TABLE IF EXISTS song_plays_hourly;
+DROP TABLE IF EXISTS song_plays_daily;
+DROP TABLE IF EXISTS songs_fts;
+DROP TABLE IF EXISTS song_ordinals;
+DROP TABLE IF EXISTS catalog_changes;
+DROP TABLE IF EXISTS songs;
@@ -0,0 +1,186 @@
+import threading
+import time
+
+from flask import Flask, jsonify, make_response
+import pytest
+
+from music_collection.utils import admission
+from music_collection.utils.admission import AdmissionController, ConcurrencyLimiter, TokenBucket, limit
+
+
+class FakeClock:
+    """A clock the test moves by hand."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture(autouse=True)
+def controllers(mocker):
+    """Keep the controllers created by a test out of the module-level registry."""
+    return mocker.patch.object(admission, "controllers", {})
+
+
+@pytest.fixture
+def app():
+    """A bare Flask app with a limited route that blocks until the test lets it finish."""
+    flask_app = Flask(__name__)
+    flask_app.started = threading.Event()
+    flask_app.finish = threading.Event()
+
+    @flask_app.route("/api/heavy", methods=["POST"])
+    @limit("heavy", max_concurrent=1, max_queue=0, rate=0)
+    def heavy():
+        flask_app.started.set()
+        flask_app.finish.wait(5)
+        return make_response(jsonify({"status": "success"}), 200)
+
+    @flask_app.route("/api/throttled", methods=["POST"])
+    @limit("throttled", rate=1, burst=2)
+    def throttled():
+        return make_response(jsonify({"status": "success"}), 200)
+
+    return flask_app
+
+
+######################################################
+#
+#    Token bucket and concurrency limiter
+#
+######################################################
+
+def test_token_bucket():
+    """Test that the burst is available at once and tokens come back at the rate."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock)
+
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.try_acquire() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert bucket.try_acquire() == 0
+    clock.now += 100
+    assert [bucket.try_acquire() for _ in range(4)] == [0, 0, 0, pytest.approx(0.5)]
+
+
+def test_limiter_rejects_when_queue_is_full():
+    """Test that callers beyond the slots and the queue are turned away at once."""
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=0, queue_timeout=5)
+
+    assert limiter.acquire() is None
+    assert limiter.acquire() == "queue_full"
+    limiter.release()
+    assert limiter.acquire() is None
+    assert limiter.peak_in_flight == 1
+
+
+def test_limiter_queue_timeout():
+    """Test that a queued caller gives up after the timeout."""
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+
+    assert limiter.acquire() is None
+    assert limiter.acquire() == "queue_timeout"
+    assert limiter.queued == 0
+    assert limiter.peak_queued == 1
+
+
+def test_limiter_admits_queued_caller_on_release():
+    """Test that a release lets a queued caller in."""
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=1, queue_timeout=5)
+    assert limiter.acquire() is None
+
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(limiter.acquire()))
+    waiter.start()
+    while not limiter.queued:
+        time.sleep(0.001)
+    assert limiter.acquire() == "queue_full"
+
+    limiter.release()
+    waiter.join(5)
+    assert results == [None]
+    assert limiter.in_flight == 1
+
+
+def test_controller_counts_rejections():
+    """Test that admitted and rejected requests are counted by reason."""
+    controller = AdmissionController("heavy", max_concurrent=1, max_queue=0, queue_timeout=1, rate=0, burst=0)
+
+    assert controller.admit() == (None, 0.0)
+    reason, _ = controller.admit()
+    assert reason == "queue_full"
+    controller.release(0.2)
+
+    snapshot = controller.snapshot()
+    assert snapshot["admitted"] == 1
+    assert snapshot["rejected"] == {"rate": 0, "queue_full": 1, "queue_timeout": 0}
+    assert snapshot["in_flight"] == 0
+    assert snapshot["mean_ms"] == 200.0
+    assert snapshot["rate"] is None
+
+
+######################################################
+#
+#    Decorator
+#
+######################################################
+
+def test_limit_returns_429_with_retry_after(app):
+    """Test that a request arriving while the only slot is taken gets a 429 with Retry-After."""
+    client = app.test_client()
+    first = threading.Thread(target=lambda: client.post("/api/heavy"))
+    first.start()
+    assert app.started.wait(5)
+
+    response = app.test_client().post("/api/heavy")
+    assert response.status_code == 429
+    assert response.get_json()["reason"] == "queue_full"
+    assert int(response.headers["Retry-After"]) >= 1
+
+    app.finish.set()
+    first.join(5)
+    assert app.test_client().post("/api/heavy").status_code == 200
+    assert admission.snapshot()["heavy"]["admitted"] == 2
+
+
+def test_limit_rate(app):
+    """Test that requests beyond the burst are rejected until tokens come back."""
+    clock = FakeClock()
+    admission.controllers["throttled"].bucket = TokenBucket(rate=1, burst=2, clock=clock)
+    client = app.test_client()
+
+    assert [client.post("/api/throttled").status_code for _ in range(3)] == [200, 200, 429]
+    clock.now += 1
+    assert client.post("/api/throttled").status_code == 200
+    assert admission.snapshot()["throttled"]["rejected"]["rate"] == 1
+
+
+def test_limit_skipped_inside_shared_transaction(app, mocker):
+    """Test that operations inside a batch are not limited again."""
+    mocker.patch.object(admission, "in_shared_transaction", return_value=True)
+    app.finish.set()
+    client = app.test_client()
+
+    assert [client.post("/api/throttled").status_code for _ in range(4)] == [200] * 4
+    assert admission.snapshot()["throttled"]["admitted"] == 0
+
+
+def test_limit_disabled(mocker):
+    """Test that the view is returned unchanged when admission control is off."""
+    mocker.patch.object(admission, "ADMISSION_ENABLED", False)
+
+    def view():
+        return "ok"
+
+    assert limit("heavy")(view) is view
+    assert admission.snapshot() == {}
+
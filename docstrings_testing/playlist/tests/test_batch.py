@@ -0,0 +1,225 @@
+import sqlite3
+
+from flask import Flask, g, jsonify, make_response, request
+import pytest
+
+from music_collection.models.play_log import PlayLog
+from music_collection.utils import batch, sql_utils
+from music_collection.utils.batch import BatchError, run_batch, validate_operations
+from music_collection.utils.sql_utils import after_commit, get_db_connection
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def songs_db(tmp_path, mocker):
+    """Point sql_utils at a throwaway database with an empty songs table."""
+    db_path = str(tmp_path / "songs.db")
+    mocker.patch.object(sql_utils, "DB_PATH", db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE songs (id INTEGER PRIMARY KEY, title TEXT UNIQUE)")
+    conn.close()
+    return db_path
+
+
+@pytest.fixture
+def app(songs_db):
+    """A bare Flask app whose routes write the way the real ones do, plus an in-memory playlist."""
+    flask_app = Flask(__name__)
+    flask_app.playlist = []
+    flask_app.play_log = PlayLog()
+
+    @flask_app.route("/api/create-song", methods=["POST"])
+    def create_song():
+        data = request.get_json()
+        if not data.get("title"):
+            return make_response(jsonify({"error": "title is required"}), 400)
+        try:
+            with get_db_connection() as conn:
+                conn.cursor().execute("INSERT INTO songs (title) VALUES (?)", (data["title"],))
+                conn.commit()
+        except sqlite3.IntegrityError as e:
+            return make_response(jsonify({"error": str(e)}), 500)
+        flask_app.playlist.append(data["title"])
+        if data.get("fail_after_write"):
+            return make_response(jsonify({"error": "failed after writing"}), 500)
+        return make_response(jsonify({"status": "success"}), 201)
+
+    @flask_app.route("/api/play-song", methods=["POST"])
+    def play_song():
+        data = request.get_json()
+        with get_db_connection() as conn:
+            conn.cursor().execute("UPDATE songs SET title = title WHERE id = ?", (data["id"],))
+            conn.commit()
+        after_commit(lambda: flask_app.play_log.record(data["id"]))
+        if data.get("fail_after_write"):
+            return make_response(jsonify({"error": "failed after writing"}), 500)
+        return make_response(jsonify({"status": "success"}), 200)
+
+    @flask_app.route("/api/count-songs", methods=["GET"])
+    def count_songs():
+        with get_db_connection() as conn:
+            count = conn.cursor().execute("SELECT COUNT(*) FROM songs").fetchone()[0]
+        return make_response(jsonify({"count": count, "saw_marker": "marker" in g}), 200)
+
+    @flask_app.route("/api/random", methods=["GET"])
+    @batch.network_bound
+    def random_number():
+        raise AssertionError("called random.org")
+
+    @flask_app.route("/api/mark", methods=["POST"])
+    def mark():
+        g.marker = True
+        return make_response(jsonify({"status": "success"}), 200)
+
+    return flask_app
+
+
+@pytest.fixture
+def checkpoint(app):
+    def save():
+        saved = list(app.playlist)
+
+        def restore():
+            app.playlist[:] = saved
+        return restore
+    return save
+
+
+def create(title, **extra):
+    return {"method": "POST", "path": "/api/create-song", "body": {"title": title, **extra}}
+
+
+def committed_titles(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute("SELECT title FROM songs ORDER BY id")]
+    finally:
+        conn.close()
+
+
+######################################################
+#
+#    Validation
+#
+######################################################
+
+@pytest.mark.parametrize("operations,message", [
+    (None, "non-empty list"),
+    ([], "non-empty list"),
+    ([{"method": "GET"}], "with a 'path'"),
+    (["/api/health"], "with a 'path'"),
+    ([{"path": "/health"}], "/api/ route"),
+    ([{"path": "/api/batch"}], "other than /api/batch"),
+])
+def test_validate_operations_invalid(operations, message):
+    """Test that malformed batches are rejected before anything runs."""
+    with pytest.raises(BatchError, match=message):
+        validate_operations(operations)
+
+
+def test_validate_operations_too_many(mocker):
+    """Test the operation limit."""
+    mocker.patch.object(batch, "BATCH_MAX_OPERATIONS", 2)
+    with pytest.raises(BatchError, match="at most 2"):
+        validate_operations([{"path": "/api/health"}] * 3)
+
+
+def test_validate_operations_defaults():
+    """Test that the method defaults to GET and is upper-cased."""
+    assert validate_operations([{"path": "/api/health"}, {"method": "post", "path": "/api/x", "body": {"a": 1}}]) == [
+        {"method": "GET", "path": "/api/health", "body": None},
+        {"method": "POST", "path": "/api/x", "body": {"a": 1}},
+    ]
+
+
+######################################################
+#
+#    Running batches
+#
+######################################################
+
+def test_run_batch(app, songs_db, mocker):
+    """Test that operations run in order on one connection and see each other's writes."""
+    connect = mocker.spy(sql_utils, "connect")
+    operations = validate_operations([create("a"), create("b"), {"path": "/api/count-songs"}])
+
+    body, status_code = run_batch(app, operations)
+
+    assert status_code == 200
+    assert body["status"] == "success"
+    assert [result["status"] for result in body["results"]] == [201, 201, 200]
+    assert body["results"][2]["body"]["count"] == 2
+    assert connect.call_count == 1
+    assert committed_titles(songs_db) == ["a", "b"]
+
+
+def test_run_batch_partial(app, songs_db):
+    """Test that a failed operation's writes are undone while the others commit."""
+    operations = validate_operations([
+        create("a"), create("b", fail_after_write=True), create(""), {"path": "/api/missing"}, create("c"),
+    ])
+
+    body, status_code = run_batch(app, operations)
+
+    assert status_code == 200
+    assert body["status"] == "partial"
+    assert [result["status"] for result in body["results"]] == [201, 500, 400, 404, 201]
+    assert committed_titles(songs_db) == ["a", "c"]
+
+
+def test_run_batch_partial_drops_failed_callbacks(app, songs_db):
+    """Test that after_commit callbacks of an operation rolled back to its savepoint do not run."""
+    def play(song_id, **extra):
+        return {"method": "POST", "path": "/api/play-song", "body": {"id": song_id, **extra}}
+    operations = validate_operations([create("a"), play(1), play(1, fail_after_write=True), play(1)])
+
+    body, _ = run_batch(app, operations)
+
+    assert [result["status"] for result in body["results"]] == [201, 200, 500, 200]
+    assert app.play_log.stats()["recorded"] == 2
+
+
+def test_run_batch_atomic_rolls_back(app, songs_db, checkpoint):
+    """Test that an atomic batch undoes everything, restores memory and skips the rest."""
+    app.playlist.append("existing")
+    operations = validate_operations([create("a"), create("a"), create("b")])
+
+    body, status_code = run_batch(app, operations, atomic=True, checkpoint=checkpoint)
+
+    assert status_code == 500
+    assert body["status"] == "rolled_back"
+    assert body["results"][0]["status"] == 201
+    assert body["results"][1]["status"] == 500
+    assert body["results"][2] == {"skipped": True}
+    assert committed_titles(songs_db) == []
+    assert app.playlist == ["existing"]
+
+
+def test_run_batch_atomic_success(app, songs_db, checkpoint):
+    """Test that a successful atomic batch commits and keeps memory changes."""
+    body, status_code = run_batch(app, validate_operations([create("a"), create("b")]), atomic=True,
+                                  checkpoint=checkpoint)
+
+    assert (body["status"], status_code) == ("success", 200)
+    assert committed_titles(songs_db) == ["a", "b"]
+    assert app.playlist == ["a", "b"]
+
+
+def test_run_batch_refuses_network_bound(app, songs_db):
+    """Test that a batch calling a route that waits on random.org is refused before anything runs."""
+    operations = validate_operations([create("a"), {"path": "/api/random?count=2"}])
+
+    with pytest.raises(BatchError, match=r"Operation 1 \(/api/random\?count=2\) waits on a remote service"):
+        run_batch(app, operations)
+    assert committed_titles(songs_db) == []
+
+
+def test_operations_do_not_share_g(app, songs_db):
+    """Test that flask.g set by one operation is not visible to the next."""
+    body, _ = run_batch(app, validate_operations([{"method": "POST", "path": "/api/mark"}, {"path": "/api/count-songs"}]))
+    assert body["results"][1]["body"]["saw_marker"] is False
@@ -0,0 +1,210 @@
+import os
+import sqlite3
+
+import pytest
+
+from music_collection.models import catalog_snapshot, song_model
+from music_collection.models.catalog_snapshot import CatalogSnapshot
+from music_collection.models.play_log import PlayLog
+from music_collection.utils import sql_utils
+from music_collection.utils.sql_utils import shared_transaction
+
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sql", "create_song_table.sql")
+
+
+class FakeClock:
+    """A clock the test moves by hand."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def songs_db(tmp_path, mocker):
+    """A throwaway database created from the schema script, holding three songs."""
+    db_path = str(tmp_path / "songs.db")
+    mocker.patch.object(sql_utils, "DB_PATH", db_path)
+    with sqlite3.connect(db_path) as conn:
+        with open(SCHEMA_PATH) as f:
+            conn.executescript(f.read())
+        conn.executemany("INSERT INTO songs (artist, title, year, genre, duration, play_count) VALUES (?, ?, ?, ?, ?, ?)", [
+            ("The Foxes", "Open Road", 1999, "Rock", 240, 3),
+            ("The Owls", "Summer Rain", 2005, "Jazz", 300, 7),
+            ("The Foxes", "Night Drive", 2005, "Rock", 180, 1),
+        ])
+    return db_path
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def snapshot(songs_db, clock, mocker):
+    """An enabled snapshot used by song_model, checking for other writers once a second."""
+    mocker.patch.object(catalog_snapshot, "CATALOG_SNAPSHOT_ENABLED", True)
+    snapshot = CatalogSnapshot(check_interval=1, clock=clock)
+    mocker.patch.object(song_model, "catalog_snapshot", snapshot)
+    # Plays go to an unstarted log of the test's own, so none are written to another test's database
+    mocker.patch.object(song_model, "play_log", PlayLog())
+    return snapshot
+
+@pytest.fixture
+def no_queries(mocker):
+    """Fails the test if song_model opens a database connection."""
+    return mocker.patch.object(song_model, "get_db_connection", side_effect=AssertionError("queried SQLite"))
+
+def external_write(db_path: str, sql: str, params=()) -> None:
+    """Writes through a connection of its own, as another process would."""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(sql, params)
+
+
+######################################################
+#
+#    Reads
+#
+######################################################
+
+def test_reads_served_from_memory(snapshot, no_queries):
+    """Test that once loaded, lookups and catalog reads neither query nor check SQLite."""
+    assert song_model.get_song_by_id(2).title == "Summer Rain"
+    checks = snapshot.stats()["checks"]
+
+    assert song_model.get_song_by_compound_key("The Foxes", "Night Drive", 2005).id == 3
+    assert [song["id"] for song in song_model.get_all_songs()] == [1, 2, 3]
+    assert [song["id"] for song in song_model.get_all_songs(sort_by_play_count=True)] == [2, 1, 3]
+    assert song_model.get_all_songs()[1] == {"id": 2, "artist": "The Owls", "title": "Summer Rain", "year": 2005,
+                                             "genre": "Jazz", "duration": 300, "play_count": 7}
+
+    stats = snapshot.stats()
+    assert (stats["loads"], stats["checks"], stats["reads"], stats["songs"]) == (1, checks, 5, 3)
+
+@pytest.mark.parametrize("lookup, message", [
+    (lambda: song_model.get_song_by_id(99), "Song with ID 99 not found"),
+    (lambda: song_model.get_song_by_id(1), "Song with ID 1 has been deleted"),
+    (lambda: song_model.get_song_by_compound_key("The Foxes", "Open Road", 1999),
+     "Song with artist 'The Foxes', title 'Open Road', and year 1999 has been deleted"),
+    (lambda: song_model.get_song_by_compound_key("The Foxes", "Open Road", 2000),
+     "Song with artist 'The Foxes', title 'Open Road', and year 2000 not found"),
+])
+def test_missing_and_deleted_songs(snapshot, songs_db, lookup, message):
+    """Test that the snapshot raises the same errors as the queries."""
+    external_write(songs_db, "UPDATE songs SET deleted = TRUE WHERE id = 1")
+
+    with pytest.raises(ValueError, match=message):
+        lookup()
+
+def test_disabled_by_default(songs_db):
+    """Test that without CATALOG_SNAPSHOT_ENABLED reads query SQLite."""
+    assert not catalog_snapshot.CATALOG_SNAPSHOT_ENABLED
+    assert song_model.get_song_by_id(1).title == "Open Road"
+    assert not song_model.catalog_snapshot.stats()["loaded"]
+
+
+######################################################
+#
+#    Writes
+#
+######################################################
+
+def test_own_writes_patch_the_snapshot(snapshot):
+    """Test that create_song, delete_song and update_play_count patch the snapshot without a reload."""
+    song_model.get_all_songs()
+    song_model.create_song("The Owls", "Blue Hour", 2012, "Jazz", 180)
+    song_model.delete_song(1)
+    song_model.update_play_count(3)
+    song_model.update_play_count(3)
+
+    assert song_model.get_song_by_compound_key("The Owls", "Blue Hour", 2012).id == 4
+    assert [(song["id"], song["play_count"]) for song in song_model.get_all_songs()] == [(2, 7), (3, 3), (4, 0)]
+    with pytest.raises(ValueError, match="has been deleted"):
+        song_model.get_song_by_id(1)
+
+    stats = snapshot.stats()
+    assert (stats["loads"], stats["patches"], stats["invalidations"]) == (1, 4, 0)
+
+def test_bulk_plays_patch_the_snapshot_once(snapshot):
+    """Test that update_play_counts patches the snapshot once for all its songs."""
+    song_model.get_all_songs()
+    song_model.update_play_counts([3, 3, 1])
+
+    assert [song["play_count"] for song in song_model.get_all_songs()] == [4, 7, 3]
+    assert (snapshot.stats()["loads"], snapshot.stats()["patches"]) == (1, 1)
+
+def test_returned_songs_are_not_modified_by_later_writes(snapshot):
+    """Test that a list handed out earlier keeps the values it was read with."""
+    before = song_model.get_all_songs()
+    song_model.update_play_count(1)
+
+    assert before[0]["play_count"] == 3
+    assert song_model.get_all_songs()[0]["play_count"] == 4
+
+def test_other_connections_writes_reload_after_the_interval(snapshot, songs_db, clock):
+    """Test that catalog_changes reveals another connection's commit at the next check."""
+    song_model.get_all_songs()
+    external_write(songs_db, "UPDATE songs SET play_count = 50 WHERE id = 3")
+
+    assert song_model.get_all_songs(sort_by_play_count=True)[0]["id"] == 2
+    clock.now += 1
+    assert song_model.get_all_songs(sort_by_play_count=True)[0]["id"] == 3
+    assert snapshot.stats()["loads"] == 2
+
+def test_other_writes_are_not_absorbed_by_own_patches(snapshot, songs_db):
+    """Test that a write by another connection before one of ours is not hidden by our patch."""
+    song_model.get_all_songs()
+    external_write(songs_db, "UPDATE songs SET title = 'Open Road (Live)' WHERE id = 1")
+    song_model.update_play_count(2)
+
+    assert song_model.get_song_by_id(1).title == "Open Road (Live)"
+    assert [song["play_count"] for song in song_model.get_all_songs()] == [3, 8, 1]
+
+def test_write_landing_before_our_commit_is_not_absorbed(snapshot, songs_db, mocker):
+    """Test that another connection's commit between check_for_writes and our commit drops the snapshot."""
+    song_model.get_all_songs()
+    check_for_writes = snapshot.check_for_writes
+
+    def check_then_external_write():
+        check_for_writes()
+        external_write(songs_db, "INSERT INTO songs (artist, title, year, genre, duration) "
+                                 "VALUES ('The Owls', 'Other', 2010, 'Jazz', 200)")
+
+    mocker.patch.object(snapshot, "check_for_writes", side_effect=check_then_external_write)
+    song_model.create_song("The Owls", "Blue Hour", 2012, "Jazz", 180)
+
+    assert [song["title"] for song in song_model.get_all_songs()] == \
+        ["Open Road", "Summer Rain", "Night Drive", "Other", "Blue Hour"]
+    stats = snapshot.stats()
+    assert (stats["loads"], stats["patches"], stats["invalidations"]) == (2, 0, 1)
+
+def test_shared_transaction_bypasses_and_invalidates(snapshot):
+    """Test that batch reads see uncommitted batch writes, and the batch's commit drops the snapshot."""
+    song_model.get_all_songs()
+
+    with shared_transaction(immediate=True):
+        song_model.create_song("The Owls", "Blue Hour", 2012, "Jazz", 180)
+        assert len(song_model.get_all_songs()) == 4
+        assert snapshot.stats()["invalidations"] == 0
+
+    assert snapshot.stats()["invalidations"] == 1
+    assert len(song_model.get_all_songs()) == 4
+    assert snapshot.stats()["loads"] == 2
+
+def test_follows_db_path(snapshot, tmp_path, mocker):
+    """Test that pointing sql_utils at another database loads that one."""
+    song_model.get_all_songs()
+    other = str(tmp_path / "other.db")
+    with sqlite3.connect(other) as conn, open(SCHEMA_PATH) as f:
+        conn.executescript(f.read())
+    mocker.patch.object(sql_utils, "DB_PATH", other)
+
+    assert song_model.get_all_songs() == []
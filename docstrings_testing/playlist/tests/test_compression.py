@@ -0,0 +1,178 @@
+import gzip
+import json
+
+from flask import Flask, Response, jsonify, make_response, request
+import pytest
+
+from music_collection.utils import compression
+from music_collection.utils.compression import choose_encoding, compress_stream
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def client(mocker):
+    """A bare Flask app with compression and routes returning large, small and streamed bodies."""
+    mocker.patch.object(compression, "COMPRESSION_ENCODINGS", ["zstd", "gzip"])
+    mocker.patch.object(compression, "COMPRESSION_MIN_SIZE", 1024)
+    mocker.patch.object(compression, "COMPRESSION_CHUNK_SIZE", 4096)
+    app = Flask(__name__)
+    app.after_request(compression.compress_response)
+    closed = []
+
+    @app.route("/large")
+    def large():
+        response = make_response(jsonify({"songs": [{"id": i, "title": f"Song {i}"} for i in range(2000)]}), 200)
+        response.set_etag("v1")
+        return response
+
+    @app.route("/small")
+    def small():
+        return make_response(jsonify({"status": "success"}), 200)
+
+    @app.route("/error")
+    def error():
+        return make_response(jsonify({"error": "x" * 5000}), 500)
+
+    @app.route("/stream")
+    def stream():
+        size = int(request.args.get("lines", "1000"))
+
+        class Lines:
+            def __iter__(self):
+                return (json.dumps({"id": i}) + "\n" for i in range(size))
+
+            def close(self):
+                closed.append(True)
+
+        return Response(Lines(), mimetype="application/x-ndjson")
+
+    test_client = app.test_client()
+    test_client.closed = closed
+    return test_client
+
+
+@pytest.fixture
+def gzip_only(mocker):
+    mocker.patch.object(compression, "zstandard", None)
+
+
+######################################################
+#
+#    Negotiation
+#
+######################################################
+
+class Accept:
+    """Stands in for werkzeug's parsed Accept-Encoding."""
+
+    def __init__(self, qualities):
+        self.qualities = qualities
+
+    def quality(self, encoding):
+        return self.qualities.get(encoding, self.qualities.get("*", 0))
+
+
+@pytest.mark.parametrize("qualities,expected", [
+    ({"gzip": 1}, "gzip"),
+    ({"identity": 1}, None),
+    ({}, None),
+    ({"gzip": 0}, None),
+    ({"*": 1}, "gzip"),
+])
+def test_choose_encoding(gzip_only, qualities, expected):
+    """Test picking an encoding from the client's preferences."""
+    assert choose_encoding(Accept(qualities)) == expected
+
+
+def test_choose_encoding_prefers_zstd(mocker):
+    """Test that zstd wins ties when available, and client quality wins otherwise."""
+    mocker.patch.object(compression, "zstandard", object())
+    assert choose_encoding(Accept({"gzip": 1, "zstd": 1})) == "zstd"
+    assert choose_encoding(Accept({"gzip": 1, "zstd": 0.5})) == "gzip"
+
+
+######################################################
+#
+#    Compression
+#
+######################################################
+
+def test_compress_stream_gzip(gzip_only):
+    """Test that chunks compress into one valid gzip stream."""
+    chunks = [b"a" * 10000, b"b" * 10000, b""]
+    assert gzip.decompress(b"".join(compress_stream(chunks, "gzip"))) == b"a" * 10000 + b"b" * 10000
+
+
+def test_compress_stream_zstd():
+    """Test that chunks compress into one valid zstd frame."""
+    zstandard = pytest.importorskip("zstandard")
+    body = b"".join(compress_stream([b"a" * 10000, b"b" * 10000], "zstd"))
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(body) == b"a" * 10000 + b"b" * 10000
+
+
+def test_large_response_compressed(client, gzip_only):
+    """Test that a large JSON body is gzipped, loses its length and gets a weak ETag."""
+    plain = client.get("/large")
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.get_etag() == ("v1", True)
+    body = gzip.decompress(response.get_data())
+    assert body == plain.get_data()
+    assert len(response.get_data()) < len(body) / 4
+
+
+def test_not_compressed_without_accept_encoding(client):
+    """Test that clients that do not ask get the body as it is, with a Vary header."""
+    response = client.get("/large")
+
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.get_etag() == ("v1", False)
+
+
+def test_small_response_not_compressed(client):
+    """Test that bodies below the threshold are skipped."""
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json() == {"status": "success"}
+
+
+def test_error_response_not_compressed(client):
+    """Test that only 200 responses are compressed."""
+    response = client.get("/error", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+
+
+def test_streamed_response_compressed(client, gzip_only):
+    """Test that a long streamed body is compressed as it streams and its source is closed."""
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    lines = gzip.decompress(response.get_data()).decode().splitlines()
+    assert len(lines) == 1000
+    assert json.loads(lines[-1]) == {"id": 999}
+    response.close()
+    assert client.closed == [True]
+
+
+def test_short_stream_not_compressed(client):
+    """Test that a stream ending below the threshold is sent as it is."""
+    response = client.get("/stream?lines=3", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+    assert response.get_data() == b'{"id": 0}\n{"id": 1}\n{"id": 2}\n'
+
+
+def test_head_not_compressed(client):
+    """Test that HEAD requests are left alone."""
+    response = client.head("/large", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
@@ -0,0 +1,167 @@
+import sqlite3
+import time
+
+import pytest
+
+from music_collection.utils import health, sql_utils
+from music_collection.utils.health import HealthMonitor, probe_database
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def songs_db(tmp_path, mocker):
+    """Point sql_utils at a throwaway database with a songs table."""
+    db_path = str(tmp_path / "songs.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE songs (id INTEGER PRIMARY KEY)")
+    conn.close()
+    mocker.patch.object(sql_utils, "DB_PATH", db_path)
+    return db_path
+
+
+@pytest.fixture
+def random_source_up(mocker):
+    """Make random.org report plenty of quota."""
+    return mocker.patch("music_collection.utils.random_utils.get_quota", return_value=1000000)
+
+
+@pytest.fixture
+def write_queues(mocker):
+    """Give each test its own write queue registry."""
+    return mocker.patch.dict(health._write_queues, clear=True)
+
+
+######################################################
+#
+#    Probes
+#
+######################################################
+
+def test_probe_database(songs_db):
+    """Test a successful database probe."""
+    result = probe_database("songs")
+    assert result["ok"] is True
+    assert result["error"] is None
+    assert result["latency_ms"] >= 0
+
+
+def test_probe_database_missing_table(songs_db):
+    """Test that a missing table fails the probe."""
+    result = probe_database("meals")
+    assert result["ok"] is False
+    assert "no such table" in result["error"]
+
+
+def test_probe_random_source_failure(mocker):
+    """Test that a failing random.org is reported, not raised."""
+    mocker.patch("music_collection.utils.random_utils.get_quota", side_effect=RuntimeError("timed out"))
+    result = health.probe_random_source()
+    assert result == {"ok": False, "quota": None, "latency_ms": result["latency_ms"], "error": "timed out"}
+
+
+######################################################
+#
+#    Readiness
+#
+######################################################
+
+def test_readiness_ready(songs_db, random_source_up, write_queues):
+    """Test a ready report and its details."""
+    health.register_write_queue("play_events", lambda: 3)
+    monitor = HealthMonitor("songs")
+    monitor.refresh()
+    report = monitor.readiness()
+
+    assert report["ready"] is True
+    assert report["prober_running"] is False
+    assert report["database"]["ok"] is True
+    assert report["random_source"]["quota"] == 1000000
+    assert report["connections"] == {"in_use": 0, "max": sql_utils.DB_MAX_CONNECTIONS, "saturation": 0.0}
+    assert report["write_queues"] == {"play_events": 3}
+
+
+def test_readiness_is_cached(songs_db, random_source_up, write_queues, mocker):
+    """Test that repeated readiness checks reuse the cached probes."""
+    probe = mocker.spy(health, "probe_database")
+    monitor = HealthMonitor("songs")
+    for _ in range(5):
+        monitor.readiness()
+
+    assert probe.call_count == 1
+
+
+def test_readiness_never_calls_random_source(songs_db, write_queues, mocker):
+    """Test that without the prober readiness probes only the database, and reports random.org from the cache."""
+    quota = mocker.patch("music_collection.utils.random_utils.get_quota", side_effect=AssertionError("called random.org"))
+    report = HealthMonitor("songs").readiness()
+
+    assert quota.call_count == 0
+    assert (report["ready"], report["prober_running"], report["database"]["ok"]) == (True, False, True)
+    assert report["random_source"]["error"] == "not probed yet"
+
+
+def test_readiness_stale_result(songs_db, random_source_up, write_queues, mocker):
+    """Test that a result older than the TTL makes the service unready."""
+    monitor = HealthMonitor("songs", interval=3600, ttl=10)
+    monitor.refresh()
+    checked_at, result = monitor._results["database"]
+    monitor._results["database"] = (checked_at - 60, result)
+
+    report = monitor.readiness()
+    assert report["ready"] is False
+    assert report["database"]["error"].startswith("stale")
+
+
+def test_readiness_saturated(songs_db, random_source_up, write_queues, mocker):
+    """Test that running out of connections makes the service unready."""
+    mocker.patch.object(sql_utils, "DB_MAX_CONNECTIONS", 2)
+    mocker.patch.object(sql_utils, "_connections_in_use", 2)
+
+    report = HealthMonitor("songs").readiness()
+    assert report["ready"] is False
+    assert report["connections"]["saturation"] == 1.0
+
+
+def test_readiness_queue_backlog(songs_db, random_source_up, write_queues):
+    """Test that a backed-up write queue makes the service unready."""
+    health.register_write_queue("play_events", lambda: health.HEALTH_MAX_QUEUE_DEPTH)
+    assert HealthMonitor("songs").readiness()["ready"] is False
+
+
+def test_readiness_random_source_optional(songs_db, write_queues, mocker):
+    """Test that random.org only affects readiness when it is required."""
+    mocker.patch("music_collection.utils.random_utils.get_quota", return_value=-1)
+    monitor = HealthMonitor("songs")
+    monitor.refresh()
+    assert monitor.readiness()["ready"] is True
+
+    mocker.patch.object(health, "HEALTH_REQUIRE_RANDOM_SOURCE", True)
+    assert monitor.readiness()["ready"] is False
+
+
+def test_connections_in_use(songs_db):
+    """Test that open connections are counted."""
+    with sql_utils.get_db_connection():
+        assert sql_utils.connections_in_use() == 1
+    assert sql_utils.connections_in_use() == 0
+
+
+def test_background_prober(songs_db, random_source_up, write_queues):
+    """Test that the prober fills the cache and reports itself as running."""
+    monitor = HealthMonitor("songs", interval=0.01)
+    monitor.start()
+    try:
+        assert monitor.liveness()["prober_running"] is True
+        deadline = time.monotonic() + 5
+        while not monitor.readiness()["ready"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        monitor.stop()
+
+    assert monitor.readiness()["ready"] is True
+    assert monitor.liveness()["prober_running"] is False
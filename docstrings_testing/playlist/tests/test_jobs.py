@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+
+from music_collection.utils.jobs import JobRunner
+
+
+@pytest.fixture
+def runner():
+    runner = JobRunner(max_workers=1, history=2)
+    yield runner
+    runner.shutdown()
+
+
+def wait(job) -> dict:
+    """Waits for a job to finish and returns its snapshot."""
+    for _ in range(500):
+        if job.finished_at is not None:
+            return job.snapshot()
+        threading.Event().wait(0.01)
+    raise AssertionError(f"job {job.id} did not finish")
+
+
+def test_job_reports_progress_and_result(runner):
+    """Test that a job moves from queued to succeeded, keeping its progress and result."""
+    release = threading.Event()
+
+    def work(job):
+        job.update(rows=1)
+        assert release.wait(5)
+        job.update(rows=2, bytes_read=10)
+        return {"inserted": 2}
+
+    job = runner.submit("import_songs", work)
+    assert runner.get(job.id) is job
+    assert runner.pending() == 1
+    release.set()
+
+    snapshot = wait(job)
+    assert (snapshot["status"], snapshot["progress"], snapshot["result"]) == \
+        ("succeeded", {"rows": 2, "bytes_read": 10}, {"inserted": 2})
+    assert snapshot["elapsed_seconds"] is not None
+    assert runner.pending() == 0
+
+def test_failed_job_keeps_its_error_and_cleans_up(runner):
+    """Test that an exception fails the job and cleanup still runs."""
+    cleaned = []
+
+    def work(job):
+        raise ValueError("CSV header is missing the columns: year")
+
+    snapshot = wait(runner.submit("import_songs", work, cleanup=lambda: cleaned.append(True)))
+
+    assert (snapshot["status"], snapshot["error"]) == ("failed", "CSV header is missing the columns: year")
+    assert cleaned == [True]
+
+def test_old_finished_jobs_are_forgotten(runner):
+    """Test that only the most recent finished jobs are kept."""
+    finished = [runner.submit("noop", lambda job: None) for _ in range(3)]
+    for job in finished:
+        wait(job)
+
+    latest = runner.submit("noop", lambda job: None)
+    wait(latest)
+
+    assert [runner.get(job.id) is not None for job in finished + [latest]] == [False, True, True, True]
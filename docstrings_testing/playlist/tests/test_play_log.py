@@ -0,0 +1,220 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from music_collection.models import catalog_snapshot, play_log, song_model
+from music_collection.models.catalog_snapshot import CatalogSnapshot
+from music_collection.models.play_log import DAY, HOUR, PlayLog, chart_bounds, get_charts, parse_window
+from music_collection.utils import sql_utils
+
+
+# Midnight UTC, so day and hour buckets are easy to reason about
+DAY0 = 20000 * DAY
+
+
+class FakeClock:
+    """A clock the test moves by hand."""
+
+    def __init__(self):
+        self.now = DAY0 + 0.5
+
+    def __call__(self):
+        return self.now
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def songs_db(tmp_path, mocker):
+    """A throwaway database created from the schema script, holding four songs, the third deleted."""
+    db_path = str(tmp_path / "songs.db")
+    mocker.patch.object(sql_utils, "DB_PATH", db_path)
+    schema = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sql", "create_song_table.sql")
+    with sqlite3.connect(db_path) as conn:
+        with open(schema) as f:
+            conn.executescript(f.read())
+        conn.executemany("INSERT INTO songs (artist, title, year, genre, duration, deleted) VALUES (?, ?, ?, ?, ?, ?)", [
+            ("The Foxes", "Open Road", 1999, "Rock", 240, False),
+            ("The Owls", "Summer Rain", 2005, "Jazz", 300, False),
+            ("The Foxes", "Night Drive", 2005, "Rock", 180, True),
+            ("The Owls", "Blue Hour", 2012, "Jazz", 180, False),
+        ])
+    return db_path
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def log(songs_db, clock, mocker):
+    """The play log song_model records to, unstarted, writing batches of three."""
+    log = PlayLog(batch_size=3, flush_interval=0.01, max_pending=5, clock=clock)
+    mocker.patch.object(song_model, "play_log", log)
+    yield log
+    log.stop()
+
+def rows(db_path: str, sql: str) -> list:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(sql).fetchall()
+
+
+######################################################
+#
+#    Writing
+#
+######################################################
+
+def test_flush_writes_events_and_rollups(log, songs_db):
+    """Test that a batch adds its plays to play_events and, counted, to both rollups."""
+    for song_id, played_at in [(1, DAY0 + 60), (1, DAY0 + 120), (2, DAY0 + HOUR), (1, DAY0 + DAY)]:
+        log.record(song_id, played_at)
+    log.flush()
+    log.record(1, DAY0 + 180)
+    log.flush()
+
+    assert len(rows(songs_db, "SELECT * FROM play_events")) == 5
+    assert rows(songs_db, "SELECT * FROM song_plays_hourly ORDER BY hour_start, song_id") == [
+        (DAY0, 1, 3), (DAY0 + HOUR, 2, 1), (DAY0 + DAY, 1, 1)]
+    assert rows(songs_db, "SELECT * FROM song_plays_daily ORDER BY day_start, song_id") == [
+        (DAY0, 1, 3), (DAY0, 2, 1), (DAY0 + DAY, 1, 1)]
+    # The third play filled a batch of three and was written right away
+    assert (log.stats()["written"], log.stats()["batches"]) == (5, 3)
+
+def test_update_play_count_records_plays(log, songs_db, clock):
+    """Test that plays counted by update_play_count reach the log with the time they happened."""
+    song_model.update_play_count(2)
+    clock.now += HOUR
+    song_model.update_play_count(2)
+    log.flush()
+
+    assert rows(songs_db, "SELECT song_id, played_at FROM play_events") == [(2, DAY0), (2, DAY0 + HOUR)]
+
+def test_full_batch_is_written_without_the_writer(log, songs_db):
+    """Test that without the background writer, record() writes a batch once it is full."""
+    for _ in range(3):
+        log.record(1)
+
+    assert log.pending() == 0
+    assert rows(songs_db, "SELECT plays FROM song_plays_daily") == [(3,)]
+
+def test_failed_batch_stays_queued(log, songs_db, tmp_path, mocker):
+    """Test that a batch the database refuses is kept, capped at max_pending, and written later."""
+    mocker.patch.object(sql_utils, "DB_PATH", str(tmp_path / "missing" / "songs.db"))
+    for song_id in range(1, 7):
+        log.record(song_id)
+
+    stats = log.stats()
+    assert (stats["pending"], stats["dropped"], stats["failures"]) == (5, 1, 4)
+
+    mocker.patch.object(sql_utils, "DB_PATH", songs_db)
+    assert log.flush() == 5
+    assert rows(songs_db, "SELECT song_id FROM play_events ORDER BY id") == [(2,), (3,), (4,), (5,), (6,)]
+
+def test_writer_writes_in_the_background(log, songs_db):
+    """Test that once started, plays are written within the flush interval, and stop() writes the rest."""
+    log.start()
+    log.record(1)
+    for _ in range(500):
+        if log.stats()["written"]:
+            break
+        threading.Event().wait(0.01)
+    assert log.stats()["written"] == 1
+
+    log.stop()
+    log.record(2)
+    log.stop()
+    assert not log.running()
+    assert log.stats()["written"] == 2
+
+def test_flush_leaves_the_snapshot_loaded(log, songs_db, mocker):
+    """Test that writing plays, which leaves songs alone, does not make the catalog snapshot reload."""
+    mocker.patch.object(catalog_snapshot, "CATALOG_SNAPSHOT_ENABLED", True)
+    snapshot = CatalogSnapshot(check_interval=0)
+    mocker.patch.object(song_model, "catalog_snapshot", snapshot)
+    song_model.get_all_songs()
+    song_model.update_play_count(1)
+    log.flush()
+
+    assert rows(songs_db, "SELECT song_id FROM play_events") == [(1,)]
+    assert song_model.get_song_by_id(1).title == "Open Road"
+    stats = snapshot.stats()
+    assert (stats["loads"], stats["patches"], stats["invalidations"]) == (1, 1, 0)
+
+def test_disabled(log, mocker):
+    """Test that with PLAY_LOG_ENABLED off plays are not recorded."""
+    mocker.patch.object(play_log, "PLAY_LOG_ENABLED", False)
+    log.record(1)
+
+    assert log.stats()["recorded"] == 0
+
+
+######################################################
+#
+#    Charts
+#
+######################################################
+
+def test_charts_combine_days_and_edge_hours(log, songs_db):
+    """Test that a window across partial days counts exactly the plays inside it, from the rollups only."""
+    start, end = DAY0 + 22 * HOUR, DAY0 + 2 * DAY + 5 * HOUR
+    plays = (
+        [(1, DAY0 + HOUR)] * 5                  # before the window
+        + [(1, start), (1, end - 1), (1, end)]  # first and last second in, then out
+        + [(2, DAY0 + DAY + 12 * HOUR)] * 2     # inside the whole day
+        + [(2, DAY0 + 23 * HOUR)]
+        + [(3, DAY0 + DAY)] * 9                 # deleted
+        + [(4, DAY0 + DAY + HOUR)] * 2          # ties with song 1
+    )
+    for song_id, played_at in plays:
+        log.record(song_id, played_at)
+    log.flush()
+    with sqlite3.connect(songs_db) as conn:
+        conn.execute("DELETE FROM play_events")
+
+    chart = get_charts(start, end)
+
+    assert [(song["id"], song["plays"]) for song in chart] == [(2, 3), (1, 2), (4, 2)]
+    assert chart[0] == {"id": 2, "artist": "The Owls", "title": "Summer Rain", "year": 2005, "genre": "Jazz",
+                        "duration": 300, "plays": 3}
+    assert [song["id"] for song in get_charts(start, end, limit=1)] == [2]
+
+def test_charts_within_a_day(log, songs_db):
+    """Test that a window with no whole day in it is read from the hourly rollup alone."""
+    for song_id, played_at in [(1, DAY0 + HOUR), (2, DAY0 + 2 * HOUR), (2, DAY0 + 3 * HOUR)]:
+        log.record(song_id, played_at)
+    log.flush()
+
+    assert [(song["id"], song["plays"]) for song in get_charts(DAY0 + 2 * HOUR, DAY0 + 4 * HOUR)] == [(2, 2)]
+    assert [(song["id"], song["plays"]) for song in get_charts(DAY0, DAY0 + DAY)] == [(2, 2), (1, 1)]
+
+@pytest.mark.parametrize("start, end, limit, message", [
+    (DAY0 + 1, DAY0 + HOUR, 20, "expected whole hours"),
+    (DAY0 + HOUR, DAY0, 20, "expected whole hours"),
+    (DAY0, DAY0 + HOUR, 0, "Limit must be between 1 and 100, got 0"),
+])
+def test_charts_invalid(start, end, limit, message):
+    """Test that unaligned or reversed bounds and out-of-range limits raise a ValueError."""
+    with pytest.raises(ValueError, match=message):
+        get_charts(start, end, limit)
+
+@pytest.mark.parametrize("window, seconds", [("24h", 24 * HOUR), ("7d", 7 * DAY), (" 4w ", 28 * DAY)])
+def test_parse_window(window, seconds):
+    """Test that windows are given in hours, days or weeks."""
+    assert parse_window(window) == seconds
+
+@pytest.mark.parametrize("window", ["", "0d", "7", "1.5d", "7m", "-1h"])
+def test_parse_window_invalid(window):
+    """Test that malformed windows raise a ValueError."""
+    with pytest.raises(ValueError, match="Invalid window"):
+        parse_window(window)
+
+def test_chart_bounds_end_with_the_current_hour():
+    """Test that a window includes the current hour and covers whole hours."""
+    assert chart_bounds(24 * HOUR, now=DAY0 + 90 * 60) == (DAY0 - 22 * HOUR, DAY0 + 2 * HOUR)
+    assert chart_bounds(90 * 60, now=DAY0) == (DAY0 - HOUR, DAY0 + HOUR)
@@ -14,6 +14,13 @@ def mock_update_play_count(mocker):
     """Mock the update_play_count function for testing purposes."""
     return mocker.patch("music_collection.models.playlist_model.update_play_count")
 
+@pytest.fixture
+def mock_update_play_counts(mocker):
+    """Mock the bulk update_play_counts function, reporting every play as counted."""
+    return mocker.patch("music_collection.models.playlist_model.update_play_counts",
+                        side_effect=lambda song_ids: {"plays": len(song_ids), "songs": len(set(song_ids)),
+                                                      "missing": [], "deleted": []})
+
 """Fixtures providing sample songs for the tests."""
 @pytest.fixture
 def sample_song1():
@@ -121,6 +128,33 @@ def test_move_song_to_beginning(playlist_model, sample_playlist):
     playlist_model.move_song_to_beginning(2)  # Move Song 2 to the beginning
     assert playlist_model.playlist[0].id == 2, "Expected Song 2 to be at the beginning"
 
+def test_version_changes_with_playlist(playlist_model, sample_playlist):
+    """Test that every change to the songs or their order bumps the version."""
+    versions = [playlist_model.version]
+    for song in sample_playlist:
+        playlist_model.add_song_to_playlist(song)
+        versions.append(playlist_model.version)
+    playlist_model.swap_songs_in_playlist(1, 2)
+    versions.append(playlist_model.version)
+    playlist_model.move_song_to_end(2)
+    versions.append(playlist_model.version)
+    playlist_model.remove_song_by_track_number(1)
+    versions.append(playlist_model.version)
+    playlist_model.clear_playlist()
+    versions.append(playlist_model.version)
+
+    assert versions == sorted(set(versions)), "Expected a new version after each change"
+
+def test_version_unchanged_by_playback(playlist_model, sample_playlist, mock_update_play_count):
+    """Test that playing and reading the playlist leave the version alone."""
+    playlist_model.playlist.extend(sample_playlist)
+    version = playlist_model.version
+
+    playlist_model.play_current_song()
+    playlist_model.get_all_songs()
+    playlist_model.go_to_track_number(2)
+    assert playlist_model.version == version
+
 ##################################################
 # Song Retrieval Test Cases
 ##################################################
@@ -283,21 +317,22 @@ def test_go_to_track_number(playlist_model, sample_playlist):
     playlist_model.go_to_track_number(2)
     assert playlist_model.current_track_number == 2, "Expected to be at track 2 after moving song"
 
-def test_play_entire_playlist(playlist_model, sample_playlist, mock_update_play_count):
+def test_play_entire_playlist(playlist_model, sample_playlist, mock_update_play_counts, mock_update_play_count):
     """Test playing the entire playlist."""
     playlist_model.playlist.extend(sample_playlist)
+    playlist_model.current_track_number = 2
 
-    playlist_model.play_entire_playlist()
+    report = playlist_model.play_entire_playlist()
 
-    # Check that all play counts were updated
-    mock_update_play_count.assert_any_call(1)
-    mock_update_play_count.assert_any_call(2)
-    assert mock_update_play_count.call_count == len(playlist_model.playlist)
+    # Check that all play counts were updated with one bulk call
+    mock_update_play_counts.assert_called_once_with([1, 2])
+    mock_update_play_count.assert_not_called()
+    assert report["plays"] == 2
 
     # Check that the current track number was updated back to the first song
     assert playlist_model.current_track_number == 1, "Expected to loop back to the beginning of the playlist"
 
-def test_play_rest_of_playlist(playlist_model, sample_playlist, mock_update_play_count):
+def test_play_rest_of_playlist(playlist_model, sample_playlist, mock_update_play_counts):
     """Test playing from the current position to the end of the playlist."""
     playlist_model.playlist.extend(sample_playlist)
     playlist_model.current_track_number = 2
@@ -305,7 +340,6 @@ def test_play_rest_of_playlist(playlist_model, sample_playlist, mock_update_play
     playlist_model.play_rest_of_playlist()
 
     # Check that play counts were updated for the remaining songs
-    mock_update_play_count.assert_any_call(2)
-    assert mock_update_play_count.call_count == 1
+    mock_update_play_counts.assert_called_once_with([2])
 
     assert playlist_model.current_track_number == 1, "Expected to loop back to the beginning of the playlist"
\ No newline at end of file
@@ -0,0 +1,134 @@
+from collections import Counter
+import sys
+import threading
+import time
+
+from flask import Flask
+import pytest
+
+from music_collection.utils import profiling
+from music_collection.utils.profiling import (
+    ProfileStore,
+    RollingSampler,
+    StackSampler,
+    collapse_frame,
+    format_collapsed,
+    top_functions
+)
+
+
+def busy_wait(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+######################################################
+#
+#    Stack formatting
+#
+######################################################
+
+def test_collapse_frame_is_root_first():
+    """Test that the innermost frame is the last element of a collapsed stack."""
+    stack = collapse_frame(sys._getframe())
+    assert stack.endswith(f"{__name__}:test_collapse_frame_is_root_first")
+
+
+def test_top_functions_and_collapsed_output():
+    """Test self/total sample attribution and collapsed text output."""
+    stacks = Counter({"app:handler;db:query": 3, "app:handler;json:dumps": 1})
+
+    summary = top_functions(stacks)
+
+    assert summary[0] == {"function": "db:query", "self": 3, "total": 3, "self_pct": 75.0}
+    assert summary[1]["function"] == "json:dumps"
+    assert format_collapsed(stacks) == "app:handler;db:query 3\napp:handler;json:dumps 1\n"
+
+
+######################################################
+#
+#    Sampling
+#
+######################################################
+
+def test_stack_sampler_samples_target_thread_with_cap():
+    """Test that only the target thread is sampled and the cap is honored."""
+    worker = threading.Thread(target=busy_wait, args=(0.3,))
+    worker.start()
+
+    sampler = StackSampler(thread_ids=[worker.ident], interval=0.001, max_samples=5)
+    sampler.start()
+    sampler.join(timeout=2)
+    worker.join()
+
+    assert sampler.samples == 5
+    assert all(stack.endswith(":busy_wait") for stack in sampler.stacks)
+
+
+def test_profile_store_evicts_oldest():
+    """Test that the profile store keeps only the most recent profiles."""
+    store = ProfileStore(max_profiles=2, directory=None)
+    for profile_id in ("a", "b", "c"):
+        store.save({"id": profile_id, "stacks": Counter()})
+
+    assert store.get("a") is None
+    assert store.get("c")["id"] == "c"
+
+
+######################################################
+#
+#    Flask integration
+#
+######################################################
+
+@pytest.fixture
+def profiled_app(mocker):
+    """A minimal app with request profiling enabled."""
+    mocker.patch.object(profiling, "PROFILING_ENABLED", True)
+    mocker.patch.object(profiling, "profile_store", ProfileStore(directory=None))
+
+    app = Flask(__name__)
+    profiling.init_app(app)
+
+    @app.route("/work")
+    def work():
+        busy_wait(0.05)
+        return "done"
+
+    return app
+
+
+def test_request_profiled_only_when_asked(profiled_app):
+    """Test that only flagged requests are profiled and stored."""
+    client = profiled_app.test_client()
+
+    assert "X-Profile-Id" not in client.get("/work").headers
+
+    response = client.get("/work", headers={"X-Profile": "1"})
+    profile = profiling.profile_store.get(response.headers["X-Profile-Id"])
+
+    assert profile["path"] == "/work"
+    assert profile["samples"] > 0
+    assert any(stack.endswith(":busy_wait") for stack in profile["stacks"])
+
+
+def test_rolling_sampler_keeps_request_stacks_in_window(mocker):
+    """Test that only request-thread stacks are kept and old buckets expire."""
+    clock = mocker.patch("music_collection.utils.profiling.time.monotonic", return_value=1000.0)
+    sampler = RollingSampler(interval=0.01, window_seconds=60, bucket_seconds=10)
+
+    sampler.record("werkzeug:serve_forever;socket:accept")
+    sampler.record("flask.app:wsgi_app;app:handler;db:query")
+    clock.return_value = 1055.0
+    sampler.record("flask.app:wsgi_app;app:handler;json:dumps")
+
+    assert sampler.aggregate() == Counter({
+        "flask.app:wsgi_app;app:handler;db:query": 1,
+        "flask.app:wsgi_app;app:handler;json:dumps": 1
+    })
+    assert sampler.aggregate(seconds=5) == Counter({"flask.app:wsgi_app;app:handler;json:dumps": 1})
+
+    clock.return_value = 1075.0
+    sampler.record("flask.app:wsgi_app;app:other")
+    assert "flask.app:wsgi_app;app:handler;db:query" not in sampler.aggregate()
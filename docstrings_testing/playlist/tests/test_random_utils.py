@@ -1,7 +1,12 @@
+import asyncio
+
+import httpx
 import pytest
 import requests
 
-from music_collection.utils.random_utils import get_random
+from music_collection.utils import random_utils
+from music_collection.utils.random_utils import (get_quota, get_random, get_random_async, get_random_fractions,
+                                                 get_random_fractions_async, sample_distinct)
 
 
 RANDOM_NUMBER = 42
@@ -47,4 +52,78 @@ def test_get_random_invalid_response(mock_random_org):
     mock_random_org.text = "invalid_response"
 
     with pytest.raises(ValueError, match="Invalid response from random.org: invalid_response"):
-        get_random(NUM_SONGS)
\ No newline at end of file
+        get_random(NUM_SONGS)
+
+def test_get_random_fractions(mock_random_org):
+    """Test retrieving several random fractions in one request."""
+    mock_random_org.text = "0.1250000000\n0.9999999999\n0.0000000000\n"
+
+    assert get_random_fractions(3) == [0.125, 0.9999999999, 0.0]
+    requests.get.assert_called_once_with(
+        "https://www.random.org/decimal-fractions/?num=3&dec=10&col=1&format=plain&rnd=new", timeout=5)
+
+@pytest.mark.parametrize("text", ["0.5\n", "0.5\n1.5\n", "0.5\nnope\n"])
+def test_get_random_fractions_invalid_response(mock_random_org, text):
+    """Simulate responses with the wrong number of fractions or values outside [0, 1)."""
+    mock_random_org.text = text
+
+    with pytest.raises(ValueError, match="Invalid response from random.org"):
+        get_random_fractions(2)
+
+def test_sample_distinct():
+    """Test that fractions map to distinct ints in range, with one per possible value at most."""
+    assert sample_distinct([0.0, 0.0, 0.0], 3) == [1, 2, 3]
+    assert sample_distinct([0.9999999999, 0.9999999999], 3) == [3, 1]
+    assert sample_distinct([0.5] * 10, 4) == [3, 1, 4, 2]
+    assert sample_distinct([0.3], 1) == [1]
+
+def test_get_quota(mock_random_org):
+    """Test retrieving the remaining random.org quota."""
+    mock_random_org.text = "199980\n"
+
+    assert get_quota() == 199980
+    requests.get.assert_called_once_with("https://www.random.org/quota/?format=plain", timeout=2)
+
+def test_get_quota_request_failure(mocker):
+    """Simulate a quota request failure."""
+    mocker.patch("requests.get", side_effect=requests.exceptions.RequestException("Connection error"))
+
+    with pytest.raises(RuntimeError, match="Quota request to random.org failed: Connection error"):
+        get_quota()
+
+
+@pytest.fixture
+def mock_async_client(mocker):
+    """Replace the pooled async client with a mock whose get is awaitable."""
+    client = mocker.Mock()
+    client.get = mocker.AsyncMock(return_value=mocker.Mock(text=f"{RANDOM_NUMBER}\n"))
+    mocker.patch.object(random_utils, "_get_async_client", return_value=client)
+    return client
+
+def test_get_random_async(mock_async_client):
+    """Test retrieving a random number with the async client."""
+    assert asyncio.run(get_random_async(NUM_SONGS)) == RANDOM_NUMBER
+    mock_async_client.get.assert_awaited_once_with(
+        "https://www.random.org/integers/?num=1&min=1&max=100&col=1&base=10&format=plain&rnd=new")
+
+def test_get_random_async_timeout(mock_async_client):
+    """Simulate a timeout with the async client."""
+    mock_async_client.get.side_effect = httpx.ReadTimeout("timed out")
+
+    with pytest.raises(RuntimeError, match="Request to random.org timed out."):
+        asyncio.run(get_random_async(NUM_SONGS))
+
+def test_get_random_async_invalid_response(mock_async_client):
+    """Simulate an invalid response with the async client."""
+    mock_async_client.get.return_value.text = "invalid_response"
+
+    with pytest.raises(ValueError, match="Invalid response from random.org: invalid_response"):
+        asyncio.run(get_random_async(NUM_SONGS))
+
+def test_get_random_fractions_async(mock_async_client):
+    """Test retrieving random fractions with the async client."""
+    mock_async_client.get.return_value.text = "0.25\n0.75\n"
+
+    assert asyncio.run(get_random_fractions_async(2)) == [0.25, 0.75]
+    mock_async_client.get.assert_awaited_once_with(
+        "https://www.random.org/decimal-fractions/?num=2&dec=10&col=1&format=plain&rnd=new")
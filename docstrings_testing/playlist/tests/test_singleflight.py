@@ -0,0 +1,140 @@
+import threading
+import time
+
+import pytest
+
+from music_collection.utils import singleflight
+from music_collection.utils.singleflight import SingleFlight
+
+
+class FakeClock:
+    """A clock the test moves by hand."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class SlowQuery:
+    """Counts its runs and blocks each one until the test releases it."""
+
+    def __init__(self, result="rows"):
+        self.result = result
+        self.runs = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.runs += 1
+        self.started.set()
+        assert self.release.wait(5)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def run_concurrently(flight: SingleFlight, key, fn, callers: int) -> list:
+    """Starts callers threads calling flight.do once the first has begun fn, then lets fn finish."""
+    results = []
+
+    def call():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    threads[0].start()
+    assert fn.started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while flight.snapshot()["shared"] < callers - 1 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    fn.release.set()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+######################################################
+#
+#    Coalescing
+#
+######################################################
+
+def test_concurrent_calls_share_one_execution():
+    """Test that callers arriving while a call is in flight get its result without running it."""
+    flight = SingleFlight("test", ttl=0)
+    query = SlowQuery()
+
+    assert run_concurrently(flight, "key", query, 5) == ["rows"] * 5
+    assert query.runs == 1
+    assert flight.snapshot() == {"calls": 5, "executions": 1, "shared": 4, "reused": 0, "in_flight": 0,
+                                 "ttl_seconds": 0}
+
+
+def test_errors_reach_every_waiting_caller():
+    """Test that a failed call raises in all waiting callers and is not kept."""
+    flight = SingleFlight("test", ttl=10)
+    query = SlowQuery(ValueError("database is locked"))
+
+    results = run_concurrently(flight, "key", query, 3)
+    assert [str(result) for result in results] == ["database is locked"] * 3
+
+    assert flight.do("key", lambda: "retried") == "retried"
+
+
+def test_different_keys_run_separately():
+    """Test that calls with different keys, e.g. other data versions, do not share results."""
+    flight = SingleFlight("test", ttl=0)
+
+    assert flight.do(("catalog", 1), lambda: "v1") == "v1"
+    assert flight.do(("catalog", 2), lambda: "v2") == "v2"
+    assert flight.snapshot()["executions"] == 2
+
+
+def test_ttl_reuses_finished_results():
+    """Test that a finished result is reused within the TTL and recomputed after it."""
+    clock = FakeClock()
+    flight = SingleFlight("test", ttl=1, clock=clock)
+    runs = []
+
+    def query():
+        runs.append(clock.now)
+        return len(runs)
+
+    assert [flight.do("key", query) for _ in range(3)] == [1, 1, 1]
+    clock.now += 1
+    assert flight.do("key", query) == 2
+    assert flight.snapshot()["reused"] == 2
+
+
+def test_without_ttl_results_are_not_kept():
+    """Test that sequential calls each run when there is no TTL."""
+    flight = SingleFlight("test", ttl=0)
+
+    results = [flight.do("key", object) for _ in range(3)]
+    assert len({id(result) for result in results}) == 3
+    assert flight.snapshot()["executions"] == 3
+
+
+######################################################
+#
+#    Bypass
+#
+######################################################
+
+@pytest.mark.parametrize("setting", ["disabled", "shared_transaction"])
+def test_bypass(setting, mocker):
+    """Test that calls run on their own when disabled or inside a shared transaction."""
+    if setting == "disabled":
+        mocker.patch.object(singleflight, "SINGLEFLIGHT_ENABLED", False)
+    else:
+        mocker.patch.object(singleflight, "in_shared_transaction", return_value=True)
+    flight = SingleFlight("test", ttl=10)
+
+    assert [flight.do("key", lambda: "rows") for _ in range(2)] == ["rows", "rows"]
+    assert flight.snapshot()["calls"] == 0
@@ -0,0 +1,185 @@
+import io
+import json
+import os
+import sqlite3
+
+import pytest
+
+from music_collection.models import catalog_snapshot, song_import, song_model
+from music_collection.models.catalog_snapshot import CatalogSnapshot
+from music_collection.models.song_import import detect_format, import_file, import_songs, validate_record
+from music_collection.utils import sql_utils
+
+
+CSV_HEADER = "artist,title,year,genre,duration\n"
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def songs_db(tmp_path, mocker):
+    """A throwaway database created from the schema script, holding one song."""
+    db_path = str(tmp_path / "songs.db")
+    mocker.patch.object(sql_utils, "DB_PATH", db_path)
+    schema = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sql", "create_song_table.sql")
+    with sqlite3.connect(db_path) as conn:
+        with open(schema) as f:
+            conn.executescript(f.read())
+        conn.execute("INSERT INTO songs (artist, title, year, genre, duration) VALUES ('The Foxes', 'Open Road', 1999, 'Rock', 240)")
+    return db_path
+
+def catalog(db_path: str) -> list[tuple]:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT id, artist, title, year, genre, duration, deleted FROM songs ORDER BY id").fetchall()
+
+
+######################################################
+#
+#    Parsing and validation
+#
+######################################################
+
+@pytest.mark.parametrize("filename, content_type, expected", [
+    ("songs.csv", None, "csv"),
+    ("songs.JSONL", None, "ndjson"),
+    (None, "application/x-ndjson; charset=utf-8", "ndjson"),
+    (None, "text/csv", "csv"),
+    ("songs.txt", "text/plain", None),
+])
+def test_detect_format(filename, content_type, expected):
+    """Test that the format comes from the file extension or the Content-Type."""
+    assert detect_format(filename, content_type) == expected
+
+@pytest.mark.parametrize("record, message", [
+    ({"artist": "A", "title": "T", "year": "1999", "genre": "Rock"}, "Missing fields: duration"),
+    ({"artist": "A", "title": "", "year": 1999, "genre": "Rock", "duration": 200}, "Missing fields: title"),
+    ({"artist": 7, "title": "T", "year": 1999, "genre": "Rock", "duration": 200}, "Invalid artist: 7"),
+    ({"artist": "A", "title": "T", "year": "nineteen", "genre": "Rock", "duration": 200}, "Invalid year: 'nineteen'"),
+    ({"artist": "A", "title": "T", "year": 1899, "genre": "Rock", "duration": 200}, "Invalid year provided: 1899"),
+    ({"artist": "A", "title": "T", "year": 1999, "genre": "Rock", "duration": True}, "Invalid duration: True"),
+    ({"artist": "A", "title": "T", "year": 1999, "genre": "Rock", "duration": "0"}, "Invalid song duration: 0"),
+])
+def test_validate_record_invalid(record, message):
+    """Test that records breaking create_song's rules are rejected with its messages."""
+    with pytest.raises(ValueError, match=message):
+        validate_record(record)
+
+def test_validate_record_converts_csv_numbers():
+    """Test that numbers given as strings, as in CSV, are converted."""
+    record = {"artist": "A", "title": "T", "year": " 1999", "genre": "Rock", "duration": "200", "extra": "x"}
+
+    assert validate_record(record) == ("A", "T", 1999, "Rock", 200)
+
+
+######################################################
+#
+#    Importing
+#
+######################################################
+
+def test_import_csv_reports_conflicts_and_errors(songs_db):
+    """Test that valid rows are inserted, and conflicts and invalid rows are reported by line."""
+    text = CSV_HEADER + "\n".join([
+        "The Owls,Summer Rain,2005,Jazz,300",
+        "The Foxes,Open Road,1999,Pop,200",
+        '"The Owls","Blue Hour, Live",2012,Jazz,180',
+        "The Owls,Slow Tide,1850,Jazz,240",
+        "The Owls,Summer Rain,2005,Jazz,301",
+    ])
+
+    report = import_songs(io.StringIO(text), "csv")
+
+    assert {key: report[key] for key in ("rows", "inserted", "updated", "skipped", "invalid")} == \
+        {"rows": 5, "inserted": 2, "updated": 0, "skipped": 2, "invalid": 1}
+    assert [(c["line"], c["title"], c["action"]) for c in report["conflicts"]] == \
+        [(3, "Open Road", "skipped"), (6, "Summer Rain", "skipped")]
+    assert [error["line"] for error in report["errors"]] == [5]
+    assert catalog(songs_db) == [
+        (1, "The Foxes", "Open Road", 1999, "Rock", 240, 0),
+        (2, "The Owls", "Summer Rain", 2005, "Jazz", 300, 0),
+        # AUTOINCREMENT spends an id on the conflicting insert
+        (4, "The Owls", "Blue Hour, Live", 2012, "Jazz", 180, 0),
+    ]
+
+def test_import_ndjson_upsert_updates_and_restores(songs_db):
+    """Test that upsert mode updates existing songs, restoring deleted ones, and reports them."""
+    song_model.delete_song(1)
+    lines = [
+        json.dumps({"artist": "The Foxes", "title": "Open Road", "year": 1999, "genre": "Pop", "duration": 200}),
+        "",
+        "{not json",
+        json.dumps(["a list"]),
+        json.dumps({"artist": "The Owls", "title": "Summer Rain", "year": 2005, "genre": "Jazz", "duration": 300}),
+    ]
+
+    report = import_songs(io.StringIO("\n".join(lines)), "ndjson", mode="upsert")
+
+    assert (report["rows"], report["inserted"], report["updated"], report["invalid"]) == (4, 1, 1, 2)
+    assert [error["line"] for error in report["errors"]] == [3, 4]
+    assert report["conflicts"] == [{"line": 1, "artist": "The Foxes", "title": "Open Road", "year": 1999,
+                                    "action": "updated"}]
+    assert catalog(songs_db)[0] == (1, "The Foxes", "Open Road", 1999, "Pop", 200, 0)
+    assert song_model.get_catalog_size() == 2
+    assert [song["id"] for song in song_model.search_songs("pop")[0]] == [1]
+
+def test_import_commits_in_chunks_with_progress(songs_db, mocker):
+    """Test that each chunk is its own transaction and progress is reported after each."""
+    text = CSV_HEADER + "".join(f"Artist {i},Song {i},2000,Pop,200\n" for i in range(5))
+    connect = mocker.spy(song_import, "get_db_connection")
+    versions = song_model.catalog_version.value
+    progress = []
+
+    import_songs(io.StringIO(text), "csv", chunk_size=2, progress=progress.append)
+
+    assert connect.call_count == 3
+    assert song_model.catalog_version.value == versions + 3
+    assert [counts["inserted"] for counts in progress] == [2, 4, 5]
+    assert len(catalog(songs_db)) == 6
+
+def test_import_reaches_the_catalog_snapshot(songs_db, mocker):
+    """Test that each committed chunk drops the catalog snapshot, so the next read sees the imported songs."""
+    mocker.patch.object(catalog_snapshot, "CATALOG_SNAPSHOT_ENABLED", True)
+    snapshot = CatalogSnapshot(check_interval=3600)
+    mocker.patch.object(song_model, "catalog_snapshot", snapshot)
+    assert len(song_model.get_all_songs()) == 1
+    text = CSV_HEADER + "".join(f"Artist {i},Song {i},2000,Pop,200\n" for i in range(3))
+
+    import_songs(io.StringIO(text), "csv", chunk_size=2)
+
+    assert len(song_model.get_all_songs()) == 4
+    assert (snapshot.stats()["invalidations"], snapshot.stats()["loads"]) == (1, 2)
+
+def test_import_file_reports_bytes(songs_db, tmp_path):
+    """Test that import_file detects the format from the extension and reports bytes read."""
+    path = tmp_path / "songs.csv"
+    path.write_text("\ufeff" + CSV_HEADER + "The Owls,Summer Rain,2005,Jazz,300\n", encoding="utf-8")
+    progress = []
+
+    report = import_file(str(path), progress=progress.append)
+
+    assert report["inserted"] == 1
+    assert progress[-1]["bytes_read"] == progress[-1]["total_bytes"] == path.stat().st_size
+
+def test_reported_rows_are_capped(songs_db, mocker):
+    """Test that the listed errors are capped while the counts cover every row."""
+    mocker.patch.object(song_import, "IMPORT_MAX_REPORTED_ROWS", 2)
+    text = CSV_HEADER + "A,T,1800,Rock,200\n" * 5
+
+    report = import_songs(io.StringIO(text), "csv")
+
+    assert report["invalid"] == 5
+    assert len(report["errors"]) == 2
+
+@pytest.mark.parametrize("text, fmt, mode, message", [
+    ("artist,title\nA,T\n", "csv", "skip", "CSV header is missing the columns: year, genre, duration"),
+    ("", "xml", "skip", "Unknown import format 'xml'"),
+    ("", "csv", "replace", "Unknown import mode 'replace'"),
+])
+def test_import_invalid_arguments(text, fmt, mode, message):
+    """Test that bad headers, formats and modes raise a ValueError before anything is written."""
+    with pytest.raises(ValueError, match=message):
+        import_songs(io.StringIO(text), fmt, mode)
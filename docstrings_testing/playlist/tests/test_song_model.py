@@ -1,9 +1,13 @@
 from contextlib import contextmanager
+import os
 import re
 import sqlite3
 
 import pytest
 
+from music_collection.models import song_model
+from music_collection.models.play_log import PlayLog
+from music_collection.utils import sql_utils
 from music_collection.models.song_model import (
     Song,
     create_song,
@@ -12,7 +16,13 @@ from music_collection.models.song_model import (
     get_song_by_compound_key,
     get_all_songs,
     get_random_song,
-    update_play_count
+    get_random_songs,
+    iter_all_songs,
+    pick_songs,
+    query_songs,
+    search_songs,
+    update_play_count,
+    update_play_counts
 )
 
 ######################################################
@@ -42,9 +52,24 @@ def mock_cursor(mocker):
         yield mock_conn  # Yield the mocked connection object
 
     mocker.patch("music_collection.models.song_model.get_db_connection", mock_get_db_connection)
+    # Plays go to an unstarted log of the test's own, so none are written to a real database
+    mocker.patch("music_collection.models.song_model.play_log", PlayLog())
 
     return mock_cursor  # Return the mock cursor so we can set expectations per test
 
+@pytest.fixture
+def songs_db(tmp_path, mocker):
+    """A throwaway database created from the schema script, with its triggers."""
+    db_path = str(tmp_path / "songs.db")
+    mocker.patch.object(sql_utils, "DB_PATH", db_path)
+    schema = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sql", "create_song_table.sql")
+    conn = sqlite3.connect(db_path)
+    with open(schema) as f:
+        conn.executescript(f.read())
+    conn.close()
+    mocker.patch.object(song_model, "play_log", PlayLog())
+    return db_path
+
 ######################################################
 #
 #    Add and delete
@@ -257,6 +282,19 @@ def test_get_all_songs(mock_cursor):
 
     assert actual_query == expected_query, "The SQL query did not match the expected structure."
 
+def test_get_all_songs_keyed_by_versions(mock_cursor, mocker):
+    """Test that catalog reads are shared only between calls with the same arguments and data versions."""
+    do = mocker.spy(song_model.catalog_reads, "do")
+
+    get_all_songs(sort_by_play_count=True)
+    song_model.stats_version.bump()
+    get_all_songs(sort_by_play_count=True)
+
+    first, second = (call.args[0] for call in do.call_args_list)
+    assert first[:2] == second[:2] == ("all_songs", True)
+    assert second[3] == first[3] + 1
+    assert mock_cursor.execute.call_count == 2
+
 def test_get_all_songs_empty_catalog(mock_cursor, caplog):
     """Test that retrieving all songs returns an empty list when the catalog is empty and logs a warning."""
 
@@ -312,57 +350,111 @@ def test_get_all_songs_ordered_by_play_count(mock_cursor):
 
     assert actual_query == expected_query, "The SQL query did not match the expected structure."
 
-def test_get_random_song(mock_cursor, mocker):
-    """Test retrieving a random song from the catalog."""
+def test_iter_all_songs(mock_cursor):
+    """Test streaming all songs fetches them in batches and keeps the query of get_all_songs."""
 
-    # Simulate that there are multiple songs in the database
-    mock_cursor.fetchall.return_value = [
-        (1, "Artist A", "Song A", 2020, "Rock", 210, 10),
-        (2, "Artist B", "Song B", 2021, "Pop", 180, 20),
-        (3, "Artist C", "Song C", 2022, "Jazz", 200, 5)
+    # Simulate two batches of rows followed by an exhausted cursor
+    mock_cursor.fetchmany.side_effect = [
+        [(2, "Artist B", "Song B", 2021, "Pop", 180, 20), (1, "Artist A", "Song A", 2020, "Rock", 210, 10)],
+        [(3, "Artist C", "Song C", 2022, "Jazz", 200, 5)],
+        []
     ]
 
-    # Mock random number generation to return the 2nd song
-    mock_random = mocker.patch("music_collection.models.song_model.get_random", return_value=2)
+    songs = iter_all_songs(sort_by_play_count=True, batch_size=2)
+
+    # Nothing is queried until the generator is iterated
+    assert not mock_cursor.execute.called
+
+    expected_result = [
+        {"id": 2, "artist": "Artist B", "title": "Song B", "year": 2021, "genre": "Pop", "duration": 180, "play_count": 20},
+        {"id": 1, "artist": "Artist A", "title": "Song A", "year": 2020, "genre": "Rock", "duration": 210, "play_count": 10},
+        {"id": 3, "artist": "Artist C", "title": "Song C", "year": 2022, "genre": "Jazz", "duration": 200, "play_count": 5}
+    ]
+    assert list(songs) == expected_result
+
+    mock_cursor.fetchmany.assert_called_with(2)
+    assert mock_cursor.fetchmany.call_count == 3
+    assert not mock_cursor.fetchall.called
+
+    expected_query = normalize_whitespace("""
+        SELECT id, artist, title, year, genre, duration, play_count
+        FROM songs
+        WHERE deleted = FALSE
+        ORDER BY play_count DESC
+    """)
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+
+    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+
+def test_get_random_song(mock_cursor, mocker):
+    """Test retrieving a random song by looking up a random ordinal."""
+
+    # Three songs in the catalog; the fraction 0.5 selects the 2nd ordinal
+    mock_cursor.fetchone.return_value = (3,)
+    mock_cursor.fetchall.return_value = [(2, 2, "Artist B", "Song B", 2021, "Pop", 180)]
+    mock_random = mocker.patch("music_collection.models.song_model.get_random_fractions", return_value=[0.5])
 
     # Call the get_random_song method
     result = get_random_song()
 
-    # Expected result based on the mock random number and fetchall return value
+    # Expected result based on the mock random fraction and fetchall return value
     expected_result = Song(2, "Artist B", "Song B", 2021, "Pop", 180)
-
-    # Ensure the result matches the expected output
     assert result == expected_result, f"Expected {expected_result}, got {result}"
 
-    # Ensure that the random number was called with the correct number of songs
-    mock_random.assert_called_once_with(3)
+    # Ensure that one fraction was requested
+    mock_random.assert_called_once_with(1)
 
-    # Ensure the SQL query was executed correctly
-    expected_query = normalize_whitespace("SELECT id, artist, title, year, genre, duration, play_count FROM songs WHERE deleted = FALSE")
+    # Ensure the song was looked up by ordinal rather than by reading the whole catalog
+    expected_query = normalize_whitespace("""
+        SELECT o.ordinal, s.id, s.artist, s.title, s.year, s.genre, s.duration
+        FROM song_ordinals o JOIN songs s ON s.id = o.song_id
+        WHERE o.ordinal IN (?)
+    """)
     actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
-
-    # Assert that the SQL query was correct
     assert actual_query == expected_query, "The SQL query did not match the expected structure."
+    assert mock_cursor.execute.call_args[0][1] == [2]
 
 def test_get_random_song_empty_catalog(mock_cursor, mocker):
     """Test retrieving a random song when the catalog is empty."""
 
     # Simulate that the catalog is empty
-    mock_cursor.fetchall.return_value = []
+    mock_cursor.fetchone.return_value = (0,)
+    mock_random = mocker.patch("music_collection.models.song_model.get_random_fractions")
 
     # Expect a ValueError to be raised when calling get_random_song with an empty catalog
     with pytest.raises(ValueError, match="The song catalog is empty"):
         get_random_song()
 
-    # Ensure that the random number was not called since there are no songs
-    mocker.patch("music_collection.models.song_model.get_random").assert_not_called()
+    # Ensure that random.org was not called since there are no songs
+    mock_random.assert_not_called()
 
-    # Ensure the SQL query was executed correctly
-    expected_query = normalize_whitespace("SELECT id, artist, title, year, genre, duration, play_count FROM songs WHERE deleted = FALSE")
-    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+@pytest.mark.parametrize("count", [0, song_model.RANDOM_SONGS_MAX + 1])
+def test_get_random_songs_invalid_count(count):
+    """Test that asking for no songs, or more than RANDOM_SONGS_MAX, raises a ValueError."""
+    with pytest.raises(ValueError, match=f"Count must be between 1 and {song_model.RANDOM_SONGS_MAX}, got {count}"):
+        get_random_songs(count)
 
-    # Assert that the SQL query was correct
-    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+def test_get_random_songs_follow_inserts_and_deletes(songs_db, mocker):
+    """Test that random songs are distinct, never deleted, and capped at the catalog size."""
+    for i in range(5):
+        create_song(artist=f"Artist {i}", title=f"Song {i}", year=2000 + i, genre="Pop", duration=180)
+    delete_song(2)
+    mock_random = mocker.patch("music_collection.models.song_model.get_random_fractions",
+                               side_effect=lambda count: [0.0] * count)
+
+    songs = get_random_songs(10)
+
+    mock_random.assert_called_once_with(4)
+    assert sorted(song.id for song in songs) == [1, 3, 4, 5]
+
+def test_pick_songs_retries_when_the_catalog_shrinks(songs_db, mocker):
+    """Test that a pick is retried against the new count when a lookup misses a deleted ordinal."""
+    for i in range(3):
+        create_song(artist=f"Artist {i}", title=f"Song {i}", year=2000 + i, genre="Pop", duration=180)
+    sample_distinct = mocker.patch("music_collection.models.song_model.sample_distinct", side_effect=[[4], [3]])
+
+    assert [song.id for song in pick_songs([0.99])] == [3]
+    assert sample_distinct.call_args_list[-1].args == ([0.99], 3)
 
 def test_update_play_count(mock_cursor):
     """Test updating the play count of a song."""
@@ -405,3 +497,251 @@ def test_update_play_count_deleted_song(mock_cursor):
 
     # Ensure that no SQL query for updating play count was executed
     mock_cursor.execute.assert_called_once_with("SELECT deleted FROM songs WHERE id = ?", (1,))
+
+def test_update_play_count_records_play(mock_cursor):
+    """Test that a counted play is queued in the play log, and a refused one is not."""
+    mock_cursor.fetchone.return_value = [False]
+    update_play_count(1)
+    mock_cursor.fetchone.return_value = [True]
+    with pytest.raises(ValueError):
+        update_play_count(2)
+
+    assert song_model.play_log.stats()["recorded"] == 1
+
+def test_update_play_counts(songs_db, mocker):
+    """Test that repeated ids are counted together in one transaction, and missing or deleted songs are reported."""
+    for title in ("Open Road", "Night Drive", "Last Call"):
+        create_song(artist="The Foxes", title=title, year=1999, genre="Rock", duration=240)
+    delete_song(2)
+    # Look ids up two at a time, so the lookup takes several statements
+    mocker.patch.object(song_model, "PLAY_COUNT_LOOKUP_CHUNK", 2)
+    connect = mocker.spy(song_model, "get_db_connection")
+    stats_version = song_model.stats_version.value
+
+    report = update_play_counts([1, 3, 1, 99, 2, 1])
+
+    assert report == {"plays": 4, "songs": 2, "missing": [99], "deleted": [2]}
+    assert connect.call_count == 1
+    assert song_model.stats_version.value == stats_version + 1
+    assert song_model.play_log.stats()["recorded"] == 4
+    with sqlite3.connect(songs_db) as conn:
+        assert conn.execute("SELECT id, play_count FROM songs ORDER BY id").fetchall() == [(1, 3), (2, 0), (3, 1)]
+
+def test_update_play_counts_nothing_to_count(mock_cursor):
+    """Test that an empty list of plays does not touch the database."""
+    assert update_play_counts([]) == {"plays": 0, "songs": 0, "missing": [], "deleted": []}
+    mock_cursor.execute.assert_not_called()
+
+######################################################
+#
+#    Versions
+#
+######################################################
+
+def test_catalog_version_bumped_on_create_and_delete(mock_cursor):
+    """Test that creating and deleting songs bump the catalog version but not the stats version."""
+    catalog_version, stats_version = song_model.catalog_version.value, song_model.stats_version.value
+
+    create_song(artist="Artist Name", title="Song Title", year=2022, genre="Pop", duration=180)
+    mock_cursor.fetchone.return_value = [False]
+    delete_song(1)
+
+    assert song_model.catalog_version.value == catalog_version + 2
+    assert song_model.stats_version.value == stats_version
+
+def test_stats_version_bumped_on_play(mock_cursor):
+    """Test that a play bumps the stats version."""
+    mock_cursor.fetchone.return_value = [False]
+    stats_version = song_model.stats_version.value
+
+    update_play_count(1)
+    assert song_model.stats_version.value == stats_version + 1
+
+def test_versions_unchanged_on_failure(mock_cursor):
+    """Test that failed writes leave the versions alone."""
+    catalog_version, stats_version = song_model.catalog_version.value, song_model.stats_version.value
+    mock_cursor.fetchone.return_value = [True]
+
+    with pytest.raises(ValueError):
+        delete_song(1)
+    with pytest.raises(ValueError):
+        update_play_count(1)
+    mock_cursor.execute.side_effect = sqlite3.IntegrityError("UNIQUE constraint failed")
+    with pytest.raises(ValueError):
+        create_song(artist="Artist Name", title="Song Title", year=2022, genre="Pop", duration=180)
+
+    assert (song_model.catalog_version.value, song_model.stats_version.value) == (catalog_version, stats_version)
+
+######################################################
+#
+#    Search
+#
+######################################################
+
+def add_songs(*songs):
+    for artist, title, genre in songs:
+        create_song(artist=artist, title=title, year=2000, genre=genre, duration=180)
+
+def test_search_songs_prefix_and_ranking(songs_db):
+    """Test that every word must match a word prefix and title matches rank first."""
+    add_songs(("Midnight Riders", "Open Road", "Rock"),
+              ("The Foxes", "Midnight Heart", "Pop"),
+              ("Heartbreakers", "Midnight Train", "Blues"),
+              ("The Owls", "Summer Rain", "Jazz"))
+
+    songs, next_cursor = search_songs("mid hea")
+
+    assert [song["title"] for song in songs] == ["Midnight Heart", "Midnight Train"]
+    assert songs[0]["play_count"] == 0
+    assert next_cursor is None
+
+def test_search_songs_follows_deletes(songs_db):
+    """Test that deleted songs leave the index and restored ones come back."""
+    add_songs(("The Foxes", "Midnight Heart", "Pop"), ("The Owls", "Midnight Rain", "Jazz"))
+    delete_song(1)
+    assert [song["id"] for song in search_songs("midnight")[0]] == [2]
+
+    with sqlite3.connect(songs_db) as conn:
+        conn.execute("UPDATE songs SET deleted = FALSE WHERE id = 1")
+    assert sorted(song["id"] for song in search_songs("midnight")[0]) == [1, 2]
+
+def test_search_songs_keyset_pagination(songs_db):
+    """Test that following next_cursor returns every match once, in rank order."""
+    add_songs(*[(f"Artist {i}", f"Song {i}" + " Song" * (i % 3), "Pop") for i in range(7)])
+    everything, _ = search_songs("song", limit=10)
+
+    pages, after = [], None
+    while True:
+        page, after = search_songs("song", limit=3, after=after)
+        pages.append(page)
+        if after is None:
+            break
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [song["id"] for page in pages for song in page] == [song["id"] for song in everything]
+
+def test_search_songs_treats_operators_as_words(songs_db):
+    """Test that FTS5 syntax in the query is matched literally rather than parsed."""
+    add_songs(("The Foxes", "Near Or Far", "Pop"))
+
+    assert [song["id"] for song in search_songs('near OR NEAR( "far')[0]] == [1]
+    assert search_songs('title:near')[0] == []
+
+@pytest.mark.parametrize("query, limit, after, message", [
+    ("!!", 20, None, "at least one word"),
+    ("song", 0, None, "Limit must be between 1 and 100"),
+    ("song", 20, "not-a-cursor", "Invalid cursor"),
+])
+def test_search_songs_invalid(query, limit, after, message):
+    """Test that empty queries, bad limits and bad cursors raise a ValueError."""
+    with pytest.raises(ValueError, match=message):
+        search_songs(query, limit=limit, after=after)
+
+
+######################################################
+#
+#    Filtered queries
+#
+######################################################
+
+@pytest.fixture
+def catalog(songs_db):
+    """Six songs across two genres, two artists, three years and three durations."""
+    for artist, title, year, genre, duration in [
+        ("The Foxes", "Open Road", 1999, "Rock", 240),
+        ("The Foxes", "Night Drive", 2005, "Rock", 180),
+        ("The Owls", "Summer Rain", 2005, "Jazz", 300),
+        ("The Owls", "Blue Hour", 2012, "Jazz", 180),
+        ("The Foxes", "Last Call", 2012, "Rock", 300),
+        ("The Owls", "Slow Tide", 1999, "Jazz", 240),
+    ]:
+        create_song(artist=artist, title=title, year=year, genre=genre, duration=duration)
+    return songs_db
+
+@pytest.mark.parametrize("filters, expected_ids", [
+    ({}, [1, 2, 3, 4, 5, 6]),
+    ({"genre": "Jazz"}, [3, 4, 6]),
+    ({"artist": "The Foxes", "year_min": 2005}, [2, 5]),
+    ({"year_min": 2000, "year_max": 2010}, [2, 3]),
+    ({"duration_min": 200, "duration_max": 250}, [1, 6]),
+    ({"genre": "Rock", "year_max": 2005, "duration_max": 200}, [2]),
+    ({"genre": "Metal"}, []),
+])
+def test_query_songs_filters(catalog, filters, expected_ids):
+    """Test that query_songs returns the songs matching every given filter."""
+    songs, next_cursor = query_songs(**filters)
+
+    assert [song["id"] for song in songs] == expected_ids
+    assert next_cursor is None
+
+def test_query_songs_skips_deleted_songs(catalog):
+    """Test that deleted songs are not returned."""
+    delete_song(3)
+
+    assert [song["id"] for song in query_songs(genre="Jazz")[0]] == [4, 6]
+
+@pytest.mark.parametrize("sort_by, descending, expected_ids", [
+    ("id", True, [6, 5, 4, 3, 2, 1]),
+    ("year", False, [1, 6, 2, 3, 4, 5]),
+    ("duration", True, [5, 3, 6, 1, 4, 2]),
+    ("title", False, [4, 5, 2, 1, 6, 3]),
+])
+def test_query_songs_keyset_pagination(catalog, sort_by, descending, expected_ids):
+    """Test that following next_cursor returns every song once, in (sort_by, id) order."""
+    pages, after = [], None
+    while True:
+        page, after = query_songs(sort_by=sort_by, descending=descending, limit=4, after=after)
+        pages.append(page)
+        if after is None:
+            break
+
+    assert [len(page) for page in pages] == [4, 2]
+    assert [song["id"] for page in pages for song in page] == expected_ids
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({"limit": 0}, "Limit must be between 1 and 100"),
+    ({"sort_by": "deleted"}, "Cannot sort by 'deleted'"),
+    ({"year_min": 2010, "year_max": 2000}, "Minimum year 2010 is greater than maximum year 2000"),
+    ({"after": "not-a-cursor"}, "Invalid cursor"),
+])
+def test_query_songs_invalid(kwargs, message):
+    """Test that bad limits, sort columns, ranges and cursors raise a ValueError."""
+    with pytest.raises(ValueError, match=message):
+        query_songs(**kwargs)
+
+def query_plan(db_path: str, sql: str, params: list) -> str:
+    with sqlite3.connect(db_path) as conn:
+        return " | ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+@pytest.mark.parametrize("filters, index", [
+    ({"genre": "Rock"}, "songs_genre_year (genre=?)"),
+    ({"genre": "Rock", "year_min": 2000}, "songs_genre_year (genre=? AND year>?)"),
+    ({"artist": "The Foxes"}, "songs_artist_year (artist=?)"),
+    ({"artist": "The Foxes", "year_max": 2005}, "songs_artist_year (artist=? AND year<?)"),
+    ({"year_min": 2000, "year_max": 2010}, "songs_year (year>? AND year<?)"),
+    ({"duration_min": 200, "duration_max": 250}, "songs_duration (duration>? AND duration<?)"),
+])
+def test_query_songs_filters_use_indexes(songs_db, filters, index):
+    """Test that each filter reads only the matching rows, through its index."""
+    sql, params = song_model._filtered_songs_query(**filters)
+
+    assert f"SEARCH songs USING INDEX {index}" in query_plan(songs_db, sql, params + [20])
+
+@pytest.mark.parametrize("filters, index", [
+    ({"genre": "Rock", "sort_by": "year", "after": song_model._encode_cursor(2005, 2)},
+     "SEARCH songs USING INDEX songs_genre_year (genre=? AND year>?)"),
+    ({"sort_by": "duration", "descending": True, "after": song_model._encode_cursor(240, 6)},
+     "SEARCH songs USING INDEX songs_duration (duration<?)"),
+    ({"sort_by": "play_count", "descending": True}, "SCAN songs USING INDEX songs_play_count"),
+])
+def test_query_songs_sorted_pages_use_index_order(songs_db, filters, index):
+    """Test that keyset pages sorted by an indexed column are read in index order, without a sort."""
+    sql, params = song_model._filtered_songs_query(**filters)
+
+    assert query_plan(songs_db, sql, params + [20]) == index
+
+def test_get_all_songs_by_play_count_uses_index(songs_db):
+    """Test that the full catalog sorted by play count is read in index order."""
+    plan = query_plan(songs_db, song_model._all_songs_query(True), [])
+
+    assert plan == "SCAN songs USING INDEX songs_play_count"
@@ -0,0 +1,250 @@
+import logging
+import sqlite3
+
+import pytest
+
+from music_collection.utils import sql_utils
+from music_collection.utils.sql_utils import (
+    StatementStats,
+    begin_request_tracking,
+    after_commit,
+    end_request_tracking,
+    get_db_connection,
+    in_shared_transaction,
+    iter_rows,
+    normalize_sql,
+    shared_transaction
+)
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def instrumented_db(tmp_path, mocker):
+    """Point sql_utils at a throwaway database with instrumentation enabled."""
+    mocker.patch.object(sql_utils, "DB_PATH", str(tmp_path / "songs.db"))
+    mocker.patch.object(sql_utils, "SQL_STATS_ENABLED", True)
+    mocker.patch.object(sql_utils, "statement_stats", StatementStats())
+
+    with get_db_connection() as conn:
+        conn.execute("CREATE TABLE songs (id INTEGER PRIMARY KEY, title TEXT)")
+        conn.executemany("INSERT INTO songs (title) VALUES (?)", [("a",), ("b",)])
+        conn.commit()
+
+    sql_utils.statement_stats.reset()
+    return sql_utils.statement_stats
+
+
+@pytest.fixture
+def songs_db(tmp_path, mocker):
+    """Point sql_utils at a throwaway database with an empty songs table."""
+    db_path = str(tmp_path / "songs.db")
+    mocker.patch.object(sql_utils, "DB_PATH", db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE songs (id INTEGER PRIMARY KEY, title TEXT)")
+    conn.close()
+    return db_path
+
+
+def count_songs(db_path: str) -> int:
+    """Counts committed songs from a separate connection."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM songs").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def insert_song(title: str) -> None:
+    """Inserts a song the way the models do: own connection, own commit."""
+    with get_db_connection() as conn:
+        conn.cursor().execute("INSERT INTO songs (title) VALUES (?)", (title,))
+        conn.commit()
+
+
+######################################################
+#
+#    Normalization and stats
+#
+######################################################
+
+def test_normalize_sql():
+    """Test that literals and whitespace are normalized away."""
+    sql = """
+        SELECT id FROM songs
+        WHERE title = 'It''s'   AND year > 1999 AND duration < 2.5
+    """
+    assert normalize_sql(sql) == "SELECT id FROM songs WHERE title = ? AND year > ? AND duration < ?"
+
+
+def test_statement_stats_snapshot():
+    """Test count, total and percentiles in the stats table."""
+    stats = StatementStats(sample_size=100)
+    for ms in range(1, 101):
+        stats.record("SELECT 1", ms / 1000)
+    stats.record("SELECT 2", 0.5)
+
+    table = stats.snapshot()
+
+    assert [row["statement"] for row in table] == ["SELECT 1", "SELECT 2"]
+    assert table[0]["count"] == 100
+    assert table[0]["total_ms"] == pytest.approx(5050)
+    assert table[0]["p50_ms"] == pytest.approx(51)
+    assert table[0]["p99_ms"] == pytest.approx(99)
+
+
+######################################################
+#
+#    Instrumented connections
+#
+######################################################
+
+def test_instrumented_connection_records_statements(instrumented_db):
+    """Test that cursor and connection shortcuts are both timed."""
+    with get_db_connection() as conn:
+        conn.cursor().execute("SELECT title FROM songs WHERE id = ?", (1,))
+        conn.execute("SELECT title FROM songs WHERE id = ?", (2,))
+
+    table = instrumented_db.snapshot()
+    assert len(table) == 1
+    assert table[0]["statement"] == "SELECT title FROM songs WHERE id = ?"
+    assert table[0]["count"] == 2
+
+
+def test_request_tracking_reports_repeated_statements(instrumented_db, mocker):
+    """Test that a statement executed in a loop is reported as repeated."""
+    mocker.patch.object(sql_utils, "SQL_REPEATED_STATEMENT_THRESHOLD", 3)
+
+    token = begin_request_tracking()
+    with get_db_connection() as conn:
+        for song_id in range(5):
+            conn.execute("UPDATE songs SET title = title WHERE id = ?", (song_id,))
+        conn.execute("SELECT COUNT(*) FROM songs")
+    summary = end_request_tracking(token)
+
+    assert summary["count"] == 6
+    assert summary["repeated"] == {"UPDATE songs SET title = title WHERE id = ?": 5}
+
+
+def test_slow_statement_logs_query_plan(instrumented_db, mocker, caplog):
+    """Test that statements over the threshold are logged with their query plan."""
+    mocker.patch.object(sql_utils, "SQL_SLOW_QUERY_MS", 0)
+    caplog.set_level(logging.WARNING, logger=sql_utils.logger.name)
+
+    with get_db_connection() as conn:
+        conn.execute("SELECT title FROM songs WHERE id = ?", (1,))
+
+    assert "Slow SQL statement" in caplog.text
+    assert "SEARCH songs USING INTEGER PRIMARY KEY" in caplog.text
+
+
+######################################################
+#
+#    Shared transactions
+#
+######################################################
+
+def test_shared_transaction_uses_one_connection(songs_db, mocker):
+    """Test that model-style writes join one connection and commit together at the end."""
+    connect = mocker.spy(sql_utils, "connect")
+
+    with shared_transaction(immediate=True):
+        insert_song("a")
+        insert_song("b")
+        assert count_songs(songs_db) == 0, "Expected nothing committed before the transaction ends"
+        assert sql_utils.connections_in_use() == 1
+
+    assert connect.call_count == 1
+    assert count_songs(songs_db) == 2
+    assert sql_utils.connections_in_use() == 0
+
+
+def test_shared_transaction_rolls_back_on_error(songs_db):
+    """Test that an exception rolls back everything."""
+    with pytest.raises(RuntimeError):
+        with shared_transaction():
+            insert_song("a")
+            raise RuntimeError("boom")
+
+    assert count_songs(songs_db) == 0
+    assert sql_utils.connections_in_use() == 0
+
+
+def test_savepoint_rollback_keeps_other_work(songs_db):
+    """Test that rolling back a savepoint undoes only the work done since it."""
+    with shared_transaction() as conn:
+        first = conn.savepoint()
+        insert_song("a")
+        conn.release_savepoint(first)
+        second = conn.savepoint()
+        insert_song("b")
+        conn.rollback_savepoint(second)
+
+    assert count_songs(songs_db) == 1
+
+
+def test_abort(songs_db):
+    """Test that an aborted transaction commits nothing and drops its callbacks."""
+    callback = []
+    with shared_transaction() as conn:
+        insert_song("a")
+        after_commit(lambda: callback.append(1))
+        conn.abort()
+
+    assert count_songs(songs_db) == 0
+    assert callback == []
+
+
+def test_after_commit(songs_db):
+    """Test that callbacks run immediately outside a shared transaction and after its commit inside one."""
+    calls = []
+    after_commit(lambda: calls.append("now"))
+    assert calls == ["now"]
+
+    with shared_transaction():
+        insert_song("a")
+        after_commit(lambda: calls.append(count_songs(songs_db)))
+        assert calls == ["now"]
+
+    assert calls == ["now", 1]
+
+
+def test_in_shared_transaction(songs_db):
+    """Test that callers can tell whether they run inside a shared transaction."""
+    assert not in_shared_transaction()
+    with shared_transaction():
+        assert in_shared_transaction()
+    assert not in_shared_transaction()
+
+
+def test_shared_transactions_do_not_nest(songs_db):
+    """Test that a shared transaction cannot be opened inside another."""
+    with shared_transaction():
+        with pytest.raises(RuntimeError, match="already active"):
+            with shared_transaction():
+                pass
+
+
+def test_iter_rows_fetches_in_batches(songs_db):
+    """Test that iter_rows yields every row while fetching at most batch_size at a time."""
+    for title in "abcde":
+        insert_song(title)
+
+    class RecordingCursor:
+        def __init__(self, cursor):
+            self.cursor = cursor
+            self.fetched = []
+
+        def fetchmany(self, size):
+            rows = self.cursor.fetchmany(size)
+            self.fetched.append(len(rows))
+            return rows
+
+    with get_db_connection() as conn:
+        cursor = RecordingCursor(conn.execute("SELECT title FROM songs ORDER BY id"))
+        assert [row[0] for row in iter_rows(cursor, batch_size=2)] == ["a", "b", "c", "d", "e"]
+    assert cursor.fetched == [2, 2, 1, 0]
@@ -0,0 +1,203 @@
+import logging
+import os
+import sqlite3
+import subprocess
+import sys
+
+from flask import Flask, jsonify, make_response
+import pytest
+
+from music_collection.utils import sql_utils, startup
+from music_collection.utils.logger import configure_logger
+from music_collection.utils.startup import apply_schema, find_env_file, load_env_file, warm_up
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_PATH = os.path.join(PROJECT_DIR, "sql", "create_song_table.sql")
+
+
+######################################################
+#
+#    Fixtures
+#
+######################################################
+
+@pytest.fixture
+def songs_db(tmp_path, mocker):
+    """Point sql_utils at a throwaway database with two songs."""
+    db_path = str(tmp_path / "songs.db")
+    mocker.patch.object(sql_utils, "DB_PATH", db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE songs (id INTEGER PRIMARY KEY, title TEXT UNIQUE)")
+    conn.executemany("INSERT INTO songs (title) VALUES (?)", [("a",), ("b",)])
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+@pytest.fixture
+def app(mocker):
+    """A bare Flask app that counts requests to the warm-up routes."""
+    mocker.patch.object(startup, "WARM_UP_PATHS", ["/api/health", "/api/missing"])
+    mocker.patch.object(startup, "WARM_UP_IMPORTS", ["json", "no_such_module"])
+    flask_app = Flask(__name__)
+    flask_app.requests = 0
+
+    @flask_app.route("/api/health")
+    def health():
+        flask_app.requests += 1
+        return make_response(jsonify({"status": "healthy"}), 200)
+
+    return flask_app
+
+
+######################################################
+#
+#    Environment files
+#
+######################################################
+
+def test_find_env_file(tmp_path):
+    """Test that the nearest .env file in the directory or its parents is found."""
+    nested = tmp_path / "a" / "b"
+    nested.mkdir(parents=True)
+    (tmp_path / ".env").write_text("X=1\n")
+    assert find_env_file(str(nested)) == str(tmp_path / ".env")
+
+    (nested / ".env").write_text("X=2\n")
+    assert find_env_file(str(nested)) == str(nested / ".env")
+
+
+def test_load_env_file(tmp_path, monkeypatch):
+    """Test that variables are loaded without overriding the environment."""
+    (tmp_path / ".env").write_text("STARTUP_TEST_NEW=from-file\nSTARTUP_TEST_SET=from-file\n")
+    monkeypatch.setenv("STARTUP_TEST_SET", "from-env")
+    monkeypatch.delenv("STARTUP_TEST_NEW", raising=False)
+
+    assert load_env_file(str(tmp_path)) == str(tmp_path / ".env")
+    assert os.environ["STARTUP_TEST_NEW"] == "from-file"
+    assert os.environ["STARTUP_TEST_SET"] == "from-env"
+    monkeypatch.delenv("STARTUP_TEST_NEW")
+
+
+def test_load_env_file_without_file(tmp_path, mocker):
+    """Test that python-dotenv is not used when there is nothing to load."""
+    mocker.patch.object(startup, "find_env_file", return_value=None)
+    load_dotenv = mocker.patch("dotenv.load_dotenv")
+
+    assert load_env_file(str(tmp_path)) is None
+    load_dotenv.assert_not_called()
+
+
+def test_app_import_defers_requests():
+    """Test that importing the app does not import requests; a fresh interpreter is needed to tell."""
+    code = "import sys, app; assert 'requests' not in sys.modules, 'requests was imported'"
+    env = dict(os.environ, HEALTH_PROBER_ENABLED="false")
+    result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_DIR, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+
+######################################################
+#
+#    Schema
+#
+######################################################
+
+@pytest.fixture
+def old_db(tmp_path, mocker):
+    """A database holding only the songs table the first version of the schema created, with three songs."""
+    db_path = str(tmp_path / "old.db")
+    mocker.patch.object(sql_utils, "DB_PATH", db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE songs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, artist TEXT NOT NULL, title TEXT NOT NULL,
+                year INTEGER NOT NULL CHECK(year >= 1900), genre TEXT NOT NULL, duration INTEGER NOT NULL CHECK(duration > 0),
+                play_count INTEGER DEFAULT 0, deleted BOOLEAN DEFAULT FALSE, UNIQUE(artist, title, year)
+            )""")
+        conn.executemany("INSERT INTO songs (artist, title, year, genre, duration, deleted) VALUES (?, ?, ?, ?, ?, ?)", [
+            ("The Foxes", "Open Road", 1999, "Rock", 240, False),
+            ("The Owls", "Summer Rain", 2005, "Jazz", 300, True),
+            ("The Foxes", "Night Drive", 2005, "Rock", 180, False),
+        ])
+    conn.close()
+    return db_path
+
+
+def test_apply_schema_upgrades_an_old_database(old_db):
+    """Test that the schema script adds the newer tables to an existing database and fills them, once."""
+    assert apply_schema(SCHEMA_PATH)
+    assert apply_schema(SCHEMA_PATH)
+
+    with sqlite3.connect(old_db) as conn:
+        conn.execute("INSERT INTO songs (artist, title, year, genre, duration) VALUES ('The Owls', 'Blue Hour', 2012, 'Jazz', 180)")
+        assert conn.execute("SELECT ordinal, song_id FROM song_ordinals ORDER BY ordinal").fetchall() == [
+            (1, 1), (2, 3), (3, 4)]
+        assert conn.execute("SELECT rowid FROM songs_fts WHERE songs_fts MATCH 'foxes OR owls' ORDER BY rowid").fetchall() == [
+            (1,), (3,), (4,)]
+        assert conn.execute("SELECT version FROM catalog_changes").fetchone() == (1,)
+        assert conn.execute("SELECT COUNT(*) FROM play_events").fetchone() == (0,)
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'songs_genre_year'").fetchone() == (1,)
+    conn.close()
+
+
+def test_apply_schema_without_database(tmp_path, mocker):
+    """Test that a database that does not exist yet is not created."""
+    mocker.patch.object(sql_utils, "DB_PATH", str(tmp_path / "missing.db"))
+
+    assert not apply_schema(SCHEMA_PATH)
+    assert not os.path.exists(sql_utils.DB_PATH)
+
+
+def test_apply_schema_failure_changes_nothing(songs_db, caplog):
+    """Test that a script that cannot be applied is logged and leaves the database as it was."""
+    # This songs table has no genre column to index
+    assert not apply_schema(SCHEMA_PATH)
+
+    assert "Could not apply the schema" in caplog.text
+    with sqlite3.connect(songs_db) as conn:
+        assert conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall() == [("songs",)]
+    conn.close()
+
+
+######################################################
+#
+#    Warm-up
+#
+######################################################
+
+def test_warm_up(app, songs_db, caplog):
+    """Test that warm-up imports, reads the table and calls each route, logging what failed."""
+    timings = warm_up(app, "songs")
+
+    assert set(timings) == {"imports", "database", "requests"}
+    assert app.requests == 1
+    assert "Warm-up read 2 rows of songs" in caplog.text
+    assert "could not import no_such_module" in caplog.text
+    assert "request to /api/missing returned 404" in caplog.text
+
+
+def test_warm_up_missing_table(app, songs_db, caplog):
+    """Test that a missing table is logged rather than raised."""
+    warm_up(app, "meals")
+
+    assert "could not read the meals table" in caplog.text
+    assert app.requests == 1
+
+
+######################################################
+#
+#    Logging
+#
+######################################################
+
+def test_configure_logger_is_idempotent():
+    """Test that configuring a logger again adds no handlers, and all loggers share one."""
+    first = logging.getLogger("startup_test.first")
+    second = logging.getLogger("startup_test.second")
+    configure_logger(first)
+    configure_logger(first)
+    configure_logger(second)
+
+    assert len(first.handlers) == 1
+    assert first.handlers == second.handlers
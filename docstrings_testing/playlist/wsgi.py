@@ -0,0 +1,34 @@
+import os
+
+from app import app
+from music_collection.utils import startup
+
+
+# The production entry point: `gunicorn -c gunicorn.conf.py wsgi:app`
+
+APP_ENV = os.getenv("APP_ENV", "production")
+
+
+def check_production_config(flask_app) -> None:
+    """
+    Refuses to serve with debug mode on in production.
+
+    The debugger allows arbitrary code execution from the browser, and debug mode
+    also adds per-request overhead.
+
+    Args:
+        flask_app (Flask): The application about to be served.
+
+    Raises:
+        RuntimeError: If APP_ENV is 'production' and debug mode is on.
+    """
+    if APP_ENV != "production":
+        return
+    if flask_app.debug or os.getenv("FLASK_DEBUG", "").lower() in ("1", "true", "yes"):
+        raise RuntimeError("Refusing to start: debug mode is enabled with APP_ENV=production")
+
+
+check_production_config(app)
+if startup.WARM_UP_ENABLED:
+    # gunicorn preloads this module before it opens the port, so no request waits for the warm-up
+    startup.warm_up(app, "songs")